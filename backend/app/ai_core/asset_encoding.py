@@ -0,0 +1,172 @@
+# Phase 2: AI System 1 - Asset Encoding
+# Handles: WebP rendition sets (thumbnail, gallery, full) encoded straight
+# from OpenCV frames, garment mask as alpha, per-endpoint effort presets
+
+from dataclasses import dataclass
+from io import BytesIO
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.core.lazy_imports import lazy_module
+
+cv2 = lazy_module("cv2")
+Image = lazy_module("PIL.Image")
+
+# libwebp's effort level behind cv2.imencode (OpenCV exposes no method knob)
+CV2_WEBP_METHOD = 4
+
+
+@dataclass(frozen=True)
+class EncodePreset:
+    """
+    WebP effort/size trade-off for one kind of scan.
+
+    Args:
+        name: Preset name (part of the scan cache key)
+        quality: WebP quality (0-100)
+        method: libwebp effort, 0 (fastest) .. 6 (smallest); the OpenCV
+            default (4) encodes through cv2.imencode, other levels through
+            Pillow, which is the only binding here that exposes it
+        alpha: Store the garment mask as the alpha channel
+    """
+
+    name: str
+    quality: int
+    method: int = CV2_WEBP_METHOD
+    alpha: bool = True
+
+
+ENCODE_PRESETS = {
+    # Quick scans: ~2x faster encode for ~7% larger files (method 0 is
+    # faster still but compresses the alpha plane ~10x worse)
+    "quick": EncodePreset("quick", quality=70, method=1),
+    # Accurate scans: libwebp's default effort, smaller files
+    "accurate": EncodePreset("accurate", quality=80),
+}
+
+
+def fit_size(width: int, height: int, max_side: int) -> Tuple[int, int]:
+    """(width, height) scaled so the long side is at most max_side (0 = unchanged)."""
+    long_side = max(width, height)
+    if max_side <= 0 or long_side <= max_side:
+        return width, height
+    factor = max_side / float(long_side)
+    return max(1, round(width * factor)), max(1, round(height * factor))
+
+
+def downscale(frame: np.ndarray, size: Tuple[int, int]) -> np.ndarray:
+    """
+    Resize a frame down to `size`.
+
+    INTER_AREA at an integer ratio first (OpenCV's fast path), then
+    INTER_LINEAR for the small remainder: ~9x faster than one INTER_AREA
+    pass at non-integer ratios, within 0.5 levels per pixel of it.
+    """
+    height, width = frame.shape[:2]
+    if (width, height) == tuple(size):
+        return frame
+    k = int(min(width / size[0], height / size[1]))
+    if k >= 2:
+        frame = cv2.resize(frame, (width // k, height // k), interpolation=cv2.INTER_AREA)
+    if (frame.shape[1], frame.shape[0]) != tuple(size):
+        frame = cv2.resize(frame, size, interpolation=cv2.INTER_LINEAR)
+    return frame
+
+
+class AssetEncoder:
+    """
+    Encodes the stored scan asset as a set of WebP renditions:
+    - Largest rendition first, each smaller one resized from the previous
+      rendition rather than from the full frame
+    - BGR/BGRA frames go to libwebp without a color conversion (OpenCV
+      takes BGR natively; Pillow unpacks it with its raw "BGR" mode)
+    - The garment mask (any resolution) is resized to each rendition and
+      stored as alpha; color under fully transparent pixels is zeroed
+      first, since the background texture would otherwise still be
+      encoded (cv2's encoder doesn't clean it up)
+
+    Args:
+        renditions: (name, max_side) pairs; max_side 0 keeps the asset
+            resolution
+    """
+
+    def __init__(self, renditions: Sequence[Tuple[str, int]]):
+        if not renditions:
+            raise ValueError("At least one rendition is required")
+        self.renditions = tuple(renditions)
+
+    @property
+    def variant(self) -> str:
+        """Rendition set description (part of the scan cache key)."""
+        return ",".join(f"{name}:{side}" for name, side in self.renditions)
+
+    @staticmethod
+    def encode_webp(frame: np.ndarray, quality: int = 75, method: int = CV2_WEBP_METHOD) -> bytes:
+        """
+        Encode one BGR or BGRA uint8 frame as WebP.
+
+        Raises:
+            ValueError: If the encoder rejects the frame
+        """
+        if method == CV2_WEBP_METHOD:
+            ok, buffer = cv2.imencode(".webp", frame, [cv2.IMWRITE_WEBP_QUALITY, int(quality)])
+            if not ok:
+                raise ValueError("WebP encoding failed")
+            return buffer.tobytes()
+
+        frame = np.ascontiguousarray(frame)
+        mode, raw_mode = ("RGBA", "BGRA") if frame.shape[2] == 4 else ("RGB", "BGR")
+        image = Image.frombuffer(mode, (frame.shape[1], frame.shape[0]), frame, "raw", raw_mode, 0, 1)
+        buffer = BytesIO()
+        image.save(buffer, format="WebP", quality=int(quality), method=int(method))
+        return buffer.getvalue()
+
+    def encode(
+        self,
+        image: np.ndarray,
+        preset: EncodePreset,
+        mask: Optional[np.ndarray] = None
+    ) -> Tuple[Dict[str, bytes], List[Dict[str, Any]]]:
+        """
+        Encode every rendition of a scan asset.
+
+        Args:
+            image: HxWx3 BGR asset frame
+            preset: Quality/effort preset
+            mask: Optional garment mask (uint8, 255 = garment) at any
+                resolution; stored as alpha when the preset keeps alpha
+
+        Returns:
+            ({name: webp_bytes}, [{"name", "width", "height", "bytes",
+            "alpha"}]) with renditions largest first
+        """
+        height, width = image.shape[:2]
+        use_alpha = preset.alpha and mask is not None
+        targets = sorted(
+            ((name, fit_size(width, height, side)) for name, side in self.renditions),
+            key=lambda item: item[1][0] * item[1][1],
+            reverse=True,
+        )
+
+        encoded: Dict[str, bytes] = {}
+        info: List[Dict[str, Any]] = []
+        frame = image
+        for name, size in targets:
+            frame = downscale(frame, size)
+            output = frame
+            if use_alpha:
+                alpha = mask
+                if alpha.shape[:2] != frame.shape[:2]:
+                    alpha = cv2.resize(mask, size, interpolation=cv2.INTER_LINEAR)
+                output = cv2.merge((*cv2.split(cv2.bitwise_and(frame, frame, mask=alpha)), alpha))
+            data = self.encode_webp(output, preset.quality, preset.method)
+            encoded[name] = data
+            info.append({
+                "name": name,
+                "width": size[0],
+                "height": size[1],
+                "bytes": len(data),
+                "alpha": use_alpha,
+            })
+        return encoded, info
@@ -0,0 +1,128 @@
+# Phase 2: AI System 1 - Calibration Cache
+# Handles: reusing a detected coin calibration for consecutive scans from
+# the same session and device (same mat, same phone)
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+
+
+def _client_tap(coin_coords: Dict[str, Any]) -> Optional[Tuple[float, float]]:
+    """The client's coin tap as (x, y); None when missing, null or not a finite number."""
+    try:
+        x, y = float(coin_coords["x"]), float(coin_coords["y"])
+    except (KeyError, TypeError, ValueError):
+        return None
+    if not (math.isfinite(x) and math.isfinite(y)):
+        return None
+    return x, y
+
+
+class CalibrationCache:
+    """
+    Coin calibrations keyed by (session_id, device_id):
+    - Stored after a scan detected the coin server-side
+    - Reused only for photos of the same pixel size, and only while the
+      client's coin tap (when sent) lands on the cached coin
+    - Entries expire after `ttl` seconds; LRU bounded by `max_entries`
+
+    Lives in the API process; the scan workers receive the cached
+    calibration as coin data with detection switched off.
+    """
+
+    def __init__(self, ttl: float = 1800.0, max_entries: int = 4096):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    @staticmethod
+    def make_key(session_id: Optional[str], device_id: Optional[str]) -> Optional[Tuple[str, str]]:
+        """Cache key, or None when the client identified neither session nor device."""
+        if not session_id and not device_id:
+            return None
+        return (session_id or "", device_id or "")
+
+    def lookup(
+        self,
+        key: Tuple[str, str],
+        image_size: Tuple[int, int],
+        coin_coords: Dict[str, Any]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Cached coin data for a scan.
+
+        Args:
+            key: (session_id, device_id)
+            image_size: (width, height) of the new photo
+            coin_coords: The client's coin data for the new photo (x/y
+                that are missing, null or not numbers count as no tap)
+
+        Returns:
+            Coin data ready for the pipeline ("detect": False,
+            "source": "cache"), or None on a miss
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry["stored_at"] > self.ttl:
+                del self._entries[key]
+                entry = None
+            usable = entry is not None and tuple(entry["image_size"]) == tuple(image_size)
+            tap = _client_tap(coin_coords)
+            if usable and tap is not None:
+                # The tap must still land on the cached coin
+                reach = max(entry["diameter_pixels"], 0.02 * max(image_size))
+                dx = tap[0] - entry["x"]
+                dy = tap[1] - entry["y"]
+                usable = dx * dx + dy * dy <= reach * reach
+            if not usable:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+
+        coin = {k: entry[k] for k in ("x", "y", "diameter_pixels", "type")}
+        # An explicit coin type from the client still wins
+        if coin_coords.get("type"):
+            coin["type"] = coin_coords["type"]
+        return {**coin, "detect": False, "source": "cache"}
+
+    def store(self, key: Tuple[str, str], image_size: Tuple[int, int], coin: Dict[str, Any]) -> None:
+        """Remember a scan's coin (metadata["coin"], full-resolution pixels) if it was detected."""
+        if coin.get("source") != "detected":
+            return
+        entry = {k: coin[k] for k in ("x", "y", "diameter_pixels", "type")}
+        entry["image_size"] = tuple(image_size)
+        entry["stored_at"] = time.monotonic()
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            self._counters["stores"] += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return {
+                **self._counters,
+                "entries": len(self._entries),
+                "hit_rate": round(self._counters["hits"] / lookups, 4) if lookups else 0.0,
+            }
+
+
+# Initialize cache
+calibration_cache = CalibrationCache(
+    ttl=settings.scan_calibration_cache_ttl,
+    max_entries=settings.scan_calibration_cache_max_entries,
+)
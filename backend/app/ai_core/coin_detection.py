@@ -0,0 +1,170 @@
+# Phase 2: AI System 1 - Coin Detection
+# Handles: locating the reference coin in a scan (Hough circles on a small
+# grayscale ROI), sub-pixel diameter refinement and coin type from color
+
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.core.lazy_imports import lazy_module
+
+cv2 = lazy_module("cv2")
+
+# Indonesian coin reference diameters (mm)
+COIN_DIAMETERS_MM = {
+    "500": 27.0,
+    "1000": 26.0,
+    "5000": 33.0,
+    "generic": 27.0,  # Default fallback
+}
+
+
+class CoinDetector:
+    """
+    Server-side coin detection:
+    - With a tap hint, only a square ROI around it (`roi_scale` coin
+      diameters wide) is searched; without one, the whole image
+    - The search region is converted to grayscale and downscaled to at most
+      `max_search_side` before HoughCircles
+    - The winning circle's diameter is refined at working resolution from
+      the area of the coin blob (Otsu threshold), which removes the Hough
+      radius quantisation
+    - Coin type from color: bi-metal (center and ring differ) -> "1000",
+      brass yellow -> "500", otherwise "generic"
+
+    Args:
+        roi_scale: ROI side in hinted coin diameters
+        max_search_side: Long side the Hough search runs at
+        tolerance: Accepted relative deviation from a hinted diameter
+    """
+
+    def __init__(
+        self,
+        roi_scale: float = 3.0,
+        max_search_side: int = 192,
+        tolerance: float = 0.4
+    ):
+        self.roi_scale = roi_scale
+        self.max_search_side = max_search_side
+        self.tolerance = tolerance
+
+    def _search_region(
+        self,
+        image: np.ndarray,
+        hint: Dict[str, Any]
+    ) -> Tuple[int, int, int, int, float, float]:
+        """(x0, y0, x1, y1, min_radius, max_radius) in image pixels."""
+        h, w = image.shape[:2]
+        short = min(h, w)
+        hinted = hint.get("diameter_pixels") if hint.get("source") != "default" else None
+        if hinted:
+            min_r = 0.5 * hinted * (1.0 - self.tolerance)
+            max_r = 0.5 * hinted * (1.0 + self.tolerance)
+        else:
+            min_r, max_r = 0.01 * short, 0.08 * short
+
+        if hint.get("x") is not None and hint.get("y") is not None:
+            half = int(self.roi_scale * max_r)
+            cx, cy = int(hint["x"]), int(hint["y"])
+            x0, y0 = max(0, cx - half), max(0, cy - half)
+            x1, y1 = min(w, cx + half), min(h, cy + half)
+            if x1 - x0 > 2 * min_r and y1 - y0 > 2 * min_r:
+                return x0, y0, x1, y1, min_r, max_r
+        return 0, 0, w, h, min_r, max_r
+
+    def _refine_diameter(self, gray: np.ndarray, cx: float, cy: float, radius: float) -> Optional[float]:
+        """Equivalent diameter of the blob under the circle (None if it disagrees)."""
+        h, w = gray.shape[:2]
+        half = int(radius * 1.6) + 2
+        x0, y0 = max(0, int(cx) - half), max(0, int(cy) - half)
+        x1, y1 = min(w, int(cx) + half + 1), min(h, int(cy) + half + 1)
+        window = cv2.GaussianBlur(gray[y0:y1, x0:x1], (3, 3), 0)
+        _, blob = cv2.threshold(window, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        px, py = int(cx) - x0, int(cy) - y0
+        if not (0 <= py < blob.shape[0] and 0 <= px < blob.shape[1]):
+            return None
+        if blob[py, px] == 0:
+            blob = cv2.bitwise_not(blob)
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(blob, connectivity=8)
+        label = labels[py, px]
+        if label == 0:
+            return None
+        diameter = 2.0 * np.sqrt(stats[label, cv2.CC_STAT_AREA] / np.pi)
+        if abs(diameter - 2 * radius) > 0.15 * 2 * radius:
+            return None
+        return float(diameter)
+
+    @staticmethod
+    def classify(image: np.ndarray, cx: float, cy: float, radius: float) -> str:
+        """Coin type from the color of its center and outer ring."""
+        h, w = image.shape[:2]
+        half = int(radius) + 1
+        x0, y0 = max(0, int(cx) - half), max(0, int(cy) - half)
+        patch = image[y0:min(h, int(cy) + half + 1), x0:min(w, int(cx) + half + 1)]
+        hsv = cv2.cvtColor(patch, cv2.COLOR_BGR2HSV).reshape(-1, 3).astype(np.float32)
+        ys, xs = np.mgrid[y0:y0 + patch.shape[0], x0:x0 + patch.shape[1]]
+        dist = (np.hypot(xs - cx, ys - cy) / max(radius, 1.0)).reshape(-1)
+        center = hsv[dist < 0.45]
+        ring = hsv[(dist > 0.65) & (dist < 0.9)]
+        if len(center) == 0 or len(ring) == 0:
+            return "generic"
+        center_sat, ring_sat = center[:, 1].mean(), ring[:, 1].mean()
+        if abs(center_sat - ring_sat) > 50:
+            return "1000"
+        hue, sat = np.median(hsv[dist < 0.9][:, 0]), (center_sat + ring_sat) / 2
+        if 10 <= hue <= 35 and sat > 70:
+            return "500"
+        return "generic"
+
+    def detect(self, image: np.ndarray, hint: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Find the coin.
+
+        Args:
+            image: BGR image (working resolution)
+            hint: Client coin data in the same pixel space; optional x, y
+                and diameter_pixels narrow the search
+
+        Returns:
+            {"x", "y", "diameter_pixels", "type", "refined"} in image
+            pixels, or None when no coin is found
+        """
+        x0, y0, x1, y1, min_r, max_r = self._search_region(image, hint)
+        roi = image[y0:y1, x0:x1]
+        factor = min(1.0, self.max_search_side / float(max(roi.shape[:2])))
+        gray_roi = cv2.cvtColor(roi, cv2.COLOR_BGR2GRAY)
+        small = gray_roi
+        if factor < 1.0:
+            small = cv2.resize(gray_roi, (max(1, round(roi.shape[1] * factor)), max(1, round(roi.shape[0] * factor))),
+                               interpolation=cv2.INTER_AREA)
+        small = cv2.medianBlur(small, 3)
+
+        lo = max(2, int(np.floor(min_r * factor)))
+        hi = max(lo + 1, int(np.ceil(max_r * factor)))
+        circles = cv2.HoughCircles(
+            small, cv2.HOUGH_GRADIENT, dp=1, minDist=2 * lo,
+            param1=100, param2=max(8, int(0.8 * lo)), minRadius=lo, maxRadius=hi,
+        )
+        if circles is None:
+            return None
+
+        circles = circles[0]
+        if hint.get("x") is not None and hint.get("y") is not None:
+            # Closest to the tap; HoughCircles already orders by votes otherwise
+            tx, ty = (float(hint["x"]) - x0) * factor, (float(hint["y"]) - y0) * factor
+            circles = circles[np.argsort(np.hypot(circles[:, 0] - tx, circles[:, 1] - ty), kind="stable")]
+        cx, cy, r = (float(v) / factor for v in circles[0])
+
+        refined = self._refine_diameter(gray_roi, cx, cy, r)
+        cx, cy = cx + x0, cy + y0
+        return {
+            "x": round(cx, 2),
+            "y": round(cy, 2),
+            "diameter_pixels": round(refined if refined is not None else 2 * r, 3),
+            "type": self.classify(image, cx, cy, r),
+            "refined": refined is not None,
+        }
+
+
+# Initialize detector
+coin_detector = CoinDetector()
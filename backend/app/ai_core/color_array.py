@@ -0,0 +1,202 @@
+# Phase 2: AI System 3 - Batch Color Theory
+# Handles: wardrobe colors parsed once into arrays; vectorised temperature,
+# harmony and Lab distance computations
+
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+
+DEFAULT_COLOR = "#808080"
+TEMPERATURES = ("warm", "cool", "neutral")
+
+WARM_COLORS = ["#FF6B35", "#FF8C3A", "#FFA500", "#FFD700", "#FF4500"]
+COOL_COLORS = ["#0066CC", "#0099FF", "#00CCFF", "#6600FF", "#9933FF"]
+NEUTRAL_COLORS = ["#808080", "#A9A9A9", "#FFFFFF", "#000000", "#D3D3D3"]
+
+# Complementary palette per temperature code (warm -> cool, cool -> warm)
+COMPLEMENTARY_PALETTES = (COOL_COLORS[:3], WARM_COLORS[:3], NEUTRAL_COLORS[:3])
+
+# sRGB (D65) -> XYZ
+_RGB_TO_XYZ = np.array([
+    [0.4124564, 0.3575761, 0.1804375],
+    [0.2126729, 0.7151522, 0.0721750],
+    [0.0193339, 0.1191920, 0.9503041],
+], dtype=np.float32)
+_WHITE_D65 = np.array([0.95047, 1.0, 1.08883], dtype=np.float32)
+
+
+def parse_hex(hex_color: Any) -> Optional[Tuple[int, int, int]]:
+    """Parse "#rrggbb" (or "rrggbb") to an RGB tuple; None when malformed."""
+    if not isinstance(hex_color, str):
+        return None
+    value = hex_color.lstrip("#")
+    if len(value) != 6:
+        return None
+    try:
+        packed = int(value, 16)
+    except ValueError:
+        return None
+    return (packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF
+
+
+_DEFAULT_RGB = parse_hex(DEFAULT_COLOR)
+
+
+def parse_hex_array(hex_colors: Iterable[Any]) -> np.ndarray:
+    """
+    Parse hex colors into an Nx3 uint8 RGB array.
+
+    Malformed or missing colors fall back to DEFAULT_COLOR.
+    """
+    hex_colors = list(hex_colors)
+    try:
+        # Fast path: every entry is "#rrggbb", decoded in one fromhex call
+        joined = "".join(hex_colors)
+        if len(joined) == 7 * len(hex_colors) and joined[::7] == "#" * len(hex_colors):
+            packed = bytes.fromhex(joined.replace("#", ""))
+            return np.frombuffer(packed, dtype=np.uint8).reshape(-1, 3).copy()
+    except (TypeError, ValueError):
+        pass
+    return np.array(
+        [parse_hex(c) or _DEFAULT_RGB for c in hex_colors],
+        dtype=np.uint8,
+    ).reshape(-1, 3)
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """Convert an Nx3 uint8 RGB array to CIE Lab (float32)."""
+    c = rgb.astype(np.float32) / 255.0
+    c = np.where(c > 0.04045, ((c + 0.055) / 1.055) ** 2.4, c / 12.92)
+    xyz = (c @ _RGB_TO_XYZ.T) / _WHITE_D65
+    f = np.where(xyz > 0.008856, np.cbrt(xyz), 7.787 * xyz + 16.0 / 116.0)
+    lab = np.empty_like(f)
+    lab[:, 0] = 116.0 * f[:, 1] - 16.0
+    lab[:, 1] = 500.0 * (f[:, 0] - f[:, 1])
+    lab[:, 2] = 200.0 * (f[:, 1] - f[:, 2])
+    return lab
+
+
+def rgb_temperatures(rgb: np.ndarray) -> np.ndarray:
+    """
+    Vectorised ColorTheory.get_color_temperature.
+
+    Returns:
+        int8 array of indices into TEMPERATURES
+    """
+    rgb = rgb.astype(np.int32)
+    diff = rgb[:, 0] + rgb[:, 1] - rgb[:, 2]
+    return np.where(np.abs(diff) < 30, 2, np.where(diff > 0, 0, 1)).astype(np.int8)
+
+
+def lab_distance_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """
+    Pairwise Euclidean (CIE76) distances between two sets of Lab colors.
+
+    Returns:
+        len(a) x len(b) float32 matrix
+    """
+    a = a.astype(np.float32, copy=False)
+    b = b.astype(np.float32, copy=False)
+    sq = (a * a).sum(1)[:, None] + (b * b).sum(1)[None, :] - 2.0 * (a @ b.T)
+    return np.sqrt(np.maximum(sq, 0.0))
+
+
+_PALETTE_LABS = [rgb_to_lab(parse_hex_array(p)) for p in COMPLEMENTARY_PALETTES]
+
+# _PALETTE_ALLOWED[t, u]: a garment of temperature u may accompany an item of
+# temperature t (the palette's own temperatures, plus neutrals)
+_PALETTE_ALLOWED = np.zeros((len(TEMPERATURES), len(TEMPERATURES)), dtype=bool)
+for _t, _palette in enumerate(COMPLEMENTARY_PALETTES):
+    _PALETTE_ALLOWED[_t, rgb_temperatures(parse_hex_array(_palette))] = True
+    _PALETTE_ALLOWED[_t, TEMPERATURES.index("neutral")] = True
+
+
+def allowed_temperatures(temperature: str) -> Tuple[str, ...]:
+    """Garment temperatures that pair with an item of the given temperature."""
+    row = _PALETTE_ALLOWED[TEMPERATURES.index(temperature)]
+    return tuple(name for name, ok in zip(TEMPERATURES, row) if ok)
+
+
+class WardrobeColors:
+    """
+    Colors of a whole wardrobe as arrays:
+    - Hex strings parsed once into an Nx3 uint8 RGB array
+    - Lab coordinates and temperature codes computed in one pass
+    - Harmony and distance matrices for all items without per-item parsing
+    """
+
+    def __init__(self, hex_colors: Sequence[Any]):
+        self._set_rgb(parse_hex_array(hex_colors))
+
+    @classmethod
+    def from_rgb(cls, rgb: np.ndarray) -> "WardrobeColors":
+        """Build from an already parsed Nx3 uint8 RGB array."""
+        colors = cls.__new__(cls)
+        colors._set_rgb(np.asarray(rgb, dtype=np.uint8).reshape(-1, 3))
+        return colors
+
+    @classmethod
+    def from_garments(cls, garments: Sequence[Dict[str, Any]]) -> "WardrobeColors":
+        return cls([g.get("color_hex", DEFAULT_COLOR) for g in garments])
+
+    def _set_rgb(self, rgb: np.ndarray) -> None:
+        self.rgb = rgb
+        self.lab = rgb_to_lab(rgb)
+        self.temperature = rgb_temperatures(rgb)
+        self._palette_distances: Optional[np.ndarray] = None
+
+    def __len__(self) -> int:
+        return len(self.rgb)
+
+    def temperature_name(self, index: int) -> str:
+        return TEMPERATURES[self.temperature[index]]
+
+    def distance_matrix(self, other_lab: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Lab distances from every item to `other_lab` (default: every item).
+
+        Returns:
+            N x M float32 matrix
+        """
+        return lab_distance_matrix(self.lab, self.lab if other_lab is None else other_lab)
+
+    def palette_distances(self) -> np.ndarray:
+        """
+        Distance from every item to the closest color of each complementary
+        palette.
+
+        Returns:
+            3 x N float32 matrix indexed by temperature code
+        """
+        if self._palette_distances is None:
+            self._palette_distances = np.stack([
+                lab_distance_matrix(palette, self.lab).min(axis=0)
+                for palette in _PALETTE_LABS
+            ])
+        return self._palette_distances
+
+    def harmony_scores(
+        self,
+        rows: Optional[Sequence[int]] = None,
+        max_distance: float = 40.0
+    ) -> np.ndarray:
+        """
+        Pairwise harmony between items.
+
+        score[i, j] = 1 - d(j, complementary palette of i) / max_distance,
+        clipped to [0, 1]; zero when j's temperature does not pair with i.
+
+        Args:
+            rows: Item indices to score against the whole wardrobe
+                (default: all items, an N x N matrix)
+            max_distance: Lab distance at which the score reaches zero
+
+        Returns:
+            len(rows) x N float32 matrix
+        """
+        rows = np.arange(len(self)) if rows is None else np.asarray(rows, dtype=np.intp)
+        row_temps = self.temperature[rows]
+        scores = 1.0 - self.palette_distances()[row_temps] / max_distance
+        np.clip(scores, 0.0, 1.0, out=scores)
+        scores[~_PALETTE_ALLOWED[row_temps][:, self.temperature]] = 0.0
+        return scores
@@ -0,0 +1,139 @@
+# Phase 2: AI System 3 - Wardrobe Color Index
+# Handles: per-wardrobe Lab color buckets for fast compatible-item lookup
+
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Sequence, Tuple
+
+import numpy as np
+
+from app.ai_core.color_array import TEMPERATURES, WardrobeColors, parse_hex_array, rgb_to_lab
+from app.ai_core.garments import WardrobeArrays
+
+
+class WardrobeColorIndex:
+    """
+    Color index over one user's wardrobe:
+    - Colors parsed once into WardrobeColors (Lab + temperature)
+    - Garments bucketed by (temperature, quantised L, a, b)
+    - Lookups visit only the buckets neighbouring each target color and
+      rank candidates by Lab distance
+    """
+
+    def __init__(
+        self,
+        colors: WardrobeColors,
+        max_distance: float = 40.0
+    ):
+        self.max_distance = max_distance
+        self.bucket_size = max_distance  # neighbours within one bucket step
+        self.size = len(colors)
+        self.colors = colors
+        self.lab = self.colors.lab
+        self.temperature = self.colors.temperature
+
+        keys = np.floor(self.lab / self.bucket_size).astype(np.int32)
+        self.buckets: Dict[Tuple[int, int, int, int], np.ndarray] = {}
+        grouped: Dict[Tuple[int, int, int, int], List[int]] = {}
+        for i, (key, temp) in enumerate(zip(keys.tolist(), self.temperature.tolist())):
+            grouped.setdefault((temp, *key), []).append(i)
+        for key, members in grouped.items():
+            self.buckets[key] = np.array(members, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _candidates(self, lab: np.ndarray, temperatures: Iterable[int]) -> np.ndarray:
+        bl, ba, bb = (int(v) for v in np.floor(lab / self.bucket_size))
+        found = []
+        for temp in temperatures:
+            for dl in (-1, 0, 1):
+                for da in (-1, 0, 1):
+                    for db in (-1, 0, 1):
+                        members = self.buckets.get((temp, bl + dl, ba + da, bb + db))
+                        if members is not None:
+                            found.append(members)
+        if not found:
+            return np.empty(0, dtype=np.int32)
+        return np.concatenate(found)
+
+    def query(
+        self,
+        target_colors: Sequence[str],
+        temperatures: Iterable[str] = TEMPERATURES,
+        limit: int = 5
+    ) -> List[Tuple[int, float]]:
+        """
+        Find garments close to any of the target colors.
+
+        Args:
+            target_colors: Hex colors to match against
+            temperatures: Allowed garment temperatures
+            limit: Maximum number of results
+
+        Returns:
+            [(garment_index, score)] sorted by score (indices refer to the
+            wardrobe the index was built from), where
+            score = 1 - lab_distance / max_distance (1.0 = exact color)
+        """
+        targets = parse_hex_array(target_colors)
+        if len(targets) == 0 or self.size == 0:
+            return []
+
+        temp_codes = [TEMPERATURES.index(t) for t in temperatures]
+        found_idx = []
+        found_dist = []
+        for lab in rgb_to_lab(targets):
+            candidates = self._candidates(lab, temp_codes)
+            if len(candidates) == 0:
+                continue
+            diff = self.lab[candidates] - lab
+            distances = np.sqrt(np.einsum("ij,ij->i", diff, diff))
+            close = distances < self.max_distance
+            found_idx.append(candidates[close])
+            found_dist.append(distances[close])
+
+        if not found_idx:
+            return []
+        idx = np.concatenate(found_idx)
+        dist = np.concatenate(found_dist)
+        if len(idx) == 0:
+            return []
+
+        # Closest target per garment, then the `limit` closest garments
+        order = np.argsort(dist, kind="stable")
+        idx, dist = idx[order], dist[order]
+        _, first = np.unique(idx, return_index=True)
+        keep = np.sort(first)[:limit]
+        return [
+            (int(i), round(1.0 - float(d) / self.max_distance, 3))
+            for i, d in zip(idx[keep], dist[keep])
+        ]
+
+
+class ColorIndexCache:
+    """Small LRU of wardrobe indexes so each wardrobe is indexed once."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, WardrobeColorIndex]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, wardrobe: WardrobeArrays) -> WardrobeColorIndex:
+        key = wardrobe.fingerprint
+        with self._lock:
+            index = self._entries.get(key)
+            if index is not None:
+                self._entries.move_to_end(key)
+                return index
+
+        index = WardrobeColorIndex(wardrobe.colors)
+        with self._lock:
+            self._entries[key] = index
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return index
+
+
+# Initialize cache
+color_index_cache = ColorIndexCache()
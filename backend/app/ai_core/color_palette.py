@@ -0,0 +1,137 @@
+# Phase 2: AI System 1 - Color Palette Extraction
+# Handles: subsampled, histogram-based dominant color palette for garments
+
+import numpy as np
+from typing import List, Dict, Any, Optional
+
+
+class PaletteExtractor:
+    """
+    Fast dominant-palette extraction:
+    - Strided subsampling of the (masked) image, no full-frame copies
+    - Quantised 3D color histogram via np.bincount
+    - Per-bin mean color, with near-identical bins merged
+    - Top-N palette entries with pixel proportions
+    """
+
+    def __init__(
+        self,
+        max_samples: int = 20000,
+        bits_per_channel: int = 4,
+        top_n: int = 5,
+        merge_distance: float = 24.0,
+        min_proportion: float = 0.02
+    ):
+        if not 1 <= bits_per_channel <= 8:
+            raise ValueError("bits_per_channel must be between 1 and 8")
+        self.max_samples = max_samples
+        self.bits_per_channel = bits_per_channel
+        self.top_n = top_n
+        self.merge_distance = merge_distance
+        self.min_proportion = min_proportion
+
+    def sample_pixels(
+        self,
+        image: np.ndarray,
+        mask: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        """
+        Subsample foreground pixels on a regular grid.
+
+        Args:
+            image: HxWx3 or HxWx4 uint8 image (alpha > 128 is foreground)
+            mask: Optional HxW boolean foreground mask
+
+        Returns:
+            Nx3 uint8 array of sampled pixels
+        """
+        h, w = image.shape[:2]
+        step = max(1, int(np.ceil(np.sqrt(h * w / float(self.max_samples)))))
+        sub = image[::step, ::step]
+
+        if mask is not None:
+            keep = mask[::step, ::step]
+        elif sub.ndim == 3 and sub.shape[2] == 4:
+            keep = sub[:, :, 3] > 128
+        else:
+            keep = None
+
+        color = sub[:, :, :3]
+        if keep is None:
+            return color.reshape(-1, 3)
+        return color[keep]
+
+    def extract(
+        self,
+        image: np.ndarray,
+        mask: Optional[np.ndarray] = None,
+        channel_order: str = "bgr"
+    ) -> List[Dict[str, Any]]:
+        """
+        Extract the dominant color palette.
+
+        Args:
+            image: HxWx3 or HxWx4 uint8 image
+            mask: Optional HxW boolean foreground mask
+            channel_order: "bgr" (OpenCV) or "rgb"
+
+        Returns:
+            Palette sorted by proportion:
+            [{"hex": "#ff5733", "rgb": [255, 87, 51], "proportion": 0.61}, ...]
+        """
+        pixels = self.sample_pixels(image, mask)
+        if len(pixels) == 0:
+            return []
+
+        if channel_order == "bgr":
+            pixels = pixels[:, ::-1]
+
+        bits = self.bits_per_channel
+        shift = 8 - bits
+        q = (pixels >> shift).astype(np.int32)
+        bins = (q[:, 0] << (2 * bits)) | (q[:, 1] << bits) | q[:, 2]
+
+        n_bins = 1 << (3 * bits)
+        counts = np.bincount(bins, minlength=n_bins)
+        sums = np.stack([
+            np.bincount(bins, weights=pixels[:, c], minlength=n_bins)
+            for c in range(3)
+        ], axis=1)
+
+        # Only the heaviest bins can end up in the palette
+        candidates = min(np.count_nonzero(counts), self.top_n * 4)
+        top = np.argpartition(counts, -candidates)[-candidates:]
+        top = top[np.argsort(counts[top])[::-1]]
+
+        palette: List[np.ndarray] = []  # [r, g, b, count]
+        for b in top:
+            count = float(counts[b])
+            mean = sums[b] / count
+            for entry in palette:
+                if np.linalg.norm(entry[:3] - mean) < self.merge_distance:
+                    total = entry[3] + count
+                    entry[:3] = (entry[:3] * entry[3] + mean * count) / total
+                    entry[3] = total
+                    break
+            else:
+                palette.append(np.array([mean[0], mean[1], mean[2], count]))
+
+        total_pixels = float(len(pixels))
+        palette.sort(key=lambda e: e[3], reverse=True)
+
+        result = []
+        for entry in palette[:self.top_n]:
+            proportion = float(entry[3] / total_pixels)
+            if result and proportion < self.min_proportion:
+                break
+            rgb = [int(round(v)) for v in entry[:3]]
+            result.append({
+                "hex": "#{:02x}{:02x}{:02x}".format(*rgb),
+                "rgb": rgb,
+                "proportion": round(proportion, 4),
+            })
+        return result
+
+
+# Initialize extractor
+palette_extractor = PaletteExtractor()
@@ -0,0 +1,164 @@
+# Phase 2: AI System 1 - Garment Descriptor
+# Handles: fixed-length color + shape vectors for "more like this" search
+
+import base64
+import math
+from typing import Optional
+
+import numpy as np
+
+from app.core.lazy_imports import lazy_module
+
+cv2 = lazy_module("cv2")
+
+# Color block: HUE_BINS x SATURATION_BINS chromatic bins plus VALUE_BINS
+# achromatic (gray) bins, over the garment pixels of an image downscaled
+# to HISTOGRAM_MAX_SIDE
+HUE_BINS = 12
+SATURATION_BINS = 3
+VALUE_BINS = 4
+COLOR_BINS = HUE_BINS * SATURATION_BINS + VALUE_BINS
+HISTOGRAM_MAX_SIDE = 128
+# Below this saturation (0-255) a pixel counts as gray
+ACHROMATIC_SATURATION = 40
+
+# Shape block: aspect, extent, solidity, circularity, 4 Hu moments
+SHAPE_FEATURES = 8
+# Shape block scale relative to the unit-length color block
+SHAPE_WEIGHT = 0.25
+
+DESCRIPTOR_DIM = COLOR_BINS + SHAPE_FEATURES
+
+# Descriptor scheme name; part of the scan cache key and of the vector
+# index, so vectors of different schemes are never compared
+DESCRIPTOR_VARIANT = f"hsv{HUE_BINS}x{SATURATION_BINS}+{VALUE_BINS}-shape{SHAPE_FEATURES}"
+
+
+def color_histogram(image: np.ndarray, mask: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Quantised HSV histogram of the garment, square-rooted.
+
+    Gray pixels (low saturation) go to value bins so black, white and
+    gray garments don't spread over random hues. The square root makes
+    the block unit length and turns its dot product into the
+    Bhattacharyya coefficient of the two color distributions.
+
+    Args:
+        image: BGR or BGRA image
+        mask: Garment mask (nonzero = garment); None uses every pixel
+
+    Returns:
+        COLOR_BINS float32 values with unit L2 norm (zeros without pixels)
+    """
+    long_side = max(image.shape[:2])
+    if long_side > HISTOGRAM_MAX_SIDE:
+        factor = HISTOGRAM_MAX_SIDE / long_side
+        image = cv2.resize(image, None, fx=factor, fy=factor, interpolation=cv2.INTER_AREA)
+        if mask is not None:
+            mask = cv2.resize(mask, (image.shape[1], image.shape[0]), interpolation=cv2.INTER_NEAREST)
+    if image.shape[2] == 4:
+        image = cv2.cvtColor(image, cv2.COLOR_BGRA2BGR)
+
+    hsv = cv2.cvtColor(image, cv2.COLOR_BGR2HSV).reshape(-1, 3)
+    if mask is not None:
+        hsv = hsv[mask.reshape(-1) > 0]
+    if len(hsv) == 0:
+        return np.zeros(COLOR_BINS, dtype=np.float32)
+
+    hue = hsv[:, 0].astype(np.int32)
+    saturation = hsv[:, 1].astype(np.int32)
+    value = hsv[:, 2].astype(np.int32)
+    chromatic = saturation >= ACHROMATIC_SATURATION
+
+    # OpenCV hue is 0-179; shifted half a bin so reds (both ends of the
+    # circle) share the first bin instead of straddling its edge
+    hue_bin = (hue + 90 // HUE_BINS) % 180 * HUE_BINS // 180
+    saturation_bin = np.minimum(
+        (saturation - ACHROMATIC_SATURATION) * SATURATION_BINS // (256 - ACHROMATIC_SATURATION),
+        SATURATION_BINS - 1,
+    )
+    bins = np.where(
+        chromatic,
+        hue_bin * SATURATION_BINS + saturation_bin,
+        HUE_BINS * SATURATION_BINS + value * VALUE_BINS // 256,
+    )
+    counts = np.bincount(bins, minlength=COLOR_BINS).astype(np.float32)
+    return np.sqrt(counts / counts.sum())
+
+
+def shape_features(contour: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Scale-invariant outline features, each roughly in [0, 1].
+
+    Args:
+        contour: Garment outline (the largest contour, working pixels)
+
+    Returns:
+        [aspect (height share of width + height), extent (area / bounding
+        box), solidity (area / convex hull), circularity (4 pi area /
+        perimeter^2), Hu moments 1-4 as -log10|hu| / 10]; zeros without
+        an outline
+    """
+    features = np.zeros(SHAPE_FEATURES, dtype=np.float32)
+    if contour is None or len(contour) < 3:
+        return features
+    area = cv2.contourArea(contour)
+    if area <= 0:
+        return features
+
+    _, _, w, h = cv2.boundingRect(contour)
+    hull_area = cv2.contourArea(cv2.convexHull(contour))
+    perimeter = cv2.arcLength(contour, True)
+    features[0] = h / (w + h)
+    features[1] = area / (w * h)
+    features[2] = area / hull_area if hull_area > 0 else 0.0
+    features[3] = min(1.0, 4 * math.pi * area / (perimeter * perimeter)) if perimeter > 0 else 0.0
+
+    hu = cv2.HuMoments(cv2.moments(contour)).ravel()[:4]
+    magnitude = np.abs(hu)
+    features[4:] = np.where(magnitude > 0, -np.log10(np.maximum(magnitude, 1e-30)) / 10, 0.0).clip(0, 1)
+    return features
+
+
+def garment_descriptor(
+    image: np.ndarray,
+    mask: Optional[np.ndarray] = None,
+    contour: Optional[np.ndarray] = None
+) -> np.ndarray:
+    """
+    Fixed-length descriptor of a segmented garment.
+
+    Args:
+        image: BGR or BGRA image (the downscaled working copy)
+        mask: Garment mask; None uses every pixel
+        contour: Garment outline; None leaves the shape block at zero
+
+    Returns:
+        DESCRIPTOR_DIM float32 values: the color histogram block followed
+        by the shape block scaled by SHAPE_WEIGHT
+    """
+    return np.concatenate([
+        color_histogram(image, mask),
+        shape_features(contour) * np.float32(SHAPE_WEIGHT),
+    ]).astype(np.float32)
+
+
+def encode_descriptor(vector: np.ndarray) -> str:
+    """Descriptor as base64 of little-endian float32 (the form stored in garments.descriptor)."""
+    return base64.b64encode(np.asarray(vector, dtype="<f4").tobytes()).decode("ascii")
+
+
+def decode_descriptor(text: str) -> np.ndarray:
+    """
+    Inverse of encode_descriptor.
+
+    Raises:
+        ValueError: Not a DESCRIPTOR_DIM float32 vector
+    """
+    try:
+        raw = base64.b64decode(text, validate=True)
+    except (TypeError, ValueError) as e:
+        raise ValueError(f"Invalid descriptor: {e}")
+    if len(raw) != DESCRIPTOR_DIM * 4:
+        raise ValueError(f"Descriptor must have {DESCRIPTOR_DIM} float32 values")
+    return np.frombuffer(raw, dtype="<f4").astype(np.float32)
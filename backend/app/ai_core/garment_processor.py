@@ -1,81 +1,309 @@
 # Phase 2: AI System 1 - Garment Recognition & Measurement
-# Handles: rembg segmentation, coin calibration, color extraction, WebP compression
+# Handles: background segmentation, coin detection and calibration, color extraction, WebP renditions,
+# perceptual hashes for duplicate detection, descriptors for similarity search
 
-import cv2
 import numpy as np
-from PIL import Image
 from io import BytesIO
-from typing import Tuple, Dict, Any
+from typing import Tuple, Dict, Any, List, Optional, Sequence
 import json
+import os
+import time
+from app.ai_core.asset_encoding import ENCODE_PRESETS, AssetEncoder
+from app.ai_core.coin_detection import COIN_DIAMETERS_MM, CoinDetector, coin_detector
+from app.ai_core.color_palette import palette_extractor
+from app.ai_core.garment_descriptor import DESCRIPTOR_VARIANT, encode_descriptor, garment_descriptor
+from app.ai_core.perceptual_hash import HASH_VARIANT, format_hash, perceptual_hash
+from app.ai_core.segmentation import Segmenter, create_segmenter
+from app.core.config import settings
+from app.core.image_header import sniff_image_header
+from app.core.instrumentation import ScanTrace
+from app.core.lazy_imports import lazy_module
+
+# OpenCV and Pillow load on the first scan, not at import
+cv2 = lazy_module("cv2")
+Image = lazy_module("PIL.Image")
+
+# Full-frame uint8 buffers alive at the pipeline's peak (decoded frame,
+# segmented BGRA copy, outline mask, BGRA encoder input when the full
+# rendition keeps the asset resolution); used by the memory budget estimate
+PEAK_FRAME_COPIES = 4
+
+# Stored asset renditions: (name, long side); 0 keeps the asset resolution
+DEFAULT_RENDITIONS = (("full", 2048), ("gallery", 768), ("thumbnail", 256))
+
+# Coin diameter assumed when the client sends none (full-resolution pixels)
+DEFAULT_COIN_DIAMETER_PX = 100
+
+# Decode-time downscaling: libjpeg scales in the DCT domain, so these are
+# cheaper than a full decode followed by cv2.resize (cv2 flag names,
+# resolved by reduced_decode_flag once OpenCV is loaded)
+REDUCED_DECODE_FLAGS = {
+    1: "IMREAD_COLOR",
+    2: "IMREAD_REDUCED_COLOR_2",
+    4: "IMREAD_REDUCED_COLOR_4",
+    8: "IMREAD_REDUCED_COLOR_8",
+}
+
+
+def reduced_decode_flag(reduction: int) -> int:
+    """cv2.imdecode flag decoding at 1/`reduction` scale (1, 2, 4 or 8)."""
+    return getattr(cv2, REDUCED_DECODE_FLAGS[reduction])
+
+
+def read_image_size(file_bytes: bytes) -> Tuple[int, int]:
+    """
+    Read (width, height) from the image header without decoding pixels.
+
+    Raises:
+        ValueError: If the bytes are not a readable image
+    """
+    _, width, height = sniff_image_header(file_bytes)
+    if width is not None:
+        return width, height
+
+    # Formats or layouts the sniffer can't read (PIL copies the buffer)
+    try:
+        with Image.open(BytesIO(file_bytes)) as header:
+            return header.size
+    except Exception:
+        raise ValueError("Invalid image data")
+
+
+def scale_coords(coords: Dict[str, Any], factor: float) -> Dict[str, Any]:
+    """Map client tap coordinates from full resolution to the working image (nulls kept)."""
+    scaled = dict(coords)
+    for key in ("x", "y", "radius", "diameter_pixels"):
+        if scaled.get(key) is not None:
+            scaled[key] = float(scaled[key]) * factor
+    return scaled
+
+
+class ScanContext:
+    """
+    Per-request scan state.
+
+    Created fresh for every scan and threaded through the pipeline so a
+    single GarmentProcessor can serve concurrent scans across threads or
+    processes without sharing calibration results.
+    """
+
+    __slots__ = ("scale_ratio", "work_scale", "coin", "dominant_color", "palette", "measurements", "outline")
+
+    def __init__(self, scale_ratio: Optional[float] = None, work_scale: float = 1.0):
+        self.scale_ratio = scale_ratio  # working-image pixels per millimeter
+        self.work_scale = work_scale  # working-image pixels per full-resolution pixel
+        self.coin: Dict[str, Any] = {}  # coin used for calibration (working-image pixels)
+        self.dominant_color: Optional[str] = None
+        self.palette: List[Dict[str, Any]] = []
+        self.measurements: Dict[str, float] = {}
+        self.outline: Optional[np.ndarray] = None  # largest garment contour (working-image pixels)
 
 
 class GarmentProcessor:
     """
     Core AI system for garment processing:
-    - Background removal (rembg)
-    - Coin-based scale calibration
-    - Color extraction (KMeans)
+    - Background removal (pluggable Segmenter; classical OpenCV by default)
+    - Coin-based scale calibration (coin detected server-side)
+    - Color extraction (histogram palette)
     - Measurement calculation
-    - WebP compression
+    - Perceptual hash (duplicates) and color + shape descriptor (similar
+      garments)
+    - WebP renditions (thumbnail, gallery, full) with the mask as alpha
+
+    The processor holds no per-scan state; everything a scan produces
+    lives on its ScanContext.
+
+    Args:
+        memory_budget_mb: Optional per-scan memory budget. Scans whose
+            estimated peak working set exceeds it are rejected before
+            decoding.
+        working_max_side: Long side of the downscaled copy that the
+            analysis stages run on; 0 analyses at full resolution.
+        asset_max_side: Long side floor for the stored WebP asset. The
+            photo is decoded at the largest 1/2, 1/4 or 1/8 reduction that
+            stays at or above it; 0 keeps the full resolution.
+        segmenter: Background removal stage (default: classical)
+        coin_detector: Server-side coin detection; None trusts the
+            client's diameter_pixels
+        renditions: (name, max_side) pairs of stored WebP renditions
     """
 
-    def __init__(self):
-        self.scale_ratio = None  # pixels per millimeter
-        self.dominant_color = None
-        self.measurements = {}
+    def __init__(
+        self,
+        memory_budget_mb: Optional[float] = None,
+        working_max_side: int = 1024,
+        asset_max_side: int = 0,
+        segmenter: Optional[Segmenter] = None,
+        coin_detector: Optional[CoinDetector] = None,
+        renditions: Sequence[Tuple[str, int]] = DEFAULT_RENDITIONS
+    ):
+        self.memory_budget_mb = memory_budget_mb or None
+        self.working_max_side = working_max_side
+        self.asset_max_side = asset_max_side
+        self.segmenter = segmenter or create_segmenter()
+        self.coin_detector = coin_detector
+        self.encoder = AssetEncoder(renditions)
+
+    @property
+    def pipeline_variant(self) -> str:
+        """Pipeline options that change scan results (part of the scan cache key)."""
+        return (
+            f"segmentation={self.segmenter.name};renditions={self.encoder.variant};"
+            f"hash={HASH_VARIANT};descriptor={DESCRIPTOR_VARIANT}"
+        )
+
+    @staticmethod
+    def choose_reduction(long_side: int, min_side: int) -> int:
+        """Pick the largest decode reduction (1, 2, 4 or 8) keeping long_side >= min_side."""
+        if min_side <= 0:
+            return 1
+        for factor in (8, 4, 2):
+            if long_side / factor >= min_side:
+                return factor
+        return 1
+
+    def working_copy(self, image: np.ndarray) -> np.ndarray:
+        """Downscale image for analysis, or return it unchanged if already small."""
+        long_side = max(image.shape[:2])
+        if self.working_max_side <= 0 or long_side <= self.working_max_side:
+            return image
+        factor = self.working_max_side / float(long_side)
+        size = (max(1, round(image.shape[1] * factor)), max(1, round(image.shape[0] * factor)))
+        # INTER_LINEAR is ~20x cheaper than INTER_AREA at non-integer ratios;
+        # the analysis stages tolerate the mild aliasing
+        return cv2.resize(image, size, interpolation=cv2.INTER_LINEAR)
+
+    def estimate_peak_bytes(self, width: int, height: int, reduction: int = 1, scaled_decode: bool = True) -> int:
+        """
+        Estimated peak image memory for scanning a width x height photo.
+
+        Args:
+            width: Full-resolution width
+            height: Full-resolution height
+            reduction: Decode reduction (1, 2, 4 or 8)
+            scaled_decode: Whether the decoder scales while decoding (JPEG);
+                otherwise the full frame exists until it is resized
+        """
+        frame = -(-width // reduction) * -(-height // reduction) * 3
+        peak = frame * PEAK_FRAME_COPIES
+        if reduction > 1 and not scaled_decode:
+            peak = max(peak, width * height * 3 + frame)
+        return peak
+
+    def check_memory_budget(self, file_bytes: bytes, reduction: int = 1) -> None:
+        """
+        Reject images that would exceed the memory budget.
+
+        Reads only the image header (PIL lazy open), not the pixel data.
+
+        Args:
+            file_bytes: Encoded image
+            reduction: Decode reduction the scan will use (1, 2, 4 or 8)
+
+        Raises:
+            ValueError: If the estimated peak exceeds the budget
+        """
+        if self.memory_budget_mb is None:
+            return
+        width, height = read_image_size(file_bytes)
+        # Only libjpeg scales in the DCT domain; OpenCV decodes other
+        # formats at full size and resizes afterwards
+        scaled_decode = sniff_image_header(file_bytes)[0] == "jpeg"
+
+        needed_mb = self.estimate_peak_bytes(width, height, reduction, scaled_decode) / (1024 * 1024)
+        if needed_mb > self.memory_budget_mb:
+            raise ValueError(
+                f"Image too large: {width}x{height} needs ~{needed_mb:.0f} MB, "
+                f"scan memory budget is {self.memory_budget_mb:.0f} MB"
+            )
 
     def calculate_scale_from_coin(
         self, 
         image_array: np.ndarray, 
-        coin_coords: Dict[str, Any]
+        coin_coords: Dict[str, Any],
+        ctx: Optional[ScanContext] = None
     ) -> float:
         """
         Calculate scale ratio (pixels/mm) using coin diameter.
         
+        With a coin detector the coin is located around the client's tap
+        (or anywhere when there is none) and its measured diameter and
+        type are used; the client's values are the fallback. Coin data
+        with "detect": False (e.g. a cached calibration) is used as is.
+        
         Args:
             image_array: OpenCV image (BGR)
-            coin_coords: {"x": center_x, "y": center_y, "diameter_pixels": d}
+            coin_coords: {"x": center_x, "y": center_y, "diameter_pixels": d,
+                "type": "500" | "1000" | "5000" | "generic"}
+            ctx: Scan context that receives the scale ratio and coin
         
         Returns:
             scale_ratio: pixels per millimeter
         """
-        # Indonesian coins reference diameters (mm):
-        # 500: 27mm, 1000: 26mm, 5000: 33mm
-        coin_reference = {
-            "500": 27.0,
-            "1000": 26.0,
-            "5000": 33.0,
-            "generic": 27.0  # Default fallback
+        coin = {
+            "x": coin_coords.get("x"),
+            "y": coin_coords.get("y"),
+            "diameter_pixels": coin_coords.get("diameter_pixels", 100),
+            "type": coin_coords.get("type") or "generic",
+            "source": coin_coords.get("source", "client"),
         }
         
-        diameter_px = coin_coords.get("diameter_pixels", 100)
-        coin_type = coin_coords.get("type", "generic")
-        diameter_mm = coin_reference.get(coin_type, 27.0)
-        
-        scale_ratio = diameter_px / diameter_mm
-        self.scale_ratio = scale_ratio
+        if self.coin_detector is not None and coin_coords.get("detect", True):
+            started = time.perf_counter()
+            detected = self.coin_detector.detect(image_array, coin_coords)
+            coin["detect_ms"] = round((time.perf_counter() - started) * 1000, 3)
+            if detected is not None:
+                coin.update(
+                    x=detected["x"],
+                    y=detected["y"],
+                    diameter_pixels=detected["diameter_pixels"],
+                    # An explicit type from the client wins over the color guess
+                    type=coin_coords.get("type") or detected["type"],
+                    source="detected",
+                )
+        
+        diameter_mm = COIN_DIAMETERS_MM.get(coin["type"], COIN_DIAMETERS_MM["generic"])
+        scale_ratio = coin["diameter_pixels"] / diameter_mm
+        if ctx is not None:
+            ctx.scale_ratio = scale_ratio
+            ctx.coin = coin
         return scale_ratio
 
-    def white_balance_calibration(
+    @staticmethod
+    def _coin_metadata(ctx: ScanContext) -> Dict[str, Any]:
+        """The calibration coin in full-resolution pixels."""
+        coin = dict(ctx.coin)
+        for key in ("x", "y", "diameter_pixels"):
+            if coin.get(key) is not None:
+                coin[key] = round(float(coin[key]) / ctx.work_scale, 2)
+        return coin
+
+    def white_balance_gains(
         self,
         image_array: np.ndarray,
         white_tap_coords: Dict[str, Any]
-    ) -> np.ndarray:
+    ) -> Optional[Tuple[float, float, float]]:
         """
-        Calibrate white balance using white paper tap coordinates.
+        Compute per-channel gains from the white paper tap region.
         
         Args:
             image_array: OpenCV image (BGR)
             white_tap_coords: {"x": x, "y": y, "radius": r}
         
         Returns:
-            Corrected image array
+            (scale_b, scale_g, scale_r), or None when the tap region is
+            empty or falls outside the image
         """
         x = int(white_tap_coords.get("x", 0))
         y = int(white_tap_coords.get("y", 0))
-        radius = int(white_tap_coords.get("radius", 30))
+        radius = float(white_tap_coords.get("radius", 30))
+        
+        if radius <= 0:
+            return None
+        # A small tap scaled to the working image still samples a pixel
+        radius = max(1, round(radius))
         
-        # Extract white reference region
+        # Extract white reference region (a view, no copy)
         if 0 <= y - radius and y + radius < image_array.shape[0] and \
            0 <= x - radius and x + radius < image_array.shape[1]:
             white_region = image_array[y - radius:y + radius, x - radius:x + radius]
@@ -84,76 +312,114 @@ class GarmentProcessor:
             b_mean, g_mean, r_mean = cv2.mean(white_region)[:3]
             
             # Normalize to white (255, 255, 255)
-            scale_b = 255.0 / (b_mean + 1e-5)
-            scale_g = 255.0 / (g_mean + 1e-5)
-            scale_r = 255.0 / (r_mean + 1e-5)
-            
-            # Apply white balance
-            corrected = image_array.copy().astype(float)
-            corrected[:, :, 0] *= scale_b
-            corrected[:, :, 1] *= scale_g
-            corrected[:, :, 2] *= scale_r
-            
-            corrected = np.clip(corrected, 0, 255).astype(np.uint8)
-            return corrected
+            return (
+                255.0 / (b_mean + 1e-5),
+                255.0 / (g_mean + 1e-5),
+                255.0 / (r_mean + 1e-5),
+            )
         
-        return image_array
+        return None
 
-    def extract_dominant_color(self, segmented_image: np.ndarray) -> str:
+    def apply_white_balance(
+        self,
+        image_array: np.ndarray,
+        gains: Tuple[float, float, float],
+        in_place: bool = False
+    ) -> np.ndarray:
         """
-        Extract dominant color from segmented garment using KMeans.
+        Apply channel gains through a 256-entry per-channel lookup table.
+
+        Works directly on uint8 data: no float frame is ever allocated.
         
         Args:
-            segmented_image: Image with transparent background (RGBA)
+            image_array: OpenCV image (BGR or BGRA, uint8)
+            gains: (scale_b, scale_g, scale_r)
+            in_place: Overwrite image_array instead of allocating a new frame
         
         Returns:
-            Hex color string (e.g., "#FF5733")
+            Corrected image array (image_array itself when in_place)
         """
-        # Convert to RGB, remove alpha channel, and flatten
-        if segmented_image.shape[2] == 4:  # RGBA
-            rgb_image = segmented_image[:, :, :3]
-            alpha = segmented_image[:, :, 3]
-            # Mask out transparent pixels
-            mask = alpha > 128
-        else:
-            rgb_image = segmented_image
-            mask = np.ones(segmented_image.shape[:2], dtype=bool)
+        levels = np.arange(256, dtype=np.float64)[:, None]
+        channel_gains = list(gains) + [1.0] * (image_array.shape[2] - 3)
+        lut = np.clip(levels * np.array(channel_gains), 0, 255).astype(np.uint8)
+        lut = lut.reshape(256, 1, image_array.shape[2])
+        
+        if in_place:
+            cv2.LUT(image_array, lut, dst=image_array)
+            return image_array
+        return cv2.LUT(image_array, lut)
+
+    def white_balance_calibration(
+        self,
+        image_array: np.ndarray,
+        white_tap_coords: Dict[str, Any],
+        in_place: bool = False
+    ) -> np.ndarray:
+        """
+        Calibrate white balance using white paper tap coordinates.
         
-        # Reshape to 2D for KMeans
-        pixels = rgb_image[mask].reshape(-1, 3).astype(float)
+        Args:
+            image_array: OpenCV image (BGR)
+            white_tap_coords: {"x": x, "y": y, "radius": r}
+            in_place: Correct image_array in place (zero-copy)
         
-        if len(pixels) == 0:
-            return "#808080"  # Gray fallback
+        Returns:
+            Corrected image array
+        """
+        gains = self.white_balance_gains(image_array, white_tap_coords)
+        if gains is None:
+            return image_array
+        return self.apply_white_balance(image_array, gains, in_place=in_place)
+
+    def extract_dominant_color(
+        self,
+        segmented_image: np.ndarray,
+        ctx: Optional[ScanContext] = None
+    ) -> str:
+        """
+        Extract dominant color from segmented garment.
+
+        Uses the histogram palette extractor on a subsample of the
+        foreground pixels; the full palette is stored on the context.
         
-        # KMeans clustering to find dominant color
-        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
-        _, _, centers = cv2.kmeans(
-            pixels, 1, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS
-        )
+        Args:
+            segmented_image: OpenCV image, BGR or BGRA (transparent background)
+            ctx: Scan context that receives the dominant color and palette
         
-        dominant_rgb = centers[0].astype(int)
-        hex_color = "#{:02x}{:02x}{:02x}".format(
-            dominant_rgb[0], dominant_rgb[1], dominant_rgb[2]
-        )
+        Returns:
+            Hex color string (e.g., "#FF5733")
+        """
+        palette = palette_extractor.extract(segmented_image, channel_order="bgr")
+        
+        # Gray fallback when no foreground pixels survive the mask
+        hex_color = palette[0]["hex"] if palette else "#808080"
         
-        self.dominant_color = hex_color
+        if ctx is not None:
+            ctx.dominant_color = hex_color
+            ctx.palette = palette
         return hex_color
 
     def measure_garment_outline(
         self,
-        segmented_image: np.ndarray
+        segmented_image: np.ndarray,
+        ctx: ScanContext
     ) -> Dict[str, float]:
         """
         Measure garment dimensions from segmented outline.
         
         Args:
             segmented_image: Binary or segmented image
+            ctx: Scan context carrying the calibrated scale ratio
         
         Returns:
             Dictionary with width_cm, height_cm, area_cm2
+
+        Raises:
+            ValueError: If the scan has not been calibrated
         """
-        if self.scale_ratio is None:
-            self.scale_ratio = 3.0  # Default fallback
+        scale_ratio = ctx.scale_ratio
+        if not scale_ratio or scale_ratio <= 0:
+            raise ValueError("Scale ratio not calibrated; run coin calibration first")
         
         # Extract alpha channel for mask
         if segmented_image.shape[2] == 4:
@@ -172,20 +438,21 @@ class GarmentProcessor:
         
         # Get bounding box of largest contour
         largest_contour = max(contours, key=cv2.contourArea)
+        ctx.outline = largest_contour
         x, y, w, h = cv2.boundingRect(largest_contour)
         
         # Convert pixels to cm using scale ratio
-        width_cm = w / self.scale_ratio / 10  # pixels/mm to cm
-        height_cm = h / self.scale_ratio / 10
+        width_cm = w / scale_ratio / 10  # pixels/mm to cm
+        height_cm = h / scale_ratio / 10
         area_cm2 = (width_cm * height_cm)
         
-        self.measurements = {
+        ctx.measurements = {
             "width_cm": round(width_cm, 2),
             "height_cm": round(height_cm, 2),
             "area_cm2": round(area_cm2, 2),
         }
         
-        return self.measurements
+        return ctx.measurements
 
     def compress_to_webp(
         self,
@@ -193,79 +460,230 @@ class GarmentProcessor:
         quality: int = 75
     ) -> bytes:
         """
-        Compress image to WebP format.
+        Compress image to WebP format (single rendition, cv2.imencode).
         
         Args:
-            image_array: Image as numpy array
+            image_array: Image as numpy array (BGR or BGRA)
             quality: WebP quality (0-100)
         
         Returns:
             WebP image bytes
         """
-        # Convert BGR to RGB
-        rgb_array = cv2.cvtColor(image_array, cv2.COLOR_BGR2RGB)
-        pil_image = Image.fromarray(rgb_array)
-        
-        # Compress to WebP
-        webp_buffer = BytesIO()
-        pil_image.save(webp_buffer, format="WebP", quality=quality)
-        webp_buffer.seek(0)
-        
-        return webp_buffer.getvalue()
+        return self.encoder.encode_webp(image_array, quality)
 
     async def process_garment_accurate(
         self,
         file_bytes: bytes,
         coin_coords: Dict[str, Any],
         white_tap_coords: Dict[str, Any]
-    ) -> Tuple[bytes, Dict[str, Any]]:
+    ) -> Tuple[Dict[str, bytes], Dict[str, Any]]:
+        """
+        Async wrapper around process_garment.
+
+        Runs the pipeline on the calling thread; API routes should go
+        through run_scan_job on the scan executor instead.
+        """
+        return self.process_garment(file_bytes, coin_coords, white_tap_coords)
+
+    def process_garment(
+        self,
+        file_bytes: bytes,
+        coin_coords: Dict[str, Any],
+        white_tap_coords: Dict[str, Any],
+        asset_max_side: Optional[int] = None,
+        trace: Optional[ScanTrace] = None,
+        preset: str = "accurate"
+    ) -> Tuple[Dict[str, bytes], Dict[str, Any]]:
         """
         Main processing pipeline for accurate garment scan.
+
+        Blocking CPU work (decode, OpenCV, WebP encode); call it from a
+        worker, never directly on the event loop.
+
+        Resolution tiers:
+        - The photo is decoded once, reduced at decode time when the asset
+          does not need full resolution (see asset_max_side).
+        - Calibration, color and contour analysis run on a working copy of
+          at most working_max_side; tap coordinates and the scale ratio are
+          mapped into that space so measurements stay in real cm.
+        - The decoded frame itself is only white balanced and encoded,
+          as WebP renditions of at most each rendition's long side.
+
+        Measurement tolerance versus a full-resolution analysis: the
+        outline is located to one working pixel, so each dimension is
+        within +/- 1 / scale_ratio mm of working resolution (about 2 mm
+        for a 12 MP photo analysed at 1024 px with a 2 px/mm full-res
+        calibration), before rounding to 0.01 cm.
         
         Args:
             file_bytes: Raw image bytes from frontend
-            coin_coords: Coin calibration data
-            white_tap_coords: White balance calibration data
+            coin_coords: Coin calibration data (full-resolution pixels)
+            white_tap_coords: White balance calibration data (full-resolution pixels)
+            asset_max_side: Per-call override of the processor's asset_max_side
+            trace: Stage recorder; an enabled trace adds a "timings" block
+                (per-stage wall/CPU time, input resolution, peak bytes)
+                to the metadata
+            preset: Encode preset name ("quick" favours encode speed,
+                "accurate" file size)
         
         Returns:
-            (webp_bytes, metadata_json)
+            ({rendition name: webp_bytes}, metadata_json)
+
+        Raises:
+            ValueError: Unknown preset or invalid image data
         """
-        # Convert bytes to image
-        nparr = np.frombuffer(file_bytes, np.uint8)
-        image = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+        if preset not in ENCODE_PRESETS:
+            raise ValueError(f"Unknown encode preset: {preset}")
+        encode_preset = ENCODE_PRESETS[preset]
+        trace = trace or ScanTrace()
+        with trace.stage("decode") as stage:
+            full_w, full_h = read_image_size(file_bytes)
+            stage["resolution"] = [full_w, full_h]
+            if asset_max_side is None:
+                asset_max_side = self.asset_max_side
+            reduction = self.choose_reduction(max(full_w, full_h), asset_max_side)
+            self.check_memory_budget(file_bytes, reduction)
+
+            # Convert bytes to image (decode-time downscaling when allowed)
+            nparr = np.frombuffer(file_bytes, np.uint8)
+            image = cv2.imdecode(nparr, reduced_decode_flag(reduction))
         
         if image is None:
             raise ValueError("Invalid image data")
         
-        # Step 1: Calculate scale ratio
-        self.calculate_scale_from_coin(image, coin_coords)
-        
-        # Step 2: White balance calibration
-        wb_corrected = self.white_balance_calibration(image, white_tap_coords)
-        
-        # Step 3: Simulate background removal (rembg integration point)
-        # In production: segmented = remove_background(wb_corrected)
-        segmented = wb_corrected  # Placeholder
+        with trace.stage("working_copy", (image.shape[1], image.shape[0])):
+            working = self.working_copy(image)
+        # Long sides compared so EXIF rotation applied by imdecode is harmless
+        work_scale = max(working.shape[:2]) / float(max(full_w, full_h))
+        ctx = ScanContext(work_scale=work_scale)
+        work_resolution = (working.shape[1], working.shape[0])
+
+        # Step 1: Calculate scale ratio (coin detected around the tap)
+        coin = {
+            "diameter_pixels": DEFAULT_COIN_DIAMETER_PX,
+            "source": "client" if "diameter_pixels" in coin_coords else "default",
+            **coin_coords,
+        }
+        with trace.stage("coin", work_resolution):
+            self.calculate_scale_from_coin(working, scale_coords(coin, work_scale), ctx)
+        
+        # Step 2: White balance calibration (frames are ours, correct in place)
+        with trace.stage("white_balance", work_resolution):
+            gains = self.white_balance_gains(working, scale_coords(white_tap_coords, work_scale))
+            if gains is not None:
+                self.apply_white_balance(working, gains, in_place=True)
+        
+        # Step 3: Background removal (BGRA, garment mask as alpha)
+        with trace.stage("segmentation", work_resolution):
+            segmented, segmentation = self.segmenter.segment(working)
+        mask = None
+        if not segmentation["fallback"] and self.segmenter.name != "none":
+            mask = cv2.extractChannel(segmented, 3)
+        
+        # Perceptual hash of the segmented garment (duplicate detection)
+        with trace.stage("phash", work_resolution):
+            phash = perceptual_hash(segmented, mask)
         
         # Step 4: Extract dominant color
-        color_hex = self.extract_dominant_color(segmented)
+        with trace.stage("color", work_resolution):
+            color_hex = self.extract_dominant_color(segmented, ctx)
         
         # Step 5: Measure garment
-        measurements = self.measure_garment_outline(segmented)
-        
-        # Step 6: Compress to WebP
-        webp_bytes = self.compress_to_webp(segmented)
-        
-        # Step 7: Prepare metadata
+        with trace.stage("measure", work_resolution):
+            measurements = self.measure_garment_outline(segmented, ctx)
+        
+        # Color + shape descriptor ("find similar garments")
+        with trace.stage("descriptor", work_resolution):
+            descriptor = garment_descriptor(segmented, mask, ctx.outline)
+        working_resolution = [segmented.shape[1], segmented.shape[0]]
+        
+        # Step 6: WebP renditions (asset resolution and below); a failed or
+        # disabled segmentation leaves the asset opaque
+        del segmented
+        if working is not image:
+            del working
+            if gains is not None:
+                with trace.stage("white_balance_asset", (image.shape[1], image.shape[0])):
+                    self.apply_white_balance(image, gains, in_place=True)
+        with trace.stage("encode", (image.shape[1], image.shape[0])):
+            renditions, rendition_info = self.encoder.encode(image, encode_preset, mask)
+        
+        # Step 7: Prepare metadata (scale ratio reported in full-resolution pixels)
         metadata = {
             "color_hex": color_hex,
+            "palette": ctx.palette,
             "measurements": measurements,
-            "scale_ratio": float(self.scale_ratio),
+            "scale_ratio": float(ctx.scale_ratio / ctx.work_scale),
+            "coin": self._coin_metadata(ctx),
+            "working_resolution": working_resolution,
+            "segmentation": segmentation,
+            "asset_resolution": [image.shape[1], image.shape[0]],
+            "renditions": rendition_info,
+            "encode_preset": encode_preset.name,
+            "phash": format_hash(phash),
+            "descriptor": encode_descriptor(descriptor),
             "file_format": "webp"
         }
+        timings = trace.report()
+        if timings is not None:
+            metadata["timings"] = timings
         
-        return webp_bytes, metadata
+        return renditions, metadata
+
+
+def _coin_detector() -> Optional[CoinDetector]:
+    return coin_detector if settings.scan_coin_detection else None
+
+
+def _segmentation_pool_size() -> int:
+    """rembg sessions per process: one per worker thread in thread mode."""
+    if settings.scan_segmentation_pool_size > 0:
+        return settings.scan_segmentation_pool_size
+    if settings.scan_execution_mode == "thread":
+        return settings.scan_max_workers or os.cpu_count() or 1
+    return 1
 
 
 # Initialize processor
-processor = GarmentProcessor()
+processor = GarmentProcessor(
+    memory_budget_mb=settings.scan_memory_budget_mb,
+    working_max_side=settings.scan_working_max_side,
+    asset_max_side=settings.scan_asset_max_side,
+    segmenter=create_segmenter(
+        settings.scan_segmentation,
+        model=settings.scan_segmentation_model,
+        pool_size=_segmentation_pool_size(),
+    ),
+    coin_detector=_coin_detector(),
+    renditions=(
+        ("full", settings.scan_full_max_side),
+        ("gallery", settings.scan_gallery_max_side),
+        ("thumbnail", settings.scan_thumbnail_max_side),
+    ),
+)
+
+
+def warm_up_scan_worker() -> None:
+    """Load the segmentation backend in this worker before the first scan."""
+    processor.segmenter.warm_up()
+
+
+def run_scan_job(
+    file_bytes: bytes,
+    coin_coords: Dict[str, Any],
+    white_tap_coords: Dict[str, Any],
+    trace: bool = False,
+    preset: str = "accurate"
+) -> Tuple[Dict[str, bytes], Dict[str, Any]]:
+    """
+    Picklable entry point for the scan executor's worker processes.
+
+    With trace=True the metadata carries a "timings" block; the API
+    process feeds it into the /metrics histograms (worker processes
+    can't share them).
+    """
+    return processor.process_garment(
+        file_bytes, coin_coords, white_tap_coords,
+        trace=ScanTrace(trace, memory=settings.scan_trace_memory),
+        preset=preset,
+    )
@@ -0,0 +1,220 @@
+# Phase 2: AI System 3 - Garment Model
+# Handles: typed garment validation at the API edge and the compact
+# struct-of-arrays wardrobe used by the recommendation engine
+
+import hashlib
+from datetime import datetime
+from enum import Enum
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+import numpy as np
+from pydantic import Field
+from typing_extensions import Annotated, TypedDict
+
+from app.ai_core.color_array import DEFAULT_COLOR, WardrobeColors, parse_hex_array
+
+
+class GarmentType(str, Enum):
+    """Garment categories; the values double as outfit slot names."""
+
+    TOP = "top"
+    BOTTOM = "bottom"
+    DRESS = "dress"
+    OUTERWEAR = "outerwear"
+    SHOES = "shoes"
+    ACCESSORY = "accessory"
+    UNKNOWN = "unknown"
+
+    @classmethod
+    def parse(cls, value: Any) -> "GarmentType":
+        """Map free-text garment_type (English or Indonesian) to a category."""
+        if isinstance(value, cls):
+            return value
+        if not isinstance(value, str):
+            return cls.UNKNOWN
+        text = value.strip().lower()
+        found = _TYPE_BY_ALIAS.get(text)
+        if found is None:
+            found = next(
+                (t for alias, t in _TYPE_ALIASES_BY_LENGTH if alias in text),
+                cls.UNKNOWN,
+            )
+            if len(_TYPE_BY_ALIAS) < 4096:
+                _TYPE_BY_ALIAS[text] = found
+        return found
+
+
+_TYPE_ALIASES = {
+    GarmentType.TOP: ("top", "shirt", "t-shirt", "tshirt", "tee", "blouse", "sweater",
+                      "hoodie", "polo", "tank", "atasan", "kemeja", "kaos", "blus", "tunik"),
+    GarmentType.BOTTOM: ("bottom", "pants", "trousers", "jeans", "shorts", "skirt",
+                         "chinos", "bawahan", "celana", "rok"),
+    GarmentType.DRESS: ("dress", "gown", "jumpsuit", "gaun", "terusan", "gamis"),
+    GarmentType.OUTERWEAR: ("outerwear", "jacket", "coat", "blazer", "cardigan", "vest",
+                            "jaket", "mantel", "outer"),
+    GarmentType.SHOES: ("shoes", "shoe", "sneakers", "boots", "heels", "sandals",
+                        "loafers", "sepatu", "sandal"),
+    GarmentType.ACCESSORY: ("accessory", "accessories", "bag", "hat", "scarf", "belt",
+                            "aksesoris", "tas", "topi", "syal", "hijab"),
+}
+# Exact aliases (plus memoised free-text lookups)
+_TYPE_BY_ALIAS: Dict[str, GarmentType] = {
+    alias: t for t, aliases in _TYPE_ALIASES.items() for alias in aliases
+}
+_TYPE_BY_ALIAS.update({t.value: t for t in GarmentType})
+# Substring fallback, longest alias first ("t-shirt" before "shirt")
+_TYPE_ALIASES_BY_LENGTH = sorted(
+    ((alias, t) for t, aliases in _TYPE_ALIASES.items() for alias in aliases),
+    key=lambda item: -len(item[0]),
+)
+
+GARMENT_TYPES = tuple(GarmentType)
+_TYPE_CODES = {t: code for code, t in enumerate(GARMENT_TYPES)}
+
+
+# "#rrggbb" (or "rrggbb"); checked by pydantic-core, no Python callback
+HexColor = Annotated[str, Field(pattern=r"^#?[0-9a-fA-F]{6}$")]
+
+
+class Garment(TypedDict, total=False):
+    """
+    A wardrobe item as accepted on the recommend endpoints.
+
+    Validated once at the edge by pydantic: malformed colors are rejected
+    with a 422 before the engine runs. A TypedDict keeps validation inside
+    pydantic-core (no per-item model objects); colors are then packed and
+    types normalised in bulk by WardrobeArrays.from_dicts. Unknown keys
+    are dropped.
+    """
+
+    id: Optional[Union[str, int]]
+    color_hex: HexColor
+    garment_type: Optional[str]
+    status: Optional[str]
+
+
+def _epoch(value: Any) -> float:
+    """Timestamp column value (datetime or ISO string) to epoch seconds."""
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value).timestamp()
+        except ValueError:
+            return 0.0
+    return 0.0
+
+
+def pack_rgb(rgb: np.ndarray) -> np.ndarray:
+    """Nx3 uint8 RGB -> N uint32 0xRRGGBB."""
+    rgb = rgb.astype(np.uint32)
+    return (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+
+
+def unpack_rgb(packed: np.ndarray) -> np.ndarray:
+    """N uint32 0xRRGGBB -> Nx3 uint8 RGB."""
+    packed = np.asarray(packed, dtype=np.uint32)
+    return np.stack([(packed >> 16) & 0xFF, (packed >> 8) & 0xFF, packed & 0xFF], axis=1).astype(np.uint8)
+
+
+class WardrobeArrays:
+    """
+    Struct-of-arrays wardrobe used inside MixMatchEngine:
+    - ids: garment ids (list of str)
+    - rgb: N uint32 packed 0xRRGGBB
+    - types: N int8 codes into GARMENT_TYPES
+    - updated_at: N float64 epoch seconds of the last change (0 = unknown)
+
+    Lab/temperature arrays (`colors`, a WardrobeColors), the id lookup and
+    the fingerprint are derived lazily and kept for the lifetime of the
+    object.
+    """
+
+    __slots__ = ("ids", "rgb", "types", "updated_at", "_colors", "_positions", "_fingerprint")
+
+    def __init__(
+        self,
+        ids: List[Optional[str]],
+        rgb: np.ndarray,
+        types: np.ndarray,
+        updated_at: Optional[np.ndarray] = None
+    ):
+        self.ids = ids
+        self.rgb = rgb.astype(np.uint32, copy=False)
+        self.types = types.astype(np.int8, copy=False)
+        self.updated_at = np.zeros(len(ids)) if updated_at is None else updated_at
+        self._colors: Optional[WardrobeColors] = None
+        self._positions: Optional[Dict[Optional[str], int]] = None
+        self._fingerprint: Optional[str] = None
+
+    @classmethod
+    def from_dicts(cls, garments: Iterable[Dict[str, Any]]) -> "WardrobeArrays":
+        """
+        Build from validated Garment dicts, stored rows or legacy payloads.
+
+        Colors are packed in one vectorised pass; malformed colors fall
+        back to DEFAULT_COLOR (validated input never has any).
+        """
+        garments = list(garments)
+        ids = [None if g.get("id") is None else str(g.get("id")) for g in garments]
+        rgb = parse_hex_array([g.get("color_hex") or DEFAULT_COLOR for g in garments])
+        raw_types = [g.get("garment_type") for g in garments]
+        raw_types = [t if isinstance(t, str) else None for t in raw_types]
+        # Classify each distinct type string once
+        codes = {t: _TYPE_CODES[GarmentType.parse(t)] for t in set(raw_types)}
+        types = np.fromiter(map(codes.__getitem__, raw_types), dtype=np.int8, count=len(raw_types))
+        updated_at = None
+        if garments and "updated_at" in garments[0]:
+            updated_at = np.fromiter(
+                (_epoch(g.get("updated_at")) for g in garments), dtype=np.float64, count=len(garments)
+            )
+        return cls(ids, pack_rgb(rgb), types, updated_at)
+
+    @classmethod
+    def coerce(cls, garments: Any) -> "WardrobeArrays":
+        """Accept WardrobeArrays or a sequence of garment dicts."""
+        if isinstance(garments, cls):
+            return garments
+        return cls.from_dicts(garments)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def colors(self) -> WardrobeColors:
+        if self._colors is None:
+            self._colors = WardrobeColors.from_rgb(unpack_rgb(self.rgb))
+        return self._colors
+
+    def position(self, garment_id: Optional[str]) -> Optional[int]:
+        """Index of a garment id in this wardrobe (None if absent)."""
+        if self._positions is None:
+            self._positions = {gid: i for i, gid in enumerate(self.ids)}
+        return self._positions.get(garment_id)
+
+    @property
+    def fingerprint(self) -> str:
+        """Stable identity of the ordered (id, color, type) content."""
+        if self._fingerprint is None:
+            digest = hashlib.blake2b(self.rgb.tobytes(), digest_size=16)
+            digest.update(self.types.tobytes())
+            digest.update("\x1f".join(i or "" for i in self.ids).encode("utf-8"))
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    def color_hex(self, index: int) -> str:
+        return "#{:06x}".format(int(self.rgb[index]))
+
+    def garment_type(self, index: int) -> GarmentType:
+        return GARMENT_TYPES[self.types[index]]
+
+    def type_indices(self, garment_type: GarmentType) -> np.ndarray:
+        return np.flatnonzero(self.types == _TYPE_CODES[garment_type])
+
+    def summary(self, index: int) -> Dict[str, Any]:
+        """Response representation of one garment."""
+        return {
+            "id": self.ids[index],
+            "type": self.garment_type(index).value,
+            "color": self.color_hex(index),
+        }
@@ -1,17 +1,31 @@
 # Phase 2: AI System 3 - Mix & Match Recommendation Engine
 # Handles: Color theory, outfit curation, weekly planning
 
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Sequence, Union
 import json
 from datetime import datetime, timedelta
+import numpy as np
+from app.ai_core import color_array
+from app.ai_core.color_array import WardrobeColors
+from app.ai_core.color_index import WardrobeColorIndex, color_index_cache
+from app.ai_core.garments import WardrobeArrays
+from app.ai_core.outfit_search import outfit_search
+
+WEEK_DAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def current_week_of(now: Optional[datetime] = None) -> str:
+    """ISO date of the Monday starting the current week."""
+    today = (now or datetime.now()).date()
+    return (today - timedelta(days=today.weekday())).isoformat()
 
 
 class ColorTheory:
     """Color theory and harmony calculations"""
     
-    WARM_COLORS = ["#FF6B35", "#FF8C3A", "#FFA500", "#FFD700", "#FF4500"]
-    COOL_COLORS = ["#0066CC", "#0099FF", "#00CCFF", "#6600FF", "#9933FF"]
-    NEUTRAL_COLORS = ["#808080", "#A9A9A9", "#FFFFFF", "#000000", "#D3D3D3"]
+    WARM_COLORS = color_array.WARM_COLORS
+    COOL_COLORS = color_array.COOL_COLORS
+    NEUTRAL_COLORS = color_array.NEUTRAL_COLORS
     
     @staticmethod
     def hex_to_rgb(hex_color: str) -> tuple:
@@ -49,13 +63,15 @@ class ColorTheory:
         Returns list of hex colors that match well
         """
         temp = ColorTheory.get_color_temperature(hex_color)
-        
-        if temp == "warm":
-            return ColorTheory.COOL_COLORS[:3]
-        elif temp == "cool":
-            return ColorTheory.WARM_COLORS[:3]
-        else:
-            return ColorTheory.NEUTRAL_COLORS[:3]
+        return list(color_array.COMPLEMENTARY_PALETTES[color_array.TEMPERATURES.index(temp)])
+    
+    @staticmethod
+    def batch(hex_colors: Sequence[str]) -> WardrobeColors:
+        """
+        Parse many colors at once for vectorised temperature, harmony and
+        distance computations.
+        """
+        return WardrobeColors(hex_colors)
 
 
 class MixMatchEngine:
@@ -68,7 +84,8 @@ class MixMatchEngine:
         self,
         item_color: str,
         skin_tone: str,
-        user_garments: List[Dict[str, Any]]
+        user_garments: Union[WardrobeArrays, Sequence[Any]],
+        index: Optional[WardrobeColorIndex] = None
     ) -> Dict[str, Any]:
         """
         Generate instant outfit match suggestions.
@@ -76,29 +93,37 @@ class MixMatchEngine:
         Args:
             item_color: Hex color of current item
             skin_tone: User's skin tone ID
-            user_garments: List of user's garment items
+            user_garments: User's wardrobe (WardrobeArrays, Garment models
+                or garment dicts)
+            index: Prebuilt color index for the wardrobe (e.g. from the
+                wardrobe repository); built and cached when omitted
         
         Returns:
             Matching outfit suggestions
         """
+        temperature = self.color_theory.get_color_temperature(item_color)
         complementary = self.color_theory.get_complementary_colors(item_color)
         
-        # Filter user's garments by complementary colors
+        # Rank user's garments by Lab distance to the complementary palette;
+        # neutrals pair with any palette
+        allowed = color_array.allowed_temperatures(temperature)
+        wardrobe = WardrobeArrays.coerce(user_garments)
+        if index is None:
+            index = color_index_cache.get(wardrobe)
+        
         matches = []
-        for garment in user_garments:
-            garment_color = garment.get("color_hex", "#808080")
-            if garment_color in complementary:
-                matches.append({
-                    "garment_id": garment.get("id"),
-                    "color_hex": garment_color,
-                    "type": garment.get("garment_type"),
-                    "match_score": 0.85
-                })
+        for idx, score in index.query(complementary, temperatures=allowed, limit=5):
+            matches.append({
+                "garment_id": wardrobe.ids[idx],
+                "color_hex": wardrobe.color_hex(idx),
+                "type": wardrobe.garment_type(idx).value,
+                "match_score": score
+            })
         
         return {
             "primary_item": {
                 "color": item_color,
-                "temperature": self.color_theory.get_color_temperature(item_color)
+                "temperature": temperature
             },
             "complementary_colors": complementary,
             "matched_items": matches[:5],
@@ -107,14 +132,15 @@ class MixMatchEngine:
     
     async def generate_weekly_plan(
         self,
-        user_garments: List[Dict[str, Any]],
+        user_garments: Union[WardrobeArrays, Sequence[Any]],
         skin_tone: str
     ) -> Dict[str, Any]:
         """
         Generate AI-curated weekly outfit plan.
         
         Args:
-            user_garments: List of all user garments
+            user_garments: User's wardrobe (WardrobeArrays, Garment models
+                or garment dicts)
             skin_tone: User's skin tone
         
         Returns:
@@ -123,47 +149,71 @@ class MixMatchEngine:
         if len(user_garments) < 3:
             return {"error": "Not enough garments for weekly plan"}
         
-        weekly_plan = []
-        days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+        days = WEEK_DAYS
+        wardrobe = WardrobeArrays.coerce(user_garments)
         
-        # Simple algorithm: rotate through garments and suggest complements
-        for i, day in enumerate(days):
-            selected_item = user_garments[i % len(user_garments)]
-            item_color = selected_item.get("color_hex", "#808080")
-            
-            # Get complementary items
-            complements = self.color_theory.get_complementary_colors(item_color)
-            matching_items = [
-                g for g in user_garments 
-                if g.get("color_hex") in complements
-            ]
-            
-            outfit = {
-                "day": day,
-                "primary": {
-                    "id": selected_item.get("id"),
-                    "type": selected_item.get("garment_type"),
-                    "color": item_color
-                },
-                "complements": [
-                    {
-                        "id": m.get("id"),
-                        "type": m.get("garment_type"),
-                        "color": m.get("color_hex")
-                    }
-                    for m in matching_items[:2]
-                ],
-                "styling_note": f"Harmonious {self.color_theory.get_color_temperature(item_color)} palette"
-            }
-            
-            weekly_plan.append(outfit)
+        # Assemble typed outfits (top/bottom/shoes, dress/shoes, ...); fall
+        # back to primary + complements when garment types are unknown
+        outfits = outfit_search.plan(wardrobe, days=len(days))
+        if len(outfits) == len(days):
+            weekly_plan = [self.format_outfit(day, outfit, wardrobe) for day, outfit in zip(days, outfits)]
+        else:
+            weekly_plan = self.rotation_plan(days, wardrobe)
         
         return {
-            "week_of": (datetime.now() + timedelta(days=1)).date().isoformat(),
+            "week_of": current_week_of(),
             "outfits": weekly_plan,
             "generated_at": datetime.now().isoformat()
         }
 
+    
+    def format_outfit(
+        self,
+        day: str,
+        outfit: Dict[str, Any],
+        wardrobe: WardrobeArrays
+    ) -> Dict[str, Any]:
+        """One day of a weekly plan from an outfit_search outfit."""
+        (_, primary), *rest = outfit["items"]
+        return {
+            "day": day,
+            "primary": wardrobe.summary(primary),
+            "complements": [
+                {**wardrobe.summary(idx), "slot": slot}
+                for slot, idx in rest
+            ],
+            "outfit_score": round(outfit["score"], 3),
+            "styling_note": f"Harmonious {wardrobe.colors.temperature_name(primary)} palette"
+        }
+    
+    def rotation_plan(
+        self,
+        days: List[str],
+        wardrobe: WardrobeArrays
+    ) -> List[Dict[str, Any]]:
+        """Rotate through garments as each day's primary item and rank the
+        whole wardrobe against all primaries in one pass."""
+        colors = wardrobe.colors
+        primaries = np.arange(len(days)) % len(wardrobe)
+        scores = colors.harmony_scores(primaries)
+        scores[np.arange(len(days)), primaries] = 0.0
+        k = min(2, scores.shape[1])
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top = np.take_along_axis(top, np.argsort(-np.take_along_axis(scores, top, 1), axis=1), 1)
+        
+        weekly_plan = []
+        for i, day in enumerate(days):
+            weekly_plan.append({
+                "day": day,
+                "primary": wardrobe.summary(primaries[i]),
+                "complements": [
+                    {**wardrobe.summary(j), "match_score": round(float(scores[i, j]), 3)}
+                    for j in top[i] if scores[i, j] > 0
+                ],
+                "styling_note": f"Harmonious {colors.temperature_name(primaries[i])} palette"
+            })
+        return weekly_plan
+
 
 # Initialize engine
 engine = MixMatchEngine()
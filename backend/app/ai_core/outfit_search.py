@@ -0,0 +1,302 @@
+# Phase 2: AI System 3 - Outfit Search
+# Handles: assembling complete outfits from typed garments and planning a
+# week of them with no-repeat and diversity constraints
+
+import time
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.ai_core.color_array import WardrobeColors
+from app.ai_core.garments import GarmentType, WardrobeArrays
+
+# Outfit templates: (slot, required)
+OUTFIT_TEMPLATES: Tuple[Tuple[Tuple[str, bool], ...], ...] = (
+    (("top", True), ("bottom", True), ("shoes", False), ("outerwear", False)),
+    (("dress", True), ("shoes", False), ("outerwear", False)),
+)
+
+# score_fn(colors, items, candidates) -> len(items) x len(candidates) matrix
+# of pairwise compatibility in [0, 1]
+ScoreFn = Callable[[WardrobeColors, np.ndarray, np.ndarray], np.ndarray]
+
+
+def harmony_compatibility(
+    colors: WardrobeColors,
+    items: np.ndarray,
+    candidates: np.ndarray,
+    max_distance: float = 40.0
+) -> np.ndarray:
+    """
+    Default score function: color harmony in either direction.
+
+    Uses the wardrobe's cached palette distances, so each call is a few
+    vector operations over the candidate set.
+    """
+    palette = colors.palette_distances()
+    forward = palette[colors.temperature[items][:, None], candidates[None, :]]
+    backward = palette[colors.temperature[candidates][None, :], items[:, None]]
+    return np.clip(1.0 - np.minimum(forward, backward) / max_distance, 0.0, 1.0)
+
+
+class OutfitSearch:
+    """
+    Beam search over outfit templates:
+    - Garments grouped into slots by GarmentType, each slot pre-pruned to
+      its most versatile `max_candidates` items
+    - Slots filled one at a time; every partial outfit is extended with the
+      `expand` best candidates by mean pairwise compatibility and the best
+      `beam_width` partial outfits are kept
+    - Outfits are ranked by mean pairwise compatibility, with a small bonus
+      per filled slot
+    - Items are not repeated within a week (until a slot runs out), and
+      candidates similar in color to earlier days are penalised
+    - When the latency budget is spent, remaining days use a greedy beam
+    """
+
+    def __init__(
+        self,
+        score_fn: ScoreFn = harmony_compatibility,
+        beam_width: int = 8,
+        expand: int = 8,
+        max_candidates: int = 256,
+        diversity_weight: float = 0.3,
+        diversity_distance: float = 25.0,
+        completeness_weight: float = 0.05,
+        time_budget_ms: float = 50.0
+    ):
+        self.score_fn = score_fn
+        self.beam_width = beam_width
+        self.expand = expand
+        self.max_candidates = max_candidates
+        self.diversity_weight = diversity_weight
+        self.diversity_distance = diversity_distance
+        self.completeness_weight = completeness_weight
+        self.time_budget_ms = time_budget_ms
+
+    def group_slots(self, wardrobe: WardrobeArrays) -> Dict[str, np.ndarray]:
+        slots = {slot for template in OUTFIT_TEMPLATES for slot, _ in template}
+        groups = {slot: wardrobe.type_indices(GarmentType(slot)) for slot in slots}
+        return {slot: members for slot, members in groups.items() if len(members)}
+
+    @staticmethod
+    def feasible_templates(groups: Dict[str, np.ndarray]) -> List[Tuple[Tuple[str, bool], ...]]:
+        return [
+            template for template in OUTFIT_TEMPLATES
+            if all(len(groups.get(slot, ())) for slot, required in template if required)
+        ]
+
+    def _versatility(self, colors: WardrobeColors) -> np.ndarray:
+        """Per-item prior: how close the item sits to any complementary palette."""
+        return np.clip(1.0 - colors.palette_distances().min(axis=0) / 40.0, 0.0, 1.0)
+
+    def _prune(self, members: np.ndarray, prior: np.ndarray) -> np.ndarray:
+        if len(members) <= self.max_candidates:
+            return members
+        top = np.argpartition(-prior[members], self.max_candidates - 1)[:self.max_candidates]
+        return members[top]
+
+    def _search_outfit(
+        self,
+        colors: WardrobeColors,
+        template: Tuple[Tuple[str, bool], ...],
+        pools: Dict[str, np.ndarray],
+        penalty: np.ndarray,
+        beam_width: int
+    ) -> Optional[Tuple[float, List[Tuple[str, int]]]]:
+        """
+        Best outfit for one template.
+
+        Returns:
+            (score, [(slot, garment_index), ...]) or None if a required slot is empty
+        """
+        # Beam entries: (pair_sum, pairs, penalty_sum, items)
+        beam: List[Tuple[float, int, float, List[Tuple[str, int]]]] = [(0.0, 0, 0.0, [])]
+
+        def rank(entry):
+            pair_sum, pairs, penalty_sum, items = entry
+            compat = pair_sum / pairs if pairs else 0.0
+            # Small bonus per item so optional slots are filled when they fit
+            return compat - penalty_sum / max(1, len(items)) + self.completeness_weight * len(items)
+
+        for slot, required in template:
+            pool = pools.get(slot)
+            if pool is None or len(pool) == 0:
+                if required:
+                    return None
+                continue
+
+            # One score_fn call per slot covering every item in the beam
+            in_beam = sorted({i for entry in beam for _, i in entry[3]})
+            if in_beam:
+                row_of = {item: row for row, item in enumerate(in_beam)}
+                compat = self.score_fn(colors, np.array(in_beam, dtype=np.intp), pool)
+
+            children = [] if required else list(beam)
+            for pair_sum, pairs, penalty_sum, items in beam:
+                if items:
+                    gains = compat[[row_of[i] for _, i in items]].sum(axis=0)
+                else:
+                    gains = np.zeros(len(pool), dtype=np.float32)
+                values = gains / max(1, len(items)) - penalty[pool]
+                k = min(self.expand, len(pool))
+                best = np.argpartition(-values, k - 1)[:k]
+                for b in best:
+                    children.append((
+                        pair_sum + float(gains[b]),
+                        pairs + len(items),
+                        penalty_sum + float(penalty[pool[b]]),
+                        items + [(slot, int(pool[b]))],
+                    ))
+
+            children.sort(key=rank, reverse=True)
+            beam = children[:beam_width]
+
+        entry = max(beam, key=rank)
+        if not entry[3]:
+            return None
+        return rank(entry), entry[3]
+
+    def score_items(self, colors: WardrobeColors, items: Sequence[int]) -> float:
+        """Outfit score: mean pairwise compatibility plus the per-slot bonus."""
+        chosen = np.asarray(items, dtype=np.intp)
+        if len(chosen) < 2:
+            return self.completeness_weight * len(chosen)
+        compat = self.score_fn(colors, chosen, chosen)
+        pairs = np.triu_indices(len(chosen), k=1)
+        return float(compat[pairs].mean()) + self.completeness_weight * len(chosen)
+
+    def _mark_used(
+        self,
+        colors: WardrobeColors,
+        items: List[Tuple[str, int]],
+        used: np.ndarray,
+        similarity: np.ndarray
+    ) -> None:
+        chosen = np.array([i for _, i in items], dtype=np.intp)
+        used[chosen] = True
+        near = 1.0 - colors.distance_matrix(colors.lab[chosen]).min(axis=1) / self.diversity_distance
+        np.maximum(similarity, np.clip(near, 0.0, 1.0), out=similarity)
+
+    def plan(
+        self,
+        wardrobe: WardrobeArrays,
+        days: int = 7,
+        fixed: Optional[Dict[int, List[Tuple[str, int]]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Plan `days` outfits.
+
+        Args:
+            wardrobe: Wardrobe arrays (garment type decides the slot)
+            days: Number of outfits
+            fixed: Outfits to keep as they are, by day index; only the other
+                days are searched (their items still count as used)
+
+        Returns:
+            One {"score", "items": [(slot, garment_index)]} per day, or []
+            when no template can be filled from the wardrobe
+        """
+        started = time.perf_counter()
+        fixed = fixed or {}
+        colors = wardrobe.colors
+        groups = self.group_slots(wardrobe)
+        templates = self.feasible_templates(groups)
+        if not templates:
+            return []
+
+        prior = self._versatility(colors)
+        used = np.zeros(len(colors), dtype=bool)
+        similarity = np.zeros(len(colors), dtype=np.float32)
+        # Prefer versatile items slightly; penalise items close to earlier days
+        base_penalty = 0.1 * (1.0 - prior)
+        for items in fixed.values():
+            self._mark_used(colors, items, used, similarity)
+
+        outfits = []
+        for day in range(days):
+            if day in fixed:
+                items = fixed[day]
+                outfits.append({"score": self.score_items(colors, [i for _, i in items]), "items": items})
+                continue
+
+            pools = {}
+            for slot, members in groups.items():
+                available = members[~used[members]]
+                if len(available) == 0:
+                    # Slot exhausted: allow repeats from here on
+                    used[members] = False
+                    available = members
+                pools[slot] = self._prune(available, prior - similarity)
+
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            beam_width = self.beam_width if elapsed_ms < self.time_budget_ms else 1
+            penalty = base_penalty + self.diversity_weight * similarity
+
+            candidates = [
+                self._search_outfit(colors, template, pools, penalty, beam_width)
+                for template in templates
+            ]
+            candidates = [c for c in candidates if c is not None]
+            if not candidates:
+                break
+            _, items = max(candidates, key=lambda c: c[0])
+            outfits.append({"score": self.score_items(colors, [i for _, i in items]), "items": items})
+            self._mark_used(colors, items, used, similarity)
+
+        return outfits
+
+    def improve(
+        self,
+        wardrobe: WardrobeArrays,
+        outfits: List[Dict[str, Any]],
+        candidates: Sequence[int],
+        min_gain: float = 1e-3
+    ) -> List[int]:
+        """
+        Try new garments in existing outfits without replanning.
+
+        Each candidate may replace the item in its slot, or fill an empty
+        optional slot, on whichever day it improves most; each candidate is
+        used at most once. Outfits are updated in place.
+
+        Returns:
+            Indices of the days that changed
+        """
+        colors = wardrobe.colors
+        optional = {slot for template in OUTFIT_TEMPLATES for slot, required in template if not required}
+        in_plan = {i for outfit in outfits for _, i in outfit["items"]}
+        changed = set()
+
+        for candidate in candidates:
+            candidate = int(candidate)
+            slot = wardrobe.garment_type(candidate).value
+            if candidate in in_plan:
+                continue
+            best: Optional[Tuple[float, int, List[Tuple[str, int]]]] = None
+            for day, outfit in enumerate(outfits):
+                items = outfit["items"]
+                slots = [s for s, _ in items]
+                if slot in slots:
+                    position = slots.index(slot)
+                    trial = items[:position] + [(slot, candidate)] + items[position + 1:]
+                elif slot in optional:
+                    trial = items + [(slot, candidate)]
+                else:
+                    continue
+                gain = self.score_items(colors, [i for _, i in trial]) - outfit["score"]
+                if gain > min_gain and (best is None or gain > best[0]):
+                    best = (gain, day, trial)
+
+            if best is not None:
+                gain, day, trial = best
+                in_plan.difference_update(i for _, i in outfits[day]["items"])
+                in_plan.update(i for _, i in trial)
+                outfits[day] = {"score": outfits[day]["score"] + gain, "items": trial}
+                changed.add(day)
+
+        return sorted(changed)
+
+
+# Initialize search
+outfit_search = OutfitSearch()
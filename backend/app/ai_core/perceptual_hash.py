@@ -0,0 +1,245 @@
+# Phase 2: AI System 1 - Duplicate Garment Detection
+# Handles: 64-bit perceptual hashes of segmented garments, per-wardrobe near-duplicate index
+
+import functools
+import math
+import threading
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.ai_core.color_array import parse_hex, rgb_to_lab
+from app.core.lazy_imports import lazy_module
+
+cv2 = lazy_module("cv2")
+
+# pHash: DCT of a HASH_SAMPLE x HASH_SAMPLE grayscale thumbnail, keeping
+# the HASH_FREQUENCIES lowest vertical and even horizontal frequencies
+# (64 bits). Odd horizontal frequencies are near zero for left-right
+# symmetric garments, so their bits would be noise; even ones are also
+# unchanged by a mirrored photo.
+HASH_SAMPLE = 32
+HASH_FREQUENCIES = 8
+HASH_BITS = HASH_FREQUENCIES * HASH_FREQUENCIES
+
+# Hash scheme name; part of the scan cache key, so changing how hashes are
+# computed never serves hashes of the old scheme
+HASH_VARIANT = "phash64-even"
+
+# Multi-index hashing: the hash is split into BANDS bands of BAND_BITS
+# bits, each with its own exact-match table
+BANDS = 4
+BAND_BITS = HASH_BITS // BANDS
+BAND_MASK = (1 << BAND_BITS) - 1
+
+
+def perceptual_hash(image: np.ndarray, mask: Optional[np.ndarray] = None) -> int:
+    """
+    pHash of a garment, invariant to where it lies in the frame and to
+    the photo's resolution.
+
+    The garment is cropped to its mask's bounding box and placed on a
+    white background before the thumbnail is taken, so the hash sees the
+    garment (outline, pattern, shading) rather than the surface it was
+    photographed on.
+
+    Args:
+        image: BGR or BGRA image (the downscaled working copy)
+        mask: Garment mask (255 = garment, contiguous uint8); None hashes
+            the whole frame
+
+    Returns:
+        64-bit hash as an int (bit set when its DCT coefficient is above
+        the median)
+    """
+    if mask is not None:
+        x, y, w, h = cv2.boundingRect(mask)
+        if w > 0 and h > 0:
+            image = image[y:y + h, x:x + w]
+            mask = mask[y:y + h, x:x + w]
+        else:
+            mask = None
+
+    if image.ndim == 3:
+        code = cv2.COLOR_BGRA2GRAY if image.shape[2] == 4 else cv2.COLOR_BGR2GRAY
+        gray = cv2.cvtColor(image, code)
+    else:
+        gray = image
+    if mask is not None:
+        # Background pixels become white
+        gray = cv2.max(gray, cv2.bitwise_not(mask))
+
+    thumb = cv2.resize(gray, (HASH_SAMPLE, HASH_SAMPLE), interpolation=cv2.INTER_AREA)
+    coefficients = cv2.dct(thumb.astype(np.float32))[:HASH_FREQUENCIES, :2 * HASH_FREQUENCIES:2].ravel()
+    # The DC term (overall brightness) is left out of the median
+    bits = coefficients > np.median(coefficients[1:])
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def format_hash(value: int) -> str:
+    """Hash as 16 hex digits (the form stored in garments.phash)."""
+    return f"{value:016x}"
+
+
+def parse_hash(text: str) -> int:
+    """
+    Inverse of format_hash.
+
+    Raises:
+        ValueError: Not a 64-bit hex string
+    """
+    value = int(text, 16)
+    if not 0 <= value < 1 << HASH_BITS:
+        raise ValueError(f"Not a {HASH_BITS}-bit hash: {text}")
+    return value
+
+
+def hamming_distance(a: int, b: int) -> int:
+    return (a ^ b).bit_count()
+
+
+def hex_to_lab(hex_colors: Sequence[Optional[str]]) -> List[Optional[Tuple[float, float, float]]]:
+    """Lab of "#rrggbb" colors (one conversion for all); None when missing or malformed."""
+    rgb = [parse_hex(c) for c in hex_colors]
+    known = [i for i, c in enumerate(rgb) if c is not None]
+    labs: List[Optional[Tuple[float, float, float]]] = [None] * len(rgb)
+    if known:
+        converted = rgb_to_lab(np.array([rgb[i] for i in known], dtype=np.uint8))
+        for i, lab in zip(known, converted.tolist()):
+            labs[i] = tuple(lab)
+    return labs
+
+
+@functools.lru_cache(maxsize=None)
+def _probe_masks(radius: int) -> Tuple[int, ...]:
+    """XOR masks reaching every band value within `radius` bit flips."""
+    return tuple(
+        sum(1 << bit for bit in bits)
+        for r in range(radius + 1)
+        for bits in combinations(range(BAND_BITS), r)
+    )
+
+
+class PerceptualHashIndex:
+    """
+    Near-duplicate index over one user's garment hashes:
+    - Multi-index hashing: each hash is filed under its 4 16-bit bands.
+      Two hashes within distance d agree to within d // 4 bits in at
+      least one band, so probing each band's neighbours up to that radius
+      finds every match exactly
+    - Small indexes are compared one by one instead (fewer operations
+      than probing)
+    - Matches can be confirmed by dominant color: the hash is grayscale,
+      so the same cut in another color would otherwise match
+    - Garments are added and removed in place; nothing is rebuilt
+    """
+
+    def __init__(self, entries: Iterable[Tuple[str, int, Optional[str]]] = ()):
+        # garment id -> (hash, color hex, color Lab)
+        self._entries: Dict[str, Tuple[int, Optional[str], Optional[Tuple[float, float, float]]]] = {}
+        self._bands: List[Dict[int, Set[str]]] = [{} for _ in range(BANDS)]
+        self._lock = threading.Lock()
+        self.add_many(entries)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def __contains__(self, garment_id: str) -> bool:
+        with self._lock:
+            return garment_id in self._entries
+
+    def entry(self, garment_id: str) -> Optional[Tuple[int, Optional[str]]]:
+        """(hash, color hex) of an indexed garment."""
+        with self._lock:
+            found = self._entries.get(garment_id)
+        return found[:2] if found is not None else None
+
+    def ids(self) -> Set[str]:
+        with self._lock:
+            return set(self._entries)
+
+    def add(self, garment_id: str, value: int, color_hex: Optional[str] = None) -> None:
+        """Insert or replace a garment's hash (and dominant color)."""
+        self.add_many([(garment_id, value, color_hex)])
+
+    def add_many(self, entries: Iterable[Tuple[str, int, Optional[str]]]) -> None:
+        """Insert or replace (garment id, hash, color hex) entries."""
+        entries = list(entries)
+        labs = hex_to_lab([color_hex for _, _, color_hex in entries])
+        with self._lock:
+            for (garment_id, value, color_hex), lab in zip(entries, labs):
+                self._discard(garment_id)
+                self._entries[garment_id] = (value, color_hex, lab)
+                for band, table in enumerate(self._bands):
+                    key = (value >> (band * BAND_BITS)) & BAND_MASK
+                    table.setdefault(key, set()).add(garment_id)
+
+    def remove(self, garment_id: str) -> bool:
+        with self._lock:
+            return self._discard(garment_id)
+
+    def _discard(self, garment_id: str) -> bool:
+        found = self._entries.pop(garment_id, None)
+        if found is None:
+            return False
+        for band, table in enumerate(self._bands):
+            key = (found[0] >> (band * BAND_BITS)) & BAND_MASK
+            members = table[key]
+            members.discard(garment_id)
+            if not members:
+                del table[key]
+        return True
+
+    def query(
+        self,
+        value: int,
+        max_distance: int,
+        color_hex: Optional[str] = None,
+        max_color_distance: Optional[float] = None,
+        limit: int = 5
+    ) -> List[Tuple[str, int]]:
+        """
+        Garments whose hash is within max_distance bits of `value`.
+
+        Args:
+            value: Hash to look up
+            max_distance: Largest Hamming distance reported
+            color_hex: Dominant color of the scanned garment
+            max_color_distance: Largest Lab distance to color_hex a match
+                may have (garments without a color are not checked;
+                None = no color check)
+            limit: Maximum matches returned
+
+        Returns:
+            [(garment_id, distance)], nearest first
+        """
+        lab = hex_to_lab([color_hex])[0] if max_color_distance is not None else None
+        masks = _probe_masks(max_distance // BANDS)
+        with self._lock:
+            if len(self._entries) * BANDS <= len(masks):
+                candidates: Iterable[str] = self._entries
+            else:
+                found: Set[str] = set()
+                for band, table in enumerate(self._bands):
+                    key = (value >> (band * BAND_BITS)) & BAND_MASK
+                    for mask in masks:
+                        members = table.get(key ^ mask)
+                        if members:
+                            found.update(members)
+                candidates = found
+            matches = []
+            for garment_id in candidates:
+                other, _, other_lab = self._entries[garment_id]
+                distance = (other ^ value).bit_count()
+                if distance > max_distance:
+                    continue
+                if (
+                    lab is not None and other_lab is not None
+                    and math.dist(lab, other_lab) > max_color_distance
+                ):
+                    continue
+                matches.append((garment_id, distance))
+        matches.sort(key=lambda m: (m[1], m[0]))
+        return matches[:limit]
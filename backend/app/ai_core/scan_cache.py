@@ -0,0 +1,251 @@
+# Phase 2: AI System 1 - Scan Result Cache
+# Handles: content-addressed reuse of scan results for re-uploaded photos
+
+import hashlib
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+
+
+def _normalise(value: Any) -> Any:
+    """Canonical form of tap coordinates: sorted keys, numbers as rounded floats."""
+    if isinstance(value, dict):
+        return {str(k): _normalise(v) for k, v in sorted(value.items())}
+    if isinstance(value, (list, tuple)):
+        return [_normalise(v) for v in value]
+    if isinstance(value, bool) or value is None:
+        return value
+    if isinstance(value, (int, float)):
+        return round(float(value), 3)
+    return str(value)
+
+
+class ScanResultCache:
+    """
+    Scan result cache keyed on photo content and calibration:
+    - Key: sha256(file bytes) + normalised coin/white-tap coordinates
+    - Values: the scan's WebP renditions ({name: bytes}) plus metadata
+    - Memory tier: LRU bounded by total stored bytes
+    - Optional disk tier: one <key>.<rendition>.webp per rendition plus a
+      <key>.json index, least recently used first eviction when over its
+      byte limit
+    - Hit/miss counters per tier
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 1024 * 1024,
+        disk_dir: Optional[str] = None,
+        disk_max_bytes: int = 512 * 1024 * 1024
+    ):
+        self.max_bytes = max_bytes
+        self.disk_dir = disk_dir or None
+        self.disk_max_bytes = disk_max_bytes
+        self._entries: "OrderedDict[str, Tuple[Dict[str, bytes], str]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "evictions": 0}
+        self._disk_bytes = 0
+        # Serialises the running byte estimate and directory eviction
+        # (puts run from concurrent worker threads)
+        self._disk_lock = threading.Lock()
+
+        if self.disk_dir:
+            os.makedirs(self.disk_dir, exist_ok=True)
+            self._disk_evict()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 or self.disk_dir is not None
+
+    @staticmethod
+    def make_key(
+        file_bytes: bytes,
+        coin_coords: Dict[str, Any],
+        white_tap_coords: Dict[str, Any],
+        variant: str = ""
+    ) -> str:
+        """
+        Build the cache key for a scan.
+
+        Args:
+            file_bytes: Raw uploaded image bytes
+            coin_coords: Coin calibration data
+            white_tap_coords: White balance calibration data
+            variant: Extra discriminator for pipeline options (e.g. preset)
+        """
+        digest = hashlib.sha256(file_bytes)
+        calibration = json.dumps(
+            [_normalise(coin_coords), _normalise(white_tap_coords), variant],
+            separators=(",", ":"),
+        )
+        digest.update(calibration.encode("utf-8"))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, bytes], Dict[str, Any]]]:
+        """Return (renditions, metadata) for a cached scan, or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._counters["memory_hits"] += 1
+                return entry[0], json.loads(entry[1])
+
+        entry = self._disk_get(key)
+        with self._lock:
+            if entry is None:
+                self._counters["misses"] += 1
+                return None
+            self._counters["disk_hits"] += 1
+            self._memory_put(key, *entry)
+        return entry[0], json.loads(entry[1])
+
+    def put(self, key: str, renditions: Dict[str, bytes], metadata: Dict[str, Any]) -> None:
+        """Store a scan result in every enabled tier."""
+        encoded = json.dumps(metadata, separators=(",", ":"))
+        with self._lock:
+            self._memory_put(key, renditions, encoded)
+        self._disk_put(key, renditions, encoded)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = sum(self._counters[k] for k in ("memory_hits", "disk_hits", "misses"))
+            hits = self._counters["memory_hits"] + self._counters["disk_hits"]
+            return {
+                **self._counters,
+                "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "memory_bytes": self._bytes,
+                "memory_max_bytes": self.max_bytes,
+                "disk_enabled": self.disk_dir is not None,
+            }
+
+    @staticmethod
+    def _entry_size(renditions: Dict[str, bytes], encoded: str) -> int:
+        return sum(len(data) for data in renditions.values()) + len(encoded)
+
+    def _memory_put(self, key: str, renditions: Dict[str, bytes], encoded: str) -> None:
+        size = self._entry_size(renditions, encoded)
+        if size > self.max_bytes:
+            return
+
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= self._entry_size(*previous)
+
+        self._entries[key] = (renditions, encoded)
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self._bytes -= self._entry_size(*old)
+            self._counters["evictions"] += 1
+
+    def _disk_path(self, key: str, rendition: Optional[str] = None) -> str:
+        suffix = f".{rendition}.webp" if rendition is not None else ".json"
+        return os.path.join(self.disk_dir, key + suffix)
+
+    def _disk_get(self, key: str) -> Optional[Tuple[Dict[str, bytes], str]]:
+        if not self.disk_dir:
+            return None
+        index_path = self._disk_path(key)
+        try:
+            with open(index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            renditions = {}
+            for name in index["renditions"]:
+                with open(self._disk_path(key, name), "rb") as f:
+                    renditions[name] = f.read()
+            # Refresh mtime so disk eviction is least-recently-used
+            os.utime(index_path)
+        except (OSError, ValueError, KeyError):
+            return None
+        return renditions, json.dumps(index["metadata"], separators=(",", ":"))
+
+    def _disk_put(self, key: str, renditions: Dict[str, bytes], encoded: str) -> None:
+        if not self.disk_dir:
+            return
+        index_path = self._disk_path(key)
+        names: List[str] = list(renditions)
+        # Unique per write: concurrent puts of one key must not share files
+        # while writing
+        tmp_suffix = f".tmp-{uuid.uuid4().hex}"
+        try:
+            # Write the renditions first and publish the .json index last,
+            # each via rename, so a reader never sees a half-written entry
+            for name in names:
+                path = self._disk_path(key, name)
+                with open(path + tmp_suffix, "wb") as f:
+                    f.write(renditions[name])
+                os.replace(path + tmp_suffix, path)
+            with open(index_path + tmp_suffix, "w", encoding="utf-8") as f:
+                f.write(f'{{"renditions":{json.dumps(names)},"metadata":{encoded}}}')
+            os.replace(index_path + tmp_suffix, index_path)
+        except OSError:
+            for path in [self._disk_path(key, name) for name in names] + [index_path]:
+                try:
+                    os.remove(path + tmp_suffix)
+                except OSError:
+                    pass
+            return
+
+        # Running estimate; the directory is only rescanned when it overflows
+        with self._disk_lock:
+            self._disk_bytes += self._entry_size(renditions, encoded)
+            overflow = self._disk_bytes > self.disk_max_bytes
+        if overflow:
+            self._disk_evict()
+
+    def _disk_evict(self) -> None:
+        """Rescan the directory and drop least recently used entries; never raises."""
+        with self._disk_lock:
+            # Entries grouped by key (file name up to the first dot); the
+            # index's mtime is the entry's last use
+            entries: Dict[str, List[Any]] = {}
+            total = 0
+            try:
+                scanned = list(os.scandir(self.disk_dir))
+            except OSError:
+                return
+            for entry in scanned:
+                try:
+                    if not entry.is_file():
+                        continue
+                    stat = entry.stat()
+                except OSError:
+                    # Removed meanwhile (e.g. a tmp file renamed into place)
+                    continue
+                record = entries.setdefault(entry.name.split(".", 1)[0], [0.0, [], 0])
+                if entry.name.endswith(".json"):
+                    record[0] = stat.st_mtime
+                record[1].append(entry.path)
+                record[2] += stat.st_size
+                total += stat.st_size
+
+            if total > self.disk_max_bytes:
+                # Evict down to a low watermark so the next puts don't rescan
+                target = self.disk_max_bytes * 0.9
+                for _, paths, size in sorted(entries.values(), key=lambda record: record[0]):
+                    for path in paths:
+                        try:
+                            os.remove(path)
+                        except OSError:
+                            pass
+                    total -= size
+                    with self._lock:
+                        self._counters["evictions"] += 1
+                    if total <= target:
+                        break
+            self._disk_bytes = total
+
+
+# Initialize cache
+scan_cache = ScanResultCache(
+    max_bytes=int(settings.scan_cache_max_mb * 1024 * 1024),
+    disk_dir=settings.scan_cache_dir,
+    disk_max_bytes=int(settings.scan_cache_disk_max_mb * 1024 * 1024),
+)
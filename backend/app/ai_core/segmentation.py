@@ -0,0 +1,350 @@
+# Phase 2: AI System 1 - Garment Segmentation
+# Handles: background removal for scans; a classical OpenCV default and an
+# optional rembg (ONNX) backend with pooled, pre-warmed model sessions
+
+import queue
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Dict, Tuple
+
+import numpy as np
+
+from app.core.lazy_imports import lazy_module
+
+cv2 = lazy_module("cv2")
+
+SEGMENTATION_BACKENDS = ("classical", "grabcut", "rembg", "none")
+
+# Below this share of foreground pixels the mask is treated as a failure
+# and the frame is kept opaque (the pre-segmentation behaviour)
+MIN_FOREGROUND_RATIO = 0.005
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 3)
+
+
+class SegmentationBackend(ABC):
+    """
+    Produces a foreground mask for a BGR garment photo.
+
+    Backends are shared by every scan in a worker, so they hold no
+    per-scan state.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def mask(self, image: np.ndarray, timings: Dict[str, float]) -> np.ndarray:
+        """
+        Foreground mask for one photo.
+
+        Args:
+            image: HxWx3 BGR uint8
+            timings: Receives per-step timings in ms
+
+        Returns:
+            HxW uint8 mask, 255 = garment
+        """
+
+    def warm_up(self) -> None:
+        """Load models and run one small inference so the first scan is not slow."""
+        self.mask(np.full((64, 64, 3), 220, dtype=np.uint8), {})
+
+
+class NoSegmentation(SegmentationBackend):
+    """Keeps the whole frame (the pipeline's behaviour before segmentation)."""
+
+    name = "none"
+
+    def mask(self, image: np.ndarray, timings: Dict[str, float]) -> np.ndarray:
+        return np.full(image.shape[:2], 255, dtype=np.uint8)
+
+
+class ClassicalSegmenter(SegmentationBackend):
+    """
+    Garment mask without network access or model weights:
+    - Background colors sampled from the image border (quantised Lab bins
+      covering most of the border)
+    - Pixels far from every background color are foreground
+    - Morphological cleanup, largest component only (drops the coin and
+      white card), holes filled
+    - Optional GrabCut refinement seeded from that mask
+    - All on a copy of at most `max_side`; the mask is scaled back up
+
+    Args:
+        max_side: Long side the mask is computed at
+        border_ratio: Border strip width as a share of the short side
+        threshold: Lab distance (OpenCV 8-bit Lab units) from the nearest
+            background color at which a pixel counts as foreground
+        max_background_colors: Background color bins kept from the border
+        refine_iterations: GrabCut iterations (0 = no refinement; about
+            100 ms per 2 iterations at 320 px, so off by default)
+    """
+
+    name = "classical"
+
+    def __init__(
+        self,
+        max_side: int = 320,
+        border_ratio: float = 0.03,
+        threshold: float = 22.0,
+        max_background_colors: int = 8,
+        refine_iterations: int = 0
+    ):
+        self.max_side = max_side
+        self.border_ratio = border_ratio
+        self.threshold = threshold
+        self.max_background_colors = max_background_colors
+        self.refine_iterations = refine_iterations
+
+    def _background_colors(self, lab: np.ndarray) -> np.ndarray:
+        h, w = lab.shape[:2]
+        b = max(2, int(round(min(h, w) * self.border_ratio)))
+        border = np.concatenate([
+            lab[:b].reshape(-1, 3), lab[-b:].reshape(-1, 3),
+            lab[b:-b, :b].reshape(-1, 3), lab[b:-b, -b:].reshape(-1, 3),
+        ])
+        # 16-level bins per channel; keep the most common bins covering 90%
+        bins = (border >> 4).astype(np.int32)
+        keys = (bins[:, 0] << 8) | (bins[:, 1] << 4) | bins[:, 2]
+        counts = np.bincount(keys, minlength=4096)
+        order = np.argsort(-counts)[:self.max_background_colors]
+        covered = np.cumsum(counts[order]) / float(len(keys))
+        order = order[:int(np.searchsorted(covered, 0.9)) + 1]
+        sums = np.stack([np.bincount(keys, weights=border[:, c], minlength=4096) for c in range(3)], axis=1)
+        return (sums[order] / counts[order][:, None]).astype(np.float32)
+
+    def _largest_component(self, fg: np.ndarray) -> np.ndarray:
+        count, labels, stats, _ = cv2.connectedComponentsWithStats(fg, connectivity=8)
+        if count <= 1:
+            return fg
+        largest = 1 + int(np.argmax(stats[1:, cv2.CC_STAT_AREA]))
+        component = np.where(labels == largest, 255, 0).astype(np.uint8)
+        # Fill holes (prints, buttons close to the background color)
+        contours, _ = cv2.findContours(component, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        cv2.drawContours(component, contours, -1, 255, thickness=cv2.FILLED)
+        return component
+
+    def _refine(self, small: np.ndarray, fg: np.ndarray) -> np.ndarray:
+        kernel = np.ones((5, 5), np.uint8)
+        sure_fg = cv2.erode(fg, kernel, iterations=2)
+        maybe_bg = cv2.dilate(fg, kernel, iterations=2)
+        seeds = np.full(fg.shape, cv2.GC_BGD, dtype=np.uint8)
+        seeds[maybe_bg > 0] = cv2.GC_PR_BGD
+        seeds[fg > 0] = cv2.GC_PR_FGD
+        seeds[sure_fg > 0] = cv2.GC_FGD
+        if not (seeds == cv2.GC_FGD).any():
+            return fg
+        bgd_model = np.zeros((1, 65), np.float64)
+        fgd_model = np.zeros((1, 65), np.float64)
+        cv2.grabCut(small, seeds, None, bgd_model, fgd_model,
+                    self.refine_iterations, cv2.GC_INIT_WITH_MASK)
+        refined = np.where((seeds == cv2.GC_FGD) | (seeds == cv2.GC_PR_FGD), 255, 0).astype(np.uint8)
+        return self._largest_component(refined)
+
+    def mask(self, image: np.ndarray, timings: Dict[str, float]) -> np.ndarray:
+        started = time.perf_counter()
+        h, w = image.shape[:2]
+        factor = min(1.0, self.max_side / float(max(h, w)))
+        small = image
+        if factor < 1.0:
+            small = cv2.resize(image, (max(1, round(w * factor)), max(1, round(h * factor))),
+                               interpolation=cv2.INTER_AREA)
+
+        lab = cv2.cvtColor(small, cv2.COLOR_BGR2LAB)
+        background = self._background_colors(lab)
+        # Squared distance to every background color in one matrix product
+        pixels = lab.reshape(-1, 3).astype(np.float32)
+        sq = (pixels * pixels).sum(1)[:, None] - 2.0 * (pixels @ background.T) + (background * background).sum(1)
+        nearest = sq.min(axis=1).reshape(lab.shape[:2])
+        fg = (nearest > self.threshold ** 2).astype(np.uint8) * 255
+        fg = cv2.morphologyEx(fg, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+        fg = cv2.morphologyEx(fg, cv2.MORPH_CLOSE, np.ones((5, 5), np.uint8))
+        fg = self._largest_component(fg)
+        timings["mask_ms"] = _elapsed_ms(started)
+
+        if self.refine_iterations > 0:
+            started = time.perf_counter()
+            fg = self._refine(small, fg)
+            timings["refine_ms"] = _elapsed_ms(started)
+
+        if small is not image:
+            started = time.perf_counter()
+            fg = cv2.resize(fg, (w, h), interpolation=cv2.INTER_LINEAR)
+            cv2.threshold(fg, 127, 255, cv2.THRESH_BINARY, dst=fg)
+            timings["upscale_ms"] = _elapsed_ms(started)
+        return fg
+
+
+class GrabCutSegmenter(ClassicalSegmenter):
+    """ClassicalSegmenter with GrabCut refinement on by default."""
+
+    name = "grabcut"
+
+    def __init__(self, refine_iterations: int = 2, **kwargs: Any):
+        super().__init__(refine_iterations=refine_iterations, **kwargs)
+
+
+class RembgSegmenter(SegmentationBackend):
+    """
+    rembg (U^2-Net family, ONNX Runtime) behind a session pool.
+
+    Model sessions are created at most `pool_size` times per process and
+    reused by every scan; a scan borrows one for the duration of its
+    inference. Requires the optional `rembg` package (and onnxruntime).
+
+    Args:
+        model: rembg model name (e.g. "u2netp", "u2net", "isnet-general-use")
+        pool_size: Sessions kept per process
+    """
+
+    name = "rembg"
+
+    def __init__(self, model: str = "u2netp", pool_size: int = 1):
+        try:
+            from rembg import new_session, remove
+        except ImportError as e:
+            raise RuntimeError(
+                "The rembg segmentation backend requires rembg (pip install rembg onnxruntime)"
+            ) from e
+
+        self.model = model
+        self.pool_size = max(1, pool_size)
+        self._new_session = new_session
+        self._remove = remove
+        self._sessions: "queue.Queue" = queue.Queue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    def _acquire(self, timings: Dict[str, float]):
+        try:
+            return self._sessions.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.pool_size
+            if create:
+                self._created += 1
+        if not create:
+            started = time.perf_counter()
+            session = self._sessions.get()
+            timings["session_wait_ms"] = _elapsed_ms(started)
+            return session
+        started = time.perf_counter()
+        try:
+            session = self._new_session(self.model)
+        except BaseException:
+            with self._lock:
+                self._created -= 1
+            raise
+        timings["session_load_ms"] = _elapsed_ms(started)
+        return session
+
+    def mask(self, image: np.ndarray, timings: Dict[str, float]) -> np.ndarray:
+        session = self._acquire(timings)
+        try:
+            started = time.perf_counter()
+            rgb = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
+            mask = self._remove(rgb, session=session, only_mask=True, post_process_mask=True)
+            timings["inference_ms"] = _elapsed_ms(started)
+        finally:
+            self._sessions.put(session)
+        mask = np.asarray(mask, dtype=np.uint8)
+        if mask.ndim == 3:
+            mask = mask[:, :, 0]
+        return mask
+
+    def warm_up(self) -> None:
+        """Create the whole pool and run each session once."""
+        sessions = [self._acquire({}) for _ in range(self.pool_size)]
+        try:
+            dummy = np.full((64, 64, 3), 220, dtype=np.uint8)
+            for session in sessions:
+                self._remove(dummy, session=session, only_mask=True)
+        finally:
+            for session in sessions:
+                self._sessions.put(session)
+
+
+class Segmenter:
+    """
+    Segmentation stage of the scan pipeline.
+
+    Turns a BGR working image into BGRA with the garment mask as alpha,
+    which the color and measurement steps already understand, and reports
+    the stage's timings and foreground share.
+    """
+
+    def __init__(self, backend: SegmentationBackend):
+        self.backend = backend
+        self._warm = False
+        self._warm_lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self.backend.name
+
+    def warm_up(self) -> None:
+        """Idempotent; called once per scan worker (and at app startup)."""
+        with self._warm_lock:
+            if not self._warm:
+                self.backend.warm_up()
+                self._warm = True
+
+    def segment(self, image: np.ndarray) -> Tuple[np.ndarray, Dict[str, Any]]:
+        """
+        Remove the background from a photo.
+
+        Args:
+            image: HxWx3 BGR uint8
+
+        Returns:
+            (HxWx4 BGRA image, {"backend", "timings_ms", "foreground_ratio",
+            "fallback"})
+        """
+        started = time.perf_counter()
+        timings: Dict[str, float] = {}
+        mask = self.backend.mask(image, timings)
+
+        compose_started = time.perf_counter()
+        ratio = cv2.countNonZero(mask) / float(mask.size)
+        fallback = ratio < MIN_FOREGROUND_RATIO
+        if fallback:
+            mask = np.full(image.shape[:2], 255, dtype=np.uint8)
+        bgra = cv2.merge((*cv2.split(image), mask))
+        timings["compose_ms"] = _elapsed_ms(compose_started)
+        timings["total_ms"] = _elapsed_ms(started)
+
+        return bgra, {
+            "backend": self.backend.name,
+            "timings_ms": timings,
+            "foreground_ratio": round(ratio, 4),
+            "fallback": fallback,
+        }
+
+
+def create_segmenter(
+    backend: str = "classical",
+    model: str = "u2netp",
+    pool_size: int = 1
+) -> Segmenter:
+    """
+    Build the segmentation stage.
+
+    Args:
+        backend: "classical" (default), "grabcut" (classical plus GrabCut
+            refinement), "rembg" or "none"
+        model: rembg model name
+        pool_size: rembg sessions per process
+    """
+    if backend == "classical":
+        return Segmenter(ClassicalSegmenter())
+    if backend == "grabcut":
+        return Segmenter(GrabCutSegmenter())
+    if backend == "rembg":
+        return Segmenter(RembgSegmenter(model, pool_size))
+    if backend == "none":
+        return Segmenter(NoSegmentation())
+    raise ValueError(f"Unknown segmentation backend: {backend}")
@@ -0,0 +1,185 @@
+# Phase 2: AI System 2 - Skin Tone Analysis
+# Handles: skin pixel masking (YCrCb) on a decode-time downscaled photo,
+# depth/undertone classification and mapping to the seeded palettes
+
+import hashlib
+import math
+import threading
+from collections import OrderedDict
+from typing import Any, Dict
+
+import numpy as np
+
+from app.ai_core.garment_processor import GarmentProcessor, read_image_size, reduced_decode_flag
+from app.core.config import settings
+from app.core.lazy_imports import lazy_module
+from app.db.palettes import SkinTonePaletteRepository, palette_repository
+
+cv2 = lazy_module("cv2")
+
+# Skin cluster bounds in YCrCb (Chai & Ngan), with very dark and blown-out
+# pixels excluded
+SKIN_YCRCB_LOWER = (30, 133, 77)
+SKIN_YCRCB_UPPER = (250, 173, 127)
+
+# Below this share of skin pixels the centre of the photo is used instead
+MIN_SKIN_RATIO = 0.02
+
+# Skin pixels sampled for the median color at most
+MAX_SKIN_SAMPLES = 20000
+
+# Palette rows (scripts/002_seed_skin_tones.sql) for the depth classes;
+# medium skin maps to its undertone's palette
+DEPTH_PALETTES = {
+    "Light": "Light/Fair Skin Tone",
+    "Deep": "Deep/Dark Skin Tone",
+    "Very Deep": "Deep/Dark Skin Tone",
+}
+
+
+class SkinToneAnalyzer:
+    """
+    Skin tone from a face photo:
+    - JPEGs are decoded at 1/2..1/8 scale (DCT domain) so the analysis
+      image has a long side of about `analysis_side`
+    - Skin pixels are selected by a YCrCb range mask (opened to drop
+      speckles); with too few, the central quarter is used
+    - Depth from the individual typology angle (ITA) and undertone from
+      the hue angle of the median skin color in CIELAB
+    - Results are cached by photo content (sha256), so re-submitted
+      photos skip decoding
+
+    Args:
+        palettes: Skin tone palette rows, loaded once
+        analysis_side: Minimum long side kept by decode-time reduction
+        cache_entries: Results kept in the LRU (0 = no cache)
+    """
+
+    def __init__(
+        self,
+        palettes: SkinTonePaletteRepository = palette_repository,
+        analysis_side: int = 320,
+        cache_entries: int = 1024
+    ):
+        self.palettes = palettes
+        self.analysis_side = analysis_side
+        self.cache_entries = cache_entries
+        self._cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _decode(self, file_bytes: bytes) -> np.ndarray:
+        width, height = read_image_size(file_bytes)
+        reduction = GarmentProcessor.choose_reduction(max(width, height), self.analysis_side)
+        # Orientation doesn't matter for color statistics
+        flags = reduced_decode_flag(reduction) | cv2.IMREAD_IGNORE_ORIENTATION
+        image = cv2.imdecode(np.frombuffer(file_bytes, np.uint8), flags)
+        if image is None:
+            raise ValueError("Invalid image")
+        return image
+
+    @staticmethod
+    def skin_mask(image: np.ndarray) -> np.ndarray:
+        """uint8 mask of skin-colored pixels (255 = skin)."""
+        ycrcb = cv2.cvtColor(image, cv2.COLOR_BGR2YCrCb)
+        mask = cv2.inRange(ycrcb, SKIN_YCRCB_LOWER, SKIN_YCRCB_UPPER)
+        return cv2.morphologyEx(mask, cv2.MORPH_OPEN, np.ones((3, 3), np.uint8))
+
+    @staticmethod
+    def classify(bgr: np.ndarray) -> Dict[str, Any]:
+        """Depth class and undertone of one BGR skin color."""
+        pixel = (bgr.reshape(1, 1, 3) / 255.0).astype(np.float32)
+        lightness, a, b = (float(v) for v in cv2.cvtColor(pixel, cv2.COLOR_BGR2Lab)[0, 0])
+
+        ita = math.degrees(math.atan2(lightness - 50.0, b))
+        if ita > 41:
+            depth = "Light"
+        elif ita > 10:
+            depth = "Medium"
+        elif ita > -30:
+            depth = "Deep"
+        else:
+            depth = "Very Deep"
+
+        # Yellow-leaning skin has a larger hue angle than pink-leaning skin
+        hue = math.degrees(math.atan2(b, a))
+        if hue >= 55:
+            undertone = "Warm"
+        elif hue <= 45:
+            undertone = "Cool"
+        else:
+            undertone = "Neutral"
+        return {"skin_tone_class": depth, "undertone": undertone, "ita": round(ita, 2), "hue_angle": round(hue, 2)}
+
+    def _analyze_pixels(self, image: np.ndarray) -> Dict[str, Any]:
+        mask = self.skin_mask(image)
+        ratio = cv2.countNonZero(mask) / float(mask.size)
+        fallback = ratio < MIN_SKIN_RATIO
+        if fallback:
+            h, w = image.shape[:2]
+            pixels = image[h // 4:3 * h // 4, w // 4:3 * w // 4].reshape(-1, 3)
+        else:
+            pixels = image[mask > 0]
+        if len(pixels) > MAX_SKIN_SAMPLES:
+            pixels = pixels[::len(pixels) // MAX_SKIN_SAMPLES + 1]
+
+        bgr = np.median(pixels, axis=0)
+        result = self.classify(bgr)
+        r, g, b = (int(round(v)) for v in bgr[::-1])
+        return {
+            **result,
+            "hex_color": "#{:02x}{:02x}{:02x}".format(r, g, b),
+            "skin_ratio": round(ratio, 4),
+            "fallback": fallback,
+            "resolution": [image.shape[1], image.shape[0]],
+        }
+
+    def palette_for(self, depth: str, undertone: str) -> Dict[str, Any]:
+        """The palette row for a result; the seeded values when the row is missing."""
+        name = DEPTH_PALETTES.get(depth, f"{undertone} Undertone")
+        return self.palettes.get(name) or self.palettes.seed(name)
+
+    def analyze(self, file_bytes: bytes) -> Dict[str, Any]:
+        """
+        Blocking: analyze a face photo.
+
+        Args:
+            file_bytes: Encoded image
+
+        Returns:
+            skin_tone_class, undertone, hex_color, the matching palette
+            (skin_tone_id, palette, recommendations), analysis details and
+            whether the result came from the cache
+
+        Raises:
+            ValueError: If the bytes are not a readable image
+        """
+        key = hashlib.sha256(file_bytes).hexdigest()
+        with self._lock:
+            analysis = self._cache.get(key)
+            if analysis is not None:
+                self._cache.move_to_end(key)
+        cached = analysis is not None
+
+        if analysis is None:
+            analysis = self._analyze_pixels(self._decode(file_bytes))
+            if self.cache_entries > 0:
+                with self._lock:
+                    self._cache[key] = analysis
+                    while len(self._cache) > self.cache_entries:
+                        self._cache.popitem(last=False)
+
+        palette = self.palette_for(analysis["skin_tone_class"], analysis["undertone"])
+        return {
+            "skin_tone_class": analysis["skin_tone_class"],
+            "undertone": analysis["undertone"],
+            "hex_color": analysis["hex_color"],
+            "skin_tone_id": palette["id"],
+            "palette": palette,
+            "recommendations": {k: palette[k] for k in ("primary", "secondary", "accent")},
+            "analysis": {k: analysis[k] for k in ("ita", "hue_angle", "skin_ratio", "fallback", "resolution")},
+            "cached": cached,
+        }
+
+
+# Initialize analyzer
+skin_tone_analyzer = SkinToneAnalyzer(cache_entries=settings.skin_tone_cache_max_entries)
@@ -0,0 +1,255 @@
+# Phase 2: AI System 3 - Garment Vector Index
+# Handles: memory-mapped float32 descriptor index with exact top-k cosine / L2 search
+
+import json
+import os
+import shutil
+import time
+import uuid
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Files of one index build (a directory under the index root)
+VECTORS_FILE = "vectors.npy"
+NORMS_FILE = "norms.npy"
+IDS_FILE = "ids.npy"
+MANIFEST_FILE = "manifest.json"
+# Index root file naming the build to serve
+CURRENT_FILE = "CURRENT"
+
+METRICS = ("cosine", "l2")
+
+
+def _write_json(path: str, data: object) -> None:
+    tmp = f"{path}.tmp-{os.getpid()}"
+    with open(tmp, "w") as f:
+        json.dump(data, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def score_vectors(
+    vectors: np.ndarray,
+    norms: np.ndarray,
+    query: np.ndarray,
+    metric: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scores of `vectors` (with squared norms `norms`) against `query`.
+
+    Returns:
+        (scores, keys): cosine similarity or L2 distance, and the ranking
+        keys (ascending = closer)
+    """
+    dots = vectors @ query
+    query_norm = float(query @ query)
+    if metric == "cosine":
+        # Higher is closer; negated so both metrics rank ascending
+        scores = dots / np.sqrt(np.maximum(norms * query_norm, 1e-24))
+        return scores, -scores
+    scores = np.sqrt(np.maximum(norms - 2 * dots + query_norm, 0))
+    return scores, scores
+
+
+def current_build(root: str) -> Optional[str]:
+    """Directory of the published build under `root` (None before the first build)."""
+    try:
+        with open(os.path.join(root, CURRENT_FILE)) as f:
+            name = f.read().strip()
+    except FileNotFoundError:
+        return None
+    return os.path.join(root, name) if name else None
+
+
+class VectorIndex:
+    """
+    Read-only nearest-neighbour index over garment descriptors:
+    - One build is a directory of .npy files (vectors N x D float32,
+      squared norms, garment ids) opened as memory maps, so every worker
+      on the host shares one copy through the OS page cache
+    - Rows are grouped by owner; the manifest maps each user id to its
+      row range, so a wardrobe search is a slice, not a filter
+    - Search is exact: one matrix-vector product (BLAS) over the rows,
+      then a partial sort for the top k
+    """
+
+    def __init__(
+        self,
+        path: str,
+        vectors: np.ndarray,
+        norms: np.ndarray,
+        ids: np.ndarray,
+        manifest: Dict
+    ):
+        self.path = path
+        self.vectors = vectors
+        self.norms = norms
+        self.ids = ids
+        self.variant: str = manifest["variant"]
+        self.built_at: float = manifest["built_at"]
+        self.owners: List[str] = manifest["owners"]
+        # Row where each owner's block starts (owners sorted by row)
+        self.owner_starts = np.asarray(manifest["owner_starts"], dtype=np.int64)
+        self._owner_rows = {
+            owner: (int(start), int(stop))
+            for owner, start, stop in zip(
+                self.owners, self.owner_starts, list(self.owner_starts[1:]) + [len(self.ids)]
+            )
+        }
+        self._rows_by_id: Optional[Dict[str, int]] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def dim(self) -> int:
+        return self.vectors.shape[1]
+
+    @classmethod
+    def build(
+        cls,
+        root: str,
+        entries: Iterable[Tuple[str, str, np.ndarray]],
+        dim: int,
+        variant: str,
+        built_at: Optional[float] = None
+    ) -> str:
+        """
+        Write a new build under `root` and publish it as the current one.
+
+        Args:
+            root: Index root directory
+            entries: (garment_id, user_id, vector) rows
+            dim: Vector length; rows of another length are skipped
+            variant: Descriptor scheme the vectors were computed with
+            built_at: When the entries were read (defaults to now); rows
+                changed after it are not in the build
+
+        Returns:
+            The new build's directory
+        """
+        by_owner: Dict[str, List[Tuple[str, np.ndarray]]] = {}
+        for garment_id, user_id, vector in entries:
+            if len(vector) == dim:
+                by_owner.setdefault(str(user_id), []).append((str(garment_id), vector))
+
+        owners = sorted(by_owner)
+        ids: List[str] = []
+        owner_starts = []
+        vectors = np.empty((sum(len(rows) for rows in by_owner.values()), dim), dtype=np.float32)
+        for owner in owners:
+            owner_starts.append(len(ids))
+            for garment_id, vector in by_owner[owner]:
+                vectors[len(ids)] = vector
+                ids.append(garment_id)
+
+        name = f"build-{int(time.time())}-{uuid.uuid4().hex[:8]}"
+        path = os.path.join(root, name)
+        os.makedirs(path)
+        np.save(os.path.join(path, VECTORS_FILE), vectors)
+        np.save(os.path.join(path, NORMS_FILE), np.einsum("ij,ij->i", vectors, vectors))
+        np.save(os.path.join(path, IDS_FILE), np.array(ids, dtype="S"))
+        _write_json(os.path.join(path, MANIFEST_FILE), {
+            "variant": variant,
+            "built_at": built_at if built_at is not None else time.time(),
+            "owners": owners,
+            "owner_starts": owner_starts,
+        })
+
+        # Publish, then drop builds older than the previous one (processes
+        # still mapping them keep their pages until they reopen)
+        previous = current_build(root)
+        tmp = os.path.join(root, f"{CURRENT_FILE}.tmp-{os.getpid()}")
+        with open(tmp, "w") as f:
+            f.write(name)
+        os.replace(tmp, os.path.join(root, CURRENT_FILE))
+        keep = {name, os.path.basename(previous) if previous else None}
+        for entry in os.listdir(root):
+            if entry.startswith("build-") and entry not in keep:
+                shutil.rmtree(os.path.join(root, entry), ignore_errors=True)
+        return path
+
+    @classmethod
+    def open(cls, path: str) -> "VectorIndex":
+        """Memory-map a build directory (nothing is read until searched)."""
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        return cls(
+            path,
+            np.load(os.path.join(path, VECTORS_FILE), mmap_mode="r"),
+            np.load(os.path.join(path, NORMS_FILE), mmap_mode="r"),
+            np.load(os.path.join(path, IDS_FILE), mmap_mode="r"),
+            manifest,
+        )
+
+    def count(self, user_id: Optional[str] = None) -> int:
+        """Rows searched for `user_id` (every row for None)."""
+        if user_id is None:
+            return len(self.ids)
+        start, stop = self._owner_rows.get(user_id, (0, 0))
+        return stop - start
+
+    def row_of(self, garment_id: str) -> Optional[int]:
+        if self._rows_by_id is None:
+            self._rows_by_id = {gid.decode(): row for row, gid in enumerate(self.ids.tolist())}
+        return self._rows_by_id.get(garment_id)
+
+    def owner_of(self, row: int) -> str:
+        return self.owners[int(np.searchsorted(self.owner_starts, row, side="right")) - 1]
+
+    def vector(self, row: int) -> np.ndarray:
+        return np.array(self.vectors[row], dtype=np.float32)
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        metric: str = "cosine",
+        user_id: Optional[str] = None,
+        exclude: Sequence[str] = ()
+    ) -> List[Tuple[str, str, float]]:
+        """
+        Exact top-k nearest garments.
+
+        Args:
+            query: Descriptor to compare against (length dim)
+            k: Results returned at most
+            metric: "cosine" (similarity, higher is closer) or "l2"
+                (Euclidean distance, lower is closer)
+            user_id: Only this owner's garments; None searches every row
+            exclude: Garment ids left out (e.g. the query garment)
+
+        Returns:
+            [(garment_id, user_id, score)], closest first
+
+        Raises:
+            ValueError: Unknown metric or wrong query length
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        query = np.asarray(query, dtype=np.float32)
+        if query.shape != (self.dim,):
+            raise ValueError(f"Query must have {self.dim} values")
+
+        start, stop = (0, len(self.ids)) if user_id is None else self._owner_rows.get(user_id, (0, 0))
+        if stop <= start or k <= 0:
+            return []
+        scores, keys = score_vectors(
+            np.asarray(self.vectors[start:stop]), np.asarray(self.norms[start:stop]), query, metric
+        )
+
+        for garment_id in exclude:
+            row = self.row_of(garment_id)
+            if row is not None and start <= row < stop:
+                keys[row - start] = np.inf
+
+        count = min(k, stop - start)
+        best = np.argpartition(keys, count - 1)[:count] if count < stop - start else np.arange(stop - start)
+        best = best[np.argsort(keys[best], kind="stable")]
+        return [
+            (self.ids[start + i].decode(), user_id or self.owner_of(start + i), float(scores[i]))
+            for i in best.tolist()
+            if np.isfinite(keys[i])
+        ]
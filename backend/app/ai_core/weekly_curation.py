@@ -0,0 +1,218 @@
+# Phase 2: AI System 3 - Weekly Curation
+# Handles: persisted weekly plans per user and week, updated incrementally
+# when the wardrobe changes instead of replanned on every read
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.ai_core.garments import WardrobeArrays
+from app.ai_core.mixmatch_logic import WEEK_DAYS, current_week_of, engine
+from app.ai_core.outfit_search import OutfitSearch, outfit_search
+from app.db.curations import CurationRepository, curation_repository
+
+# Bump when the stored plan document changes shape
+DOCUMENT_VERSION = 1
+# Garment ids stored alongside the watermark timestamp at most
+MAX_WATERMARK_IDS = 2048
+
+
+class WeeklyCurator:
+    """
+    Weekly plans stored in weekly_curations, one per (user, week_of):
+    - Cache hit: the wardrobe fingerprint matches the stored plan, so the
+      stored outfits are returned as they are
+    - Garments removed or recolored: only the days wearing them are
+      replanned, with every other day held fixed
+    - Garments added or edited since the plan's watermark: each is tried in
+      its slot across the week and swapped in where it raises the score
+    - A full replan only happens for a new week, a plan without typed
+      outfits, or more than `max_incremental` changed garments
+    """
+
+    def __init__(
+        self,
+        repository: CurationRepository = curation_repository,
+        search: OutfitSearch = outfit_search,
+        max_incremental: int = 64
+    ):
+        self.repository = repository
+        self.search = search
+        self.max_incremental = max_incremental
+
+    def cached(self, user_id: str, wardrobe: WardrobeArrays, week_of: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The stored plan if it is in memory and still matches the wardrobe."""
+        week_of = week_of or current_week_of()
+        document = self.repository.peek(user_id, week_of)
+        if document is None or document.get("fingerprint") != wardrobe.fingerprint:
+            return None
+        return self._response(week_of, document, cached=True, recomputed=[])
+
+    def curate(self, user_id: str, wardrobe: WardrobeArrays, week_of: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Blocking: the user's plan for a week, updated for wardrobe changes.
+
+        Args:
+            user_id: Owner of the wardrobe
+            wardrobe: The user's current wardrobe (with updated_at)
+            week_of: ISO date of the week's Monday (default: current week)
+
+        Returns:
+            Weekly curation plan with generated_at/updated_at, whether it was
+            a cache hit, and the days recomputed by this call
+        """
+        if len(wardrobe) < 3:
+            return {"error": "Not enough garments for weekly plan"}
+
+        week_of = week_of or current_week_of()
+        document = self.repository.get(user_id, week_of)
+        if document is not None and document.get("fingerprint") == wardrobe.fingerprint:
+            return self._response(week_of, document, cached=True, recomputed=[])
+
+        updated = None
+        if document is not None and document.get("version") == DOCUMENT_VERSION and document.get("plan"):
+            updated = self._update(document, wardrobe)
+        if updated is None:
+            updated, recomputed = self._full_plan(wardrobe), list(range(len(WEEK_DAYS)))
+            if document is not None:
+                updated["generated_at"] = document.get("generated_at", updated["generated_at"])
+        else:
+            updated, recomputed = updated
+
+        self.repository.save(user_id, week_of, updated)
+        return self._response(week_of, updated, cached=False, recomputed=recomputed)
+
+    def _full_plan(self, wardrobe: WardrobeArrays) -> Dict[str, Any]:
+        outfits = self.search.plan(wardrobe, days=len(WEEK_DAYS))
+        if len(outfits) == len(WEEK_DAYS):
+            formatted = [engine.format_outfit(day, o, wardrobe) for day, o in zip(WEEK_DAYS, outfits)]
+        else:
+            # No typed outfits: rotation plans are cheap and are not stored
+            # as a plan, so any wardrobe change recomputes them
+            outfits, formatted = [], engine.rotation_plan(WEEK_DAYS, wardrobe)
+        now = datetime.now().isoformat()
+        return self._document(wardrobe, outfits, formatted, generated_at=now, updated_at=now)
+
+    def _update(
+        self,
+        document: Dict[str, Any],
+        wardrobe: WardrobeArrays
+    ) -> Optional[Tuple[Dict[str, Any], List[int]]]:
+        """
+        Bring a stored plan up to date with the wardrobe.
+
+        Returns:
+            (document, recomputed day indices), or None when a full replan
+            is needed
+        """
+        # Days whose garments all still exist unchanged are kept
+        kept: Dict[int, Dict[str, Any]] = {}
+        invalid: List[int] = []
+        for day, stored in enumerate(document["plan"]):
+            items = []
+            for slot, garment_id, rgb, code in stored["items"]:
+                i = wardrobe.position(garment_id)
+                if i is None or int(wardrobe.rgb[i]) != rgb or int(wardrobe.types[i]) != code:
+                    invalid.append(day)
+                    break
+                items.append((slot, i))
+            else:
+                kept[day] = {"score": stored["score"], "items": items}
+
+        # Garments added or edited since the plan was last written; timestamps
+        # may be coarse, so ties with the watermark are new unless the plan
+        # already saw them (or the tie was a bulk import too large to list)
+        in_plan = {i for outfit in kept.values() for _, i in outfit["items"]}
+        watermark = document.get("watermark", 0.0)
+        seen = document.get("watermark_ids")
+        fresh = np.flatnonzero(wardrobe.updated_at > watermark).tolist()
+        if seen is not None:
+            seen = set(seen)
+            fresh += [
+                i for i in np.flatnonzero(wardrobe.updated_at == watermark).tolist()
+                if wardrobe.ids[i] not in seen
+            ]
+        fresh = [i for i in fresh if i not in in_plan]
+        if len(fresh) > self.max_incremental:
+            return None
+
+        if invalid:
+            outfits = self.search.plan(
+                wardrobe, days=len(WEEK_DAYS), fixed={d: o["items"] for d, o in kept.items()}
+            )
+            if len(outfits) != len(WEEK_DAYS):
+                return None
+        else:
+            outfits = [kept[day] for day in range(len(WEEK_DAYS))]
+
+        changed = self.search.improve(wardrobe, outfits, fresh)
+        recomputed = sorted(set(invalid) | set(changed))
+
+        formatted = list(document["outfits"])
+        for day in recomputed:
+            formatted[day] = engine.format_outfit(WEEK_DAYS[day], outfits[day], wardrobe)
+        updated = self._document(
+            wardrobe, outfits, formatted,
+            generated_at=document["generated_at"],
+            updated_at=datetime.now().isoformat(),
+        )
+        return updated, recomputed
+
+    @staticmethod
+    def _document(
+        wardrobe: WardrobeArrays,
+        outfits: List[Dict[str, Any]],
+        formatted: List[Dict[str, Any]],
+        generated_at: str,
+        updated_at: str
+    ) -> Dict[str, Any]:
+        """Plan document stored in weekly_curations.curated_items."""
+        watermark = float(wardrobe.updated_at.max()) if len(wardrobe) else 0.0
+        at_watermark = np.flatnonzero(wardrobe.updated_at == watermark)
+        return {
+            "version": DOCUMENT_VERSION,
+            "fingerprint": wardrobe.fingerprint,
+            "watermark": watermark,
+            # Garments sharing the watermark timestamp (bulk imports), unless
+            # there are too many to be worth storing
+            "watermark_ids": (
+                [wardrobe.ids[i] for i in at_watermark.tolist()]
+                if len(at_watermark) <= MAX_WATERMARK_IDS else None
+            ),
+            # Items keep id, packed color and type code so a later wardrobe
+            # can tell which days still hold
+            "plan": [
+                {
+                    "score": float(outfit["score"]),
+                    "items": [
+                        [slot, wardrobe.ids[i], int(wardrobe.rgb[i]), int(wardrobe.types[i])]
+                        for slot, i in outfit["items"]
+                    ],
+                }
+                for outfit in outfits
+            ],
+            "outfits": formatted,
+            "generated_at": generated_at,
+            "updated_at": updated_at,
+        }
+
+    @staticmethod
+    def _response(
+        week_of: str,
+        document: Dict[str, Any],
+        cached: bool,
+        recomputed: List[int]
+    ) -> Dict[str, Any]:
+        return {
+            "week_of": week_of,
+            "outfits": document["outfits"],
+            "generated_at": document["generated_at"],
+            "updated_at": document["updated_at"],
+            "cached": cached,
+            "recomputed_days": [WEEK_DAYS[d] for d in recomputed],
+        }
+
+
+# Initialize curator
+weekly_curator = WeeklyCurator()
@@ -1,42 +1,111 @@
 # Phase 2: Recommendation API Routes
 # POST /api/v1/recommend/instant - Generate instant outfit matches
 # POST /api/v1/recommend/weekly - Generate weekly curation plan
+# POST /api/v1/recommend/similar - Find garments similar to a scanned one
 
-from fastapi import APIRouter, HTTPException
-from pydantic import BaseModel
-from typing import List, Dict, Any
+import asyncio
+from datetime import date, timedelta
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field, model_validator
+from typing import List, Literal, Optional, Tuple
+from app.ai_core.color_index import WardrobeColorIndex
+from app.ai_core.garment_descriptor import decode_descriptor
+from app.ai_core.garments import Garment, WardrobeArrays
 from app.ai_core.mixmatch_logic import engine
+from app.ai_core.weekly_curation import weekly_curator
+from app.core.auth import authorize_user, current_user
+from app.core.config import settings
+from app.db.garment_vectors import garment_vector_repository
+from app.db.wardrobe import wardrobe_repository
 
 router = APIRouter()
 
 
-class InstantMatchRequest(BaseModel):
+class WardrobeSource(BaseModel):
+    """
+    Where the wardrobe comes from: `user_id` loads it from the server-side
+    wardrobe store (payload size independent of wardrobe size; must be the
+    signed-in user when authentication is on, see app.core.auth);
+    `user_garments` is an inline list, validated here once (hex colors,
+    garment types) before reaching the engine.
+    """
+    user_id: Optional[str] = None
+    user_garments: Optional[List[Garment]] = None
+    
+    @model_validator(mode="after")
+    def require_source(self):
+        if self.user_id is None and self.user_garments is None:
+            raise ValueError("Either user_id or user_garments is required")
+        return self
+
+
+class InstantMatchRequest(WardrobeSource):
     item_color: str
     skin_tone: str
-    user_garments: List[Dict[str, Any]]
 
 
-class WeeklyPlanRequest(BaseModel):
-    user_garments: List[Dict[str, Any]]
+class WeeklyPlanRequest(WardrobeSource):
     skin_tone: str
+    # Monday of the planned week (any date is moved back to its Monday);
+    # defaults to the current week
+    week_of: Optional[date] = None
+
+
+class SimilarRequest(BaseModel):
+    """
+    Query garment: one of the user's stored garments (`garment_id`), or
+    the `descriptor` of a scan (metadata.descriptor) that has not been
+    saved yet. `scope` "wardrobe" searches the user's own garments,
+    "catalog" the catalogue account's (settings.similar_catalog_user_id);
+    other users' wardrobes are never searched.
+    """
+    user_id: str
+    garment_id: Optional[str] = None
+    descriptor: Optional[str] = None
+    scope: Literal["wardrobe", "catalog"] = "wardrobe"
+    metric: Literal["cosine", "l2"] = "cosine"
+    k: int = Field(10, ge=1, le=100)
+
+    @model_validator(mode="after")
+    def require_query(self):
+        if self.garment_id is None and self.descriptor is None:
+            raise ValueError("Either garment_id or descriptor is required")
+        return self
+
+
+async def _load_wardrobe(
+    request: WardrobeSource
+) -> Tuple[WardrobeArrays, Optional[WardrobeColorIndex]]:
+    """Resolve the request's wardrobe (and its cached color index for stored wardrobes)."""
+    if request.user_id is not None:
+        snapshot = await wardrobe_repository.get_wardrobe(request.user_id)
+        return snapshot.wardrobe, snapshot.color_index
+    return WardrobeArrays.from_dicts(request.user_garments), None
 
 
 @router.post("/instant")
-async def generate_instant_match(request: InstantMatchRequest):
+async def generate_instant_match(
+    request: InstantMatchRequest,
+    user: Optional[str] = Depends(current_user)
+):
     """
     Generate instant outfit match suggestions.
     
     Args:
-        request: Item color, skin tone, and available garments
+        request: Item color, skin tone, and user_id (or inline garments)
+        user: Signed-in user; user_id must match it (authentication on)
     
     Returns:
         Matching outfit suggestions
     """
+    authorize_user(request.user_id, user)
     try:
+        wardrobe, index = await _load_wardrobe(request)
         result = await engine.generate_instant_match(
             request.item_color,
             request.skin_tone,
-            request.user_garments
+            wardrobe,
+            index=index
         )
         
         return {"status": "success", "data": result}
@@ -46,19 +115,39 @@ async def generate_instant_match(request: InstantMatchRequest):
 
 
 @router.post("/weekly")
-async def generate_weekly_plan(request: WeeklyPlanRequest):
+async def generate_weekly_plan(
+    request: WeeklyPlanRequest,
+    user: Optional[str] = Depends(current_user)
+):
     """
     Generate AI-curated weekly outfit plan.
     
+    Plans for a user_id are stored per week and only updated for wardrobe
+    changes; inline wardrobes are planned on every call.
+    
     Args:
-        request: User's garments and skin tone
+        request: Skin tone and user_id (or inline garments)
+        user: Signed-in user; user_id must match it (authentication on)
     
     Returns:
         7-day outfit curation plan
     """
+    authorize_user(request.user_id, user)
     try:
+        wardrobe, _ = await _load_wardrobe(request)
+        if request.user_id is not None:
+            week_of = None
+            if request.week_of is not None:
+                week_of = (request.week_of - timedelta(days=request.week_of.weekday())).isoformat()
+            result = weekly_curator.cached(request.user_id, wardrobe, week_of)
+            if result is None:
+                result = await asyncio.to_thread(
+                    weekly_curator.curate, request.user_id, wardrobe, week_of
+                )
+            return {"status": "success", "data": result}
+        
         result = await engine.generate_weekly_plan(
-            request.user_garments,
+            wardrobe,
             request.skin_tone
         )
         
@@ -66,3 +155,72 @@ async def generate_weekly_plan(request: WeeklyPlanRequest):
     
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/similar")
+async def find_similar_garments(
+    request: SimilarRequest,
+    user: Optional[str] = Depends(current_user)
+):
+    """
+    Find the garments closest to a query garment by color and shape.
+    
+    Served from the shared descriptor index (exact top-k) over the user's
+    wardrobe or the catalog.
+    
+    Args:
+        request: User, query garment (garment_id or descriptor), scope,
+            metric, k
+        user: Signed-in user; user_id must match it (authentication on)
+    
+    Returns:
+        Up to k garment ids, closest first ("cosine": similarity, higher
+        is closer; "l2": distance, lower is closer)
+    """
+    authorize_user(request.user_id, user)
+    try:
+        if request.scope == "catalog":
+            if not settings.similar_catalog_user_id:
+                raise HTTPException(status_code=400, detail="No catalog is configured")
+            owner = settings.similar_catalog_user_id
+        else:
+            owner = request.user_id
+
+        index = await garment_vector_repository.get_index()
+        if request.descriptor is not None:
+            query = decode_descriptor(request.descriptor)
+        else:
+            found = await garment_vector_repository.garment_descriptor(request.garment_id)
+            # Only the user's own garments (or catalog items) can be the query
+            if found is None or found[0] not in {request.user_id, settings.similar_catalog_user_id or None}:
+                raise HTTPException(status_code=404, detail="Garment not found or has no descriptor")
+            _, query = found
+        
+        matches, searched = garment_vector_repository.search(
+            index,
+            query,
+            k=request.k,
+            metric=request.metric,
+            user_id=owner,
+            exclude=[request.garment_id] if request.garment_id is not None else (),
+        )
+        return {
+            "status": "success",
+            "data": {
+                "items": [
+                    {"garment_id": garment_id, "score": round(score, 4)}
+                    for garment_id, score in matches
+                ],
+                "metric": request.metric,
+                "scope": request.scope,
+                "indexed": searched,
+                "index_built_at": index.built_at,
+            },
+        }
+    
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
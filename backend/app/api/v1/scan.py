@@ -1,54 +1,242 @@
 # Phase 2: Scan API Routes
 # POST /api/v1/scan/accurate - Accurate garment scan with calibration
 # POST /api/v1/scan/quick - Quick scan without calibration
+# POST /api/v1/scan/batch - Many garments in one request, NDJSON results
+# POST /api/v1/scan/jobs - Queue a scan, returns a job id right away
+# GET /api/v1/scan/jobs/stats - Job queue depth and latency percentiles
+# GET /api/v1/scan/jobs/{job_id} - Job status and result
+# GET /api/v1/scan/cache - Scan result cache counters
 
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException
-from typing import Optional
+from fastapi import APIRouter, Depends, File, UploadFile, Form, Header, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import Optional, List, Dict, Any, Tuple
+from datetime import datetime, timezone
+import asyncio
 import json
-from app.ai_core.garment_processor import processor
+import logging
+from app.ai_core.calibration_cache import calibration_cache
+from app.ai_core.garment_processor import processor, read_image_size, run_scan_job
+from app.ai_core.scan_cache import scan_cache
+from app.core.auth import authorize_user, optional_user
+from app.core.config import settings
+from app.core.ingest import ingest_upload, UploadRejectedError
+from app.core.instrumentation import scan_metrics
+from app.core.job_worker import JobWorker
+from app.core.storage import asset_uploader, StorageError
+from app.db.adapters import DATABASE_ERRORS
+from app.db.scan_jobs import scan_job_store, JobQueueFullError, IdempotencyConflictError, JobLookupError
+from app.db.wardrobe import wardrobe_repository
+from app.core.executor import (
+    scan_executor,
+    ExecutorSaturatedError,
+    ExecutorTimeoutError,
+)
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Calibration used when a scan has no coin / white paper taps (the coin is
+# still searched for server-side; 100 px is the fallback)
+QUICK_COIN_COORDS = {"diameter_pixels": 100, "source": "default"}
+QUICK_WHITE_TAP_COORDS = {"x": 0, "y": 0, "radius": 0}
+
+
+def _cache_lookup(
+    file_bytes: bytes,
+    coin_data: Dict[str, Any],
+    white_data: Dict[str, Any],
+    preset: str
+) -> Tuple[str, Optional[Tuple[Dict[str, bytes], Dict[str, Any]]]]:
+    variant = f"{processor.pipeline_variant};preset={preset}"
+    key = scan_cache.make_key(file_bytes, coin_data, white_data, variant=variant)
+    return key, scan_cache.get(key)
+
+
+async def _process_scan(
+    file_bytes: bytes,
+    coin_data: Dict[str, Any],
+    white_data: Dict[str, Any],
+    wait_for_capacity: bool = False,
+    calibration_key: Optional[Tuple[str, str]] = None,
+    timings: bool = False,
+    preset: str = "accurate"
+) -> Tuple[Dict[str, bytes], Dict[str, Any], bool]:
+    """
+    Run a scan through the calibration cache, the result cache and the
+    scan executor, then store its renditions.
+
+    Hashing and disk-tier I/O run in a thread so large uploads don't stall
+    the event loop. Renditions are uploaded in parallel, alongside the
+    result cache write, and the call returns once they are durable.
+    
+    Args:
+        file_bytes: Raw image bytes
+        coin_data: Coin calibration data
+        white_data: White balance calibration data
+        wait_for_capacity: Retry while the executor is saturated instead of
+            raising ExecutorSaturatedError
+        calibration_key: (session_id, device_id); reuses the coin detected
+            in an earlier scan from the same session and device
+        timings: Trace this scan and return its "timings" metadata block
+            (cache hits have none); other scans are traced at the
+            configured sample rate for /metrics only
+        preset: Encode preset ("quick" or "accurate")
+    
+    Returns:
+        ({rendition name: asset URL}, metadata, cached); no URLs when
+        storage is disabled
+    
+    Raises:
+        StorageError: If a rendition could not be stored
+    """
+    image_size = None
+    if calibration_key is not None and calibration_cache.enabled:
+        image_size = read_image_size(file_bytes)
+        coin_data = calibration_cache.lookup(calibration_key, image_size, coin_data) or coin_data
+    
+    key = None
+    if scan_cache.enabled:
+        key, hit = await asyncio.to_thread(_cache_lookup, file_bytes, coin_data, white_data, preset)
+        if hit is not None:
+            return await asset_uploader.upload(hit[0]), hit[1], True
+    
+    trace = scan_metrics.should_trace(timings)
+    while True:
+        try:
+            renditions, metadata = await scan_executor.run(
+                run_scan_job, file_bytes, coin_data, white_data, trace, preset
+            )
+            break
+        except ExecutorSaturatedError:
+            if not wait_for_capacity:
+                raise
+            await asyncio.sleep(0.05)
+    
+    # Timings describe this run only: recorded, never cached
+    report = metadata.pop("timings", None)
+    scan_metrics.observe(report)
+    
+    async def remember() -> None:
+        if key is not None:
+            await asyncio.to_thread(scan_cache.put, key, renditions, metadata)
+        if image_size is not None and "coin" in metadata:
+            calibration_cache.store(calibration_key, image_size, metadata["coin"])
+    
+    assets, _ = await asyncio.gather(asset_uploader.upload(renditions), remember())
+    if timings and report is not None:
+        metadata = {**metadata, "timings": report}
+    return assets, metadata, False
+
+
+async def _find_duplicates(user_id: Optional[str], metadata: Dict[str, Any]) -> Optional[List[Dict[str, Any]]]:
+    """
+    Garments in the user's wardrobe that the scan looks like (same
+    perceptual hash, within the configured distances).
+
+    Returns:
+        [{"garment_id", "distance"}], nearest first; None when not checked
+        (no user_id, detection disabled, or the wardrobe could not be read)
+    """
+    if not user_id or not settings.scan_duplicate_detection or "phash" not in metadata:
+        return None
+    try:
+        return await wardrobe_repository.find_duplicates(
+            user_id, metadata["phash"], metadata.get("color_hex")
+        )
+    except (*DATABASE_ERRORS, OSError):
+        # The scan itself succeeded; an unreachable wardrobe only skips the
+        # check (anything else, e.g. a malformed hash, is a bug and raises)
+        logger.exception("Duplicate check skipped: wardrobe hashes could not be read")
+        return None
+
+
+def _scan_result(
+    assets: Dict[str, str],
+    metadata: Dict[str, Any],
+    cached: bool,
+    duplicates: Optional[List[Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """Response fields shared by every scan route; webp_url is the largest rendition."""
+    return {
+        "webp_url": next(iter(assets.values()), None),
+        "assets": assets,
+        "metadata": metadata,
+        "cached": cached,
+        "duplicates": duplicates
+    }
+
+
+def _saturated(e: ExecutorSaturatedError) -> HTTPException:
+    return HTTPException(
+        status_code=503,
+        detail=str(e),
+        headers={"Retry-After": str(e.retry_after)},
+    )
+
 
 @router.post("/accurate")
 async def scan_accurate(
     file: UploadFile = File(...),
     coin_coords: str = Form(...),
-    white_tap_coords: str = Form(...)
+    white_tap_coords: str = Form(...),
+    session_id: Optional[str] = Form(None),
+    device_id: Optional[str] = Form(None),
+    user_id: Optional[str] = Form(None),
+    user: Optional[str] = Depends(optional_user),
+    timings: bool = False
 ):
     """
     Accurate garment scan with coin calibration and white balance.
     
     Args:
         file: Image file (JPEG/PNG)
-        coin_coords: JSON string with coin calibration data
+        coin_coords: JSON string with coin calibration data (the tap only
+            needs to be near the coin; it is detected server-side)
         white_tap_coords: JSON string with white paper coordinates
+        session_id: Optional scanning session; with device_id, lets
+            consecutive scans reuse the detected coin calibration
+        device_id: Optional device identifier
+        user_id: Optional wardrobe owner; the scan is checked against
+            their garments for near-duplicates
+        user: Signed-in user; user_id must match it (authentication on)
+        timings: Query flag; adds per-stage timings to the metadata
     
     Returns:
-        WebP image bytes and measurement metadata
+        Stored asset URLs (webp_url = largest rendition), measurement
+        metadata and near-duplicate garments ("duplicates", null without
+        user_id)
     """
+    authorize_user(user_id, user)
     try:
         # Parse JSON coordinates
         coin_data = json.loads(coin_coords)
         white_data = json.loads(white_tap_coords)
         
-        # Read file bytes
-        file_bytes = await file.read()
-        
-        if not file_bytes:
-            raise HTTPException(status_code=400, detail="Empty file")
+        # Stream upload into one buffer (header and size checked early)
+        upload = await ingest_upload(file)
         
-        # Process garment
-        webp_bytes, metadata = await processor.process_garment_accurate(
-            file_bytes, coin_data, white_data
+        # Process garment off the event loop (or reuse a cached result)
+        assets, metadata, cached = await _process_scan(
+            upload.buffer, coin_data, white_data,
+            calibration_key=calibration_cache.make_key(session_id, device_id),
+            timings=timings,
+            preset="accurate"
         )
+        duplicates = await _find_duplicates(user_id, metadata)
         
-        return {
-            "status": "success",
-            "webp_url": "file://processed_image.webp",  # In production: upload to Supabase Storage
-            "metadata": metadata
-        }
+        return {"status": "success", **_scan_result(assets, metadata, cached, duplicates)}
     
+    except HTTPException:
+        raise
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ExecutorSaturatedError as e:
+        raise _saturated(e)
+    except ExecutorTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except StorageError as e:
+        raise HTTPException(status_code=502, detail=str(e))
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON in coordinates")
     except ValueError as e:
@@ -58,34 +246,358 @@ async def scan_accurate(
 
 
 @router.post("/quick")
-async def scan_quick(file: UploadFile = File(...)):
+async def scan_quick(
+    file: UploadFile = File(...),
+    user_id: Optional[str] = Form(None),
+    user: Optional[str] = Depends(optional_user),
+    timings: bool = False
+):
     """
     Quick garment scan without calibration.
     
     Args:
         file: Image file (JPEG/PNG)
+        user_id: Optional wardrobe owner (see /accurate)
+        user: Signed-in user; user_id must match it (authentication on)
+        timings: Query flag; adds per-stage timings to the metadata
     
     Returns:
-        Processed image and basic metadata
+        Processed image, basic metadata and near-duplicate garments
     """
+    authorize_user(user_id, user)
     try:
-        file_bytes = await file.read()
-        
-        if not file_bytes:
-            raise HTTPException(status_code=400, detail="Empty file")
+        upload = await ingest_upload(file)
         
         # Simplified processing without calibration
-        webp_bytes, metadata = await processor.process_garment_accurate(
-            file_bytes, 
-            {"diameter_pixels": 100, "type": "generic"},
-            {"x": 0, "y": 0, "radius": 0}
+        assets, metadata, cached = await _process_scan(
+            upload.buffer,
+            QUICK_COIN_COORDS,
+            QUICK_WHITE_TAP_COORDS,
+            timings=timings,
+            preset="quick"
         )
+        duplicates = await _find_duplicates(user_id, metadata)
         
-        return {
-            "status": "success",
-            "webp_url": "file://processed_image.webp",
-            "metadata": metadata
-        }
+        return {"status": "success", **_scan_result(assets, metadata, cached, duplicates)}
     
+    except HTTPException:
+        raise
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except ExecutorSaturatedError as e:
+        raise _saturated(e)
+    except ExecutorTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except StorageError as e:
+        raise HTTPException(status_code=502, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Processing error: {str(e)}")
+
+
+def _parse_batch_coords(coords: Optional[str], count: int) -> List[Tuple[Dict[str, Any], Dict[str, Any], str]]:
+    """
+    Parse the optional per-image calibration list for /batch.
+
+    `coords` is a JSON array aligned with the uploaded files; each entry
+    is null or {"coin_coords": {...}, "white_tap_coords": {...}}. Missing
+    entries fall back to quick-scan calibration (and the quick encode
+    preset); entries with a coin use the accurate preset.
+    """
+    entries = json.loads(coords) if coords else []
+    if not isinstance(entries, list) or len(entries) > count:
+        raise ValueError("coords must be a JSON array with at most one entry per file")
+
+    parsed = []
+    for i in range(count):
+        entry = entries[i] if i < len(entries) else None
+        entry = entry or {}
+        if not isinstance(entry, dict):
+            raise ValueError(f"coords[{i}] must be an object or null")
+        parsed.append((
+            entry.get("coin_coords") or QUICK_COIN_COORDS,
+            entry.get("white_tap_coords") or QUICK_WHITE_TAP_COORDS,
+            "accurate" if entry.get("coin_coords") else "quick",
+        ))
+    return parsed
+
+
+def _error_result(e: Exception) -> Tuple[int, str]:
+    """Map a pipeline exception to the (status code, detail) the single-item routes use."""
+    if isinstance(e, UploadRejectedError):
+        return e.status_code, str(e)
+    if isinstance(e, ExecutorTimeoutError):
+        return 504, str(e)
+    if isinstance(e, StorageError):
+        return 502, str(e)
+    if isinstance(e, ValueError):
+        return 400, str(e)
+    return 500, f"Processing error: {str(e)}"
+
+
+@router.post("/batch")
+async def scan_batch(
+    files: List[UploadFile] = File(...),
+    coords: Optional[str] = Form(None),
+    session_id: Optional[str] = Form(None),
+    device_id: Optional[str] = Form(None),
+    user_id: Optional[str] = Form(None),
+    user: Optional[str] = Depends(optional_user),
+    timings: bool = False
+):
+    """
+    Scan many garments in one request (wardrobe onboarding).
+    
+    Args:
+        files: Image files (JPEG/PNG)
+        coords: Optional JSON array, one entry per file, of
+            {"coin_coords": {...}, "white_tap_coords": {...}} or null
+        session_id: Optional scanning session (see /accurate)
+        device_id: Optional device identifier
+        user_id: Optional wardrobe owner; each item is checked for
+            near-duplicates (see /accurate)
+        user: Signed-in user; user_id must match it (authentication on)
+        timings: Query flag; adds per-stage timings to each item's metadata
+    
+    Returns:
+        NDJSON stream: one line per item as soon as it finishes
+        ({"index", "filename", "status", ...}), then a summary line
+        ({"status": "done", "total", "succeeded", "failed"})
+    """
+    authorize_user(user_id, user)
+    if len(files) > settings.scan_batch_max_items:
+        raise HTTPException(
+            status_code=413,
+            detail=f"Batch too large: {len(files)} files, limit is {settings.scan_batch_max_items}"
+        )
+    
+    try:
+        calibrations = _parse_batch_coords(coords, len(files))
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON in coordinates")
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    calibration_key = calibration_cache.make_key(session_id, device_id)
+    
+    async def stream_results():
+        # Batches share the executor with single scans; the per-batch window
+        # keeps one large upload from taking every slot
+        window = asyncio.Semaphore(max(1, scan_executor.max_workers))
+        
+        async def scan_item(index: int) -> Dict[str, Any]:
+            result = {"index": index, "filename": files[index].filename}
+            coin_data, white_data, preset = calibrations[index]
+            try:
+                # Read inside the window so only in-flight uploads are held
+                # in memory (the form, spooled by Starlette, is closed once
+                # the response has been sent). A rejected file becomes an
+                # error line rather than failing the batch.
+                async with window:
+                    upload = await ingest_upload(files[index])
+                    assets, metadata, cached = await _process_scan(
+                        upload.buffer, coin_data, white_data, wait_for_capacity=True,
+                        calibration_key=calibration_key, timings=timings, preset=preset
+                    )
+                duplicates = await _find_duplicates(user_id, metadata)
+            except Exception as e:
+                code, detail = _error_result(e)
+                return {**result, "status": "error", "code": code, "detail": detail}
+            return {**result, "status": "success", **_scan_result(assets, metadata, cached, duplicates)}
+        
+        tasks = [asyncio.ensure_future(scan_item(i)) for i in range(len(files))]
+        failed = 0
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                item = await next_done
+                failed += item["status"] != "success"
+                yield json.dumps(item) + "\n"
+        finally:
+            # Client went away: stop queueing work nobody will read
+            for task in tasks:
+                task.cancel()
+        
+        yield json.dumps({
+            "status": "done",
+            "total": len(files),
+            "succeeded": len(files) - failed,
+            "failed": failed
+        }) + "\n"
+    
+    return StreamingResponse(stream_results(), media_type="application/x-ndjson")
+
+
+@router.get("/cache")
+async def scan_cache_stats():
+    """
+    Scan result cache counters.
+    
+    Returns:
+        Hit/miss counts per tier, hit rate and memory usage, plus the
+        calibration cache counters
+    """
+    return {
+        "status": "success",
+        "data": {**scan_cache.stats(), "calibration": calibration_cache.stats()}
+    }
+
+
+async def _run_queued_scan(job: Dict[str, Any]) -> Dict[str, Any]:
+    """Job handler: run a queued scan exactly like /accurate or /quick would."""
+    params = job["params"]
+    assets, metadata, cached = await _process_scan(
+        job["payload"], params["coin_coords"], params["white_tap_coords"],
+        wait_for_capacity=True,
+        calibration_key=calibration_cache.make_key(params.get("session_id"), params.get("device_id")),
+        timings=params.get("timings", False),
+        preset=params["preset"]
+    )
+    duplicates = await _find_duplicates(params.get("user_id"), metadata)
+    return _scan_result(assets, metadata, cached, duplicates)
+
+
+# Initialize job worker (started with the app)
+scan_job_worker = JobWorker(
+    scan_job_store,
+    _run_queued_scan,
+    _error_result,
+    concurrency=settings.scan_jobs_workers or scan_executor.max_workers,
+    lease_seconds=settings.scan_jobs_lease_seconds,
+    retry_backoff=settings.scan_jobs_retry_backoff,
+)
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    return datetime.fromtimestamp(value, timezone.utc).isoformat() if value is not None else None
+
+
+def _job_data(job: Dict[str, Any]) -> Dict[str, Any]:
+    data = {
+        "job_id": job["id"],
+        "state": job["status"],
+        "attempts": job["attempts"],
+        "created_at": _timestamp(job["created_at"]),
+        "started_at": _timestamp(job["started_at"]),
+        "finished_at": _timestamp(job["finished_at"]),
+        "expires_at": _timestamp(job["expires_at"]),
+    }
+    if job["status"] == "succeeded":
+        data["result"] = job["result"]
+    if job["error"] is not None:
+        # While retrying this is the last attempt's error
+        data["error"] = job["error"]
+    return data
+
+
+@router.post("/jobs", status_code=202)
+async def submit_scan_job(
+    file: UploadFile = File(...),
+    coin_coords: Optional[str] = Form(None),
+    white_tap_coords: Optional[str] = Form(None),
+    session_id: Optional[str] = Form(None),
+    device_id: Optional[str] = Form(None),
+    user_id: Optional[str] = Form(None),
+    user: Optional[str] = Depends(optional_user),
+    idempotency_key: Optional[str] = Header(None),
+    timings: bool = False
+):
+    """
+    Queue a garment scan and return at once; poll /jobs/{job_id} for the
+    result.
+    
+    Args:
+        file: Image file (JPEG/PNG)
+        coin_coords: Optional JSON coin calibration; with it the scan runs
+            like /accurate, without it like /quick
+        white_tap_coords: Optional JSON white paper coordinates
+        session_id: Optional scanning session (see /accurate)
+        device_id: Optional device identifier
+        user_id: Optional wardrobe owner; the result lists near-duplicate
+            garments (see /accurate)
+        user: Signed-in user; user_id must match it (authentication on)
+        idempotency_key: Idempotency-Key header; resubmitting the same
+            upload with the same key (as the same user) returns the
+            original job
+        timings: Query flag; adds per-stage timings to the result metadata
+    
+    Returns:
+        202 with the job (state "queued"), or the existing job for a
+        repeated Idempotency-Key ("created": false)
+    """
+    authorize_user(user_id, user)
+    try:
+        coin_data = json.loads(coin_coords) if coin_coords else None
+        white_data = json.loads(white_tap_coords) if white_tap_coords else None
+        upload = await ingest_upload(file)
+        
+        params = {
+            "coin_coords": coin_data or QUICK_COIN_COORDS,
+            "white_tap_coords": white_data or QUICK_WHITE_TAP_COORDS,
+            "preset": "accurate" if coin_data else "quick",
+            "session_id": session_id,
+            "device_id": device_id,
+            "user_id": user_id,
+            "timings": timings,
+        }
+        # The job belongs to the signed-in user, or to user_id when
+        # authentication is off
+        job = await asyncio.to_thread(
+            scan_job_store.submit, upload.buffer, params, idempotency_key, user or user_id
+        )
+    
+    except UploadRejectedError as e:
+        raise HTTPException(status_code=e.status_code, detail=str(e))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    except IdempotencyConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except JobLookupError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(scan_job_store.retry_after)})
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON in coordinates")
+    
+    if job["created"]:
+        scan_job_worker.notify()
+    return JSONResponse(
+        status_code=202,
+        content={"status": "success", "created": job["created"], "data": _job_data(job)},
+        headers={"Location": f"/api/v1/scan/jobs/{job['id']}"},
+    )
+
+
+@router.get("/jobs/stats")
+async def scan_job_stats():
+    """
+    Scan job queue counters.
+    
+    Returns:
+        Jobs per state, queue depth, age of the oldest queued job, and
+        p50/p90/p99 queue wait and end-to-end latency of recent jobs
+    """
+    return {"status": "success", "data": await asyncio.to_thread(scan_job_store.stats)}
+
+
+@router.get("/jobs/{job_id}")
+async def get_scan_job(
+    job_id: str,
+    user: Optional[str] = Depends(optional_user)
+):
+    """
+    Status of a queued scan.
+    
+    Args:
+        job_id: Id returned by POST /jobs
+        user: Signed-in user; must be the submitter of a job that has
+            one (authentication on)
+    
+    Returns:
+        The job: state ("queued", "running", "succeeded", "failed"),
+        attempts, timestamps, and the scan result (as returned by
+        /accurate) once succeeded or the error once failed
+    """
+    job = await asyncio.to_thread(scan_job_store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Scan job not found or expired")
+    authorize_user(job["user_id"], user)
+    return {"status": "success", "data": _job_data(job)}
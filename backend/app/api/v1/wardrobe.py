@@ -0,0 +1,110 @@
+# Phase 2: Wardrobe API Routes
+# POST /api/v1/wardrobe/garments - Save scanned garments to the user's wardrobe
+# DELETE /api/v1/wardrobe/garments/{garment_id} - Remove a garment
+
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel, Field
+from typing import Any, Dict, List, Literal, Optional
+from app.ai_core.garment_descriptor import decode_descriptor
+from app.ai_core.perceptual_hash import parse_hash
+from app.core.auth import authorize_user, current_user
+from app.db.wardrobe import wardrobe_repository
+
+router = APIRouter()
+
+
+class GarmentWrite(BaseModel):
+    """
+    A scanned garment as stored in the wardrobe: the scan response's
+    webp_url / assets and its metadata (color_hex, measurements, phash,
+    descriptor).
+    """
+    file_url: str = ""
+    assets: Optional[Dict[str, str]] = None
+    color_hex: Optional[str] = None
+    measurements_json: Optional[Dict[str, Any]] = None
+    garment_type: Optional[str] = None
+    status: Literal["DRAF", "PERMANEN"] = "DRAF"
+    phash: Optional[str] = None
+    descriptor: Optional[str] = None
+
+
+class SaveGarmentsRequest(BaseModel):
+    user_id: str
+    garments: List[GarmentWrite] = Field(..., min_length=1, max_length=100)
+
+
+@router.post("/garments")
+async def save_garments(
+    request: SaveGarmentsRequest,
+    user: Optional[str] = Depends(current_user)
+):
+    """
+    Save scanned garments to the user's wardrobe.
+
+    Writing through the backend (rather than straight to Supabase) updates
+    the duplicate index and the similar-garment index at once, so the
+    next scan already sees the garment.
+
+    Args:
+        request: Owner and the garments to add
+        user: Signed-in user; user_id must match it (authentication on)
+
+    Returns:
+        The stored garments with their ids
+    """
+    authorize_user(request.user_id, user)
+    try:
+        garments = [garment.model_dump() for garment in request.garments]
+        for garment in garments:
+            # Malformed hashes would be stored but never matched
+            if garment["phash"] is not None:
+                parse_hash(garment["phash"])
+            if garment["descriptor"] is not None:
+                decode_descriptor(garment["descriptor"])
+
+        ids = await asyncio.to_thread(wardrobe_repository.save_garments, request.user_id, garments)
+
+        return {
+            "status": "success",
+            "data": [
+                {"id": garment_id, "user_id": request.user_id, **garment}
+                for garment_id, garment in zip(ids, garments)
+            ],
+        }
+
+    except HTTPException:
+        raise
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Save error: {str(e)}")
+
+
+@router.delete("/garments/{garment_id}")
+async def delete_garment(
+    garment_id: str,
+    user_id: str,
+    user: Optional[str] = Depends(current_user)
+):
+    """
+    Remove a garment from the user's wardrobe.
+
+    Args:
+        garment_id: Garment to remove
+        user_id: Owner
+        user: Signed-in user; user_id must match it (authentication on)
+    """
+    authorize_user(user_id, user)
+    try:
+        deleted = await asyncio.to_thread(wardrobe_repository.delete_garment, user_id, garment_id)
+        if not deleted:
+            raise HTTPException(status_code=404, detail="Garment not found")
+
+        return {"status": "success", "data": {"id": garment_id}}
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Delete error: {str(e)}")
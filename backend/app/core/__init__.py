@@ -0,0 +1 @@
+# Core infrastructure module
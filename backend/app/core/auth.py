@@ -0,0 +1,115 @@
+# Request authentication
+# Verifies Supabase access tokens (HS256 JWTs signed with the project's JWT
+# secret) so user-scoped routes act only for the signed-in user
+
+import base64
+import binascii
+import hashlib
+import hmac
+import json
+import time
+from typing import Optional
+
+from fastapi import Header, HTTPException
+
+from app.core.config import settings
+
+
+class AuthError(ValueError):
+    """Access token missing, malformed, expired or not signed with the secret."""
+
+
+def _b64decode(segment: str) -> bytes:
+    return base64.urlsafe_b64decode(segment + "=" * (-len(segment) % 4))
+
+
+def verify_access_token(token: str, secret: str, audience: str = "authenticated") -> str:
+    """
+    Check a Supabase access token and return its user id.
+
+    Args:
+        token: Compact JWT (header.payload.signature)
+        secret: Project JWT secret (Supabase dashboard > API settings)
+        audience: Required "aud" claim (empty = not checked)
+
+    Returns:
+        The token's "sub" claim (auth.users id = profiles.id)
+
+    Raises:
+        AuthError: Malformed, wrongly signed, expired or foreign token
+    """
+    try:
+        header, payload, signature = token.split(".")
+        algorithm = json.loads(_b64decode(header)).get("alg")
+        claims = json.loads(_b64decode(payload))
+        signature_bytes = _b64decode(signature)
+    except (ValueError, AttributeError, binascii.Error):
+        raise AuthError("Malformed access token")
+
+    if algorithm != "HS256":
+        raise AuthError("Unsupported access token algorithm")
+    expected = hmac.new(secret.encode(), f"{header}.{payload}".encode("ascii"), hashlib.sha256).digest()
+    if not hmac.compare_digest(expected, signature_bytes):
+        raise AuthError("Invalid access token signature")
+
+    expires_at = claims.get("exp")
+    if not isinstance(expires_at, (int, float)) or expires_at <= time.time():
+        raise AuthError("Access token expired")
+    if audience:
+        audiences = claims.get("aud")
+        if audience not in (audiences if isinstance(audiences, list) else [audiences]):
+            raise AuthError("Access token audience mismatch")
+    user_id = claims.get("sub")
+    if not user_id:
+        raise AuthError("Access token has no subject")
+    return str(user_id)
+
+
+async def current_user(authorization: Optional[str] = Header(None)) -> Optional[str]:
+    """
+    Route dependency: the signed-in user's id from "Authorization: Bearer".
+
+    Returns None when authentication is off (no SUPABASE_JWT_SECRET); the
+    API must then only be reachable by trusted callers, since user ids in
+    requests are taken as given.
+
+    Raises:
+        HTTPException: 401 without a valid access token
+    """
+    if not settings.supabase_jwt_secret:
+        return None
+    scheme, _, token = (authorization or "").partition(" ")
+    if scheme.lower() != "bearer" or not token.strip():
+        raise HTTPException(status_code=401, detail="Missing access token", headers={"WWW-Authenticate": "Bearer"})
+    try:
+        return verify_access_token(token.strip(), settings.supabase_jwt_secret, settings.supabase_jwt_audience)
+    except AuthError as e:
+        raise HTTPException(status_code=401, detail=str(e), headers={"WWW-Authenticate": "Bearer"})
+
+
+async def optional_user(authorization: Optional[str] = Header(None)) -> Optional[str]:
+    """Route dependency like current_user, for routes open to anonymous callers (no Authorization header = None)."""
+    if not settings.supabase_jwt_secret or not authorization:
+        return None
+    return await current_user(authorization)
+
+
+def authorize_user(user_id: Optional[str], authenticated: Optional[str]) -> None:
+    """
+    Refuse a request that names another user's data.
+
+    Args:
+        user_id: User id named in the request (None = none named)
+        authenticated: Result of current_user / optional_user
+
+    Raises:
+        HTTPException: 401 when authentication is on and the request
+            names a user without a token, 403 when user_id is not the
+            signed-in user
+    """
+    if not settings.supabase_jwt_secret or user_id is None:
+        return
+    if authenticated is None:
+        raise HTTPException(status_code=401, detail="Missing access token", headers={"WWW-Authenticate": "Bearer"})
+    if user_id != authenticated:
+        raise HTTPException(status_code=403, detail="user_id does not match the signed-in user")
@@ -0,0 +1,279 @@
+# Runtime configuration
+# Reads backend settings from environment variables (and .env when present)
+
+import os
+from dataclasses import dataclass
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_str(name: str, default: str) -> str:
+    value = os.getenv(name)
+    return value.strip() if value else default
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+def _env_float(name: str, default: float) -> float:
+    value = os.getenv(name)
+    return float(value) if value else default
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    return value.strip().lower() in ("1", "true", "yes", "on") if value else default
+
+
+@dataclass(frozen=True)
+class Settings:
+    """
+    Backend settings.
+
+    Deployment:
+        worker_role: Routers this process serves: "all" (default), "scan"
+            (scan and skin tone routes) or "recommend"; image libraries
+            are only loaded by processes that serve scans
+
+    Scan execution:
+        scan_execution_mode: "process" (default), "thread" or "inline"
+        scan_max_workers: Worker count for the scan pool (0 = CPU count)
+        scan_max_queue: Jobs allowed to wait for a free worker
+        scan_job_timeout: Seconds before a scan request gives up
+        scan_retry_after: Retry-After hint (seconds) for saturated responses
+        scan_memory_budget_mb: Per-scan image memory budget (0 = unlimited)
+        scan_working_max_side: Long side of the analysis copy (0 = full resolution)
+        scan_asset_max_side: Long side floor for the stored asset; enables
+            decode-time downscaling (0 = full resolution)
+        scan_full_max_side: Long side of the "full" WebP rendition
+            (0 = asset resolution)
+        scan_gallery_max_side: Long side of the "gallery" rendition
+        scan_thumbnail_max_side: Long side of the "thumbnail" rendition
+        scan_batch_max_items: Maximum files accepted by /scan/batch
+        scan_cache_max_mb: In-memory scan result cache size (0 = disabled)
+        scan_cache_dir: Directory for the on-disk cache tier (empty = disabled)
+        scan_cache_disk_max_mb: On-disk cache tier size limit
+        scan_segmentation: Background removal backend, "classical"
+            (default, OpenCV only), "rembg" (needs rembg + onnxruntime) or
+            "none"
+        scan_segmentation_model: rembg model name
+        scan_segmentation_pool_size: rembg sessions per process (0 = one
+            per scan worker thread in thread mode, otherwise 1)
+        scan_warmup: Start scan workers and load segmentation models at
+            app startup instead of on the first scan
+        scan_coin_detection: Detect the coin server-side (Hough circles)
+            instead of trusting the client's diameter_pixels
+        scan_calibration_cache_ttl: Seconds a detected calibration is reused
+            for the same session and device (0 = disabled)
+        scan_calibration_cache_max_entries: Calibrations kept in memory
+        scan_trace_sample_rate: Share of scans traced per stage for the
+            /metrics histograms (0 = only scans that ask for timings)
+        scan_trace_memory: Track peak allocations (tracemalloc) in traced
+            scans
+
+    Duplicate detection (scans sent with a user_id):
+        scan_duplicate_detection: Look up each scan's perceptual hash in
+            the user's wardrobe and report near-duplicates
+        scan_duplicate_max_distance: Largest hash distance (bits out of
+            64) reported as a duplicate
+        scan_duplicate_max_color_distance: Largest Lab distance between
+            dominant colors of duplicates (0 = hash only)
+
+    Scan jobs (POST /scan/jobs):
+        scan_jobs_db_path: SQLite file holding the durable job queue
+        scan_jobs_workers: Jobs run at once per API process (0 = one per
+            scan worker)
+        scan_jobs_max_queued: Unfinished jobs accepted before 503 (0 = unbounded)
+        scan_jobs_max_attempts: Attempts per job, retries included
+        scan_jobs_retry_backoff: Seconds before the first retry, doubled
+            for each further attempt
+        scan_jobs_lease_seconds: Seconds a claimed job stays with its
+            worker before another process may take it over (keep above
+            scan_job_timeout)
+        scan_jobs_result_ttl: Seconds finished jobs (and idempotency keys)
+            are kept
+
+    Asset storage:
+        storage_backend: Where scan renditions are stored: "local"
+            (default), "s3" (any S3-compatible endpoint), "supabase"
+            (Supabase Storage REST API) or "none"
+        storage_local_dir: Directory for the local backend
+        storage_public_url: Base URL assets are served from (empty = the
+            backend's own URLs; for local, paths under /assets on this API)
+        storage_endpoint: S3 endpoint URL, or the Supabase project URL
+        storage_bucket: Bucket name
+        storage_region: S3 signing region
+        storage_access_key: S3 access key id
+        storage_secret_key: S3 secret key, or the Supabase service role key
+        storage_prefix: Key prefix for scan assets
+        storage_max_connections: Pooled connections and parallel uploads
+            per process
+        storage_timeout: Seconds per upload request
+
+    Uploads:
+        upload_max_bytes: Largest accepted image file
+        upload_max_pixels: Largest accepted image (width x height)
+        upload_chunk_bytes: Read size; the first chunk is sniffed for the header
+
+    Profile:
+        skin_tone_cache_max_entries: Skin tone results kept per process,
+            keyed by photo content (0 = no cache)
+
+    Authentication:
+        supabase_jwt_secret: Supabase project JWT secret; when set, routes
+            that take a user_id require "Authorization: Bearer <access
+            token>" and only serve the token's user. Empty = user ids are
+            trusted as sent (only for callers behind a trusted gateway)
+        supabase_jwt_audience: Required "aud" claim of access tokens
+
+    Database:
+        database_url: "sqlite:///path.db" (default ./data/lokafit.db, the
+            directory is created), "sqlite:///:memory:" or a postgresql://
+            URL (needs psycopg2)
+        database_pool_size: Pooled connections per process
+        wardrobe_cache_ttl: Seconds a user's wardrobe projection is reused
+        wardrobe_cache_max_users: Wardrobe projections kept in memory
+
+    Similarity search (/recommend/similar):
+        similar_index_dir: Directory of the garment descriptor index
+            (memory-mapped, shared by every worker on the host)
+        similar_index_ttl: Seconds an index build is served before it is
+            rebuilt from the garments table in the background
+        similar_catalog_user_id: Account whose garments form the shared
+            catalog (scope "catalog"); empty = wardrobe search only
+    """
+
+    worker_role: str = "all"
+    scan_execution_mode: str = "process"
+    scan_max_workers: int = 0
+    scan_max_queue: int = 8
+    scan_job_timeout: float = 30.0
+    scan_retry_after: int = 2
+    scan_memory_budget_mb: float = 0.0
+    scan_working_max_side: int = 1024
+    scan_asset_max_side: int = 0
+    scan_full_max_side: int = 2048
+    scan_gallery_max_side: int = 768
+    scan_thumbnail_max_side: int = 256
+    scan_batch_max_items: int = 100
+    scan_cache_max_mb: float = 64.0
+    scan_cache_dir: str = ""
+    scan_cache_disk_max_mb: float = 512.0
+    scan_segmentation: str = "classical"
+    scan_segmentation_model: str = "u2netp"
+    scan_segmentation_pool_size: int = 0
+    scan_warmup: bool = True
+    scan_coin_detection: bool = True
+    scan_calibration_cache_ttl: float = 1800.0
+    scan_calibration_cache_max_entries: int = 4096
+    scan_trace_sample_rate: float = 0.05
+    scan_trace_memory: bool = True
+    scan_duplicate_detection: bool = True
+    scan_duplicate_max_distance: int = 10
+    scan_duplicate_max_color_distance: float = 25.0
+    scan_jobs_db_path: str = "./data/scan_jobs.db"
+    scan_jobs_workers: int = 0
+    scan_jobs_max_queued: int = 1000
+    scan_jobs_max_attempts: int = 3
+    scan_jobs_retry_backoff: float = 2.0
+    scan_jobs_lease_seconds: float = 120.0
+    scan_jobs_result_ttl: float = 86400.0
+    storage_backend: str = "local"
+    storage_local_dir: str = "./data/storage"
+    storage_public_url: str = ""
+    storage_endpoint: str = ""
+    storage_bucket: str = ""
+    storage_region: str = "us-east-1"
+    storage_access_key: str = ""
+    storage_secret_key: str = ""
+    storage_prefix: str = "garments"
+    storage_max_connections: int = 16
+    storage_timeout: float = 30.0
+    upload_max_bytes: int = 20 * 1024 * 1024
+    upload_max_pixels: int = 50_000_000
+    upload_chunk_bytes: int = 64 * 1024
+    skin_tone_cache_max_entries: int = 1024
+    supabase_jwt_secret: str = ""
+    supabase_jwt_audience: str = "authenticated"
+    database_url: str = "sqlite:///./data/lokafit.db"
+    database_pool_size: int = 4
+    wardrobe_cache_ttl: float = 30.0
+    wardrobe_cache_max_users: int = 1024
+    similar_index_dir: str = "./data/similar_index"
+    similar_index_ttl: float = 300.0
+    similar_catalog_user_id: str = ""
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        return cls(
+            worker_role=_env_str("WORKER_ROLE", cls.worker_role),
+            scan_execution_mode=_env_str("SCAN_EXECUTION_MODE", cls.scan_execution_mode),
+            scan_max_workers=_env_int("SCAN_MAX_WORKERS", cls.scan_max_workers),
+            scan_max_queue=_env_int("SCAN_MAX_QUEUE", cls.scan_max_queue),
+            scan_job_timeout=_env_float("SCAN_JOB_TIMEOUT", cls.scan_job_timeout),
+            scan_retry_after=_env_int("SCAN_RETRY_AFTER", cls.scan_retry_after),
+            scan_memory_budget_mb=_env_float("SCAN_MEMORY_BUDGET_MB", cls.scan_memory_budget_mb),
+            scan_working_max_side=_env_int("SCAN_WORKING_MAX_SIDE", cls.scan_working_max_side),
+            scan_asset_max_side=_env_int("SCAN_ASSET_MAX_SIDE", cls.scan_asset_max_side),
+            scan_full_max_side=_env_int("SCAN_FULL_MAX_SIDE", cls.scan_full_max_side),
+            scan_gallery_max_side=_env_int("SCAN_GALLERY_MAX_SIDE", cls.scan_gallery_max_side),
+            scan_thumbnail_max_side=_env_int("SCAN_THUMBNAIL_MAX_SIDE", cls.scan_thumbnail_max_side),
+            scan_batch_max_items=_env_int("SCAN_BATCH_MAX_ITEMS", cls.scan_batch_max_items),
+            scan_cache_max_mb=_env_float("SCAN_CACHE_MAX_MB", cls.scan_cache_max_mb),
+            scan_cache_dir=_env_str("SCAN_CACHE_DIR", cls.scan_cache_dir),
+            scan_cache_disk_max_mb=_env_float("SCAN_CACHE_DISK_MAX_MB", cls.scan_cache_disk_max_mb),
+            scan_segmentation=_env_str("SCAN_SEGMENTATION", cls.scan_segmentation),
+            scan_segmentation_model=_env_str("SCAN_SEGMENTATION_MODEL", cls.scan_segmentation_model),
+            scan_segmentation_pool_size=_env_int("SCAN_SEGMENTATION_POOL_SIZE", cls.scan_segmentation_pool_size),
+            scan_warmup=_env_bool("SCAN_WARMUP", cls.scan_warmup),
+            scan_coin_detection=_env_bool("SCAN_COIN_DETECTION", cls.scan_coin_detection),
+            scan_calibration_cache_ttl=_env_float("SCAN_CALIBRATION_CACHE_TTL", cls.scan_calibration_cache_ttl),
+            scan_calibration_cache_max_entries=_env_int(
+                "SCAN_CALIBRATION_CACHE_MAX_ENTRIES", cls.scan_calibration_cache_max_entries
+            ),
+            scan_trace_sample_rate=_env_float("SCAN_TRACE_SAMPLE_RATE", cls.scan_trace_sample_rate),
+            scan_trace_memory=_env_bool("SCAN_TRACE_MEMORY", cls.scan_trace_memory),
+            scan_duplicate_detection=_env_bool("SCAN_DUPLICATE_DETECTION", cls.scan_duplicate_detection),
+            scan_duplicate_max_distance=_env_int("SCAN_DUPLICATE_MAX_DISTANCE", cls.scan_duplicate_max_distance),
+            scan_duplicate_max_color_distance=_env_float(
+                "SCAN_DUPLICATE_MAX_COLOR_DISTANCE", cls.scan_duplicate_max_color_distance
+            ),
+            scan_jobs_db_path=_env_str("SCAN_JOBS_DB_PATH", cls.scan_jobs_db_path),
+            scan_jobs_workers=_env_int("SCAN_JOBS_WORKERS", cls.scan_jobs_workers),
+            scan_jobs_max_queued=_env_int("SCAN_JOBS_MAX_QUEUED", cls.scan_jobs_max_queued),
+            scan_jobs_max_attempts=_env_int("SCAN_JOBS_MAX_ATTEMPTS", cls.scan_jobs_max_attempts),
+            scan_jobs_retry_backoff=_env_float("SCAN_JOBS_RETRY_BACKOFF", cls.scan_jobs_retry_backoff),
+            scan_jobs_lease_seconds=_env_float("SCAN_JOBS_LEASE_SECONDS", cls.scan_jobs_lease_seconds),
+            scan_jobs_result_ttl=_env_float("SCAN_JOBS_RESULT_TTL", cls.scan_jobs_result_ttl),
+            storage_backend=_env_str("STORAGE_BACKEND", cls.storage_backend),
+            storage_local_dir=_env_str("STORAGE_LOCAL_DIR", cls.storage_local_dir),
+            storage_public_url=_env_str("STORAGE_PUBLIC_URL", cls.storage_public_url),
+            storage_endpoint=_env_str("STORAGE_ENDPOINT", cls.storage_endpoint),
+            storage_bucket=_env_str("STORAGE_BUCKET", cls.storage_bucket),
+            storage_region=_env_str("STORAGE_REGION", cls.storage_region),
+            storage_access_key=_env_str("STORAGE_ACCESS_KEY", cls.storage_access_key),
+            storage_secret_key=_env_str("STORAGE_SECRET_KEY", cls.storage_secret_key),
+            storage_prefix=_env_str("STORAGE_PREFIX", cls.storage_prefix),
+            storage_max_connections=_env_int("STORAGE_MAX_CONNECTIONS", cls.storage_max_connections),
+            storage_timeout=_env_float("STORAGE_TIMEOUT", cls.storage_timeout),
+            upload_max_bytes=_env_int("UPLOAD_MAX_BYTES", cls.upload_max_bytes),
+            upload_max_pixels=_env_int("UPLOAD_MAX_PIXELS", cls.upload_max_pixels),
+            upload_chunk_bytes=_env_int("UPLOAD_CHUNK_BYTES", cls.upload_chunk_bytes),
+            skin_tone_cache_max_entries=_env_int("SKIN_TONE_CACHE_MAX_ENTRIES", cls.skin_tone_cache_max_entries),
+            supabase_jwt_secret=_env_str("SUPABASE_JWT_SECRET", cls.supabase_jwt_secret),
+            supabase_jwt_audience=_env_str("SUPABASE_JWT_AUDIENCE", cls.supabase_jwt_audience),
+            database_url=_env_str("DATABASE_URL", cls.database_url),
+            database_pool_size=_env_int("DATABASE_POOL_SIZE", cls.database_pool_size),
+            wardrobe_cache_ttl=_env_float("WARDROBE_CACHE_TTL", cls.wardrobe_cache_ttl),
+            wardrobe_cache_max_users=_env_int("WARDROBE_CACHE_MAX_USERS", cls.wardrobe_cache_max_users),
+            similar_index_dir=_env_str("SIMILAR_INDEX_DIR", cls.similar_index_dir),
+            similar_index_ttl=_env_float("SIMILAR_INDEX_TTL", cls.similar_index_ttl),
+            similar_catalog_user_id=_env_str("SIMILAR_CATALOG_USER_ID", cls.similar_catalog_user_id),
+        )
+
+
+settings = Settings.from_env()
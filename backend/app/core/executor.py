@@ -0,0 +1,171 @@
+# Bounded CPU executor for blocking pipeline work
+# Keeps OpenCV/PIL work off the event loop with queue limits and timeouts
+
+import asyncio
+import multiprocessing
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+from app.core.config import settings
+
+EXECUTION_MODES = ("process", "thread", "inline")
+
+
+class ExecutorSaturatedError(RuntimeError):
+    """Raised when every worker is busy and the wait queue is full."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Scan capacity exhausted, retry later")
+        self.retry_after = retry_after
+
+
+class ExecutorTimeoutError(TimeoutError):
+    """Raised when a job does not finish within the per-job timeout."""
+
+
+class BoundedExecutor:
+    """
+    Runs blocking callables in a worker pool with backpressure.
+
+    - process: ProcessPoolExecutor, throughput scales with cores
+    - thread: ThreadPoolExecutor, for environments without fork/spawn
+    - inline: runs on the event loop (legacy behaviour, debugging only)
+
+    At most `max_workers + max_queue` jobs are admitted at once; further
+    submissions fail fast with ExecutorSaturatedError. A job that times out
+    keeps its slot until the worker actually finishes, so the admission
+    bound always reflects real CPU load.
+    """
+
+    def __init__(
+        self,
+        mode: str = "process",
+        max_workers: int = 0,
+        max_queue: int = 8,
+        job_timeout: Optional[float] = 30.0,
+        retry_after: int = 2,
+        initializer: Optional[Callable[[], None]] = None,
+    ):
+        if mode not in EXECUTION_MODES:
+            raise ValueError(f"Unknown execution mode: {mode}")
+
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_queue = max(0, max_queue)
+        self.job_timeout = job_timeout if job_timeout and job_timeout > 0 else None
+        self.retry_after = retry_after
+        self.initializer = initializer
+        self._pool: Optional[Executor] = None
+        self._in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _get_pool(self) -> Executor:
+        if self._pool is None:
+            if self.mode == "process":
+                method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context(method),
+                    initializer=self.initializer,
+                )
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers,
+                    thread_name_prefix="scan-worker",
+                    initializer=self.initializer,
+                )
+        return self._pool
+
+    def _release(self, _future: Any = None) -> None:
+        self._in_flight -= 1
+
+    async def run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        Run `fn(*args)` in the pool and await its result.
+
+        Raises:
+            ExecutorSaturatedError: No free worker or queue slot
+            ExecutorTimeoutError: Job exceeded the per-job timeout
+        """
+        if self._in_flight >= self.capacity:
+            raise ExecutorSaturatedError(self.retry_after)
+
+        self._in_flight += 1
+
+        if self.mode == "inline":
+            try:
+                return fn(*args)
+            finally:
+                self._release()
+
+        loop = asyncio.get_running_loop()
+        try:
+            future = loop.run_in_executor(self._get_pool(), fn, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(self._release)
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(future), self.job_timeout)
+        except asyncio.TimeoutError:
+            raise ExecutorTimeoutError(f"Job exceeded {self.job_timeout:g}s timeout")
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM kill); start a fresh pool for later jobs
+            self._pool = None
+            raise
+
+    def start(self) -> None:
+        """
+        Start every worker now rather than on first use, so worker
+        initializers (model loading) run before traffic arrives.
+        """
+        if self.mode == "inline":
+            return
+        pool = self._get_pool()
+        # Concurrent no-op jobs make the pool spawn up to max_workers workers
+        for future in [pool.submit(_noop) for _ in range(self.max_workers)]:
+            future.result()
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+def _noop() -> None:
+    pass
+
+
+def _init_scan_worker() -> None:
+    """
+    Keep OpenCV single-threaded per worker to avoid core oversubscription,
+    and load the segmentation backend before the worker's first scan.
+    """
+    import cv2
+
+    cv2.setNumThreads(1)
+    if settings.scan_warmup:
+        from app.ai_core.garment_processor import warm_up_scan_worker
+
+        warm_up_scan_worker()
+
+
+# Initialize scan executor
+scan_executor = BoundedExecutor(
+    mode=settings.scan_execution_mode,
+    max_workers=settings.scan_max_workers,
+    max_queue=settings.scan_max_queue,
+    job_timeout=settings.scan_job_timeout,
+    retry_after=settings.scan_retry_after,
+    initializer=_init_scan_worker,
+)
@@ -0,0 +1,85 @@
+# Image header sniffing
+# Reads format and dimensions from the first bytes of JPEG/PNG/WebP files
+# without decoding pixels (and without importing the imaging libraries)
+
+import struct
+from typing import Optional, Tuple
+
+SUPPORTED_FORMATS = ("jpeg", "png", "webp")
+
+# JPEG start-of-frame markers carrying the image dimensions
+_JPEG_SOF_MARKERS = {
+    0xC0, 0xC1, 0xC2, 0xC3, 0xC5, 0xC6, 0xC7,
+    0xC9, 0xCA, 0xCB, 0xCD, 0xCE, 0xCF,
+}
+
+
+def _jpeg_size(head: memoryview) -> Optional[Tuple[int, int]]:
+    pos = 2
+    end = len(head)
+    while pos + 4 <= end:
+        if head[pos] != 0xFF:
+            return None
+        marker = head[pos + 1]
+        if marker == 0xFF:  # fill byte
+            pos += 1
+            continue
+        if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7:  # standalone markers
+            pos += 2
+            continue
+        (length,) = struct.unpack(">H", head[pos + 2:pos + 4])
+        if marker in _JPEG_SOF_MARKERS:
+            if pos + 9 > end:
+                return None
+            height, width = struct.unpack(">HH", head[pos + 5:pos + 9])
+            return width, height
+        pos += 2 + length
+    return None
+
+
+def _webp_size(head: memoryview) -> Optional[Tuple[int, int]]:
+    if len(head) < 30:
+        return None
+    chunk = bytes(head[12:16])
+    if chunk == b"VP8X":
+        width = 1 + int.from_bytes(head[24:27], "little")
+        height = 1 + int.from_bytes(head[27:30], "little")
+        return width, height
+    if chunk == b"VP8L":
+        bits = int.from_bytes(head[21:25], "little")
+        return 1 + (bits & 0x3FFF), 1 + ((bits >> 14) & 0x3FFF)
+    if chunk == b"VP8 ":
+        width, height = struct.unpack("<HH", head[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    return None
+
+
+def sniff_image_header(head) -> Tuple[Optional[str], Optional[int], Optional[int]]:
+    """
+    Identify an image from its first bytes.
+
+    Args:
+        head: Leading bytes of the file (bytes, bytearray or memoryview)
+
+    Returns:
+        (format, width, height); format is None for unsupported data and
+        the dimensions are None when they lie beyond `head`
+    """
+    head = memoryview(head)
+    size = None
+    if bytes(head[:3]) == b"\xff\xd8\xff":
+        fmt = "jpeg"
+        size = _jpeg_size(head)
+    elif bytes(head[:8]) == b"\x89PNG\r\n\x1a\n":
+        fmt = "png"
+        if len(head) >= 24 and bytes(head[12:16]) == b"IHDR":
+            size = struct.unpack(">II", head[16:24])
+    elif bytes(head[:4]) == b"RIFF" and bytes(head[8:12]) == b"WEBP":
+        fmt = "webp"
+        size = _webp_size(head)
+    else:
+        return None, None, None
+
+    if size is None:
+        return fmt, None, None
+    return fmt, int(size[0]), int(size[1])
@@ -0,0 +1,187 @@
+# Streaming upload ingestion for image routes
+# Sniffs the image header early, enforces size limits while reading and
+# lands the payload in one preallocated buffer for the decoder
+
+import asyncio
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+from fastapi import UploadFile
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+from app.core.image_header import SUPPORTED_FORMATS, sniff_image_header
+
+
+class UploadRejectedError(ValueError):
+    """Upload refused during ingestion; carries the HTTP status to return."""
+
+    status_code = 400
+
+
+class UploadTooLargeError(UploadRejectedError):
+    status_code = 413
+
+
+class UnsupportedImageError(UploadRejectedError):
+    status_code = 415
+
+
+@dataclass
+class IngestedImage:
+    """
+    Uploaded image bytes plus header information.
+
+    `buffer` is a bytearray sized to the payload; np.frombuffer and
+    hashlib read it without copying.
+    """
+
+    buffer: bytearray
+    format: str
+    width: Optional[int]
+    height: Optional[int]
+
+    def __len__(self) -> int:
+        return len(self.buffer)
+
+
+def check_dimensions(width: int, height: int, max_pixels: int) -> None:
+    if width <= 0 or height <= 0:
+        raise UnsupportedImageError("Invalid image dimensions")
+    if width * height > max_pixels:
+        raise UploadTooLargeError(
+            f"Image too large: {width}x{height} exceeds {max_pixels / 1e6:.0f} MP limit"
+        )
+
+
+def _read_upload(
+    upload: UploadFile,
+    max_bytes: int,
+    chunk_bytes: int,
+    on_header: Callable[[memoryview], None]
+) -> bytearray:
+    """
+    Blocking read of the spooled upload into one buffer.
+
+    Reads straight into a bytearray sized from the upload (readinto, no
+    intermediate bytes objects); `on_header` sees the first chunk before
+    the rest of the file is read.
+    """
+    source = upload.file
+    source.seek(0)
+
+    expected = upload.size
+    if expected is not None and expected > max_bytes:
+        raise UploadTooLargeError(f"File too large: limit is {max_bytes} bytes")
+
+    buffer = bytearray(expected if expected is not None else chunk_bytes)
+    view = memoryview(buffer)
+    filled = 0
+    header_checked = False
+
+    while True:
+        if filled == len(buffer):
+            if expected is not None:
+                # Size was known up front; confirm EOF
+                if source.read(1):
+                    raise UploadTooLargeError("Upload larger than declared size")
+                break
+            if len(buffer) >= max_bytes:
+                if source.read(1):
+                    raise UploadTooLargeError(f"File too large: limit is {max_bytes} bytes")
+                break
+            # Unknown size: grow geometrically, capped at the limit
+            view.release()
+            buffer.extend(bytes(min(len(buffer), max_bytes - len(buffer))))
+            view = memoryview(buffer)
+
+        read = source.readinto(view[filled:filled + chunk_bytes])
+        if not read:
+            break
+        filled += read
+
+        if not header_checked and (filled >= chunk_bytes or filled == len(buffer)):
+            on_header(view[:filled])
+            header_checked = True
+
+    if not header_checked and filled:
+        on_header(view[:filled])
+
+    view.release()
+    if filled != len(buffer):
+        del buffer[filled:]
+    return buffer
+
+
+async def ingest_upload(
+    upload: UploadFile,
+    max_bytes: Optional[int] = None,
+    max_pixels: Optional[int] = None
+) -> IngestedImage:
+    """
+    Read an uploaded image with early validation.
+
+    - The header is sniffed from the first chunk: unsupported formats and
+      over-limit dimensions are rejected before the rest is read
+    - max_bytes is enforced while reading
+    - The payload lands in one preallocated buffer handed to the decoder
+      without further copies
+
+    Raises:
+        UploadRejectedError: Empty, oversized or unsupported upload
+    """
+    max_bytes = max_bytes or settings.upload_max_bytes
+    max_pixels = max_pixels or settings.upload_max_pixels
+    header = {}
+
+    def on_header(head: memoryview) -> None:
+        fmt, width, height = sniff_image_header(head)
+        if fmt is None:
+            raise UnsupportedImageError(
+                f"Unsupported image format; expected one of {', '.join(SUPPORTED_FORMATS)}"
+            )
+        if width is not None:
+            check_dimensions(width, height, max_pixels)
+        header.update(format=fmt, width=width, height=height)
+
+    buffer = await asyncio.to_thread(
+        _read_upload, upload, max_bytes, settings.upload_chunk_bytes, on_header
+    )
+    if not buffer:
+        raise UploadRejectedError("Empty file")
+
+    # Dimensions beyond the first chunk (e.g. JPEG with a large EXIF block)
+    if header["width"] is None:
+        fmt, width, height = sniff_image_header(buffer)
+        if width is not None:
+            check_dimensions(width, height, max_pixels)
+            header.update(width=width, height=height)
+
+    return IngestedImage(buffer=buffer, **header)
+
+
+class UploadSizeLimitMiddleware:
+    """
+    Reject oversized upload requests from their Content-Length header,
+    before the multipart body is received and parsed.
+    """
+
+    def __init__(self, app, limit_for_path: Callable[[str], Optional[int]]):
+        self.app = app
+        self.limit_for_path = limit_for_path
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["method"] == "POST":
+            limit = self.limit_for_path(scope["path"])
+            if limit is not None:
+                for name, value in scope["headers"]:
+                    if name == b"content-length":
+                        if value.isdigit() and int(value) > limit:
+                            response = JSONResponse(
+                                {"detail": f"Request body too large: limit is {limit} bytes"},
+                                status_code=413,
+                            )
+                            await response(scope, receive, send)
+                            return
+                        break
+        await self.app(scope, receive, send)
@@ -0,0 +1,237 @@
+# Scan pipeline instrumentation
+# Per-stage wall time, CPU time, input resolution and peak allocations for
+# sampled scans, aggregated into Prometheus-style histograms
+
+import random
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from app.core.config import settings
+
+# Histogram bucket upper bounds
+SECONDS_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BYTES_BUCKETS = tuple(float(1 << shift) for shift in range(16, 32, 2))  # 64 KiB .. 1 GiB
+MEGAPIXEL_BUCKETS = (0.5, 1.0, 2.0, 4.0, 8.0, 12.0, 16.0, 24.0, 48.0)
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics), one per label set."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class MetricsRegistry:
+    """
+    Named histograms with labels, rendered in the Prometheus text format.
+
+    Observations only happen in the API process: scan workers send their
+    stage records back in the scan metadata.
+    """
+
+    def __init__(self):
+        self._histograms: Dict[str, Tuple[str, Tuple[float, ...], Dict[Tuple[Tuple[str, str], ...], Histogram]]] = {}
+        self._gauges: Dict[str, Tuple[str, Any]] = {}
+        self._lock = threading.Lock()
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float]) -> None:
+        """Declare a histogram (idempotent)."""
+        with self._lock:
+            self._histograms.setdefault(name, (help_text, tuple(buckets), {}))
+
+    def gauge(self, name: str, help_text: str, read: Any) -> None:
+        """Declare a gauge whose value is read from `read()` at scrape time."""
+        with self._lock:
+            self._gauges[name] = (help_text, read)
+
+    def observe(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            _, buckets, series = self._histograms[name]
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(buckets)
+            histogram.observe(value)
+
+    @staticmethod
+    def _labels(pairs: Sequence[Tuple[str, str]]) -> str:
+        if not pairs:
+            return ""
+        escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                   for k, v in pairs)
+        return "{" + ",".join(escaped) + "}"
+
+    def render(self) -> str:
+        """Prometheus text exposition format (version 0.0.4)."""
+        lines: List[str] = []
+        with self._lock:
+            for name, (help_text, buckets, series) in sorted(self._histograms.items()):
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in sorted(series.items()):
+                    cumulative = 0
+                    for bound, count in zip(buckets + (float("inf"),), histogram.counts):
+                        cumulative += count
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{self._labels(key + (('le', le),))} {cumulative}")
+                    lines.append(f"{name}_sum{self._labels(key)} {histogram.sum!r}")
+                    lines.append(f"{name}_count{self._labels(key)} {histogram.count}")
+            gauges = sorted(self._gauges.items())
+        for name, (help_text, read) in gauges:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {float(read())!r}")
+        return "\n".join(lines) + "\n"
+
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+_tracing_owned = False
+
+
+def _start_memory_tracing() -> None:
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _tracing_owned = True
+        _tracing_users += 1
+
+
+def _stop_memory_tracing() -> None:
+    global _tracing_users, _tracing_owned
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _tracing_owned:
+            tracemalloc.stop()
+            _tracing_owned = False
+
+
+class ScanTrace:
+    """
+    Stage recorder for one scan.
+
+    Disabled traces cost one generator per stage and record nothing.
+    Enabled traces record per stage:
+    - wall_ms (perf_counter) and cpu_ms (this thread's CPU time)
+    - resolution of the stage's input, when the stage reports it
+    - peak_bytes: peak Python/NumPy allocations above the stage's starting
+      point (tracemalloc; process-wide, so concurrent traced scans in
+      threads inflate each other's peaks)
+
+    Args:
+        enabled: Record stages at all
+        memory: Also track peak allocations (tracemalloc slows every
+            allocation in the process while any traced scan runs)
+    """
+
+    __slots__ = ("enabled", "memory", "stages", "_started")
+
+    def __init__(self, enabled: bool = False, memory: bool = True):
+        self.enabled = enabled
+        self.memory = memory and enabled
+        self.stages: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name: str, resolution: Optional[Tuple[int, int]] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Time a pipeline stage.
+
+        Yields a record the stage may annotate, e.g.
+        record["resolution"] = [w, h] once its input size is known.
+        """
+        record: Dict[str, Any] = {"stage": name}
+        if resolution is not None:
+            record["resolution"] = [int(resolution[0]), int(resolution[1])]
+        if not self.enabled:
+            yield record
+            return
+
+        if self.memory:
+            _start_memory_tracing()
+            tracemalloc.reset_peak()
+            base = tracemalloc.get_traced_memory()[0]
+        wall = time.perf_counter()
+        cpu = time.thread_time()
+        try:
+            yield record
+        finally:
+            record["wall_ms"] = round((time.perf_counter() - wall) * 1000, 3)
+            record["cpu_ms"] = round((time.thread_time() - cpu) * 1000, 3)
+            if self.memory:
+                record["peak_bytes"] = max(0, tracemalloc.get_traced_memory()[1] - base)
+                _stop_memory_tracing()
+            self.stages.append(record)
+
+    def report(self) -> Optional[Dict[str, Any]]:
+        """The `timings` metadata block (None when disabled)."""
+        if not self.enabled:
+            return None
+        return {
+            "total_ms": round((time.perf_counter() - self._started) * 1000, 3),
+            "stages": self.stages,
+        }
+
+
+class ScanMetrics:
+    """
+    Scan stage histograms plus the sampling decision.
+
+    Args:
+        registry: Where histograms are recorded
+        sample_rate: Share of scans traced (0..1); scans whose client asks
+            for timings are always traced
+        memory: Track peak allocations in traced scans
+    """
+
+    def __init__(self, registry: MetricsRegistry, sample_rate: float = 0.05, memory: bool = True):
+        self.registry = registry
+        self.sample_rate = sample_rate
+        self.memory = memory
+        registry.histogram("lokafit_scan_stage_seconds", "Scan pipeline stage wall time", SECONDS_BUCKETS)
+        registry.histogram("lokafit_scan_stage_cpu_seconds", "Scan pipeline stage CPU time", SECONDS_BUCKETS)
+        registry.histogram("lokafit_scan_stage_peak_bytes", "Peak allocations during a scan stage", BYTES_BUCKETS)
+        registry.histogram("lokafit_scan_stage_input_megapixels", "Scan stage input resolution", MEGAPIXEL_BUCKETS)
+        registry.histogram("lokafit_scan_seconds", "Traced scan wall time", SECONDS_BUCKETS)
+
+    def should_trace(self, requested: bool = False) -> bool:
+        return requested or (self.sample_rate > 0 and random.random() < self.sample_rate)
+
+    def observe(self, timings: Optional[Dict[str, Any]]) -> None:
+        """Record a scan's `timings` block."""
+        if not timings:
+            return
+        self.registry.observe("lokafit_scan_seconds", timings["total_ms"] / 1000)
+        for record in timings["stages"]:
+            stage = record["stage"]
+            self.registry.observe("lokafit_scan_stage_seconds", record["wall_ms"] / 1000, stage=stage)
+            self.registry.observe("lokafit_scan_stage_cpu_seconds", record["cpu_ms"] / 1000, stage=stage)
+            if "peak_bytes" in record:
+                self.registry.observe("lokafit_scan_stage_peak_bytes", record["peak_bytes"], stage=stage)
+            if "resolution" in record:
+                w, h = record["resolution"]
+                self.registry.observe("lokafit_scan_stage_input_megapixels", w * h / 1e6, stage=stage)
+
+
+# Initialize metrics
+metrics_registry = MetricsRegistry()
+scan_metrics = ScanMetrics(
+    metrics_registry,
+    sample_rate=settings.scan_trace_sample_rate,
+    memory=settings.scan_trace_memory,
+)
@@ -0,0 +1,155 @@
+# Asynchronous job worker
+# Drains the durable scan job store from the API process: claims due jobs,
+# runs them through the scan executor, records results and retries
+
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from app.core.instrumentation import SECONDS_BUCKETS, metrics_registry
+from app.db.scan_jobs import ScanJobStore
+
+logger = logging.getLogger(__name__)
+
+# Queue wait and end-to-end job time reach well past a single scan
+JOB_SECONDS_BUCKETS = SECONDS_BUCKETS + (30.0, 60.0, 300.0, 900.0)
+
+metrics_registry.histogram(
+    "lokafit_scan_job_wait_seconds", "Time from submission to a job's first attempt", JOB_SECONDS_BUCKETS
+)
+metrics_registry.histogram(
+    "lokafit_scan_job_seconds", "Time from submission to a job's final outcome", JOB_SECONDS_BUCKETS
+)
+
+
+class JobWorker:
+    """
+    Runs queued jobs with bounded concurrency:
+    - `concurrency` drain loops each claim one job at a time; a submission
+      wakes them, otherwise they poll every `poll_interval` seconds (jobs
+      queued by other processes, retries coming due)
+    - The actual CPU work goes through the handler (the scan executor),
+      so the worker adds no threads of its own
+    - Failures with a 5xx code (timeouts, crashed workers) are retried
+      with exponential backoff until the store's attempt limit; 4xx
+      failures (bad image, bad calibration) fail the job at once
+    - On shutdown, jobs still running are handed back to the queue
+
+    Args:
+        store: Durable job store
+        handler: Coroutine turning a claimed job into its result dict
+        describe_error: Maps a handler exception to (status code, detail)
+        concurrency: Jobs run at once
+        lease_seconds: Claim lease (see ScanJobStore.claim)
+        retry_backoff: Seconds before the first retry, doubled per attempt
+        poll_interval: Idle poll period in seconds
+        reap_interval: Seconds between expiry sweeps
+    """
+
+    def __init__(
+        self,
+        store: ScanJobStore,
+        handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+        describe_error: Callable[[Exception], Tuple[int, str]],
+        concurrency: int = 1,
+        lease_seconds: float = 120.0,
+        retry_backoff: float = 2.0,
+        poll_interval: float = 0.5,
+        reap_interval: float = 30.0
+    ):
+        self.store = store
+        self.handler = handler
+        self.describe_error = describe_error
+        self.concurrency = max(1, concurrency)
+        self.lease_seconds = lease_seconds
+        self.retry_backoff = retry_backoff
+        self.poll_interval = poll_interval
+        self.reap_interval = reap_interval
+        self._tasks: List[asyncio.Task] = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._active: Set[str] = set()
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks)
+
+    def notify(self) -> None:
+        """Wake idle drain loops (a job was just submitted)."""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.ensure_future(self._drain()) for _ in range(self.concurrency)]
+        self._tasks.append(asyncio.ensure_future(self._reap()))
+
+    async def stop(self) -> None:
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for job_id in list(self._active):
+            await asyncio.to_thread(self.store.release, job_id)
+        self._active.clear()
+
+    async def _idle(self) -> None:
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+        except asyncio.TimeoutError:
+            pass
+        self._wakeup.clear()
+
+    async def _drain(self) -> None:
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim, self.lease_seconds)
+            except Exception:
+                # Store busy or unreadable: same as an empty queue, poll again
+                logger.warning("Scan job claim failed", exc_info=True)
+                job = None
+            if job is None:
+                await self._idle()
+                continue
+            await self._run(job)
+
+    async def _run(self, job: Dict[str, Any]) -> None:
+        """
+        Run one claimed job and record its outcome. Never raises: if the
+        outcome can't be written (store locked or unreachable), the job
+        keeps its lease and is claimed again once the lease expires.
+        """
+        job_id = job["id"]
+        self._active.add(job_id)
+        try:
+            if job["attempts"] == 1 and job["started_at"] is not None:
+                metrics_registry.observe("lokafit_scan_job_wait_seconds", job["started_at"] - job["created_at"])
+
+            try:
+                result = await self.handler(job)
+            except Exception as e:
+                code, detail = self.describe_error(e)
+                retry = code >= 500 and job["attempts"] < self.store.max_attempts
+                delay = self.retry_backoff * 2 ** (job["attempts"] - 1) if retry else None
+                await asyncio.to_thread(self.store.fail, job_id, {"code": code, "detail": detail}, delay)
+                outcome = "retrying" if retry else "failed"
+            else:
+                await asyncio.to_thread(self.store.complete, job_id, result)
+                outcome = "succeeded"
+
+            if outcome != "retrying":
+                metrics_registry.observe("lokafit_scan_job_seconds", time.time() - job["created_at"], status=outcome)
+        except Exception:
+            logger.exception("Scan job %s: outcome not recorded, retried after its lease expires", job_id)
+        finally:
+            self._active.discard(job_id)
+
+    async def _reap(self) -> None:
+        while True:
+            try:
+                await asyncio.to_thread(self.store.reap)
+            except Exception:
+                logger.exception("Scan job expiry sweep failed")
+            await asyncio.sleep(self.reap_interval)
@@ -0,0 +1,34 @@
+# Lazy imports
+# Defers heavy native libraries (OpenCV, Pillow) until first use, so
+# workers that never touch images (e.g. the recommend role) start without them
+
+import importlib
+import sys
+import types
+from typing import Any
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that imports it on first attribute access.
+
+    Each attribute is copied onto the stand-in when first read, so later
+    lookups (cv2.resize in a hot path) are plain module dict hits. The
+    real module is the one in sys.modules; the stand-in never registers
+    itself there.
+    """
+
+    def __getattr__(self, name: str) -> Any:
+        value = getattr(importlib.import_module(self.__name__), name)
+        self.__dict__[name] = value
+        return value
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    """
+    `import name`, deferred until the module is first used.
+
+    Args:
+        name: Dotted module name, e.g. "cv2" or "PIL.Image"
+    """
+    return sys.modules.get(name) or LazyModule(name)
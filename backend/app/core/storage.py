@@ -0,0 +1,449 @@
+# Asset storage
+# Durable storage of processed garment assets behind one interface: local
+# filesystem (development, tests), S3-compatible object stores and
+# Supabase Storage, uploaded in parallel off the event loop
+
+import asyncio
+import hashlib
+import hmac
+import os
+import tempfile
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Mapping, Optional, Tuple
+from urllib.parse import quote, urlparse
+
+from app.core.config import settings
+
+STORAGE_BACKENDS = ("local", "s3", "supabase", "none")
+
+# Uploaded keys remembered per process, so cached scans are only checked
+# for, not re-uploaded
+UPLOADED_KEYS_MAX_ENTRIES = 4096
+
+# Route the local backend's directory is served from (see main.py)
+LOCAL_ASSETS_ROUTE = "/assets"
+
+
+class StorageError(RuntimeError):
+    """Raised when an asset could not be stored durably."""
+
+
+class StorageBackend(ABC):
+    """
+    Blocking object store interface used by AssetUploader.
+
+    `put` returns only once the object is durable (fsynced, or
+    acknowledged by the object store); it may be called from many threads
+    at once.
+    """
+
+    name = ""
+
+    @abstractmethod
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        """Store an object durably, replacing any previous one."""
+
+    @abstractmethod
+    def exists(self, key: str) -> bool:
+        """Whether an object is stored (False when that can't be told)."""
+
+    @abstractmethod
+    def url(self, key: str) -> str:
+        """Public URL of a stored object."""
+
+    def close(self) -> None:
+        pass
+
+
+class LocalStorage(StorageBackend):
+    """
+    Files under `root`, written to a temporary file, fsynced and renamed
+    into place (readers never see a partial asset).
+
+    Args:
+        root: Directory holding the assets
+        public_url: Base URL the directory is served from (empty = paths
+            under LOCAL_ASSETS_ROUTE on this API)
+    """
+
+    name = "local"
+
+    def __init__(self, root: str, public_url: str = ""):
+        self.root = os.path.abspath(root)
+        self.public_url = public_url.rstrip("/")
+
+    def _path(self, key: str) -> str:
+        path = os.path.normpath(os.path.join(self.root, key))
+        if not path.startswith(self.root + os.sep):
+            raise StorageError(f"Invalid storage key: {key}")
+        return path
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        path = self._path(key)
+        directory = os.path.dirname(path)
+        try:
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, path)
+            except BaseException:
+                if os.path.exists(tmp_path):
+                    os.unlink(tmp_path)
+                raise
+            # The rename itself is durable once the directory entry is synced
+            dir_fd = os.open(directory, os.O_RDONLY)
+            try:
+                os.fsync(dir_fd)
+            finally:
+                os.close(dir_fd)
+        except OSError as e:
+            raise StorageError(f"Could not store {key}: {e}") from e
+
+    def exists(self, key: str) -> bool:
+        return os.path.isfile(self._path(key))
+
+    def url(self, key: str) -> str:
+        return f"{self.public_url or LOCAL_ASSETS_ROUTE}/{quote(key, safe='/-_.~')}"
+
+
+class HTTPStorage(StorageBackend):
+    """
+    Object stores spoken to over HTTP through one pooled requests.Session:
+    keep-alive connections (up to `max_connections`), and idempotent PUTs
+    retried on connection errors and 5xx responses.
+
+    Args:
+        endpoint: Service base URL
+        bucket: Bucket name
+        public_url: Base URL objects are served from (empty = the backend's
+            own public URL)
+        max_connections: Pooled connections (= parallel uploads)
+        timeout: Seconds per request
+        retries: Retries per upload
+    """
+
+    def __init__(
+        self,
+        endpoint: str,
+        bucket: str,
+        public_url: str = "",
+        max_connections: int = 16,
+        timeout: float = 30.0,
+        retries: int = 3
+    ):
+        import requests
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+
+        if not endpoint or not bucket:
+            raise ValueError(f"{self.name} storage needs STORAGE_ENDPOINT and STORAGE_BUCKET")
+        self.endpoint = endpoint.rstrip("/")
+        self.bucket = bucket
+        self.public_url = public_url.rstrip("/")
+        self.timeout = timeout
+        self._requests = requests
+        self._session = requests.Session()
+        retry = Retry(
+            total=retries,
+            backoff_factor=0.2,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset({"PUT", "POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_connections, pool_block=True, max_retries=retry)
+        self._session.mount("https://", adapter)
+        self._session.mount("http://", adapter)
+
+    def _exists(self, url: str, headers: Mapping[str, str]) -> bool:
+        try:
+            response = self._session.head(url, headers=dict(headers), timeout=self.timeout)
+        except self._requests.RequestException:
+            return False
+        return response.status_code == 200
+
+    def _request(self, method: str, url: str, data: bytes, headers: Mapping[str, str], key: str) -> None:
+        try:
+            response = self._session.request(method, url, data=data, headers=dict(headers), timeout=self.timeout)
+        except self._requests.RequestException as e:
+            raise StorageError(f"Could not store {key}: {e}") from e
+        if response.status_code >= 300:
+            raise StorageError(f"Could not store {key}: HTTP {response.status_code} {response.text[:200]}")
+
+    def close(self) -> None:
+        self._session.close()
+
+
+def sigv4_headers(
+    method: str,
+    url: str,
+    headers: Mapping[str, str],
+    payload_hash: str,
+    access_key: str,
+    secret_key: str,
+    region: str,
+    service: str = "s3",
+    now: Optional[datetime] = None
+) -> Dict[str, str]:
+    """
+    AWS Signature Version 4 for a request without query parameters.
+
+    Args:
+        method: HTTP method
+        url: Request URL (path already URI-encoded)
+        headers: Headers to sign besides host, x-amz-date and
+            x-amz-content-sha256
+        payload_hash: Hex sha256 of the body
+        access_key: Access key id
+        secret_key: Secret access key
+        region: Signing region
+        service: Signing service name
+        now: Signing time (default: current time)
+
+    Returns:
+        `headers` plus x-amz-date, x-amz-content-sha256 and Authorization
+    """
+    now = now or datetime.now(timezone.utc)
+    amz_date = now.strftime("%Y%m%dT%H%M%SZ")
+    datestamp = amz_date[:8]
+    parsed = urlparse(url)
+
+    signed = {k.lower(): str(v).strip() for k, v in headers.items()}
+    signed.update({"host": parsed.netloc, "x-amz-date": amz_date, "x-amz-content-sha256": payload_hash})
+    names = sorted(signed)
+    canonical_request = "\n".join([
+        method,
+        parsed.path or "/",
+        "",
+        "".join(f"{name}:{signed[name]}\n" for name in names),
+        ";".join(names),
+        payload_hash,
+    ])
+    scope = f"{datestamp}/{region}/{service}/aws4_request"
+    string_to_sign = "\n".join([
+        "AWS4-HMAC-SHA256", amz_date, scope, hashlib.sha256(canonical_request.encode()).hexdigest()
+    ])
+
+    key = ("AWS4" + secret_key).encode()
+    for part in (datestamp, region, service, "aws4_request"):
+        key = hmac.new(key, part.encode(), hashlib.sha256).digest()
+    signature = hmac.new(key, string_to_sign.encode(), hashlib.sha256).hexdigest()
+
+    return {
+        **headers,
+        "x-amz-date": amz_date,
+        "x-amz-content-sha256": payload_hash,
+        "Authorization": (
+            f"AWS4-HMAC-SHA256 Credential={access_key}/{scope}, "
+            f"SignedHeaders={';'.join(names)}, Signature={signature}"
+        ),
+    }
+
+
+class S3Storage(HTTPStorage):
+    """
+    S3-compatible object store (AWS S3, MinIO, R2, Supabase's S3 endpoint)
+    with path-style URLs and SigV4-signed PUTs; no SDK needed.
+
+    Args:
+        access_key: Access key id
+        secret_key: Secret access key
+        region: Signing region
+        (other arguments: see HTTPStorage)
+    """
+
+    name = "s3"
+
+    def __init__(self, endpoint: str, bucket: str, access_key: str, secret_key: str, region: str = "us-east-1", **kwargs):
+        super().__init__(endpoint, bucket, **kwargs)
+        self.access_key = access_key
+        self.secret_key = secret_key
+        self.region = region
+
+    def _object_url(self, key: str) -> str:
+        return f"{self.endpoint}/{quote(self.bucket)}/{quote(key, safe='/-_.~')}"
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        url = self._object_url(key)
+        headers = sigv4_headers(
+            "PUT", url, {"Content-Type": content_type}, hashlib.sha256(data).hexdigest(),
+            self.access_key, self.secret_key, self.region,
+        )
+        self._request("PUT", url, data, headers, key)
+
+    def exists(self, key: str) -> bool:
+        url = self._object_url(key)
+        headers = sigv4_headers(
+            "HEAD", url, {}, hashlib.sha256(b"").hexdigest(),
+            self.access_key, self.secret_key, self.region,
+        )
+        return self._exists(url, headers)
+
+    def url(self, key: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{quote(key, safe='/-_.~')}"
+        return self._object_url(key)
+
+
+class SupabaseStorage(HTTPStorage):
+    """
+    Supabase Storage REST API (POST /storage/v1/object/<bucket>/<key>,
+    upserting) authenticated with the service role key.
+
+    Args:
+        service_key: Supabase service role key
+        (other arguments: see HTTPStorage; endpoint is the project URL)
+    """
+
+    name = "supabase"
+
+    def __init__(self, endpoint: str, bucket: str, service_key: str, **kwargs):
+        super().__init__(endpoint, bucket, **kwargs)
+        self.service_key = service_key
+
+    def _object_url(self, key: str) -> str:
+        return f"{self.endpoint}/storage/v1/object/{quote(self.bucket)}/{quote(key, safe='/-_.~')}"
+
+    def put(self, key: str, data: bytes, content_type: str) -> None:
+        headers = {
+            "Authorization": f"Bearer {self.service_key}",
+            "apikey": self.service_key,
+            "Content-Type": content_type,
+            "x-upsert": "true",
+            "cache-control": "max-age=31536000",
+        }
+        self._request("POST", self._object_url(key), data, headers, key)
+
+    def exists(self, key: str) -> bool:
+        headers = {"Authorization": f"Bearer {self.service_key}", "apikey": self.service_key}
+        return self._exists(self._object_url(key), headers)
+
+    def url(self, key: str) -> str:
+        if self.public_url:
+            return f"{self.public_url}/{quote(key, safe='/-_.~')}"
+        return f"{self.endpoint}/storage/v1/object/public/{quote(self.bucket)}/{quote(key, safe='/-_.~')}"
+
+
+class AssetUploader:
+    """
+    Uploads a scan's WebP renditions:
+    - Content-addressed keys (<prefix>/<sha256>.webp), so re-uploads of
+      the same bytes are idempotent and deduplicated
+    - Every rendition uploaded at once on a dedicated thread pool sized
+      to the backend's connection pool; the event loop only awaits
+    - Keys uploaded by this process are remembered, so cache hits only
+      check that the object is still stored (and upload it again when it
+      was deleted) instead of uploading it
+
+    Args:
+        backend: Storage backend (None = storage disabled)
+        prefix: Key prefix for scan assets
+        max_concurrency: Parallel uploads per process
+    """
+
+    def __init__(self, backend: Optional[StorageBackend], prefix: str = "garments", max_concurrency: int = 16):
+        self.backend = backend
+        self.prefix = prefix.strip("/")
+        self.max_concurrency = max(1, max_concurrency)
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._uploaded: "OrderedDict[str, None]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.backend is not None
+
+    def _get_pool(self) -> ThreadPoolExecutor:
+        if self._pool is None:
+            self._pool = ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="storage")
+        return self._pool
+
+    def key_for(self, data: bytes) -> str:
+        return f"{self.prefix}/{hashlib.sha256(data).hexdigest()}.webp"
+
+    def _put(self, key: str, data: bytes) -> None:
+        with self._lock:
+            uploaded = key in self._uploaded
+            if uploaded:
+                self._uploaded.move_to_end(key)
+        # New keys are put straight away (uploads are idempotent)
+        if uploaded and self.backend.exists(key):
+            return
+        self.backend.put(key, data, "image/webp")
+        with self._lock:
+            self._uploaded[key] = None
+            while len(self._uploaded) > UPLOADED_KEYS_MAX_ENTRIES:
+                self._uploaded.popitem(last=False)
+
+    async def upload(self, renditions: Dict[str, bytes]) -> Dict[str, str]:
+        """
+        Store every rendition and wait until all are durable.
+
+        Args:
+            renditions: {rendition name: webp bytes}
+
+        Returns:
+            {rendition name: public URL} (empty when storage is disabled)
+
+        Raises:
+            StorageError: If any rendition could not be stored
+        """
+        if self.backend is None or not renditions:
+            return {}
+        loop = asyncio.get_running_loop()
+        pool = self._get_pool()
+        keys: Dict[str, Tuple[str, bytes]] = {name: (self.key_for(data), data) for name, data in renditions.items()}
+        await asyncio.gather(*(
+            loop.run_in_executor(pool, self._put, key, data) for key, data in keys.values()
+        ))
+        return {name: self.backend.url(key) for name, (key, _) in keys.items()}
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self.backend is not None:
+            self.backend.close()
+
+
+def create_storage_backend(kind: str) -> Optional[StorageBackend]:
+    """
+    Build the configured storage backend.
+
+    Args:
+        kind: "local", "s3", "supabase" or "none"
+    """
+    if kind not in STORAGE_BACKENDS:
+        raise ValueError(f"Unknown storage backend: {kind}")
+    if kind == "none":
+        return None
+    if kind == "local":
+        return LocalStorage(settings.storage_local_dir, public_url=settings.storage_public_url)
+
+    options = {
+        "public_url": settings.storage_public_url,
+        "max_connections": settings.storage_max_connections,
+        "timeout": settings.storage_timeout,
+    }
+    if kind == "s3":
+        return S3Storage(
+            settings.storage_endpoint, settings.storage_bucket,
+            settings.storage_access_key, settings.storage_secret_key,
+            region=settings.storage_region, **options,
+        )
+    return SupabaseStorage(settings.storage_endpoint, settings.storage_bucket, settings.storage_secret_key, **options)
+
+
+# Initialize asset uploader
+asset_uploader = AssetUploader(
+    create_storage_backend(settings.storage_backend),
+    prefix=settings.storage_prefix,
+    max_concurrency=settings.storage_max_connections,
+)
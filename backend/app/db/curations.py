@@ -0,0 +1,138 @@
+# Weekly curation repository
+# Persists one weekly outfit plan per user and week in weekly_curations,
+# with an in-memory LRU in front so repeated planner reads skip the database
+
+import json
+import threading
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+from app.core.config import settings
+from app.db.adapters import DatabaseAdapter, get_adapter
+
+# Local schema mirroring scripts/001_create_lokafit_schema.sql (weekly_curations)
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS weekly_curations (
+  id TEXT PRIMARY KEY,
+  user_id TEXT NOT NULL,
+  week_of DATE NOT NULL,
+  curated_items TEXT NOT NULL,
+  styling_notes TEXT,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_weekly_curations_user_week
+  ON weekly_curations(user_id, week_of);
+"""
+
+
+class CurationRepository:
+    """
+    Stored weekly plans keyed by (user_id, week_of):
+    - curated_items holds the whole plan document (JSON)
+    - One row per week (unique on user_id, week_of; see
+      scripts/003_weekly_curations_unique_week.sql), upserted on save
+    - Recently read or written plans are kept in an LRU of `max_entries`
+    """
+
+    def __init__(self, adapter: Optional[DatabaseAdapter] = None, max_entries: int = 1024):
+        self._adapter = adapter
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    @property
+    def adapter(self) -> DatabaseAdapter:
+        if self._adapter is None:
+            self._adapter = get_adapter()
+        return self._adapter
+
+    def use_adapter(self, adapter: DatabaseAdapter) -> None:
+        """Swap the backing database (e.g. an in-memory SQLite in tests)."""
+        with self._lock:
+            self._adapter = adapter
+            self._schema_ready = False
+            self._entries.clear()
+
+    def ensure_schema(self) -> None:
+        """Create the weekly_curations table on SQLite; Postgres uses the SQL scripts."""
+        if self._schema_ready:
+            return
+        if self.adapter.dialect == "sqlite":
+            with self.adapter.connection() as conn:
+                conn.executescript(SQLITE_SCHEMA)
+        self._schema_ready = True
+
+    def _remember(self, key: Tuple[str, str], document: Dict[str, Any]) -> None:
+        with self._lock:
+            self._entries[key] = document
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def peek(self, user_id: str, week_of: str) -> Optional[Dict[str, Any]]:
+        """The plan document if it is held in memory; never touches the database."""
+        key = (user_id, week_of)
+        with self._lock:
+            document = self._entries.get(key)
+            if document is not None:
+                self._entries.move_to_end(key)
+            return document
+
+    def get(self, user_id: str, week_of: str) -> Optional[Dict[str, Any]]:
+        """
+        The stored plan document for a user's week.
+
+        Args:
+            user_id: Owner of the plan
+            week_of: ISO date of the week's Monday
+
+        Returns:
+            The curated_items document, or None if the week was never planned
+        """
+        document = self.peek(user_id, week_of)
+        if document is not None:
+            return document
+
+        self.ensure_schema()
+        row = self.adapter.fetch_one(
+            "SELECT curated_items FROM weekly_curations WHERE user_id = ? AND week_of = ?",
+            (user_id, week_of),
+        )
+        if row is None:
+            return None
+        document = row["curated_items"]
+        if isinstance(document, (str, bytes)):
+            document = json.loads(document)
+        self._remember((user_id, week_of), document)
+        return document
+
+    def save(
+        self,
+        user_id: str,
+        week_of: str,
+        document: Dict[str, Any],
+        styling_notes: Optional[str] = None
+    ) -> None:
+        """Store the plan document for a user's week, replacing any previous one."""
+        self.ensure_schema()
+        payload = json.dumps(document, separators=(",", ":"))
+        self.adapter.execute(
+            "INSERT INTO weekly_curations (id, user_id, week_of, curated_items, styling_notes) "
+            "VALUES (?, ?, ?, ?, ?) "
+            "ON CONFLICT (user_id, week_of) DO UPDATE SET "
+            "curated_items = excluded.curated_items, styling_notes = excluded.styling_notes",
+            (str(uuid.uuid4()), user_id, week_of, payload, styling_notes),
+        )
+        self._remember((user_id, week_of), document)
+
+    def forget(self, user_id: str) -> None:
+        """Drop a user's plans from memory (the stored rows are kept)."""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == user_id]:
+                del self._entries[key]
+
+
+# Initialize repository
+curation_repository = CurationRepository(max_entries=settings.wardrobe_cache_max_users)
@@ -0,0 +1,349 @@
+# Garment vector repository
+# Builds the similar-garment index from garments.descriptor into a shared
+# directory of memory-mapped files and serves it to the recommend workers
+
+import asyncio
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.ai_core.garment_descriptor import DESCRIPTOR_DIM, DESCRIPTOR_VARIANT, decode_descriptor
+from app.ai_core.vector_index import METRICS, VectorIndex, current_build, score_vectors
+from app.core.config import settings
+from app.db.adapters import DatabaseAdapter, get_adapter
+from app.db.garments_schema import ensure_garments_schema
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+except ImportError:  # Windows: builds are not coordinated across processes
+    fcntl = None
+
+# Lock file under the index root; one process builds at a time
+LOCK_FILE = ".lock"
+
+# Touched under the index root on every write; builds older than its
+# mtime are stale in every process on the host
+DIRTY_FILE = ".dirty"
+
+# Seconds between checks for a build published by another process
+RELOAD_INTERVAL = 1.0
+
+# Writes kept on top of the open build; older ones are only dropped from
+# memory (the next build reads them from the table)
+MAX_PENDING = 10000
+
+# Seconds before a failed background rebuild is tried again
+REFRESH_RETRY_INTERVAL = 30.0
+
+
+class GarmentVectorRepository:
+    """
+    Similar-garment index shared by every worker on the host:
+    - One process at a time (file lock) reads every stored descriptor
+      and writes a new VectorIndex build; the others map the published
+      build read-only, so the vectors live once in the page cache
+    - A build is served for `ttl` seconds; after that the next request
+      starts a rebuild in the background and keeps answering from the
+      current build until the new one is published
+    - Writes through the wardrobe repository (the /api/v1/wardrobe
+      routes) are applied in place on top of the build in the process
+      that handled them (saved garments join the results, deleted ones
+      leave them) and mark the shared build stale, so every worker on
+      the host (scan workers take the writes) rebuilds on its next
+      search
+    """
+
+    def __init__(
+        self,
+        root: str,
+        ttl: float = 300.0,
+        adapter: Optional[DatabaseAdapter] = None
+    ):
+        self.root = root
+        self.ttl = ttl
+        self._adapter = adapter
+        self._index: Optional[VectorIndex] = None
+        self._checked_at = 0.0
+        # Wall time of the last write; builds that read the table before
+        # it are stale
+        self._dirty_at = 0.0
+        # garment id -> (owner, descriptor or None when deleted, wall time
+        # of the write), for writes newer than the open build
+        self._pending: Dict[str, Tuple[str, Optional[np.ndarray], float]] = {}
+        self._refreshing: Optional[asyncio.Task] = None
+        # Monotonic time of the last failed background rebuild
+        self._refresh_failed_at: Optional[float] = None
+        self._lock = threading.Lock()
+        # Held for a whole rebuild; _lock only guards the open build
+        self._build_mutex = threading.Lock()
+        self._schema_ready = False
+
+    @property
+    def adapter(self) -> DatabaseAdapter:
+        if self._adapter is None:
+            self._adapter = get_adapter()
+        return self._adapter
+
+    def use_adapter(self, adapter: DatabaseAdapter) -> None:
+        """Swap the backing database; the next request rebuilds the index."""
+        with self._lock:
+            self._adapter = adapter
+            self._schema_ready = False
+            self._index = None
+            self._pending.clear()
+
+    def ensure_schema(self) -> None:
+        """Create the garments table on SQLite; Postgres uses the SQL scripts."""
+        if self._schema_ready:
+            return
+        ensure_garments_schema(self.adapter)
+        self._schema_ready = True
+
+    @contextmanager
+    def _build_lock(self) -> Iterator[None]:
+        os.makedirs(self.root, exist_ok=True)
+        if fcntl is None:
+            yield
+            return
+        with open(os.path.join(self.root, LOCK_FILE), "a") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _is_fresh(self, index: VectorIndex) -> bool:
+        return (
+            index.variant == DESCRIPTOR_VARIANT
+            and index.built_at >= self._dirty_at
+            and time.time() - index.built_at < self.ttl
+        )
+
+    def _open_current(self) -> Optional[VectorIndex]:
+        """The published build, reusing the open one when unchanged (caller holds the lock)."""
+        path = current_build(self.root)
+        if path is None:
+            return None
+        if self._index is None or self._index.path != path:
+            try:
+                self._index = VectorIndex.open(path)
+            except (FileNotFoundError, ValueError, KeyError):
+                # Removed or half-written; keep serving the open build
+                return self._index
+        return self._index
+
+    def refresh(self, force: bool = False) -> VectorIndex:
+        """
+        Blocking: open the published build, rebuilding it from the garments
+        table first when it is missing, older than ttl, of another
+        descriptor variant, or `force` is set.
+
+        Waits for a build in progress in another process and then uses
+        its result instead of building again.
+        """
+        with self._build_mutex, self._build_lock():
+            with self._lock:
+                index = self._open_current()
+            if index is None or force or not self._is_fresh(index):
+                self.ensure_schema()
+                read_at = time.time()
+                rows = self.adapter.fetch_all(
+                    "SELECT id, user_id, descriptor FROM garments WHERE descriptor IS NOT NULL"
+                )
+                entries: List[Tuple[str, str, np.ndarray]] = []
+                for row in rows:
+                    try:
+                        entries.append((row["id"], row["user_id"], decode_descriptor(row["descriptor"])))
+                    except ValueError:
+                        continue
+                VectorIndex.build(self.root, entries, DESCRIPTOR_DIM, DESCRIPTOR_VARIANT, built_at=read_at)
+                with self._lock:
+                    index = self._open_current()
+            self._checked_at = time.monotonic()
+            return index
+
+    def current(self) -> Optional[VectorIndex]:
+        """
+        The open build, switching to a newer published one (and noticing
+        writes from other processes) at most once per RELOAD_INTERVAL.
+        """
+        with self._lock:
+            if time.monotonic() - self._checked_at >= RELOAD_INTERVAL:
+                self._checked_at = time.monotonic()
+                self._open_current()
+                try:
+                    self._dirty_at = max(self._dirty_at, os.stat(os.path.join(self.root, DIRTY_FILE)).st_mtime)
+                except OSError:
+                    pass
+            return self._index
+
+    async def get_index(self) -> VectorIndex:
+        """
+        The index to search: built off the event loop on first use, then
+        served as is while a stale build is replaced in the background.
+        """
+        index = self.current()
+        if index is None:
+            return await asyncio.to_thread(self.refresh)
+        if (
+            not self._is_fresh(index)
+            and (self._refreshing is None or self._refreshing.done())
+            and (
+                self._refresh_failed_at is None
+                or time.monotonic() - self._refresh_failed_at >= REFRESH_RETRY_INTERVAL
+            )
+        ):
+            self._refreshing = asyncio.create_task(asyncio.to_thread(self.refresh))
+            self._refreshing.add_done_callback(self._refreshed)
+        return index
+
+    def _refreshed(self, task: asyncio.Task) -> None:
+        """Log a failed background rebuild; the stale build keeps serving until the retry."""
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is None:
+            self._refresh_failed_at = None
+            return
+        self._refresh_failed_at = time.monotonic()
+        logger.error(
+            "Similar-garment index rebuild failed, retrying in %.0f s",
+            REFRESH_RETRY_INTERVAL,
+            exc_info=error,
+        )
+
+    def load_descriptor(self, garment_id: str) -> Optional[Tuple[str, np.ndarray]]:
+        """Blocking: (owner, descriptor) of a stored garment; None when it has none."""
+        self.ensure_schema()
+        row = self.adapter.fetch_one(
+            "SELECT user_id, descriptor FROM garments WHERE id = ? AND descriptor IS NOT NULL",
+            (garment_id,),
+        )
+        if row is None:
+            return None
+        try:
+            return str(row["user_id"]), decode_descriptor(row["descriptor"])
+        except ValueError:
+            return None
+
+    def _pending_for(self, index: VectorIndex) -> Dict[str, Tuple[str, Optional[np.ndarray]]]:
+        """Writes the build doesn't contain yet (older ones are dropped)."""
+        with self._lock:
+            for garment_id in [g for g, (_, _, at) in self._pending.items() if at <= index.built_at]:
+                del self._pending[garment_id]
+            return {g: (owner, vector) for g, (owner, vector, _) in self._pending.items()}
+
+    async def garment_descriptor(self, garment_id: str) -> Optional[Tuple[str, np.ndarray]]:
+        """(owner, descriptor) of a garment: from pending writes or the index, else from the database."""
+        index = await self.get_index()
+        pending = self._pending_for(index).get(garment_id)
+        if pending is not None:
+            return pending if pending[1] is not None else None
+        row = index.row_of(garment_id)
+        if row is not None:
+            return index.owner_of(row), index.vector(row)
+        return await asyncio.to_thread(self.load_descriptor, garment_id)
+
+    def search(
+        self,
+        index: VectorIndex,
+        query: np.ndarray,
+        k: int,
+        metric: str,
+        user_id: str,
+        exclude: Sequence[str] = ()
+    ) -> Tuple[List[Tuple[str, float]], int]:
+        """
+        Exact top-k over one owner's garments: the build's rows plus the
+        writes it doesn't contain yet.
+
+        Returns:
+            ([(garment_id, score)] closest first, garments searched)
+
+        Raises:
+            ValueError: Unknown metric or wrong query length
+        """
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        query = np.asarray(query, dtype=np.float32)
+        pending = {g: v for g, (owner, v) in self._pending_for(index).items() if owner == user_id}
+        matches = [
+            (garment_id, score)
+            for garment_id, _, score in index.search(query, k, metric, user_id, list(exclude) + list(pending))
+        ]
+        added = [(g, v) for g, v in pending.items() if v is not None and g not in exclude]
+        if added:
+            vectors = np.stack([v for _, v in added])
+            scores, _ = score_vectors(vectors, np.einsum("ij,ij->i", vectors, vectors), query, metric)
+            matches.extend((g, float(score)) for (g, _), score in zip(added, scores))
+            matches.sort(key=lambda m: -m[1] if metric == "cosine" else m[1])
+            matches = matches[:k]
+        searched = index.count(user_id) + sum(
+            (v is not None) - (index.row_of(g) is not None) for g, v in pending.items()
+        )
+        return matches, searched
+
+    def record_saved(self, user_id: str, garments: Iterable[Tuple[str, Optional[str]]]) -> None:
+        """
+        Apply garments written through the wardrobe repository.
+
+        Args:
+            user_id: Owner
+            garments: (garment id, stored descriptor); garments saved
+                without a descriptor keep their indexed one
+        """
+        now = time.time()
+        changed = False
+        with self._lock:
+            for garment_id, text in garments:
+                if not text:
+                    continue
+                try:
+                    vector = decode_descriptor(text)
+                except ValueError:
+                    continue
+                self._remember(garment_id, user_id, vector, now)
+                changed = True
+        if changed:
+            self.invalidate()
+
+    def record_deleted(self, user_id: str, garment_id: str) -> None:
+        """Apply a garment deleted through the wardrobe repository."""
+        with self._lock:
+            self._remember(garment_id, user_id, None, time.time())
+        self.invalidate()
+
+    def _remember(self, garment_id: str, user_id: str, vector: Optional[np.ndarray], at: float) -> None:
+        """Record a pending write (caller holds the lock)."""
+        self._pending.pop(garment_id, None)
+        self._pending[garment_id] = (user_id, vector, at)
+        while len(self._pending) > MAX_PENDING:
+            del self._pending[next(iter(self._pending))]
+
+    def invalidate(self) -> None:
+        """Rebuild on the next request, in every process on the host (after writes, or a bulk import)."""
+        now = time.time()
+        with self._lock:
+            self._dirty_at = now
+        try:
+            os.makedirs(self.root, exist_ok=True)
+            path = os.path.join(self.root, DIRTY_FILE)
+            with open(path, "a"):
+                pass
+            os.utime(path, (now, now))
+        except OSError:
+            logger.warning("Could not mark the similar-garment index stale for other workers", exc_info=True)
+
+
+# Initialize repository
+garment_vector_repository = GarmentVectorRepository(
+    settings.similar_index_dir,
+    ttl=settings.similar_index_ttl,
+)
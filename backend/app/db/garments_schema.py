@@ -0,0 +1,42 @@
+# Garments table schema
+# Local SQLite schema of the garments table, shared by the repositories
+# that read it
+
+from app.db.adapters import DatabaseAdapter
+
+# Local schema mirroring scripts/001_create_lokafit_schema.sql (garments),
+# scripts/004_garments_phash.sql, scripts/005_garments_descriptor.sql and
+# scripts/007_garments_assets.sql
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS garments (
+  id TEXT PRIMARY KEY,
+  user_id TEXT NOT NULL,
+  file_url TEXT NOT NULL DEFAULT '',
+  storage_path TEXT,
+  color_hex TEXT,
+  measurements_json TEXT,
+  garment_type TEXT,
+  status TEXT CHECK (status IN ('DRAF', 'PERMANEN')),
+  phash TEXT,
+  descriptor TEXT,
+  assets TEXT,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+  updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX IF NOT EXISTS idx_garments_user_id ON garments(user_id);
+"""
+
+# Columns added after the first schema, added to older local databases
+SQLITE_ADDED_COLUMNS = (("phash", "TEXT"), ("descriptor", "TEXT"), ("assets", "TEXT"))
+
+
+def ensure_garments_schema(adapter: DatabaseAdapter) -> None:
+    """Create (or bring up to date) the garments table on SQLite; Postgres uses the SQL scripts."""
+    if adapter.dialect != "sqlite":
+        return
+    with adapter.connection() as conn:
+        conn.executescript(SQLITE_SCHEMA)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(garments)")}
+        for name, kind in SQLITE_ADDED_COLUMNS:
+            if name not in columns:
+                conn.execute(f"ALTER TABLE garments ADD COLUMN {name} {kind}")
@@ -0,0 +1,120 @@
+# Skin tone palette repository
+# Loads the seeded skin_tone_palettes rows once per process and serves
+# them from memory to the skin tone analyzer
+
+import json
+import threading
+from typing import Any, Dict, Optional
+
+from app.db.adapters import DatabaseAdapter, get_adapter
+
+# Local schema mirroring scripts/001_create_lokafit_schema.sql (skin_tone_palettes)
+SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS skin_tone_palettes (
+  id TEXT PRIMARY KEY,
+  name TEXT NOT NULL UNIQUE,
+  hex_values TEXT NOT NULL,
+  description TEXT,
+  created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+"""
+
+# Rows of scripts/002_seed_skin_tones.sql (id, name, values, description),
+# seeded into local SQLite databases; the ids are fixed so profiles.skin_tone_id
+# means the same palette in every database
+SEED_PALETTES = (
+    ("ddc50012-b015-44da-8a44-c3ffc2ed26ab", "Warm Undertone",
+     {"primary": "#E8B4A8", "secondary": ["#D4A574", "#C99070", "#B8845C", "#A47548"], "accent": "#F5D4A3"},
+     "Golden, peachy, warm skin tones"),
+    ("877c220f-cbce-48d8-bc38-548ee5e61800", "Cool Undertone",
+     {"primary": "#D4A0A0", "secondary": ["#C4949C", "#B488A0", "#A47CA8", "#9876B0"], "accent": "#E8C4D8"},
+     "Pink, rosy, cool skin tones"),
+    ("1bf47018-1ceb-4254-9257-55645e6ae404", "Neutral Undertone",
+     {"primary": "#D4A890", "secondary": ["#C49C84", "#B89078", "#A8846C", "#987860"], "accent": "#E8C8A0"},
+     "Balanced, olive, neutral skin tones"),
+    ("f38387ca-2c38-4598-a811-ebf64bf932c4", "Deep/Dark Skin Tone",
+     {"primary": "#6B4423", "secondary": ["#5C3817", "#4D2C0B", "#3E2000", "#2F1400"], "accent": "#8B6433"},
+     "Deep, dark, warm skin tones"),
+    ("66db4592-f951-4d83-8536-a949ea7dd527", "Light/Fair Skin Tone",
+     {"primary": "#F5D4C4", "secondary": ["#E8C8B8", "#DBBCAC", "#CEB0A0", "#C1A494"], "accent": "#FDE8DC"},
+     "Light, fair, pale skin tones"),
+)
+
+
+class SkinTonePaletteRepository:
+    """
+    Skin tone palettes keyed by name:
+    - Read once (app startup or first use) and kept for the process'
+      lifetime; the table only changes through seed scripts
+    - Local SQLite databases get the table and the seed rows on first use
+    """
+
+    def __init__(self, adapter: Optional[DatabaseAdapter] = None):
+        self._adapter = adapter
+        self._palettes: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lock = threading.Lock()
+
+    @property
+    def adapter(self) -> DatabaseAdapter:
+        if self._adapter is None:
+            self._adapter = get_adapter()
+        return self._adapter
+
+    def use_adapter(self, adapter: DatabaseAdapter) -> None:
+        """Swap the backing database (e.g. an in-memory SQLite in tests)."""
+        with self._lock:
+            self._adapter = adapter
+            self._palettes = None
+
+    def ensure_schema(self) -> None:
+        """Create and seed skin_tone_palettes on SQLite; Postgres uses the SQL scripts."""
+        if self.adapter.dialect != "sqlite":
+            return
+        with self.adapter.connection() as conn:
+            conn.executescript(SQLITE_SCHEMA)
+        self.adapter.execute_many(
+            "INSERT INTO skin_tone_palettes (id, name, hex_values, description) "
+            "VALUES (?, ?, ?, ?) ON CONFLICT (name) DO UPDATE SET id = excluded.id",
+            [(palette_id, name, json.dumps(values), description)
+             for palette_id, name, values, description in SEED_PALETTES],
+        )
+
+    def load(self) -> Dict[str, Dict[str, Any]]:
+        """Blocking: every palette by name, read from the database once."""
+        with self._lock:
+            if self._palettes is not None:
+                return self._palettes
+
+        self.ensure_schema()
+        rows = self.adapter.fetch_all("SELECT id, name, hex_values, description FROM skin_tone_palettes")
+        palettes = {}
+        for row in rows:
+            values = row["hex_values"]
+            # JSONB comes back decoded from Postgres, as text from SQLite
+            if isinstance(values, str):
+                values = json.loads(values)
+            palettes[row["name"]] = {
+                "id": str(row["id"]),
+                "name": row["name"],
+                "description": row["description"],
+                **values,
+            }
+
+        with self._lock:
+            self._palettes = palettes
+        return palettes
+
+    def get(self, name: str) -> Optional[Dict[str, Any]]:
+        return self.load().get(name)
+
+    @staticmethod
+    def seed(name: str) -> Optional[Dict[str, Any]]:
+        """A palette as seeded by the scripts (same id), for when the table can't be read."""
+        for palette_id, seed_name, values, description in SEED_PALETTES:
+            if seed_name == name:
+                return {"id": palette_id, "name": seed_name, "description": description, **values}
+        return None
+
+
+# Initialize repository
+palette_repository = SkinTonePaletteRepository()
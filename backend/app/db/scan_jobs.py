@@ -0,0 +1,402 @@
+# Scan job store
+# Durable queue of asynchronous scan jobs in a local SQLite file: uploads,
+# claim leases, retries and results kept for a TTL (no external broker)
+
+import hashlib
+import json
+import sqlite3
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence
+
+from app.core.config import settings
+from app.db.adapters import SQLiteAdapter
+
+JOBS_TABLE = """
+CREATE TABLE IF NOT EXISTS {name} (
+  id TEXT PRIMARY KEY,
+  user_id TEXT NOT NULL DEFAULT '',
+  idempotency_key TEXT,
+  payload_sha256 TEXT NOT NULL,
+  params TEXT NOT NULL,
+  status TEXT NOT NULL,
+  attempts INTEGER NOT NULL DEFAULT 0,
+  available_at REAL NOT NULL,
+  lease_expires_at REAL,
+  created_at REAL NOT NULL,
+  started_at REAL,
+  finished_at REAL,
+  expires_at REAL,
+  result TEXT,
+  error TEXT,
+  UNIQUE (user_id, idempotency_key)
+);
+"""
+
+SCHEMA = JOBS_TABLE.format(name="scan_jobs") + """
+CREATE INDEX IF NOT EXISTS idx_scan_jobs_ready ON scan_jobs(status, available_at);
+CREATE INDEX IF NOT EXISTS idx_scan_jobs_expires ON scan_jobs(expires_at);
+CREATE TABLE IF NOT EXISTS scan_job_payloads (
+  job_id TEXT PRIMARY KEY REFERENCES scan_jobs(id) ON DELETE CASCADE,
+  data BLOB NOT NULL
+);
+"""
+
+# Rebuilds a table created before jobs had an owner (the key was unique
+# across all users); run with foreign keys off so the payloads survive
+MIGRATE_OWNER = JOBS_TABLE.format(name="scan_jobs_owned") + """
+INSERT INTO scan_jobs_owned (id, idempotency_key, payload_sha256, params, status, attempts,
+  available_at, lease_expires_at, created_at, started_at, finished_at, expires_at, result, error)
+SELECT id, idempotency_key, payload_sha256, params, status, attempts, available_at,
+  lease_expires_at, created_at, started_at, finished_at, expires_at, result, error
+FROM scan_jobs;
+DROP TABLE scan_jobs;
+ALTER TABLE scan_jobs_owned RENAME TO scan_jobs;
+"""
+
+JOB_STATES = ("queued", "running", "succeeded", "failed")
+
+# Finished jobs the latency percentiles are computed over
+LATENCY_WINDOW = 1000
+
+JOB_COLUMNS = (
+    "id, user_id, idempotency_key, params, status, attempts, created_at, started_at, "
+    "finished_at, expires_at, result, error"
+)
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when the queue already holds `max_queued` unfinished jobs."""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Scan job queue is full, retry later")
+        self.retry_after = retry_after
+
+
+class IdempotencyConflictError(ValueError):
+    """Raised when an idempotency key is reused for a different upload or parameters."""
+
+
+class JobLookupError(RuntimeError):
+    """Raised when the job behind a contended idempotency key cannot be read back."""
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    if not samples:
+        return {}
+    samples = sorted(samples)
+    pick = lambda q: samples[min(len(samples) - 1, int(q * len(samples)))]  # noqa: E731
+    return {
+        "p50_ms": round(pick(0.50) * 1000, 1),
+        "p90_ms": round(pick(0.90) * 1000, 1),
+        "p99_ms": round(pick(0.99) * 1000, 1),
+    }
+
+
+class ScanJobStore:
+    """
+    Scan jobs in a local SQLite database (WAL), shared by every API
+    process on the host:
+    - The upload is kept in a separate table until the job finishes, so
+      status polls never read image bytes
+    - Jobs are claimed with a single UPDATE, so concurrent workers (and
+      processes) never run the same attempt twice; a claim holds a lease,
+      and a job whose worker died is claimed again once the lease expires
+    - A job belongs to the user who submitted it (anonymous jobs to
+      nobody); an idempotency key maps that user's resubmissions to the
+      original job while its result is kept (reusing a key for another
+      upload is an error)
+    - Finished jobs expire `result_ttl` seconds after completion
+
+    Args:
+        path: SQLite file (":memory:" for tests)
+        max_queued: Unfinished jobs accepted at most (0 = unbounded)
+        max_attempts: Attempts per job, retries included
+        result_ttl: Seconds results (and failures) stay readable
+        retry_after: Retry-After hint (seconds) when the queue is full
+    """
+
+    def __init__(
+        self,
+        path: str,
+        max_queued: int = 1000,
+        max_attempts: int = 3,
+        result_ttl: float = 86400.0,
+        retry_after: int = 2
+    ):
+        self.path = path
+        self.max_queued = max_queued
+        self.max_attempts = max(1, max_attempts)
+        self.result_ttl = result_ttl
+        self.retry_after = retry_after
+        self._adapter: Optional[SQLiteAdapter] = None
+
+    @property
+    def adapter(self) -> SQLiteAdapter:
+        if self._adapter is None:
+            self._adapter = SQLiteAdapter(self.path)
+            with self._adapter.connection() as conn:
+                columns = {row[1] for row in conn.execute("PRAGMA table_info(scan_jobs)")}
+                if columns and "user_id" not in columns:
+                    conn.execute("PRAGMA foreign_keys=OFF")
+                    try:
+                        conn.executescript(f"BEGIN;{MIGRATE_OWNER}COMMIT;")
+                    finally:
+                        conn.execute("PRAGMA foreign_keys=ON")
+                conn.executescript(SCHEMA)
+        return self._adapter
+
+    @staticmethod
+    def _job(row: Dict[str, Any]) -> Dict[str, Any]:
+        job = dict(row)
+        job["user_id"] = job["user_id"] or None
+        job["params"] = json.loads(job["params"])
+        for field in ("result", "error"):
+            if job.get(field) is not None:
+                job[field] = json.loads(job[field])
+        return job
+
+    def submit(
+        self,
+        payload: bytes,
+        params: Dict[str, Any],
+        idempotency_key: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Blocking: queue a scan job, or return the job `user_id` already
+        queued under `idempotency_key`.
+
+        Args:
+            payload: Uploaded image bytes
+            params: JSON-serialisable scan parameters
+            idempotency_key: Optional client key for safe resubmission
+            user_id: Submitting user (None for anonymous scans); keys are
+                scoped to it
+
+        Returns:
+            The job (see `get`), with "created" False for a resubmission
+
+        Raises:
+            JobQueueFullError: Too many unfinished jobs
+            IdempotencyConflictError: Key already used for another request
+            JobLookupError: The job under a contended key vanished (expired)
+                before it could be read
+        """
+        encoded = json.dumps(params, sort_keys=True)
+        digest = hashlib.sha256(payload + encoded.encode()).hexdigest()
+        now = time.time()
+        job_id = str(uuid.uuid4())
+        owner = user_id or ""
+
+        existing = None
+        created = False
+        for _ in range(2):
+            try:
+                with self.adapter.connection() as conn:
+                    if idempotency_key is not None:
+                        conn.execute(
+                            "DELETE FROM scan_jobs WHERE user_id = ? AND idempotency_key = ? "
+                            "AND expires_at <= ?",
+                            (owner, idempotency_key, now),
+                        )
+                        existing = conn.execute(
+                            "SELECT id, payload_sha256 FROM scan_jobs WHERE user_id = ? AND idempotency_key = ?",
+                            (owner, idempotency_key),
+                        ).fetchone()
+                        if existing is not None:
+                            break
+
+                    if self.max_queued > 0:
+                        (depth,) = conn.execute(
+                            "SELECT COUNT(*) FROM scan_jobs WHERE status IN ('queued', 'running')"
+                        ).fetchone()
+                        if depth >= self.max_queued:
+                            raise JobQueueFullError(self.retry_after)
+
+                    conn.execute(
+                        "INSERT INTO scan_jobs (id, user_id, idempotency_key, payload_sha256, params, "
+                        "status, available_at, created_at) VALUES (?, ?, ?, ?, ?, 'queued', ?, ?)",
+                        (job_id, owner, idempotency_key, digest, encoded, now, now),
+                    )
+                    conn.execute(
+                        "INSERT INTO scan_job_payloads (job_id, data) VALUES (?, ?)",
+                        (job_id, sqlite3.Binary(payload)),
+                    )
+                created = True
+                break
+            except sqlite3.IntegrityError:
+                # Another process inserted the same key first; read its job
+                continue
+
+        if not created and existing is None:
+            # Both inserts lost the race; the winner's row may have expired since
+            existing = self.adapter.fetch_one(
+                "SELECT id, payload_sha256 FROM scan_jobs WHERE user_id = ? AND idempotency_key = ?",
+                (owner, idempotency_key),
+            )
+            if existing is None:
+                raise JobLookupError("Scan job for this Idempotency-Key could not be read, retry later")
+            existing = (existing["id"], existing["payload_sha256"])
+
+        if existing is not None:
+            if existing[1] != digest:
+                raise IdempotencyConflictError("Idempotency-Key was already used for a different scan")
+            job = self.get(existing[0])
+            if job is None:
+                raise JobLookupError("Scan job for this Idempotency-Key expired, retry later")
+            return {**job, "created": False}
+        return {**self.get(job_id), "created": True}
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Blocking: a job by id (None when unknown or expired)."""
+        row = self.adapter.fetch_one(
+            f"SELECT {JOB_COLUMNS} FROM scan_jobs WHERE id = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (job_id, time.time()),
+        )
+        return self._job(row) if row else None
+
+    def claim(self, lease_seconds: float) -> Optional[Dict[str, Any]]:
+        """
+        Blocking: take the oldest runnable job (queued and due, or running
+        with an expired lease and attempts left).
+
+        Returns:
+            The job with its "payload" bytes, or None when nothing is due
+        """
+        now = time.time()
+        rows = self.adapter.fetch_all(
+            "UPDATE scan_jobs SET status = 'running', attempts = attempts + 1, "
+            "lease_expires_at = ?, started_at = COALESCE(started_at, ?) "
+            "WHERE id = (SELECT id FROM scan_jobs "
+            "  WHERE (status = 'queued' AND available_at <= ?) "
+            "     OR (status = 'running' AND lease_expires_at <= ? AND attempts < ?) "
+            "  ORDER BY available_at LIMIT 1) "
+            f"RETURNING {JOB_COLUMNS}",
+            (now + lease_seconds, now, now, now, self.max_attempts),
+        )
+        if not rows:
+            return None
+        job = self._job(rows[0])
+        payload = self.adapter.fetch_one("SELECT data FROM scan_job_payloads WHERE job_id = ?", (job["id"],))
+        job["payload"] = bytes(payload["data"]) if payload else b""
+        return job
+
+    def complete(self, job_id: str, result: Dict[str, Any]) -> None:
+        """Blocking: store a job's result and drop its upload."""
+        now = time.time()
+        with self.adapter.connection() as conn:
+            conn.execute(
+                "UPDATE scan_jobs SET status = 'succeeded', result = ?, error = NULL, "
+                "finished_at = ?, expires_at = ?, lease_expires_at = NULL WHERE id = ?",
+                (json.dumps(result), now, now + self.result_ttl, job_id),
+            )
+            conn.execute("DELETE FROM scan_job_payloads WHERE job_id = ?", (job_id,))
+
+    def fail(self, job_id: str, error: Dict[str, Any], retry_in: Optional[float] = None) -> None:
+        """
+        Blocking: record a failed attempt.
+
+        Args:
+            job_id: Job id
+            error: {"code", "detail"} of the failure
+            retry_in: Seconds until the job is due again; None fails it for good
+        """
+        now = time.time()
+        with self.adapter.connection() as conn:
+            if retry_in is not None:
+                conn.execute(
+                    "UPDATE scan_jobs SET status = 'queued', error = ?, available_at = ?, "
+                    "lease_expires_at = NULL WHERE id = ?",
+                    (json.dumps(error), now + retry_in, job_id),
+                )
+                return
+            conn.execute(
+                "UPDATE scan_jobs SET status = 'failed', error = ?, finished_at = ?, "
+                "expires_at = ?, lease_expires_at = NULL WHERE id = ?",
+                (json.dumps(error), now, now + self.result_ttl, job_id),
+            )
+            conn.execute("DELETE FROM scan_job_payloads WHERE job_id = ?", (job_id,))
+
+    def release(self, job_id: str) -> None:
+        """Blocking: hand a running job back to the queue without counting the attempt (shutdown)."""
+        self.adapter.execute(
+            "UPDATE scan_jobs SET status = 'queued', attempts = attempts - 1, lease_expires_at = NULL "
+            "WHERE id = ? AND status = 'running'",
+            (job_id,),
+        )
+
+    def reap(self) -> int:
+        """
+        Blocking: fail jobs whose last attempt's lease ran out and delete
+        expired jobs.
+
+        Returns:
+            Rows changed
+        """
+        now = time.time()
+        abandoned = json.dumps({"code": 500, "detail": "Worker stopped before the scan finished"})
+        with self.adapter.connection() as conn:
+            failed = conn.execute(
+                "UPDATE scan_jobs SET status = 'failed', error = ?, finished_at = ?, expires_at = ?, "
+                "lease_expires_at = NULL WHERE status = 'running' AND lease_expires_at <= ? AND attempts >= ?",
+                (abandoned, now, now + self.result_ttl, now, self.max_attempts),
+            ).rowcount
+            conn.execute(
+                "DELETE FROM scan_job_payloads WHERE job_id IN "
+                "(SELECT id FROM scan_jobs WHERE status IN ('succeeded', 'failed'))"
+            )
+            # Payload rows go with the job rows (ON DELETE CASCADE)
+            expired = conn.execute("DELETE FROM scan_jobs WHERE expires_at <= ?", (now,)).rowcount
+        return failed + expired
+
+    def depth(self) -> int:
+        """Blocking: jobs waiting for a worker."""
+        row = self.adapter.fetch_one("SELECT COUNT(*) AS n FROM scan_jobs WHERE status = 'queued'")
+        return int(row["n"]) if row else 0
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Blocking: queue counters.
+
+        Returns:
+            Jobs per state, age of the oldest queued job, and queue wait /
+            end-to-end latency percentiles over the latest finished jobs
+        """
+        now = time.time()
+        counts = {state: 0 for state in JOB_STATES}
+        for row in self.adapter.fetch_all(
+            "SELECT status, COUNT(*) AS n FROM scan_jobs "
+            "WHERE expires_at IS NULL OR expires_at > ? GROUP BY status",
+            (now,),
+        ):
+            counts[row["status"]] = int(row["n"])
+
+        oldest = self.adapter.fetch_one(
+            "SELECT MIN(created_at) AS created_at FROM scan_jobs WHERE status = 'queued'"
+        )
+        finished: Sequence[Dict[str, Any]] = self.adapter.fetch_all(
+            "SELECT created_at, started_at, finished_at FROM scan_jobs "
+            "WHERE finished_at IS NOT NULL ORDER BY finished_at DESC LIMIT ?",
+            (LATENCY_WINDOW,),
+        )
+        return {
+            "jobs": counts,
+            "depth": counts["queued"],
+            "oldest_queued_s": (
+                round(now - oldest["created_at"], 3) if oldest and oldest["created_at"] is not None else 0.0
+            ),
+            "wait": _percentiles([r["started_at"] - r["created_at"] for r in finished if r["started_at"]]),
+            "latency": _percentiles([r["finished_at"] - r["created_at"] for r in finished]),
+            "latency_window": len(finished),
+        }
+
+
+# Initialize job store
+scan_job_store = ScanJobStore(
+    settings.scan_jobs_db_path,
+    max_queued=settings.scan_jobs_max_queued,
+    max_attempts=settings.scan_jobs_max_attempts,
+    result_ttl=settings.scan_jobs_result_ttl,
+    retry_after=settings.scan_retry_after,
+)
@@ -0,0 +1,333 @@
+# Wardrobe repository
+# Loads a user's garments from the garments table and keeps a per-user
+# projection in memory for the recommendation engine, plus a per-user
+# perceptual hash index for duplicate detection at scan time
+
+import asyncio
+import json
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from app.ai_core.color_index import WardrobeColorIndex
+from app.ai_core.garments import WardrobeArrays
+from app.ai_core.perceptual_hash import PerceptualHashIndex, parse_hash
+from app.core.config import settings
+from app.db.adapters import DatabaseAdapter, get_adapter
+from app.db.garment_vectors import garment_vector_repository
+from app.db.garments_schema import ensure_garments_schema
+
+# Columns the recommendation engine reads; everything else stays in the DB
+PROJECTION_COLUMNS = ("id", "color_hex", "garment_type", "status", "updated_at")
+
+
+def _parse_phash(value: Any) -> Optional[int]:
+    """Stored hash as an int; None when missing or malformed."""
+    if not value:
+        return None
+    try:
+        return parse_hash(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _json_or_none(value: Any) -> Optional[str]:
+    """JSON column value (text; Postgres casts it to JSONB)."""
+    return json.dumps(value) if value is not None else None
+
+
+class WardrobeSnapshot:
+    """
+    One user's wardrobe as loaded from the database, held as
+    WardrobeArrays (ids, packed colors, type codes).
+
+    The color index is built on first use and shared by every request
+    served from this snapshot.
+    """
+
+    __slots__ = ("user_id", "wardrobe", "loaded_at", "_color_index", "_lock")
+
+    def __init__(self, user_id: str, wardrobe: WardrobeArrays):
+        self.user_id = user_id
+        self.wardrobe = wardrobe
+        self.loaded_at = time.monotonic()
+        self._color_index: Optional[WardrobeColorIndex] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.wardrobe)
+
+    @property
+    def color_index(self) -> WardrobeColorIndex:
+        if self._color_index is None:
+            with self._lock:
+                if self._color_index is None:
+                    self._color_index = WardrobeColorIndex(self.wardrobe.colors)
+        return self._color_index
+
+
+class WardrobeRepository:
+    """
+    Garment storage for the recommendation endpoints:
+    - Reads the projection columns for one user in a single query
+    - Keeps an LRU of per-user snapshots, reused for `cache_ttl` seconds
+    - Writes through this repository (the /api/v1/wardrobe routes)
+      invalidate the user's snapshot
+    - Per-user perceptual hash indexes (duplicate detection) are loaded
+      on first lookup and then kept up to date in place: writes through
+      this repository add or remove the garment at once in the process
+      that handled them; rows changed elsewhere (another worker, or
+      directly in the database) are applied by the next lookup after
+      `cache_ttl`
+    - Descriptor writes are passed on to the similar-garment index
+    - The adapter is swappable (SQLite in memory for tests, Postgres in
+      production)
+    """
+
+    def __init__(
+        self,
+        adapter: Optional[DatabaseAdapter] = None,
+        cache_ttl: float = 30.0,
+        max_users: int = 1024,
+        duplicate_max_distance: int = 10,
+        duplicate_max_color_distance: float = 25.0
+    ):
+        self._adapter = adapter
+        self.cache_ttl = cache_ttl
+        self.max_users = max_users
+        self.duplicate_max_distance = duplicate_max_distance
+        self.duplicate_max_color_distance = duplicate_max_color_distance
+        self._snapshots: "OrderedDict[str, WardrobeSnapshot]" = OrderedDict()
+        # user id -> (hash index, monotonic time of the last database sync)
+        self._hash_indexes: "OrderedDict[str, Tuple[PerceptualHashIndex, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._schema_ready = False
+
+    @property
+    def adapter(self) -> DatabaseAdapter:
+        if self._adapter is None:
+            self._adapter = get_adapter()
+        return self._adapter
+
+    def use_adapter(self, adapter: DatabaseAdapter) -> None:
+        """Swap the backing database (e.g. an in-memory SQLite in tests)."""
+        with self._lock:
+            self._adapter = adapter
+            self._schema_ready = False
+            self._snapshots.clear()
+            self._hash_indexes.clear()
+
+    def ensure_schema(self) -> None:
+        """Create the garments table on SQLite; Postgres uses the SQL scripts."""
+        if self._schema_ready:
+            return
+        ensure_garments_schema(self.adapter)
+        self._schema_ready = True
+
+    def load(self, user_id: str) -> WardrobeSnapshot:
+        """Blocking: the user's wardrobe, from cache when fresh."""
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.cache_ttl:
+                self._snapshots.move_to_end(user_id)
+                return snapshot
+
+        self.ensure_schema()
+        rows = self.adapter.fetch_all(
+            f"SELECT {', '.join(PROJECTION_COLUMNS)} FROM garments "
+            "WHERE user_id = ? ORDER BY created_at, id",
+            (user_id,),
+        )
+        snapshot = WardrobeSnapshot(user_id, WardrobeArrays.from_dicts(rows))
+
+        with self._lock:
+            self._snapshots[user_id] = snapshot
+            self._snapshots.move_to_end(user_id)
+            while len(self._snapshots) > self.max_users:
+                self._snapshots.popitem(last=False)
+        return snapshot
+
+    async def get_wardrobe(self, user_id: str) -> WardrobeSnapshot:
+        """Cached snapshot without touching the database; otherwise load off the event loop."""
+        with self._lock:
+            snapshot = self._snapshots.get(user_id)
+            if snapshot is not None and time.monotonic() - snapshot.loaded_at < self.cache_ttl:
+                self._snapshots.move_to_end(user_id)
+                return snapshot
+        return await asyncio.to_thread(self.load, user_id)
+
+    def invalidate(self, user_id: str) -> None:
+        with self._lock:
+            self._snapshots.pop(user_id, None)
+
+    def _cached_hash_index(self, user_id: str) -> Optional[PerceptualHashIndex]:
+        """The user's hash index if synced within cache_ttl (caller holds the lock)."""
+        cached = self._hash_indexes.get(user_id)
+        if cached is None or time.monotonic() - cached[1] >= self.cache_ttl:
+            return None
+        self._hash_indexes.move_to_end(user_id)
+        return cached[0]
+
+    def load_hash_index(self, user_id: str) -> PerceptualHashIndex:
+        """
+        Blocking: the user's perceptual hash index, synced with the
+        garments table when older than cache_ttl.
+
+        A sync reads only (id, phash, color_hex) and updates the existing
+        index in place: garments that were deleted are removed, new or
+        changed ones (re)added.
+        """
+        with self._lock:
+            index = self._cached_hash_index(user_id)
+            if index is not None:
+                return index
+            cached = self._hash_indexes.get(user_id)
+
+        self.ensure_schema()
+        rows = self.adapter.fetch_all(
+            "SELECT id, phash, color_hex FROM garments WHERE user_id = ? AND phash IS NOT NULL",
+            (user_id,),
+        )
+        index = cached[0] if cached is not None else PerceptualHashIndex()
+        current = {}
+        for row in rows:
+            value = _parse_phash(row["phash"])
+            if value is not None:
+                current[str(row["id"])] = (value, row["color_hex"])
+        for garment_id in index.ids() - current.keys():
+            index.remove(garment_id)
+        index.add_many(
+            (garment_id, value, color_hex)
+            for garment_id, (value, color_hex) in current.items()
+            if index.entry(garment_id) != (value, color_hex)
+        )
+
+        with self._lock:
+            self._hash_indexes[user_id] = (index, time.monotonic())
+            self._hash_indexes.move_to_end(user_id)
+            while len(self._hash_indexes) > self.max_users:
+                self._hash_indexes.popitem(last=False)
+        return index
+
+    async def find_duplicates(
+        self,
+        user_id: str,
+        phash: str,
+        color_hex: Optional[str] = None,
+        limit: int = 5
+    ) -> List[Dict[str, Any]]:
+        """
+        Garments in the user's wardrobe that look like a scanned one.
+
+        Served from the in-memory index; the database is only read (off
+        the event loop) on the user's first lookup and once per cache_ttl.
+
+        Args:
+            user_id: Wardrobe owner
+            phash: Perceptual hash of the scan (metadata["phash"])
+            color_hex: Dominant color of the scan; matches must be within
+                duplicate_max_color_distance of it (Lab)
+            limit: Maximum matches returned
+
+        Returns:
+            [{"garment_id", "distance"}], nearest first (distance in bits
+            out of 64)
+
+        Raises:
+            ValueError: Malformed phash
+        """
+        value = parse_hash(phash)
+        with self._lock:
+            index = self._cached_hash_index(user_id)
+        if index is None:
+            index = await asyncio.to_thread(self.load_hash_index, user_id)
+        matches = index.query(
+            value,
+            self.duplicate_max_distance,
+            color_hex=color_hex,
+            max_color_distance=self.duplicate_max_color_distance or None,
+            limit=limit,
+        )
+        return [{"garment_id": garment_id, "distance": distance} for garment_id, distance in matches]
+
+    def _hash_index_if_loaded(self, user_id: str) -> Optional[PerceptualHashIndex]:
+        with self._lock:
+            cached = self._hash_indexes.get(user_id)
+        return cached[0] if cached is not None else None
+
+    def save_garments(self, user_id: str, garments: Sequence[Dict[str, Any]]) -> List[str]:
+        """
+        Insert or update garments for a user.
+
+        Args:
+            user_id: Owner of the garments
+            garments: Dicts with optional id, file_url, assets,
+                measurements_json, color_hex, garment_type, status, phash
+                and descriptor (the scan's metadata["phash"] /
+                metadata["descriptor"]; kept when an update has none).
+                An id owned by another user is left unchanged.
+
+        Returns:
+            Garment ids in input order
+        """
+        self.ensure_schema()
+        ids = [str(g.get("id") or uuid.uuid4()) for g in garments]
+        self.adapter.execute_many(
+            "INSERT INTO garments "
+            "(id, user_id, file_url, assets, color_hex, measurements_json, garment_type, status, "
+            "phash, descriptor) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT (id) DO UPDATE SET color_hex = excluded.color_hex, "
+            "garment_type = excluded.garment_type, status = excluded.status, "
+            "assets = COALESCE(excluded.assets, garments.assets), "
+            "measurements_json = COALESCE(excluded.measurements_json, garments.measurements_json), "
+            "phash = COALESCE(excluded.phash, garments.phash), "
+            "descriptor = COALESCE(excluded.descriptor, garments.descriptor), "
+            "updated_at = CURRENT_TIMESTAMP "
+            "WHERE garments.user_id = excluded.user_id",
+            [
+                (gid, user_id, g.get("file_url", ""), _json_or_none(g.get("assets")), g.get("color_hex"),
+                 _json_or_none(g.get("measurements_json")), g.get("garment_type"), g.get("status"),
+                 g.get("phash"), g.get("descriptor"))
+                for gid, g in zip(ids, garments)
+            ],
+        )
+        self.invalidate(user_id)
+        garment_vector_repository.record_saved(user_id, [(gid, g.get("descriptor")) for gid, g in zip(ids, garments)])
+
+        index = self._hash_index_if_loaded(user_id)
+        if index is not None:
+            entries = []
+            for gid, g in zip(ids, garments):
+                value = _parse_phash(g.get("phash"))
+                if value is None:
+                    known = index.entry(gid)
+                    value = known[0] if known is not None else None
+                if value is not None:
+                    entries.append((gid, value, g.get("color_hex")))
+            index.add_many(entries)
+        return ids
+
+    def delete_garment(self, user_id: str, garment_id: str) -> bool:
+        self.ensure_schema()
+        deleted = self.adapter.execute(
+            "DELETE FROM garments WHERE id = ? AND user_id = ?", (garment_id, user_id)
+        )
+        self.invalidate(user_id)
+        index = self._hash_index_if_loaded(user_id)
+        if index is not None:
+            index.remove(garment_id)
+        if deleted:
+            garment_vector_repository.record_deleted(user_id, garment_id)
+        return deleted > 0
+
+
+# Initialize repository
+wardrobe_repository = WardrobeRepository(
+    cache_ttl=settings.wardrobe_cache_ttl,
+    max_users=settings.wardrobe_cache_max_users,
+    duplicate_max_distance=settings.scan_duplicate_max_distance,
+    duplicate_max_color_distance=settings.scan_duplicate_max_color_distance,
+)
@@ -0,0 +1,64 @@
+# Benchmark: scan asset encoding
+#
+# Encodes the asset of a segmented synthetic scan as:
+#   legacy      BGR->RGB copy, PIL, one full-resolution WebP at quality 75
+#   quick       rendition set with the quick preset
+#   accurate    rendition set with the accurate preset
+# reporting encode time and bytes stored (all renditions together).
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_asset_encoding [--mp 1 4 12] [--repeat 3]
+
+import argparse
+import json
+from io import BytesIO
+
+import cv2
+from PIL import Image
+
+from app.ai_core.asset_encoding import ENCODE_PRESETS, AssetEncoder
+from app.ai_core.garment_processor import DEFAULT_RENDITIONS
+from app.ai_core.segmentation import create_segmenter
+from benchmarks.common import RESOLUTIONS, synthetic_garment_photo, time_call
+
+
+def legacy_webp(image) -> bytes:
+    buffer = BytesIO()
+    Image.fromarray(cv2.cvtColor(image, cv2.COLOR_BGR2RGB)).save(buffer, format="WebP", quality=75)
+    return buffer.getvalue()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mp", type=int, nargs="+", default=[1, 4, 12])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    encoder = AssetEncoder(DEFAULT_RENDITIONS)
+    segmenter = create_segmenter("classical")
+
+    report = []
+    for mp in args.mp:
+        width, height = RESOLUTIONS[mp]
+        image = synthetic_garment_photo(width, height)
+        working = cv2.resize(image, (1024, round(1024 * height / width)), interpolation=cv2.INTER_AREA)
+        mask = segmenter.segment(working)[0][:, :, 3].copy()
+
+        row = {
+            "megapixels": mp,
+            "legacy": {**time_call(lambda: legacy_webp(image), args.repeat), "bytes": len(legacy_webp(image))},
+        }
+        for name, preset in ENCODE_PRESETS.items():
+            _, info = encoder.encode(image, preset, mask)
+            row[name] = {
+                **time_call(lambda: encoder.encode(image, preset, mask), args.repeat),
+                "bytes": sum(r["bytes"] for r in info),
+                "renditions": {r["name"]: r["bytes"] for r in info},
+            }
+        report.append(row)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
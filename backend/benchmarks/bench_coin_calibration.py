@@ -0,0 +1,81 @@
+# Benchmark: server-side coin detection and the calibration cache
+#
+# Scans synthetic photos whose client coin tap carries a diameter that is
+# 20% off (a sloppy manual tap) and compares:
+#   client      detection off, the client's diameter is trusted
+#   detected    coin detected around the tap
+#   cached      second scan of the session, calibration from the cache
+# reporting coin detection time and the measurement error against the
+# drawn garment's true size.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_coin_calibration [--mp 1 4 12] [--repeat 5]
+
+import argparse
+import json
+
+from app.ai_core.calibration_cache import CalibrationCache
+from app.ai_core.coin_detection import CoinDetector
+from app.ai_core.garment_processor import GarmentProcessor, read_image_size, scale_coords
+from app.ai_core.segmentation import create_segmenter
+from benchmarks.common import RESOLUTIONS, encode_jpeg, synthetic_garment_photo, time_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mp", type=int, nargs="+", default=[1, 4, 12])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    segmenter = create_segmenter("classical")
+    trusting = GarmentProcessor(segmenter=segmenter)
+    detecting = GarmentProcessor(segmenter=segmenter, coin_detector=CoinDetector())
+    cache = CalibrationCache()
+    key = ("bench-session", "bench-device")
+
+    report = []
+    for mp in args.mp:
+        width, height = RESOLUTIONS[mp]
+        payload = encode_jpeg(synthetic_garment_photo(width, height))
+        size = read_image_size(payload)
+        card = max(8, width // 20)
+        true_diameter = 2 * max(6, width // 60)
+        tap = {"x": 2 * card + 4, "y": height - 2 * card - 3, "diameter_pixels": true_diameter * 1.2}
+        white = {"x": width // 10, "y": width // 10, "radius": width // 50}
+        # Drawn garment: sleeves span width / 2, body spans height / 3; the
+        # synthetic coin is brass colored, i.e. a Rp 500 coin (27 mm)
+        px_per_cm = true_diameter / 27.0 * 10
+        truth = {"width_cm": (width // 4) * 2 / px_per_cm, "height_cm": (height // 3) / px_per_cm}
+
+        working = detecting.working_copy(synthetic_garment_photo(width, height))
+        scale = max(working.shape[:2]) / float(max(width, height))
+        working_tap = scale_coords(tap, scale)
+
+        def error(metadata):
+            return {k: round(abs(metadata["measurements"][k] - truth[k]), 2) for k in truth}
+
+        _, client = trusting.process_garment(payload, {**tap, "type": "500"}, white)
+        _, detected = detecting.process_garment(payload, tap, white)
+        cache.store(key, size, detected["coin"])
+        cached_coin = cache.lookup(key, size, tap)
+        _, cached = detecting.process_garment(payload, cached_coin, white)
+
+        report.append({
+            "megapixels": mp,
+            "client": {"measurement_error_cm": error(client)},
+            "detected": {
+                "coin": detected["coin"],
+                "true_diameter_pixels": true_diameter,
+                "measurement_error_cm": error(detected),
+            },
+            "cached": {"coin_source": cached["coin"]["source"], "measurement_error_cm": error(cached)},
+            "detect_only": time_call(lambda: detecting.coin_detector.detect(working, working_tap), args.repeat),
+            "scan_detected": time_call(lambda: detecting.process_garment(payload, tap, white), args.repeat),
+            "scan_cached": time_call(lambda: detecting.process_garment(payload, cached_coin, white), args.repeat),
+        })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
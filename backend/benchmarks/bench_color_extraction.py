@@ -0,0 +1,51 @@
+# Benchmark: dominant color extraction
+#
+# Compares the previous full-resolution 1-cluster KMeans path with the
+# subsampled histogram palette extractor on synthetic phone photos.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_color_extraction [--mp 1 4 12]
+
+import argparse
+import json
+
+import cv2
+import numpy as np
+
+from app.ai_core.color_palette import palette_extractor
+from benchmarks.common import RESOLUTIONS, synthetic_garment_photo, time_call
+
+
+def kmeans_dominant_color(image: np.ndarray) -> str:
+    """Previous implementation: KMeans (K=1, 10 attempts) over every pixel."""
+    pixels = image.reshape(-1, 3).astype(np.float32)
+    criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 10, 1.0)
+    _, _, centers = cv2.kmeans(pixels, 1, None, criteria, 10, cv2.KMEANS_RANDOM_CENTERS)
+    b, g, r = centers[0].astype(int)
+    return "#{:02x}{:02x}{:02x}".format(r, g, b)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mp", type=int, nargs="+", default=sorted(RESOLUTIONS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    report = []
+    for mp in args.mp:
+        width, height = RESOLUTIONS[mp]
+        image = synthetic_garment_photo(width, height)
+        kmeans = time_call(lambda: kmeans_dominant_color(image), repeat=args.repeat)
+        histogram = time_call(lambda: palette_extractor.extract(image), repeat=args.repeat)
+        report.append({
+            "megapixels": mp,
+            "kmeans": {**kmeans, "color": kmeans_dominant_color(image)},
+            "histogram": {**histogram, "palette": palette_extractor.extract(image)[:3]},
+            "speedup": round(kmeans["median_ms"] / max(histogram["median_ms"], 1e-6), 1),
+        })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+# Benchmark: instant-match color lookup across wardrobe sizes
+#
+# Compares the previous linear exact-hex scan with the wardrobe color
+# index: one-off build cost, cached lookup (fingerprint + query) and the
+# bare query.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_color_index [--sizes 10 100 1000 5000 10000]
+
+import argparse
+import json
+
+from app.ai_core.color_index import ColorIndexCache, WardrobeColorIndex
+from app.ai_core.garments import WardrobeArrays
+from app.ai_core.mixmatch_logic import ColorTheory
+from benchmarks.common import synthetic_wardrobe, time_call
+
+ITEM_COLOR = "#FF6B35"
+
+
+def linear_exact_match(garments):
+    """Previous implementation: O(n) scan for exact hex matches."""
+    complementary = ColorTheory.get_complementary_colors(ITEM_COLOR)
+    return [g for g in garments if g.get("color_hex", "#808080") in complementary]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000, 10000])
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    complementary = ColorTheory.get_complementary_colors(ITEM_COLOR)
+    allowed = {ColorTheory.get_color_temperature(c) for c in complementary} | {"neutral"}
+
+    report = []
+    for size in args.sizes:
+        wardrobe = synthetic_wardrobe(size)
+        arrays = WardrobeArrays.from_dicts(wardrobe)
+        cache = ColorIndexCache()
+        index = WardrobeColorIndex(arrays.colors)
+        cache.get(arrays)
+
+        report.append({
+            "wardrobe_size": size,
+            "linear_scan": {**time_call(lambda: linear_exact_match(wardrobe), args.repeat),
+                            "matches": len(linear_exact_match(wardrobe))},
+            "index_build": time_call(
+                lambda: WardrobeColorIndex(WardrobeArrays.from_dicts(wardrobe).colors), 5
+            ),
+            "cached_lookup": time_call(
+                lambda: cache.get(arrays).query(complementary, allowed), args.repeat
+            ),
+            "query_only": {**time_call(lambda: index.query(complementary, allowed), args.repeat),
+                           "matches": len(index.query(complementary, allowed))},
+        })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# Benchmark: duplicate detection at scan time
+#
+# For each wardrobe size, stores garments with random perceptual hashes in
+# an in-memory SQLite wardrobe store and reports:
+#   cold_load       first lookup for the user (database read + index build)
+#   sync            lookup after cache_ttl (database read, index updated in place)
+#   lookup          warm find_duplicates for a near-duplicate (4 bits off)
+#                   and for an unrelated hash
+#   linear_scan     the same lookups comparing against every stored hash
+#   exact           index matches == linear scan matches
+# plus the cost of hashing a segmented working copy.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_duplicate_index [--sizes 10 100 1000 10000]
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+import cv2
+
+from app.ai_core.garment_processor import processor
+from app.ai_core.perceptual_hash import format_hash, hamming_distance, perceptual_hash
+from app.db.adapters import create_adapter
+from app.db.wardrobe import WardrobeRepository
+from benchmarks.common import RESOLUTIONS, summarize, synthetic_garment_photo, synthetic_wardrobe, time_call
+
+
+def timed_lookups(repository: WardrobeRepository, user_id: str, phash: str, repeat: int) -> dict:
+    async def run() -> list:
+        samples = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            await repository.find_duplicates(user_id, phash)
+            samples.append((time.perf_counter() - start) * 1000)
+        return samples
+
+    return summarize(asyncio.run(run()))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=1000)
+    parser.add_argument("--max-distance", type=int, default=10)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    repository = WardrobeRepository(
+        create_adapter("sqlite:///:memory:"),
+        duplicate_max_distance=args.max_distance,
+        duplicate_max_color_distance=0,
+    )
+    report = {"max_distance": args.max_distance, "wardrobes": []}
+    for size in args.sizes:
+        user_id = f"bench-user-{size}"
+        wardrobe = synthetic_wardrobe(size)
+        hashes = [rng.getrandbits(64) for _ in range(size)]
+        for garment, value in zip(wardrobe, hashes):
+            garment["phash"] = format_hash(value)
+        repository.save_garments(user_id, wardrobe)
+
+        near = hashes[size // 2] ^ sum(1 << bit for bit in rng.sample(range(64), 4))
+        unrelated = rng.getrandbits(64)
+
+        repository.cache_ttl = 0
+        cold = time_call(lambda: repository.load_hash_index(user_id), 1)
+        sync = time_call(lambda: repository.load_hash_index(user_id), 5)
+        repository.cache_ttl = 3600
+        index = repository.load_hash_index(user_id)
+
+        row = {"wardrobe_size": size, "cold_load": cold, "sync": sync}
+        for name, value in (("near_duplicate", near), ("unrelated", unrelated)):
+            def linear_scan():
+                return [i for i, h in enumerate(hashes) if hamming_distance(h, value) <= args.max_distance]
+
+            found = {g for g, _ in index.query(value, args.max_distance, limit=size)}
+            expected = {wardrobe[i]["id"] for i in linear_scan()}
+            row[name] = {
+                "lookup": timed_lookups(repository, user_id, format_hash(value), args.repeat),
+                "linear_scan": time_call(linear_scan, min(args.repeat, 100)),
+                "matches": len(found),
+                "exact": found == expected,
+            }
+        report["wardrobes"].append(row)
+
+    width, height = RESOLUTIONS[12]
+    working = processor.working_copy(synthetic_garment_photo(width, height))
+    segmented, _ = processor.segmenter.segment(working)
+    mask = cv2.extractChannel(segmented, 3)
+    smaller, _ = processor.segmenter.segment(cv2.resize(working, None, fx=0.75, fy=0.75, interpolation=cv2.INTER_AREA))
+    report["hash"] = {
+        "working_resolution": [segmented.shape[1], segmented.shape[0]],
+        "perceptual_hash": time_call(lambda: perceptual_hash(segmented, mask), 50),
+        # Same garment photographed at 3/4 of the resolution
+        "rescaled_distance": hamming_distance(
+            perceptual_hash(segmented, mask), perceptual_hash(smaller, cv2.extractChannel(smaller, 3))
+        ),
+    }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+# Benchmark: recommend request parsing and engine time, untyped vs typed
+#
+# Request parsing: pydantic validation of the JSON body with
+# user_garments as List[Dict[str, Any]] (previous model) vs List[Garment]
+# (hex colors checked by pydantic-core, then packed and types
+# normalised in bulk). Engine: instant match and
+# weekly plan from dicts vs from WardrobeArrays built at the edge.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_garment_model [--sizes 1000 10000]
+
+import argparse
+import asyncio
+import json
+from typing import Any, Dict, List
+
+from pydantic import BaseModel
+
+from app.ai_core.color_index import ColorIndexCache
+from app.ai_core.garments import WardrobeArrays
+from app.ai_core.mixmatch_logic import MixMatchEngine
+from app.api.v1.recommend import WeeklyPlanRequest
+from benchmarks.common import synthetic_wardrobe, time_call
+
+
+class UntypedWeeklyPlanRequest(BaseModel):
+    """Previous request model."""
+    user_garments: List[Dict[str, Any]]
+    skin_tone: str
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    engine = MixMatchEngine()
+    report = []
+    for size in args.sizes:
+        body = json.dumps({"user_garments": synthetic_wardrobe(size), "skin_tone": "medium"})
+        untyped = UntypedWeeklyPlanRequest.model_validate_json(body)
+        typed = WeeklyPlanRequest.model_validate_json(body)
+        dicts = untyped.user_garments
+
+        def typed_edge():
+            request = WeeklyPlanRequest.model_validate_json(body)
+            return WardrobeArrays.from_dicts(request.user_garments)
+
+        def instant(wardrobe):
+            # Fresh index cache so every call includes parsing/indexing
+            import app.ai_core.mixmatch_logic as mixmatch
+            mixmatch.color_index_cache = ColorIndexCache()
+            return asyncio.run(engine.generate_instant_match("#FF6B35", "", wardrobe))
+
+        report.append({
+            "wardrobe_size": size,
+            "payload_bytes": len(body),
+            "parse_untyped": time_call(lambda: UntypedWeeklyPlanRequest.model_validate_json(body), args.repeat),
+            "parse_typed_to_arrays": time_call(typed_edge, args.repeat),
+            "instant_from_dicts": time_call(lambda: instant(dicts), args.repeat),
+            "instant_from_arrays": time_call(
+                lambda: instant(WardrobeArrays.from_dicts(typed.user_garments)), args.repeat
+            ),
+            "weekly_from_dicts": time_call(
+                lambda: asyncio.run(engine.generate_weekly_plan(dicts, "")), args.repeat
+            ),
+            "weekly_from_arrays": time_call(
+                lambda: asyncio.run(engine.generate_weekly_plan(
+                    WardrobeArrays.from_dicts(typed.user_garments), "")), args.repeat
+            ),
+        })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
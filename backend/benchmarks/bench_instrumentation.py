@@ -0,0 +1,63 @@
+# Benchmark: scan instrumentation overhead
+#
+# Runs the scan pipeline on synthetic photos with:
+#   off        trace disabled (what unsampled scans pay)
+#   timed      wall/CPU time and resolution per stage
+#   memory     timed plus tracemalloc peak allocations
+# and reports the expected per-scan overhead at the configured sample
+# rate, plus the stage breakdown of one traced scan.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_instrumentation [--mp 1 4 12] [--repeat 5] [--sample-rate 0.05]
+
+import argparse
+import json
+
+from app.ai_core.garment_processor import GarmentProcessor
+from app.ai_core.segmentation import create_segmenter
+from app.core.config import settings
+from app.core.instrumentation import ScanTrace
+from benchmarks.common import RESOLUTIONS, encode_jpeg, synthetic_garment_photo, time_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mp", type=int, nargs="+", default=[1, 4, 12])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--sample-rate", type=float, default=settings.scan_trace_sample_rate)
+    args = parser.parse_args()
+
+    processor = GarmentProcessor(segmenter=create_segmenter("classical"))
+    coin = {"diameter_pixels": 100, "source": "default"}
+    white = {"x": 0, "y": 0, "radius": 0}
+
+    report = []
+    for mp in args.mp:
+        width, height = RESOLUTIONS[mp]
+        payload = encode_jpeg(synthetic_garment_photo(width, height))
+        processor.process_garment(payload, coin, white)  # warm-up
+
+        def scan(enabled: bool, memory: bool):
+            return lambda: processor.process_garment(payload, coin, white, trace=ScanTrace(enabled, memory))
+
+        off = time_call(scan(False, False), args.repeat)
+        timed = time_call(scan(True, False), args.repeat)
+        memory = time_call(scan(True, True), args.repeat)
+        _, metadata = processor.process_garment(payload, coin, white, trace=ScanTrace(True, True))
+
+        expected_ms = args.sample_rate * (memory["median_ms"] - off["median_ms"])
+        report.append({
+            "megapixels": mp,
+            "off": off,
+            "timed": timed,
+            "memory": memory,
+            "expected_overhead_ms_per_scan": round(expected_ms, 3),
+            "sample_rate": args.sample_rate,
+            "stages": metadata["timings"]["stages"],
+        })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
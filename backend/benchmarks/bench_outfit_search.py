@@ -0,0 +1,56 @@
+# Benchmark: weekly outfit search across wardrobe sizes
+#
+# Times OutfitSearch.plan on synthetic typed wardrobes (colors parsed
+# beforehand, as the engine does through the color index cache) and
+# reports plan quality: mean outfit score, distinct items used and whether
+# the latency budget forced the greedy fallback.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_outfit_search [--sizes 10 100 1000 5000 10000] [--budget-ms 50]
+
+import argparse
+import json
+import time
+
+from app.ai_core.garments import WardrobeArrays
+from app.ai_core.outfit_search import OutfitSearch
+from benchmarks.common import synthetic_wardrobe, time_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000, 10000])
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    parser.add_argument("--beam-width", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    search = OutfitSearch(beam_width=args.beam_width, time_budget_ms=args.budget_ms)
+    report = []
+    for size in args.sizes:
+        wardrobe = synthetic_wardrobe(size)
+        arrays = WardrobeArrays.from_dicts(wardrobe)
+        arrays.colors.palette_distances()
+
+        started = time.perf_counter()
+        outfits = search.plan(arrays)
+        first_ms = (time.perf_counter() - started) * 1000
+        items = [i for outfit in outfits for _, i in outfit["items"]]
+
+        timing = time_call(lambda: search.plan(arrays), args.repeat)
+        report.append({
+            "wardrobe_size": size,
+            "plan": timing,
+            "within_budget": timing["median_ms"] <= args.budget_ms,
+            "first_run_ms": round(first_ms, 3),
+            "days_planned": len(outfits),
+            "mean_outfit_score": round(sum(o["score"] for o in outfits) / max(1, len(outfits)), 3),
+            "items_used": len(items),
+            "distinct_items": len(set(items)),
+        })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+# Benchmark: repeat-upload latency with the scan result cache
+#
+# Posts the same photo to /api/v1/scan/accurate through the ASGI app
+# in-process: the first upload runs the pipeline, repeats are cache hits.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_scan_cache [--mp 1 4 12] [--repeat 5]
+
+import argparse
+import json
+import os
+import time
+
+# Run scans on the calling thread so timings exclude pool start-up
+os.environ.setdefault("SCAN_EXECUTION_MODE", "inline")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from benchmarks.common import RESOLUTIONS, encode_jpeg, synthetic_garment_photo  # noqa: E402
+from main import app  # noqa: E402
+from app.ai_core.scan_cache import scan_cache  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mp", type=int, nargs="+", default=sorted(RESOLUTIONS))
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    report = []
+    with TestClient(app) as client:
+        for mp in args.mp:
+            width, height = RESOLUTIONS[mp]
+            payload = encode_jpeg(synthetic_garment_photo(width, height, seed=mp))
+            form = {
+                "coin_coords": json.dumps({"x": 40, "y": height - 40, "diameter_pixels": width / 30, "type": "500"}),
+                "white_tap_coords": json.dumps({"x": width // 10, "y": width // 10, "radius": 20}),
+            }
+
+            timings = []
+            for _ in range(1 + args.repeat):
+                start = time.perf_counter()
+                response = client.post(
+                    "/api/v1/scan/accurate",
+                    files={"file": ("garment.jpg", payload, "image/jpeg")},
+                    data=form,
+                )
+                timings.append(((time.perf_counter() - start) * 1000, response.json()["cached"]))
+
+            repeats = sorted(ms for ms, _ in timings[1:])
+            report.append({
+                "megapixels": mp,
+                "upload_bytes": len(payload),
+                "first_upload_ms": round(timings[0][0], 1),
+                "repeat_median_ms": round(repeats[len(repeats) // 2], 1),
+                "repeats_cached": all(cached for _, cached in timings[1:]),
+            })
+
+    print(json.dumps({"results": report, "cache": scan_cache.stats()}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+# Benchmark: asynchronous scan jobs
+#
+# Through the app (TestClient, thread executor), for one synthetic photo:
+#   sync        POST /scan/quick, connection held for the whole scan
+#   submit      POST /scan/jobs, time until the 202 with the job id
+#   drain       --jobs distinct photos submitted back to back, time until
+#               every job reads "succeeded" (queue throughput)
+# plus the /scan/jobs/stats block after the drain.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_scan_jobs [--mp 4] [--jobs 20] [--repeat 5]
+
+import argparse
+import json
+import os
+import tempfile
+import time
+
+os.environ["SCAN_EXECUTION_MODE"] = "thread"
+os.environ["SCAN_CACHE_MAX_MB"] = "0"
+os.environ["SCAN_CACHE_DIR"] = ""
+os.environ["SCAN_TRACE_SAMPLE_RATE"] = "0"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["STORAGE_BACKEND"] = "none"
+os.environ["SCAN_JOBS_DB_PATH"] = os.path.join(tempfile.mkdtemp(prefix="lokafit-jobs-"), "scan_jobs.db")
+
+from fastapi.testclient import TestClient
+
+import main as app_main
+from benchmarks.common import RESOLUTIONS, encode_jpeg, synthetic_garment_photo, time_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mp", type=int, default=4)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    width, height = RESOLUTIONS[args.mp]
+    photos = [
+        encode_jpeg(synthetic_garment_photo(width, height, garment_bgr=(20 + 10 * i, 90, 200), seed=i))
+        for i in range(args.jobs)
+    ]
+
+    def post(path, photo):
+        return client.post(path, files={"file": ("garment.jpg", photo, "image/jpeg")})
+
+    with TestClient(app_main.app) as client:
+        report = {
+            "megapixels": args.mp,
+            "sync": time_call(lambda: post("/api/v1/scan/quick", photos[0]), args.repeat),
+            "submit": time_call(lambda: post("/api/v1/scan/jobs", photos[0]), args.repeat),
+        }
+
+        # Let the submit loop's jobs finish before timing the drain
+        while any(client.get("/api/v1/scan/jobs/stats").json()["data"]["jobs"][s] for s in ("queued", "running")):
+            time.sleep(0.05)
+
+        start = time.perf_counter()
+        ids = [post("/api/v1/scan/jobs", photo).json()["data"]["job_id"] for photo in photos]
+        pending = set(ids)
+        while pending:
+            pending = {
+                job_id for job_id in pending
+                if client.get(f"/api/v1/scan/jobs/{job_id}").json()["data"]["state"] not in ("succeeded", "failed")
+            }
+            time.sleep(0.02)
+        elapsed = time.perf_counter() - start
+        report["drain"] = {
+            "jobs": args.jobs,
+            "seconds": round(elapsed, 3),
+            "jobs_per_second": round(args.jobs / elapsed, 2),
+        }
+        report["stats"] = client.get("/api/v1/scan/jobs/stats").json()["data"]
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
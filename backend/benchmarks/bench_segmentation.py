@@ -0,0 +1,71 @@
+# Benchmark: segmentation backends in the scan pipeline
+#
+# Runs GarmentProcessor.process_garment on synthetic garment photos with
+# each segmentation backend and reports the stage timings, the foreground
+# share and the measurement error against the drawn garment's true size.
+# "none" is the pipeline before segmentation (the whole photo measured).
+# rembg is included when it is installed (first call loads the model, so
+# warm-up time is reported separately).
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_segmentation [--mp 1 4 12] [--repeat 5]
+
+import argparse
+import importlib.util
+import json
+import time
+
+from app.ai_core.garment_processor import GarmentProcessor
+from app.ai_core.segmentation import create_segmenter
+from benchmarks.common import RESOLUTIONS, encode_jpeg, synthetic_garment_photo, time_call
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mp", type=int, nargs="+", default=[1, 4, 12])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    backends = ["none", "classical", "grabcut"]
+    if importlib.util.find_spec("rembg") is not None:
+        backends.append("rembg")
+
+    report = []
+    for name in backends:
+        segmenter = create_segmenter(name)
+        started = time.perf_counter()
+        segmenter.warm_up()
+        warm_up_ms = round((time.perf_counter() - started) * 1000, 1)
+        processor = GarmentProcessor(segmenter=segmenter)
+
+        for mp in args.mp:
+            width, height = RESOLUTIONS[mp]
+            payload = encode_jpeg(synthetic_garment_photo(width, height))
+            coin_px = width / 30
+            coin = {"x": width // 20, "y": height - width // 20, "diameter_pixels": coin_px, "type": "500"}
+            white = {"x": width // 10, "y": width // 10, "radius": width // 50}
+
+            _, metadata = processor.process_garment(payload, coin, white)
+            # Drawn garment: sleeves span width / 2, body spans height / 3
+            px_per_cm = coin_px / 27.0 * 10
+            truth = {"width_cm": (width // 4) * 2 / px_per_cm, "height_cm": (height // 3) / px_per_cm}
+            measured = metadata["measurements"]
+
+            report.append({
+                "backend": name,
+                "megapixels": mp,
+                "warm_up_ms": warm_up_ms,
+                "scan": time_call(lambda: processor.process_garment(payload, coin, white), args.repeat),
+                "segmentation_ms": metadata["segmentation"]["timings_ms"],
+                "foreground_ratio": metadata["segmentation"]["foreground_ratio"],
+                "color_hex": metadata["color_hex"],
+                "measurement_error_cm": {
+                    k: round(abs(measured[k] - truth[k]), 2) for k in ("width_cm", "height_cm")
+                },
+            })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
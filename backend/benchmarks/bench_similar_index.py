@@ -0,0 +1,113 @@
+# Benchmark: similar-garment search
+#
+# For each index size, builds a VectorIndex of random descriptors (100
+# garments per user) in a temporary directory and reports:
+#   build           writing the build from (garment, user, vector) rows
+#   open            memory-mapping the published build
+#   search          top-k over every garment ("all") and over one user's
+#                   garments ("wardrobe"), cosine and L2, mapped pages warm
+#   exact           search results == a float64 brute-force ranking
+#   bytes           size of the build on disk (shared page cache per host)
+# plus the cost of computing a descriptor for a segmented working copy.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_similar_index [--sizes 10000 100000 250000]
+
+import argparse
+import json
+import os
+import tempfile
+
+import cv2
+import numpy as np
+
+from app.ai_core.garment_descriptor import COLOR_BINS, DESCRIPTOR_DIM, DESCRIPTOR_VARIANT, garment_descriptor
+from app.ai_core.garment_processor import processor
+from app.ai_core.vector_index import VectorIndex
+from benchmarks.common import RESOLUTIONS, synthetic_garment_photo, time_call
+
+GARMENTS_PER_USER = 100
+
+
+def random_descriptors(size: int, rng: np.random.Generator) -> np.ndarray:
+    """Descriptors shaped like real ones: sparse unit color block, small shape block."""
+    colors = rng.dirichlet(np.full(COLOR_BINS, 0.1), size=size)
+    shapes = rng.uniform(0, 1, size=(size, DESCRIPTOR_DIM - COLOR_BINS)) * 0.25
+    return np.hstack([np.sqrt(colors), shapes]).astype(np.float32)
+
+
+def brute_force(vectors: np.ndarray, query: np.ndarray, k: int, metric: str) -> list:
+    vectors = vectors.astype(np.float64)
+    query = query.astype(np.float64)
+    if metric == "cosine":
+        keys = -(vectors @ query) / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    else:
+        keys = np.linalg.norm(vectors - query, axis=1)
+    return np.argsort(keys, kind="stable")[:k].tolist()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 250000])
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    report = {"dim": DESCRIPTOR_DIM, "k": args.k, "indexes": []}
+    for size in args.sizes:
+        vectors = random_descriptors(size, rng)
+        garment_ids = [f"g{i:07d}" for i in range(size)]
+        user_ids = [f"u{i // GARMENTS_PER_USER:05d}" for i in range(size)]
+        queries = random_descriptors(args.repeat, rng)
+
+        with tempfile.TemporaryDirectory() as root:
+            entries = list(zip(garment_ids, user_ids, vectors))
+            build = time_call(lambda: VectorIndex.build(root, entries, DESCRIPTOR_DIM, DESCRIPTOR_VARIANT), 1)
+            path = VectorIndex.build(root, entries, DESCRIPTOR_DIM, DESCRIPTOR_VARIANT)
+            opened = time_call(lambda: VectorIndex.open(path), 5)
+            index = VectorIndex.open(path)
+            index.search(queries[0])
+
+            row = {
+                "size": size,
+                "build": build,
+                "open": opened,
+                "bytes": sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)),
+            }
+            user_id = user_ids[size // 2]
+            start = user_ids.index(user_id)
+            for metric in ("cosine", "l2"):
+                for scope, owner in (("all", None), ("wardrobe", user_id)):
+                    samples = iter(queries)
+                    timing = time_call(
+                        lambda: index.search(next(samples), args.k, metric, user_id=owner), args.repeat
+                    )
+                    exact = True
+                    for query in queries[:10]:
+                        found = [g for g, _, _ in index.search(query, args.k, metric, user_id=owner)]
+                        if owner is None:
+                            expected = [garment_ids[i] for i in brute_force(vectors, query, args.k, metric)]
+                        else:
+                            block = vectors[start:start + GARMENTS_PER_USER]
+                            expected = [garment_ids[start + i] for i in brute_force(block, query, args.k, metric)]
+                        exact = exact and found == expected
+                    row[f"{metric}/{scope}"] = {"search": timing, "exact": exact}
+            report["indexes"].append(row)
+
+    width, height = RESOLUTIONS[12]
+    working = processor.working_copy(synthetic_garment_photo(width, height))
+    segmented, _ = processor.segmenter.segment(working)
+    mask = cv2.extractChannel(segmented, 3)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    outline = max(contours, key=cv2.contourArea)
+    report["descriptor"] = {
+        "working_resolution": [segmented.shape[1], segmented.shape[0]],
+        "garment_descriptor": time_call(lambda: garment_descriptor(segmented, mask, outline), 50),
+    }
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+# Benchmark: skin tone analysis
+#
+# Analyzes a synthetic face photo (skin-colored ellipse on a background)
+# encoded as JPEG:
+#   legacy      full-resolution decode, HSV conversion, centre-region mean
+#   cold        SkinToneAnalyzer with an empty result cache
+#   cached      the same photo submitted again (sha256 + LRU hit)
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_skin_tone [--mp 1 4 12] [--repeat 5]
+
+import argparse
+import json
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+import cv2
+import numpy as np
+
+from app.ai_core.skin_tone import SkinToneAnalyzer
+from benchmarks.common import RESOLUTIONS, encode_jpeg, time_call
+
+
+def synthetic_face_photo(width: int, height: int) -> np.ndarray:
+    image = np.full((height, width, 3), (90, 110, 60), np.uint8)
+    cv2.ellipse(image, (width // 2, height // 2), (width // 5, height // 3), 0, 0, 360, (110, 150, 200), -1)
+    noise = np.random.default_rng(0).integers(-8, 8, image.shape, dtype=np.int16)
+    return np.clip(image.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def legacy_analysis(file_bytes: bytes) -> np.ndarray:
+    image = cv2.imdecode(np.frombuffer(file_bytes, np.uint8), cv2.IMREAD_COLOR)
+    cv2.cvtColor(image, cv2.COLOR_BGR2HSV)
+    h, w = image.shape[:2]
+    return np.mean(image[h // 4:3 * h // 4, w // 4:3 * w // 4], axis=(0, 1))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mp", type=int, nargs="+", default=[1, 4, 12])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    analyzer = SkinToneAnalyzer()
+    analyzer.palettes.load()
+
+    report = []
+    for mp in args.mp:
+        jpeg = encode_jpeg(synthetic_face_photo(*RESOLUTIONS[mp]))
+
+        def cold():
+            analyzer._cache.clear()
+            return analyzer.analyze(jpeg)
+
+        result = cold()
+        report.append({
+            "megapixels": mp,
+            "jpeg_bytes": len(jpeg),
+            "legacy": time_call(lambda: legacy_analysis(jpeg), args.repeat),
+            "cold": time_call(cold, args.repeat),
+            "cached": time_call(lambda: analyzer.analyze(jpeg), args.repeat),
+            "skin_tone_class": result["skin_tone_class"],
+            "undertone": result["undertone"],
+            "resolution": result["analysis"]["resolution"],
+        })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
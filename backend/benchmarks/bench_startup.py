@@ -0,0 +1,89 @@
+# Benchmark: worker startup per role
+#
+# For each WORKER_ROLE, starts fresh interpreters that import main and run
+# the app's startup events (thread executor, warm-up on), reporting:
+#   import_ms / rss_import_mb   after `import main`
+#   ready_ms / rss_ready_mb     after startup (scan workers warmed up)
+#   image_libs                  whether OpenCV / Pillow got loaded
+# The "eager" rows import cv2 and PIL up front, as every worker did
+# before image libraries were loaded lazily.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_startup [--roles all scan recommend] [--runs 5]
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import summarize
+
+CHILD = r"""
+import json, resource, sys, time
+start = time.perf_counter()
+if EAGER:
+    import cv2
+    from PIL import Image
+import main
+imported = time.perf_counter()
+rss_import = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+from fastapi.testclient import TestClient
+with TestClient(main.app):
+    ready = time.perf_counter()
+    rss_ready = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(json.dumps({
+        "import_ms": (imported - start) * 1000,
+        "ready_ms": (ready - start) * 1000,
+        "rss_import_mb": rss_import,
+        "rss_ready_mb": rss_ready,
+        "image_libs": [m for m in ("cv2", "PIL.Image") if m in sys.modules],
+    }))
+"""
+
+
+def start_worker(role: str, eager: bool) -> dict:
+    env = {
+        **os.environ,
+        "WORKER_ROLE": role,
+        "SCAN_EXECUTION_MODE": "thread",
+        "SCAN_MAX_WORKERS": "2",
+        "DATABASE_URL": "sqlite:///:memory:",
+        "SCAN_JOBS_DB_PATH": ":memory:",
+        "STORAGE_BACKEND": "none",
+        "PYTHONDONTWRITEBYTECODE": "1",
+    }
+    output = subprocess.run(
+        [sys.executable, "-c", f"EAGER = {eager}\n{CHILD}"],
+        env=env, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--roles", nargs="+", default=["all", "scan", "recommend"])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--no-eager", action="store_true", help="Skip the eager-import baseline rows")
+    args = parser.parse_args()
+
+    report = []
+    for role in args.roles:
+        for eager in (False,) if args.no_eager else (False, True):
+            runs = [start_worker(role, eager) for _ in range(args.runs)]
+            report.append({
+                "role": role,
+                "eager": eager,
+                "import_ms": summarize([r["import_ms"] for r in runs]),
+                "ready_ms": summarize([r["ready_ms"] for r in runs]),
+                "rss_import_mb": round(max(r["rss_import_mb"] for r in runs), 1),
+                "rss_ready_mb": round(max(r["rss_ready_mb"] for r in runs), 1),
+                "image_libs": runs[-1]["image_libs"],
+            })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
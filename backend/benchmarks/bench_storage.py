@@ -0,0 +1,97 @@
+# Benchmark: scan asset uploads
+#
+# Stores the rendition set of a synthetic scan (accurate preset) through:
+#   local       LocalStorage in a temp dir (fsync + rename per file)
+#   http        S3Storage against a local HTTP server that answers after
+#               --latency-ms (stands in for an object store round trip)
+# each one rendition after another ("serial") and through AssetUploader
+# ("parallel", pooled connections). Keys are made unique per run so the
+# uploader's already-uploaded memory never short-circuits the timing.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_storage [--mp 12] [--latency-ms 40] [--repeat 5]
+
+import argparse
+import asyncio
+import json
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+
+from app.ai_core.asset_encoding import ENCODE_PRESETS, AssetEncoder
+from app.ai_core.garment_processor import DEFAULT_RENDITIONS
+from app.core.storage import AssetUploader, LocalStorage, S3Storage
+from benchmarks.common import RESOLUTIONS, summarize, synthetic_garment_photo
+
+
+def object_store(latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_PUT(self):
+            self.rfile.read(int(self.headers["Content-Length"]))
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mp", type=int, default=12)
+    parser.add_argument("--latency-ms", type=float, default=40.0)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    width, height = RESOLUTIONS[args.mp]
+    image = synthetic_garment_photo(width, height)
+    mask = cv2.inRange(image, (0, 0, 0), (255, 255, 254))
+    renditions, _ = AssetEncoder(DEFAULT_RENDITIONS).encode(image, ENCODE_PRESETS["accurate"], mask)
+
+    server = object_store(args.latency_ms / 1000.0)
+    backends = {
+        "local": LocalStorage(tempfile.mkdtemp(prefix="lokafit-storage-")),
+        "http": S3Storage(f"http://127.0.0.1:{server.server_port}", "bench", "key", "secret"),
+    }
+
+    report = {
+        "megapixels": args.mp,
+        "renditions": {name: len(data) for name, data in renditions.items()},
+        "latency_ms": args.latency_ms,
+    }
+    run = 0
+    for name, backend in backends.items():
+        uploader = AssetUploader(backend, prefix="bench")
+        serial, parallel = [], []
+        for _ in range(args.repeat):
+            run += 1
+            batch = {k: v + run.to_bytes(4, "big") for k, v in renditions.items()}
+            start = time.perf_counter()
+            for data in batch.values():
+                backend.put(uploader.key_for(data), data, "image/webp")
+            serial.append((time.perf_counter() - start) * 1000)
+
+            run += 1
+            batch = {k: v + run.to_bytes(4, "big") for k, v in renditions.items()}
+            start = time.perf_counter()
+            asyncio.run(uploader.upload(batch))
+            parallel.append((time.perf_counter() - start) * 1000)
+        report[name] = {"serial": summarize(serial), "parallel": summarize(parallel)}
+        uploader.shutdown()
+
+    server.shutdown()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
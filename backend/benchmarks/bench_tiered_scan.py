@@ -0,0 +1,87 @@
+# Benchmark: resolution-tiered scan pipeline
+#
+# Runs the full scan in fresh processes under three configurations:
+#   full        analysis and asset at full resolution (working_max_side=0)
+#   tiered      analysis on a working copy, asset at full resolution
+#   tiered_asset  as tiered, asset decoded with decode-time downscaling
+# and reports latency, peak RSS growth and the measurement difference
+# against the full-resolution run. analysis_ms excludes the WebP encode.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_tiered_scan [--mp 4 12] [--working-max-side 1024]
+
+import argparse
+import json
+import multiprocessing
+import resource
+import time
+
+from benchmarks.common import RESOLUTIONS, encode_jpeg, synthetic_garment_photo
+
+
+def _run(name: str, working_max_side: int, asset_max_side: int, mp: int, queue) -> None:
+    from app.ai_core.garment_processor import GarmentProcessor
+    from app.core.instrumentation import ScanTrace
+
+    width, height = RESOLUTIONS[mp]
+    payload = encode_jpeg(synthetic_garment_photo(width, height))
+    coin = {"x": width // 20, "y": height - width // 20, "diameter_pixels": width / 30, "type": "500"}
+    white = {"x": width // 10, "y": width // 10, "radius": width // 50}
+    processor = GarmentProcessor(working_max_side=working_max_side, asset_max_side=asset_max_side)
+
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    start = time.perf_counter()
+    _, metadata = processor.process_garment(payload, coin, white, trace=ScanTrace(True, memory=False))
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    encode_ms = [s["wall_ms"] for s in metadata["timings"]["stages"] if s["stage"] == "encode"]
+
+    queue.put({
+        "config": name,
+        "megapixels": mp,
+        "wall_ms": round(elapsed_ms, 1),
+        "analysis_ms": round(elapsed_ms - sum(encode_ms), 1),
+        "peak_rss_growth_mb": round(peak - baseline, 1),
+        "measurements": metadata["measurements"],
+        "working_resolution": metadata["working_resolution"],
+        "asset_resolution": metadata["asset_resolution"],
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mp", type=int, nargs="+", default=[4, 12])
+    parser.add_argument("--working-max-side", type=int, default=1024)
+    parser.add_argument("--asset-max-side", type=int, default=1600)
+    args = parser.parse_args()
+
+    configs = [
+        ("full", 0, 0),
+        ("tiered", args.working_max_side, 0),
+        ("tiered_asset", args.working_max_side, args.asset_max_side),
+    ]
+
+    ctx = multiprocessing.get_context("spawn")
+    report = []
+    for mp in args.mp:
+        runs = []
+        for name, working_side, asset_side in configs:
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run, args=(name, working_side, asset_side, mp, queue))
+            proc.start()
+            runs.append(queue.get())
+            proc.join()
+
+        reference = runs[0]["measurements"]
+        for run in runs:
+            run["max_measurement_delta_cm"] = max(
+                abs(run["measurements"][k] - reference[k]) for k in ("width_cm", "height_cm")
+            )
+            run["speedup"] = round(runs[0]["wall_ms"] / max(run["wall_ms"], 1e-6), 2)
+        report.extend(runs)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
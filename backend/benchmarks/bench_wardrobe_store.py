@@ -0,0 +1,59 @@
+# Benchmark: recommend requests with inline wardrobes vs the wardrobe store
+#
+# Posts /api/v1/recommend/instant and /weekly through the ASGI app
+# in-process, once with the whole wardrobe in the body (user_garments) and
+# once with only user_id against an in-memory SQLite wardrobe store.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_wardrobe_store [--sizes 10 100 1000 5000]
+
+import argparse
+import json
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.db.adapters import create_adapter  # noqa: E402
+from app.db.wardrobe import wardrobe_repository  # noqa: E402
+from benchmarks.common import synthetic_wardrobe, time_call  # noqa: E402
+from main import app  # noqa: E402
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    wardrobe_repository.use_adapter(create_adapter("sqlite:///:memory:"))
+    report = []
+    with TestClient(app) as client:
+        for size in args.sizes:
+            user_id = f"bench-user-{size}"
+            wardrobe = synthetic_wardrobe(size)
+            wardrobe_repository.save_garments(user_id, wardrobe)
+
+            row = {"wardrobe_size": size}
+            for route, extra in (("instant", {"item_color": "#FF6B35"}), ("weekly", {})):
+                inline = {"skin_tone": "medium", "user_garments": wardrobe, **extra}
+                by_id = {"skin_tone": "medium", "user_id": user_id, **extra}
+                url = f"/api/v1/recommend/{route}"
+
+                wardrobe_repository.invalidate(user_id)
+                cold = time_call(lambda: client.post(url, json=by_id), 1)
+                row[route] = {
+                    "inline_payload_bytes": len(json.dumps(inline)),
+                    "user_id_payload_bytes": len(json.dumps(by_id)),
+                    "inline": time_call(lambda: client.post(url, json=inline), args.repeat),
+                    "user_id_cold": cold,
+                    "user_id_cached": time_call(lambda: client.post(url, json=by_id), args.repeat),
+                }
+            report.append(row)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# Benchmark: stored weekly curations vs replanning on every read
+#
+# Posts /api/v1/recommend/weekly through the ASGI app in-process against an
+# in-memory SQLite wardrobe store and measures: the first (cold) plan, a
+# repeated read in the same week, and the incremental update after adding
+# or removing one garment. Inline wardrobes (replanned per call) are the
+# baseline.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_weekly_curation [--sizes 10 100 1000 5000]
+
+import argparse
+import json
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite:///:memory:")
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.db.adapters import create_adapter  # noqa: E402
+from app.db.curations import curation_repository  # noqa: E402
+from app.db.wardrobe import wardrobe_repository  # noqa: E402
+from benchmarks.common import synthetic_wardrobe, time_call  # noqa: E402
+from main import app  # noqa: E402
+
+URL = "/api/v1/recommend/weekly"
+
+
+def _timed_post(client: TestClient, payload: dict) -> dict:
+    started = time.perf_counter()
+    response = client.post(URL, json=payload)
+    elapsed = (time.perf_counter() - started) * 1000
+    data = response.json()["data"]
+    return {
+        "ms": round(elapsed, 3),
+        "cached": data.get("cached"),
+        "recomputed_days": len(data.get("recomputed_days", [])),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 5000])
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    adapter = create_adapter("sqlite:///:memory:")
+    wardrobe_repository.use_adapter(adapter)
+    curation_repository.use_adapter(adapter)
+    report = []
+    with TestClient(app) as client:
+        for size in args.sizes:
+            user_id = f"bench-user-{size}"
+            wardrobe = synthetic_wardrobe(size)
+            wardrobe_repository.save_garments(user_id, wardrobe)
+            by_id = {"skin_tone": "medium", "user_id": user_id}
+            inline = {"skin_tone": "medium", "user_garments": wardrobe}
+
+            row = {"wardrobe_size": size}
+            row["inline_replan"] = time_call(lambda: client.post(URL, json=inline), args.repeat)
+            row["cold_plan"] = _timed_post(client, by_id)
+            row["cached_read"] = time_call(lambda: client.post(URL, json=by_id), args.repeat)
+
+            # Writes land in a later second than the bulk import
+            time.sleep(1.0)
+            added = wardrobe_repository.save_garments(
+                user_id, [{"color_hex": "#1f3a5f", "garment_type": "shoes"}]
+            )
+            row["add_one"] = _timed_post(client, by_id)
+
+            planned = client.post(URL, json=by_id).json()["data"]["outfits"]
+            wardrobe_repository.delete_garment(user_id, planned[3]["primary"]["id"])
+            row["remove_planned"] = _timed_post(client, by_id)
+
+            wardrobe_repository.delete_garment(user_id, added[0])
+            row["remove_one"] = _timed_post(client, by_id)
+            report.append(row)
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Benchmark: weekly plan generation across wardrobe sizes
+#
+# Compares the previous per-garment ColorTheory loop (hex parsed for every
+# comparison) with the vectorised WardrobeColors pass used by
+# MixMatchEngine.generate_weekly_plan, from raw dicts and from prebuilt
+# WardrobeArrays (as served by the wardrobe store).
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_weekly_plan [--sizes 10 100 1000 10000]
+
+import argparse
+import asyncio
+import json
+
+from app.ai_core.garments import WardrobeArrays
+from app.ai_core.mixmatch_logic import ColorTheory, MixMatchEngine
+from benchmarks.common import synthetic_wardrobe, time_call
+
+DAYS = 7
+
+
+def legacy_weekly_plan(garments):
+    """Previous implementation: nested Python loops over the wardrobe."""
+    outfits = []
+    for i in range(DAYS):
+        item = garments[i % len(garments)]
+        complements = ColorTheory.get_complementary_colors(item.get("color_hex", "#808080"))
+        matching = [g for g in garments if g.get("color_hex") in complements]
+        outfits.append((item, matching[:2], ColorTheory.get_color_temperature(item["color_hex"])))
+    return outfits
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    engine = MixMatchEngine()
+    report = []
+    for size in args.sizes:
+        wardrobe = synthetic_wardrobe(size)
+        colors = ColorTheory.batch([g["color_hex"] for g in wardrobe])
+        primaries = [i % size for i in range(DAYS)]
+        arrays = WardrobeArrays.from_dicts(wardrobe)
+
+        report.append({
+            "wardrobe_size": size,
+            "legacy_loop": time_call(lambda: legacy_weekly_plan(wardrobe), args.repeat),
+            "parse_once": time_call(lambda: ColorTheory.batch([g["color_hex"] for g in wardrobe]), args.repeat),
+            "harmony_scores": time_call(lambda: colors.harmony_scores(primaries), args.repeat),
+            "weekly_plan_from_dicts": time_call(
+                lambda: asyncio.run(engine.generate_weekly_plan(wardrobe, "")), args.repeat
+            ),
+            "weekly_plan_from_arrays": time_call(
+                lambda: asyncio.run(engine.generate_weekly_plan(arrays, "")), args.repeat
+            ),
+        })
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+# Benchmark: white balance memory and latency
+#
+# Each variant runs in a fresh process so ru_maxrss reflects only that
+# variant: the peak RSS growth over a baseline taken right after the
+# input frame is allocated. Also reports the peak RSS of a full scan.
+#
+# Usage (from backend/):
+#   python -m benchmarks.bench_white_balance [--mp 12]
+
+import argparse
+import json
+import multiprocessing
+import resource
+import time
+
+import cv2
+import numpy as np
+
+from benchmarks.common import RESOLUTIONS, encode_jpeg, synthetic_garment_photo
+
+WHITE_TAP = {"x": 60, "y": 60, "radius": 20}
+COIN = {"x": 60, "y": 2900, "diameter_pixels": 130, "type": "500"}
+
+
+def _peak_rss_mb() -> float:
+    # Linux reports ru_maxrss in kilobytes
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def float_white_balance(image: np.ndarray) -> np.ndarray:
+    """Previous implementation: float64 copy of the whole frame."""
+    x, y, r = WHITE_TAP["x"], WHITE_TAP["y"], WHITE_TAP["radius"]
+    b_mean, g_mean, r_mean = cv2.mean(image[y - r:y + r, x - r:x + r])[:3]
+    corrected = image.copy().astype(float)
+    corrected[:, :, 0] *= 255.0 / (b_mean + 1e-5)
+    corrected[:, :, 1] *= 255.0 / (g_mean + 1e-5)
+    corrected[:, :, 2] *= 255.0 / (r_mean + 1e-5)
+    return np.clip(corrected, 0, 255).astype(np.uint8)
+
+
+def _run_variant(variant: str, mp: int, queue) -> None:
+    from app.ai_core.garment_processor import GarmentProcessor
+
+    processor = GarmentProcessor()
+    width, height = RESOLUTIONS[mp]
+    image = synthetic_garment_photo(width, height)
+    payload = encode_jpeg(image) if variant == "full_scan" else None
+    baseline = _peak_rss_mb()
+
+    start = time.perf_counter()
+    if variant == "float64_copy":
+        float_white_balance(image)
+    elif variant == "lut_copy":
+        processor.white_balance_calibration(image, WHITE_TAP)
+    elif variant == "lut_in_place":
+        processor.white_balance_calibration(image, WHITE_TAP, in_place=True)
+    elif variant == "full_scan":
+        processor.process_garment(payload, COIN, WHITE_TAP)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+
+    queue.put({
+        "variant": variant,
+        "megapixels": mp,
+        "wall_ms": round(elapsed_ms, 2),
+        "peak_rss_growth_mb": round(_peak_rss_mb() - baseline, 1),
+    })
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--mp", type=int, nargs="+", default=[12])
+    args = parser.parse_args()
+
+    ctx = multiprocessing.get_context("spawn")
+    report = []
+    for mp in args.mp:
+        for variant in ("float64_copy", "lut_copy", "lut_in_place", "full_scan"):
+            queue = ctx.Queue()
+            proc = ctx.Process(target=_run_variant, args=(variant, mp, queue))
+            proc.start()
+            report.append(queue.get())
+            proc.join()
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
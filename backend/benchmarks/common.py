@@ -0,0 +1,97 @@
+# Shared helpers for backend benchmarks
+# Synthetic inputs only, so every script runs offline on a plain Linux box
+
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+# Megapixel tier -> (width, height) at a 4:3 phone aspect ratio
+RESOLUTIONS = {
+    1: (1152, 864),
+    4: (2304, 1728),
+    12: (4000, 3000),
+}
+
+
+def synthetic_garment_photo(
+    width: int,
+    height: int,
+    garment_bgr: Tuple[int, int, int] = (60, 80, 190),
+    seed: int = 0,
+) -> np.ndarray:
+    """
+    Draw a garment-like shape on a noisy light background.
+
+    Includes a white card (top-left) and a coin (bottom-left) so the
+    calibration stages have something to work with.
+    """
+    rng = np.random.default_rng(seed)
+    image = rng.integers(200, 236, size=(height, width, 3), dtype=np.uint8)
+
+    # Shirt body + sleeves
+    cx, cy = width // 2, height // 2
+    bw, bh = width // 4, height // 3
+    cv2.rectangle(image, (cx - bw // 2, cy - bh // 2), (cx + bw // 2, cy + bh // 2), garment_bgr, -1)
+    sleeve = np.array([
+        [cx - bw // 2, cy - bh // 2],
+        [cx - bw, cy - bh // 4],
+        [cx - bw // 2, cy],
+        [cx + bw // 2, cy],
+        [cx + bw, cy - bh // 4],
+        [cx + bw // 2, cy - bh // 2],
+    ], dtype=np.int32)
+    cv2.fillPoly(image, [sleeve], garment_bgr)
+
+    # White reference card and coin
+    card = max(8, width // 20)
+    cv2.rectangle(image, (card, card), (3 * card, 3 * card), (250, 250, 250), -1)
+    coin_r = max(6, width // 60)
+    cv2.circle(image, (2 * card, height - 2 * card), coin_r, (90, 150, 180), -1)
+    return image
+
+
+def encode_jpeg(image: np.ndarray, quality: int = 90) -> bytes:
+    ok, buf = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    if not ok:
+        raise RuntimeError("JPEG encode failed")
+    return buf.tobytes()
+
+
+def summarize(samples: List[float]) -> Dict[str, float]:
+    """min/median/mean of millisecond samples."""
+    samples = sorted(samples)
+    return {
+        "min_ms": round(samples[0], 3),
+        "median_ms": round(samples[len(samples) // 2], 3),
+        "mean_ms": round(sum(samples) / len(samples), 3),
+    }
+
+
+def time_call(fn: Callable[[], object], repeat: int = 5) -> Dict[str, float]:
+    """Run `fn` `repeat` times and return min/median/mean wall time in ms."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+GARMENT_TYPES = ("top", "bottom", "outerwear", "shoes", "dress", "accessory")
+
+
+def synthetic_wardrobe(size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """Random wardrobe of `size` garment dicts shaped like the garments table."""
+    rng = np.random.default_rng(seed)
+    colors = rng.integers(0, 256, size=(size, 3))
+    types = rng.integers(0, len(GARMENT_TYPES), size=size)
+    return [
+        {
+            "id": f"g-{seed}-{i}",
+            "color_hex": "#{:02x}{:02x}{:02x}".format(*colors[i]),
+            "garment_type": GARMENT_TYPES[types[i]],
+        }
+        for i in range(size)
+    ]
@@ -0,0 +1,69 @@
+# Stress check: concurrent scans must not share calibration state
+#
+# Runs hundreds of scans with different coin calibrations in parallel on a
+# single GarmentProcessor and verifies each result equals its serial run.
+#
+# Usage (from backend/):
+#   python -m benchmarks.stress_concurrent_scans [--scans 300] [--threads 16]
+
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from app.ai_core.garment_processor import GarmentProcessor, run_scan_job
+from benchmarks.common import synthetic_garment_photo, encode_jpeg
+
+COIN_TYPES = ("500", "1000", "5000", "generic")
+
+
+def comparable(metadata):
+    """Scan metadata without the per-run timing fields (every "*_ms" key, at any depth)."""
+    if isinstance(metadata, dict):
+        return {k: comparable(v) for k, v in metadata.items() if not k.endswith("_ms")}
+    if isinstance(metadata, list):
+        return [comparable(v) for v in metadata]
+    return metadata
+
+
+def build_jobs(count: int):
+    photos = [
+        encode_jpeg(synthetic_garment_photo(320, 240, garment_bgr=(40 * i, 90, 200 - 30 * i), seed=i))
+        for i in range(4)
+    ]
+    jobs = []
+    for i in range(count):
+        coin = {"x": 20, "y": 200, "diameter_pixels": 40 + (i % 97), "type": COIN_TYPES[i % 4]}
+        white = {"x": 24, "y": 24, "radius": 6 + (i % 5)}
+        jobs.append((photos[i % len(photos)], coin, white))
+    return jobs
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--scans", type=int, default=300)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--processes", type=int, default=0, help="also check a process pool")
+    args = parser.parse_args()
+
+    processor = GarmentProcessor()
+    jobs = build_jobs(args.scans)
+    expected = [comparable(processor.process_garment(*job)[1]) for job in jobs]
+
+    failures = 0
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        results = list(pool.map(lambda job: comparable(processor.process_garment(*job)[1]), jobs))
+    failures += sum(1 for got, want in zip(results, expected) if got != want)
+    print(f"threads={args.threads} scans={args.scans} mismatches={failures}")
+
+    if args.processes:
+        with ProcessPoolExecutor(max_workers=args.processes) as pool:
+            results = [comparable(r[1]) for r in pool.map(run_scan_job, *zip(*jobs))]
+        mismatches = sum(1 for got, want in zip(results, expected) if got != want)
+        print(f"processes={args.processes} scans={args.scans} mismatches={mismatches}")
+        failures += mismatches
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
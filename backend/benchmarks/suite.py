@@ -0,0 +1,229 @@
+# Benchmark suite: backend hot paths, with baseline comparison
+#
+# Offline and synthetic only (no network, no model downloads):
+#   scan_stages   GarmentProcessor per stage (decode, working_copy, coin,
+#                 white_balance, segmentation, color, measure, encode) and
+#                 end to end, on 1/4/12 MP photos
+#   scan_api      POST /api/v1/scan/accurate and /quick through the ASGI
+#                 app in-process (inline executor, scan cache off)
+#   recommend     POST /api/v1/recommend/instant and /weekly for
+#                 10..10k garment wardrobes, inline and by user_id
+#
+# Results are flat "group/case/metric" keys with min/median/mean ms, so
+# two runs can be compared key by key. With --baseline the run fails
+# (exit code 1) when a key's median got slower than the baseline by more
+# than --threshold (relative) and --min-delta-ms (absolute, keeps
+# sub-millisecond stages from flapping).
+#
+# Usage (from backend/):
+#   python -m benchmarks.suite --output baseline.json
+#   python -m benchmarks.suite --baseline baseline.json [--threshold 0.2]
+#   python -m benchmarks.suite --quick            # 1 MP, small wardrobes
+#   python -m benchmarks.suite --groups scan_stages recommend
+
+import argparse
+import json
+import os
+import platform
+import sys
+from datetime import datetime, timezone
+
+# The API groups run against a deterministic app: scans inline on the
+# event loop's thread, nothing served from the scan or calibration caches,
+# no sampled tracing, wardrobes in an in-memory SQLite store
+os.environ["SCAN_EXECUTION_MODE"] = "inline"
+os.environ["SCAN_CACHE_MAX_MB"] = "0"
+os.environ["SCAN_CACHE_DIR"] = ""
+os.environ["SCAN_CALIBRATION_CACHE_TTL"] = "0"
+os.environ["SCAN_TRACE_SAMPLE_RATE"] = "0"
+os.environ["DATABASE_URL"] = "sqlite:///:memory:"
+os.environ["STORAGE_BACKEND"] = "none"
+os.environ["SCAN_JOBS_DB_PATH"] = ":memory:"
+
+import cv2  # noqa: E402
+import numpy as np  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.ai_core.garment_processor import processor  # noqa: E402
+from app.core.instrumentation import ScanTrace  # noqa: E402
+from app.db.adapters import create_adapter  # noqa: E402
+from app.db.curations import curation_repository  # noqa: E402
+from app.db.wardrobe import wardrobe_repository  # noqa: E402
+from benchmarks.common import (  # noqa: E402
+    RESOLUTIONS,
+    encode_jpeg,
+    summarize,
+    synthetic_garment_photo,
+    synthetic_wardrobe,
+    time_call,
+)
+from main import app  # noqa: E402
+
+GROUPS = ("scan_stages", "scan_api", "recommend")
+WARDROBE_SIZES = (10, 100, 1000, 10000)
+# Bump when cases are renamed or their inputs change
+SUITE_VERSION = 1
+
+
+def scan_inputs(mp: int):
+    """JPEG payload plus coin/white taps matching synthetic_garment_photo."""
+    width, height = RESOLUTIONS[mp]
+    payload = encode_jpeg(synthetic_garment_photo(width, height))
+    card = max(8, width // 20)
+    coin = {"x": 2 * card, "y": height - 2 * card, "diameter_pixels": 2 * max(6, width // 60)}
+    white = {"x": 2 * card, "y": 2 * card, "radius": card // 2}
+    return payload, coin, white
+
+
+def bench_scan_stages(mps, repeat):
+    results = {}
+    for mp in mps:
+        payload, coin, white = scan_inputs(mp)
+        processor.process_garment(payload, coin, white)  # warm-up
+        stages, total = {}, []
+        for _ in range(repeat):
+            trace = ScanTrace(True, memory=False)
+            processor.process_garment(payload, coin, white, trace=trace)
+            report = trace.report()
+            total.append(report["total_ms"])
+            for record in report["stages"]:
+                stages.setdefault(record["stage"], []).append(record["wall_ms"])
+        for stage, samples in stages.items():
+            results[f"scan_stages/{mp}mp/{stage}"] = summarize(samples)
+        results[f"scan_stages/{mp}mp/total"] = summarize(total)
+    return results
+
+
+def bench_scan_api(client, mps, repeat):
+    results = {}
+    for mp in mps:
+        payload, coin, white = scan_inputs(mp)
+        files = {"file": ("garment.jpg", payload, "image/jpeg")}
+        form = {"coin_coords": json.dumps(coin), "white_tap_coords": json.dumps(white)}
+
+        def accurate():
+            response = client.post("/api/v1/scan/accurate", files=files, data=form)
+            response.raise_for_status()
+
+        def quick():
+            response = client.post("/api/v1/scan/quick", files=files)
+            response.raise_for_status()
+
+        accurate()  # warm-up
+        results[f"scan_api/{mp}mp/accurate"] = time_call(accurate, repeat)
+        results[f"scan_api/{mp}mp/quick"] = time_call(quick, repeat)
+    return results
+
+
+def bench_recommend(client, sizes, repeat):
+    results = {}
+    for size in sizes:
+        user_id = f"bench-user-{size}"
+        wardrobe = synthetic_wardrobe(size)
+        wardrobe_repository.save_garments(user_id, wardrobe)
+
+        for route, extra in (("instant", {"item_color": "#FF6B35"}), ("weekly", {})):
+            url = f"/api/v1/recommend/{route}"
+            inline = {"skin_tone": "medium", "user_garments": wardrobe, **extra}
+            by_id = {"skin_tone": "medium", "user_id": user_id, **extra}
+
+            def post(body):
+                response = client.post(url, json=body)
+                response.raise_for_status()
+
+            post(by_id)  # loads the snapshot (and stores the weekly plan)
+            results[f"recommend/{size}/{route}_inline"] = time_call(lambda: post(inline), repeat)
+            results[f"recommend/{size}/{route}_user_id"] = time_call(lambda: post(by_id), repeat)
+    return results
+
+
+def compare(results, baseline, threshold, min_delta_ms):
+    """Per-key median comparison; returns (rows, regressions)."""
+    rows, regressions = [], []
+    for key, current in sorted(results.items()):
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        before, after = previous["median_ms"], current["median_ms"]
+        ratio = after / before if before > 0 else 1.0
+        row = {"case": key, "baseline_ms": before, "current_ms": after, "ratio": round(ratio, 3)}
+        rows.append(row)
+        if ratio > 1 + threshold and after - before > min_delta_ms:
+            regressions.append(row)
+    return rows, regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--groups", nargs="+", choices=GROUPS, default=list(GROUPS))
+    parser.add_argument("--mp", type=int, nargs="+", choices=sorted(RESOLUTIONS), default=sorted(RESOLUTIONS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(WARDROBE_SIZES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--quick", action="store_true", help="1 MP photos, wardrobes of 10 and 100, 3 repeats")
+    parser.add_argument("--output", help="write results JSON here (default: stdout)")
+    parser.add_argument("--baseline", help="results JSON of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.2, help="allowed relative slowdown (0.2 = 20%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=2.0, help="ignore slowdowns smaller than this")
+    args = parser.parse_args()
+    if args.quick:
+        args.mp, args.sizes, args.repeat = [1], [10, 100], 3
+
+    wardrobe_repository.use_adapter(create_adapter("sqlite:///:memory:"))
+    curation_repository.use_adapter(wardrobe_repository.adapter)
+
+    results = {}
+    with TestClient(app) as client:
+        if "scan_stages" in args.groups:
+            results.update(bench_scan_stages(args.mp, args.repeat))
+        if "scan_api" in args.groups:
+            results.update(bench_scan_api(client, args.mp, args.repeat))
+        if "recommend" in args.groups:
+            results.update(bench_recommend(client, args.sizes, args.repeat))
+
+    document = {
+        "suite_version": SUITE_VERSION,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "numpy": np.__version__,
+            "opencv": cv2.__version__,
+            "segmentation": processor.segmenter.name,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("suite_version") != SUITE_VERSION:
+            print(f"baseline is suite version {baseline.get('suite_version')}, "
+                  f"this is {SUITE_VERSION}; cases may not line up", file=sys.stderr)
+        rows, regressions = compare(results, baseline["results"], args.threshold, args.min_delta_ms)
+        document["comparison"] = {
+            "baseline": args.baseline,
+            "threshold": args.threshold,
+            "min_delta_ms": args.min_delta_ms,
+            "cases": rows,
+            "regressions": [row["case"] for row in regressions],
+        }
+        for row in regressions:
+            print(f"REGRESSION {row['case']}: {row['baseline_ms']} ms -> {row['current_ms']} ms "
+                  f"(x{row['ratio']})", file=sys.stderr)
+        print(f"{len(rows)} cases compared, {len(regressions)} regressions", file=sys.stderr)
+        exit_code = 1 if regressions else 0
+
+    text = json.dumps(document, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
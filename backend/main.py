@@ -1,8 +1,24 @@
 # FastAPI Entry Point - LokaFit Backend Server
 
+import asyncio
+import logging
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from app.api.v1 import scan, profile, recommend
+from fastapi.responses import PlainTextResponse
+from app.core.config import settings
+from app.core.ingest import UploadSizeLimitMiddleware
+from app.core.instrumentation import metrics_registry
+
+logger = logging.getLogger(__name__)
+
+# Routers mounted per worker role: "scan" serves the image routes (scan,
+# skin tone) and garment writes, "recommend" the outfit routes; only the mounted routers
+# (and their dependencies) are imported
+WORKER_ROLES = ("all", "scan", "recommend")
+if settings.worker_role not in WORKER_ROLES:
+    raise ValueError(f"Unknown worker role: {settings.worker_role}")
+SERVES_SCAN = settings.worker_role in ("all", "scan")
+SERVES_RECOMMEND = settings.worker_role in ("all", "recommend")
 
 app = FastAPI(
     title="LokaFit API",
@@ -19,15 +35,103 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Multipart framing and form fields on top of the image bytes
+UPLOAD_FORM_OVERHEAD = 64 * 1024
+
+
+def upload_body_limit(path: str):
+    """Content-Length ceiling for upload routes (None = not an upload route)"""
+    if path == "/api/v1/scan/batch":
+        return (settings.upload_max_bytes + UPLOAD_FORM_OVERHEAD) * settings.scan_batch_max_items
+    if path.startswith("/api/v1/scan/") or path == "/api/v1/profile/skin-tone":
+        return settings.upload_max_bytes + UPLOAD_FORM_OVERHEAD
+    return None
+
+
+# Reject oversized uploads before the multipart body is parsed
+app.add_middleware(UploadSizeLimitMiddleware, limit_for_path=upload_body_limit)
+
 # Include routers
-app.include_router(scan.router, prefix="/api/v1/scan", tags=["scan"])
-app.include_router(profile.router, prefix="/api/v1/profile", tags=["profile"])
-app.include_router(recommend.router, prefix="/api/v1/recommend", tags=["recommend"])
+if SERVES_SCAN:
+    from app.api.v1 import scan, profile, wardrobe
+    from app.core.executor import scan_executor
+    from app.core.storage import LOCAL_ASSETS_ROUTE, LocalStorage, asset_uploader
+    from app.db.palettes import palette_repository
+    from app.db.scan_jobs import scan_job_store
+
+    app.include_router(scan.router, prefix="/api/v1/scan", tags=["scan"])
+    app.include_router(profile.router, prefix="/api/v1/profile", tags=["profile"])
+    # Garment writes follow a scan and update the scan workers' duplicate index
+    app.include_router(wardrobe.router, prefix="/api/v1/wardrobe", tags=["wardrobe"])
+
+    # Local storage: scan assets are served by the API itself
+    if isinstance(asset_uploader.backend, LocalStorage) and not asset_uploader.backend.public_url:
+        from fastapi.staticfiles import StaticFiles
+
+        app.mount(
+            LOCAL_ASSETS_ROUTE,
+            StaticFiles(directory=asset_uploader.backend.root, check_dir=False),
+            name="assets",
+        )
+
+    @app.on_event("startup")
+    async def warm_up_scan_workers():
+        """Start scan workers and load the segmentation backend before serving"""
+        if settings.scan_warmup:
+            await asyncio.to_thread(scan_executor.start)
+            if scan_executor.mode == "inline":
+                from app.ai_core.garment_processor import warm_up_scan_worker
+
+                await asyncio.to_thread(warm_up_scan_worker)
+
+    @app.on_event("startup")
+    async def start_scan_job_worker():
+        """Start draining the durable scan job queue (jobs left by a previous run included)"""
+        await scan.scan_job_worker.start()
+
+    @app.on_event("startup")
+    async def load_skin_tone_palettes():
+        """Read the skin tone palettes once; if the database is unreachable, the first analysis retries"""
+        try:
+            await asyncio.to_thread(palette_repository.load)
+        except Exception:
+            logger.exception("Skin tone palettes not loaded at startup; retried on the first analysis")
+
+    @app.on_event("shutdown")
+    async def shutdown_scan_executor():
+        """Hand running jobs back to the queue, then stop scan workers and storage uploads"""
+        await scan.scan_job_worker.stop()
+        scan_executor.shutdown()
+        asset_uploader.shutdown()
+
+    # Scan executor load, read at scrape time
+    metrics_registry.gauge("lokafit_scan_in_flight", "Scan jobs running or queued", lambda: scan_executor.in_flight)
+    metrics_registry.gauge("lokafit_scan_capacity", "Scan jobs admitted at most", lambda: scan_executor.capacity)
+    metrics_registry.gauge("lokafit_scan_jobs_queued", "Queued scan jobs waiting for a worker", scan_job_store.depth)
+
+if SERVES_RECOMMEND:
+    from app.api.v1 import recommend
+    from app.db.garment_vectors import garment_vector_repository
+
+    app.include_router(recommend.router, prefix="/api/v1/recommend", tags=["recommend"])
+
+    @app.on_event("startup")
+    async def load_similar_garment_index():
+        """Map (or build) the similar-garment index; if the database is unreachable, the first search retries"""
+        try:
+            await asyncio.to_thread(garment_vector_repository.refresh)
+        except Exception:
+            logger.exception("Similar-garment index not loaded at startup")
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus scrape endpoint (scan stage histograms, executor load)"""
+    return PlainTextResponse(metrics_registry.render(), media_type="text/plain; version=0.0.4")
 
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "ok", "service": "lokafit-backend"}
+    return {"status": "ok", "service": "lokafit-backend", "role": settings.worker_role}
 
 if __name__ == "__main__":
     import uvicorn
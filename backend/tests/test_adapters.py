@@ -0,0 +1,24 @@
+# Database adapters: "?" placeholders translated for psycopg2
+
+from app.db.adapters import _pyformat
+
+
+def test_placeholders_become_pyformat():
+    assert _pyformat("SELECT * FROM t WHERE a = ? AND b IN (?, ?)") == (
+        "SELECT * FROM t WHERE a = %s AND b IN (%s, %s)"
+    )
+
+
+def test_literal_percent_is_escaped():
+    assert _pyformat("SELECT * FROM t WHERE name LIKE 'a%' AND pct > ? % 2") == (
+        "SELECT * FROM t WHERE name LIKE 'a%%' AND pct > %s %% 2"
+    )
+
+
+def test_question_marks_in_strings_identifiers_and_comments_are_kept():
+    sql = "SELECT '?', 'it''s ?', \"col?\" FROM t -- why?\nWHERE a = ?"
+    assert _pyformat(sql) == "SELECT '?', 'it''s ?', \"col?\" FROM t -- why?\nWHERE a = %s"
+
+
+def test_unterminated_string_is_left_alone():
+    assert _pyformat("SELECT ? WHERE a = 'open ?") == "SELECT %s WHERE a = 'open ?"
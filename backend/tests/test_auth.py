@@ -0,0 +1,61 @@
+# Access tokens: HS256 signature, expiry and audience checks
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+
+import pytest
+
+from app.core.auth import AuthError, verify_access_token
+
+SECRET = "sekret"
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _token(claims: dict, secret: str = SECRET) -> str:
+    header = _b64(json.dumps({"alg": "HS256", "typ": "JWT"}).encode())
+    payload = _b64(json.dumps(claims).encode())
+    signature = hmac.new(secret.encode(), f"{header}.{payload}".encode(), hashlib.sha256).digest()
+    return f"{header}.{payload}.{_b64(signature)}"
+
+
+def _claims(**overrides) -> dict:
+    return {"sub": "user-1", "aud": "authenticated", "exp": time.time() + 60, **overrides}
+
+
+def test_valid_token_returns_subject():
+    assert verify_access_token(_token(_claims()), SECRET) == "user-1"
+
+
+def test_expired_token_is_rejected():
+    with pytest.raises(AuthError, match="expired"):
+        verify_access_token(_token(_claims(exp=time.time() - 1)), SECRET)
+
+
+def test_token_without_expiry_is_rejected():
+    claims = _claims()
+    del claims["exp"]
+    with pytest.raises(AuthError, match="expired"):
+        verify_access_token(_token(claims), SECRET)
+
+
+def test_bad_signature_is_rejected():
+    with pytest.raises(AuthError, match="signature"):
+        verify_access_token(_token(_claims(), secret="other"), SECRET)
+
+
+def test_tampered_payload_is_rejected():
+    header, _, signature = _token(_claims()).split(".")
+    forged = _b64(json.dumps(_claims(sub="admin")).encode())
+    with pytest.raises(AuthError, match="signature"):
+        verify_access_token(f"{header}.{forged}.{signature}", SECRET)
+
+
+def test_malformed_token_is_rejected():
+    with pytest.raises(AuthError, match="Malformed"):
+        verify_access_token("not-a-jwt", SECRET)
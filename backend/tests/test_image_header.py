@@ -0,0 +1,49 @@
+# Image header sniffing: truncated headers report the format without dimensions
+
+import struct
+import zlib
+
+from app.core.image_header import sniff_image_header
+
+
+def _png(width: int, height: int) -> bytes:
+    ihdr = struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0)
+    return (
+        b"\x89PNG\r\n\x1a\n" + struct.pack(">I", len(ihdr)) + b"IHDR" + ihdr
+        + struct.pack(">I", zlib.crc32(b"IHDR" + ihdr))
+    )
+
+
+def _jpeg(width: int, height: int) -> bytes:
+    app0 = b"\xff\xe0" + struct.pack(">H", 16) + b"JFIF\x00" + bytes(9)
+    sof = b"\xff\xc0" + struct.pack(">HBHHB", 11, 8, height, width, 1) + bytes(3)
+    return b"\xff\xd8" + app0 + sof
+
+
+def _webp_vp8x(width: int, height: int) -> bytes:
+    chunk = b"VP8X" + struct.pack("<I", 10) + bytes(4)
+    chunk += (width - 1).to_bytes(3, "little") + (height - 1).to_bytes(3, "little")
+    return b"RIFF" + struct.pack("<I", 4 + len(chunk)) + b"WEBP" + chunk
+
+
+def test_complete_headers():
+    assert sniff_image_header(_png(640, 480)) == ("png", 640, 480)
+    assert sniff_image_header(_jpeg(640, 480)) == ("jpeg", 640, 480)
+    assert sniff_image_header(_webp_vp8x(640, 480)) == ("webp", 640, 480)
+
+
+def test_truncated_headers_keep_format_without_dimensions():
+    for data, fmt in ((_png(640, 480), "png"), (_jpeg(640, 480), "jpeg"), (_webp_vp8x(640, 480), "webp")):
+        # Every cut after the signature must return cleanly, never raise
+        signature = 3 if fmt == "jpeg" else 12 if fmt == "webp" else 8
+        for cut in range(signature, len(data)):
+            found, width, height = sniff_image_header(data[:cut])
+            assert found == fmt
+            assert (width, height) in ((None, None), (640, 480))
+        assert sniff_image_header(memoryview(data)[:signature]) == (fmt, None, None)
+
+
+def test_truncated_signature_is_unsupported():
+    assert sniff_image_header(b"") == (None, None, None)
+    assert sniff_image_header(b"\x89PN") == (None, None, None)
+    assert sniff_image_header(b"RIFF\x00\x00") == (None, None, None)
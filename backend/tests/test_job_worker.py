@@ -0,0 +1,57 @@
+# Job worker: a failing store write must not stop the drain loop
+
+import asyncio
+import sqlite3
+
+from app.core.job_worker import JobWorker
+from app.db.scan_jobs import ScanJobStore
+
+
+class FlakyStore(ScanJobStore):
+    """Job store whose first `complete` fails like a locked SQLite file."""
+
+    def __init__(self, path: str):
+        super().__init__(path)
+        self.failed_writes = 0
+
+    def complete(self, job_id, result):
+        if self.failed_writes == 0:
+            self.failed_writes += 1
+            raise sqlite3.OperationalError("database is locked")
+        super().complete(job_id, result)
+
+
+def test_failed_complete_keeps_draining(tmp_path):
+    store = FlakyStore(str(tmp_path / "jobs.db"))
+
+    async def handler(job):
+        return {"ok": True}
+
+    async def run():
+        worker = JobWorker(
+            store,
+            handler,
+            lambda e: (500, str(e)),
+            concurrency=1,
+            lease_seconds=0.2,
+            poll_interval=0.05,
+        )
+        first = store.submit(b"first", {})
+        second = store.submit(b"second", {})
+        await worker.start()
+        drain = worker._tasks[0]
+        try:
+            for _ in range(100):
+                jobs = [store.get(first["id"]), store.get(second["id"])]
+                if all(job["status"] == "succeeded" for job in jobs):
+                    break
+                await asyncio.sleep(0.05)
+            assert not drain.done()
+            assert not worker._active
+        finally:
+            await worker.stop()
+        return jobs
+
+    jobs = asyncio.run(run())
+    assert store.failed_writes == 1
+    assert [job["status"] for job in jobs] == ["succeeded", "succeeded"]
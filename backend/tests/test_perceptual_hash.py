@@ -0,0 +1,89 @@
+# Perceptual hash index: multi-index probing finds exactly the brute-force matches
+
+import random
+
+import pytest
+
+from app.ai_core.perceptual_hash import (
+    BAND_BITS, BANDS, PerceptualHashIndex, format_hash, hamming_distance, parse_hash
+)
+
+HASH_MASK = (1 << (BAND_BITS * BANDS)) - 1
+
+
+def _flip(value: int, bits) -> int:
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+def _random_index(seed: int, size: int = 200):
+    rng = random.Random(seed)
+    hashes = {f"g{i}": rng.getrandbits(BAND_BITS * BANDS) for i in range(size)}
+    return PerceptualHashIndex((gid, value, None) for gid, value in hashes.items()), hashes
+
+
+def test_matches_across_band_boundaries():
+    base = 0x0123_4567_89AB_CDEF
+    # Flips on both sides of every band edge, 2 per band (radius 2 at distance 8)
+    edges = [BAND_BITS * band + offset for band in range(BANDS) for offset in (0, BAND_BITS - 1)]
+    # All 8 flips in one band: only the other three bands still agree
+    one_band = list(range(BAND_BITS - 8, BAND_BITS))
+    index, _ = _random_index(seed=1)
+    index.add("edges", _flip(base, edges))
+    index.add("one-band", _flip(base, one_band))
+    index.add("too-far", _flip(base, edges + [BAND_BITS * BANDS - 2]))
+
+    found = dict(index.query(base, max_distance=8, limit=10))
+
+    assert found["edges"] == 8 and found["one-band"] == 8
+    assert "too-far" not in found
+
+
+@pytest.mark.parametrize("max_distance", [0, 3, 4, 8, 12])
+def test_query_equals_brute_force(max_distance):
+    index, hashes = _random_index(seed=max_distance)
+    rng = random.Random(100 + max_distance)
+    for gid in rng.sample(sorted(hashes), 20):
+        # Near neighbours of an indexed hash, at and just past the radius
+        query = _flip(hashes[gid], rng.sample(range(BAND_BITS * BANDS), max_distance))
+        expected = sorted(
+            (hamming_distance(value, query), other)
+            for other, value in hashes.items()
+            if hamming_distance(value, query) <= max_distance
+        )
+        got = index.query(query, max_distance=max_distance, limit=len(hashes))
+        assert got == [(other, distance) for distance, other in expected]
+
+
+def test_remove_and_replace():
+    index, hashes = _random_index(seed=7)
+    value = hashes["g0"]
+
+    assert index.remove("g0")
+    assert not index.remove("g0")
+    assert "g0" not in index and len(index) == len(hashes) - 1
+    assert all(gid != "g0" for gid, _ in index.query(value, max_distance=0))
+
+    # Re-adding under a new hash drops the old band entries
+    index.add("g1", value)
+    assert index.query(value, max_distance=0) == [("g1", 0)]
+    assert index.query(hashes["g1"], max_distance=0) == []
+    assert index.entry("g1") == (value, None)
+
+
+def test_color_check_skips_other_colors():
+    index = PerceptualHashIndex([("navy", 0, "#1f3a5f"), ("red", 0, "#c0392b"), ("unknown", 0, None)])
+
+    found = index.query(0, max_distance=0, color_hex="#1f3a5f", max_color_distance=10)
+
+    assert [gid for gid, _ in found] == ["navy", "unknown"]
+
+
+def test_hash_text_round_trip():
+    assert parse_hash(format_hash(HASH_MASK)) == HASH_MASK
+    assert format_hash(1) == "0000000000000001"
+    with pytest.raises(ValueError):
+        parse_hash("1" * 17)
+    with pytest.raises(ValueError):
+        parse_hash("not hex")
@@ -0,0 +1,66 @@
+# Scan job store: idempotency keys are scoped to the submitting user
+
+import sqlite3
+
+import pytest
+
+from app.db.scan_jobs import IdempotencyConflictError, JobLookupError, ScanJobStore
+
+
+def test_idempotency_key_is_scoped_per_user(tmp_path):
+    store = ScanJobStore(str(tmp_path / "jobs.db"))
+
+    first = store.submit(b"photo", {}, "key-1", "alice")
+    again = store.submit(b"photo", {}, "key-1", "alice")
+    other = store.submit(b"other photo", {}, "key-1", "bob")
+    anonymous = store.submit(b"photo", {}, "key-1")
+
+    assert first["created"] and first["user_id"] == "alice"
+    assert not again["created"] and again["id"] == first["id"]
+    assert other["created"] and other["user_id"] == "bob"
+    assert anonymous["created"] and anonymous["user_id"] is None
+    with pytest.raises(IdempotencyConflictError):
+        store.submit(b"other photo", {}, "key-1", "alice")
+
+
+def test_lost_insert_race_raises_lookup_error(tmp_path):
+    store = ScanJobStore(str(tmp_path / "jobs.db"))
+    with store.adapter.connection() as conn:
+        # Every insert fails like a concurrent insert of the same key
+        conn.execute(
+            "CREATE TRIGGER always_taken BEFORE INSERT ON scan_jobs "
+            "BEGIN SELECT RAISE(ABORT, 'UNIQUE constraint failed'); END"
+        )
+
+    with pytest.raises(JobLookupError):
+        store.submit(b"photo", {}, "key-1", "alice")
+
+
+def test_jobs_table_without_owner_is_migrated(tmp_path):
+    path = str(tmp_path / "jobs.db")
+    conn = sqlite3.connect(path)
+    conn.executescript(
+        """
+        CREATE TABLE scan_jobs (
+          id TEXT PRIMARY KEY, idempotency_key TEXT UNIQUE, payload_sha256 TEXT NOT NULL,
+          params TEXT NOT NULL, status TEXT NOT NULL, attempts INTEGER NOT NULL DEFAULT 0,
+          available_at REAL NOT NULL, lease_expires_at REAL, created_at REAL NOT NULL,
+          started_at REAL, finished_at REAL, expires_at REAL, result TEXT, error TEXT
+        );
+        CREATE TABLE scan_job_payloads (
+          job_id TEXT PRIMARY KEY REFERENCES scan_jobs(id) ON DELETE CASCADE,
+          data BLOB NOT NULL
+        );
+        INSERT INTO scan_jobs (id, idempotency_key, payload_sha256, params, status, available_at, created_at)
+        VALUES ('old', 'key-1', 'digest', '{}', 'queued', 0, 0);
+        INSERT INTO scan_job_payloads (job_id, data) VALUES ('old', x'00');
+        """
+    )
+    conn.close()
+
+    store = ScanJobStore(path)
+    claimed = store.claim(lease_seconds=30)
+
+    assert claimed["id"] == "old" and claimed["user_id"] is None
+    assert claimed["payload"] == b"\x00"
+    assert store.submit(b"photo", {}, "key-1", "alice")["created"]
@@ -0,0 +1,63 @@
+# Garment vector index: rebuilding with appended rows publishes a new build
+
+import os
+
+import numpy as np
+import pytest
+
+from app.ai_core.vector_index import VectorIndex, current_build
+
+DIM = 8
+
+
+def _entries(count: int, seed: int = 0):
+    rng = np.random.default_rng(seed)
+    return [(f"g{i}", f"user-{i % 2}", rng.random(DIM, dtype=np.float32)) for i in range(count)]
+
+
+def test_reopen_after_append(tmp_path):
+    root = str(tmp_path)
+    entries = _entries(6)
+    first = VectorIndex.open(VectorIndex.build(root, entries, DIM, "v1"))
+
+    appended = ("g-new", "user-1", np.ones(DIM, dtype=np.float32))
+    second_path = VectorIndex.build(root, entries + [appended], DIM, "v1")
+    reopened = VectorIndex.open(current_build(root))
+
+    assert reopened.path == second_path
+    assert len(reopened) == 7 and reopened.count("user-1") == 4
+    assert reopened.search(np.ones(DIM), k=1, user_id="user-1")[0][:2] == ("g-new", "user-1")
+    assert reopened.row_of("g-new") is not None
+    # The previous build stays readable for processes still mapping it
+    assert len(first) == 6 and first.row_of("g-new") is None
+    assert first.search(np.ones(DIM), k=6)
+
+    # Only the current build and its predecessor are kept
+    VectorIndex.build(root, entries, DIM, "v1")
+    assert not os.path.exists(first.path)
+    assert os.path.exists(second_path)
+
+
+def test_search_matches_brute_force(tmp_path):
+    entries = _entries(50, seed=3)
+    index = VectorIndex.open(VectorIndex.build(str(tmp_path), entries, DIM, "v1"))
+    query = np.random.default_rng(4).random(DIM, dtype=np.float32)
+
+    vectors = np.stack([vector for _, _, vector in entries])
+    cosine = vectors @ query / (np.linalg.norm(vectors, axis=1) * np.linalg.norm(query))
+    order = np.argsort(-cosine)
+
+    # The closest garment is excluded, so the next five come back
+    results = index.search(query, k=5, exclude=[entries[order[0]][0]])
+    assert [gid for gid, _, _ in results] == [entries[i][0] for i in order[1:6]]
+    assert [score for _, _, score in results] == pytest.approx(cosine[order[1:6]], rel=1e-5)
+
+
+def test_rows_of_another_length_are_skipped(tmp_path):
+    entries = _entries(3) + [("short", "user-0", np.ones(DIM - 1, dtype=np.float32))]
+    index = VectorIndex.open(VectorIndex.build(str(tmp_path), entries, DIM, "v1"))
+
+    assert len(index) == 3 and index.row_of("short") is None
+    with pytest.raises(ValueError):
+        index.search(np.ones(DIM - 1), k=1)
+    assert index.search(np.ones(DIM), k=3, user_id="nobody") == []
@@ -0,0 +1,82 @@
+# Weekly curation: stored plans are reused and patched, not replanned
+
+from app.ai_core.garments import WardrobeArrays
+from app.ai_core.mixmatch_logic import WEEK_DAYS
+from app.ai_core.weekly_curation import WeeklyCurator
+from app.db.adapters import create_adapter
+from app.db.curations import CurationRepository
+from benchmarks.common import synthetic_wardrobe
+
+USER = "user-1"
+WEEK = "2026-10-12"
+IMPORTED_AT = "2026-10-12T08:00:00"
+
+
+def _curator() -> WeeklyCurator:
+    return WeeklyCurator(repository=CurationRepository(create_adapter("sqlite:///:memory:")))
+
+
+def _wardrobe(garments) -> WardrobeArrays:
+    return WardrobeArrays.from_dicts(garments)
+
+
+def _garments(size: int = 40):
+    return [{**garment, "updated_at": IMPORTED_AT} for garment in synthetic_wardrobe(size)]
+
+
+def _ids(outfit) -> set:
+    return {outfit["primary"]["id"]} | {item["id"] for item in outfit["complements"]}
+
+
+def test_unchanged_wardrobe_is_a_cache_hit():
+    curator = _curator()
+    garments = _garments()
+
+    first = curator.curate(USER, _wardrobe(garments), WEEK)
+    again = curator.curate(USER, _wardrobe(garments), WEEK)
+
+    assert not first["cached"] and first["recomputed_days"] == list(WEEK_DAYS)
+    assert again["cached"] and again["recomputed_days"] == []
+    assert again["outfits"] == first["outfits"]
+    assert curator.cached(USER, _wardrobe(garments), WEEK)["outfits"] == first["outfits"]
+
+
+def test_removed_garment_replans_only_its_days():
+    curator = _curator()
+    garments = _garments()
+    first = curator.curate(USER, _wardrobe(garments), WEEK)
+    plan = first["outfits"]
+    removed = plan[3]["primary"]["id"]
+    wearing = {WEEK_DAYS[day] for day, outfit in enumerate(plan) if removed in _ids(outfit)}
+
+    updated = curator.curate(USER, _wardrobe([g for g in garments if g["id"] != removed]), WEEK)
+
+    assert not updated["cached"]
+    assert wearing <= set(updated["recomputed_days"]) < set(WEEK_DAYS)
+    for day, outfit in enumerate(updated["outfits"]):
+        assert removed not in _ids(outfit)
+        if WEEK_DAYS[day] not in updated["recomputed_days"]:
+            assert outfit == plan[day]
+    assert updated["generated_at"] == first["generated_at"]
+
+
+def test_added_garment_is_tried_without_a_full_replan():
+    curator = _curator()
+    garments = _garments()
+    first = curator.curate(USER, _wardrobe(garments), WEEK)
+
+    added = {"id": "new", "color_hex": "#1f3a5f", "garment_type": "shoes", "updated_at": "2026-10-13T09:00:00"}
+    updated = curator.curate(USER, _wardrobe(garments + [added]), WEEK)
+
+    assert not updated["cached"]
+    assert len(updated["recomputed_days"]) < len(WEEK_DAYS)
+    assert updated["generated_at"] == first["generated_at"]
+    for day, outfit in enumerate(updated["outfits"]):
+        if WEEK_DAYS[day] not in updated["recomputed_days"]:
+            assert outfit == first["outfits"][day]
+    # The patched plan is stored: the same wardrobe is now a cache hit
+    assert curator.curate(USER, _wardrobe(garments + [added]), WEEK)["cached"]
+
+
+def test_small_wardrobe_has_no_plan():
+    assert "error" in _curator().curate(USER, _wardrobe(_garments(2)), WEEK)
@@ -60,7 +60,7 @@ export function WardrobeGallery() {
             <div className="aspect-square bg-muted overflow-hidden">
               {garment.file_url ? (
                 <img
-                  src={garment.file_url || "/placeholder.svg"}
+                  src={garment.assets?.gallery || garment.file_url || "/placeholder.svg"}
                   alt={garment.garment_type}
                   className="w-full h-full object-cover hover:scale-105 transition"
                 />
@@ -2,11 +2,12 @@
 
 import { useState, useCallback } from "react";
 import {
+  saveScannedGarment,
   scanGarmentAccurate,
   scanGarmentQuick,
+  type ScanDuplicate,
 } from "@/lib/api-client";
 import { useUserStore } from "@/store/user-store";
-import { createClient } from "@/lib/supabase/client";
 
 interface ScanCoordinates {
   coinCoords?: {
@@ -25,6 +26,8 @@ interface ScanCoordinates {
 export function useGarmentScan() {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
+  // Garments the last scan looks like (already in the wardrobe)
+  const [duplicates, setDuplicates] = useState<ScanDuplicate[]>([]);
   const { user, addGarment, setIsLoading: setStoreLoading } = useUserStore();
 
   const performAccurateScan = useCallback(
@@ -53,43 +56,13 @@ export function useGarmentScan() {
             y: 0,
             radius: 0,
           },
+          userId: user.id,
         });
+        setDuplicates(result.duplicates ?? []);
 
-        // Upload image to Supabase Storage
-        const supabase = createClient();
-        const fileName = `garments/${user.id}/${Date.now()}.webp`;
-
-        // Convert webp URL to blob and upload
-        const response = await fetch(result.webp_url);
-        const blob = await response.blob();
-
-        const { data: uploadData, error: uploadError } = await supabase.storage
-          .from("garments")
-          .upload(fileName, blob);
-
-        if (uploadError) throw uploadError;
-
-        // Get public URL
-        const {
-          data: { publicUrl },
-        } = supabase.storage.from("garments").getPublicUrl(fileName);
-
-        // Save to database
-        const { data: garment, error: dbError } = await supabase
-          .from("garments")
-          .insert({
-            user_id: user.id,
-            file_url: publicUrl,
-            storage_path: fileName,
-            color_hex: result.metadata.color_hex,
-            measurements_json: result.metadata.measurements,
-            garment_type: "Unknown",
-            status: "DRAF",
-          })
-          .select()
-          .single();
-
-        if (dbError) throw dbError;
+        // Save to the wardrobe (indexes for duplicates / similar garments
+        // are updated by the backend)
+        const garment = await saveScannedGarment(user.id, result);
 
         // Update local state
         addGarment(garment);
@@ -120,36 +93,10 @@ export function useGarmentScan() {
       setStoreLoading(true);
 
       try {
-        const result = await scanGarmentQuick(file);
-
-        // Upload to Supabase
-        const supabase = createClient();
-        const fileName = `garments/${user.id}/${Date.now()}.webp`;
-
-        const response = await fetch(result.webp_url);
-        const blob = await response.blob();
-
-        await supabase.storage.from("garments").upload(fileName, blob);
-
-        const {
-          data: { publicUrl },
-        } = supabase.storage.from("garments").getPublicUrl(fileName);
-
-        const { data: garment, error: dbError } = await supabase
-          .from("garments")
-          .insert({
-            user_id: user.id,
-            file_url: publicUrl,
-            storage_path: fileName,
-            color_hex: result.metadata.color_hex,
-            measurements_json: result.metadata.measurements,
-            garment_type: "Unknown",
-            status: "DRAF",
-          })
-          .select()
-          .single();
+        const result = await scanGarmentQuick(file, user.id);
+        setDuplicates(result.duplicates ?? []);
 
-        if (dbError) throw dbError;
+        const garment = await saveScannedGarment(user.id, result);
 
         addGarment(garment);
         return garment;
@@ -170,5 +117,6 @@ export function useGarmentScan() {
     performQuickScan,
     isLoading,
     error,
+    duplicates,
   };
 }
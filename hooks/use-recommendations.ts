@@ -10,7 +10,7 @@ import { useUserStore } from "@/store/user-store";
 export function useRecommendations() {
   const [isLoading, setIsLoading] = useState(false);
   const [error, setError] = useState<string | null>(null);
-  const { user, garments, skinToneResult } = useUserStore();
+  const { user, skinToneResult } = useUserStore();
 
   const getInstantMatches = useCallback(
     async (itemColor: string) => {
@@ -26,7 +26,7 @@ export function useRecommendations() {
         const result = await generateInstantMatch(
           itemColor,
           skinToneResult.skin_tone_class,
-          garments
+          user.id
         );
         return result.data;
       } catch (err) {
@@ -37,7 +37,7 @@ export function useRecommendations() {
         setIsLoading(false);
       }
     },
-    [user, skinToneResult, garments]
+    [user, skinToneResult]
   );
 
   const getWeeklyPlan = useCallback(async () => {
@@ -51,7 +51,7 @@ export function useRecommendations() {
 
     try {
       const result = await generateWeeklyPlan(
-        garments,
+        user.id,
         skinToneResult.skin_tone_class
       );
       return result.data;
@@ -62,7 +62,7 @@ export function useRecommendations() {
     } finally {
       setIsLoading(false);
     }
-  }, [user, skinToneResult, garments]);
+  }, [user, skinToneResult]);
 
   return {
     getInstantMatches,
@@ -23,14 +23,16 @@ export function useSkinTone() {
       try {
         const result = await analyzeSkinTone(file);
 
-        // Save to database
-        const supabase = createClient();
-        await supabase
-          .from("profiles")
-          .update({
-            skin_tone_id: result.skin_tone_class,
-          })
-          .eq("id", user.id);
+        // Save to database (keep the stored palette when none matched)
+        if (result.skin_tone_id) {
+          const supabase = createClient();
+          await supabase
+            .from("profiles")
+            .update({
+              skin_tone_id: result.skin_tone_id,
+            })
+            .eq("id", user.id);
+        }
 
         // Update store
         setSkinTone(result);
@@ -1,5 +1,8 @@
 // Frontend API Client for FastAPI Backend Communication
 
+import { createClient } from "@/lib/supabase/client";
+import type { Garment } from "@/store/user-store";
+
 interface ScanRequest {
   file: File;
   coinCoords: {
@@ -13,24 +16,90 @@ interface ScanRequest {
     y: number;
     radius: number;
   };
+  // Same session + device lets later scans reuse the detected coin
+  sessionId?: string;
+  deviceId?: string;
+  // Owner's wardrobe is checked for near-duplicates of the scan
+  userId?: string;
+}
+
+export interface ScanDuplicate {
+  garment_id: string;
+  // Perceptual hash distance, bits out of 64 (0 = same picture)
+  distance: number;
 }
 
 interface ScanResponse {
   status: string;
-  webp_url: string;
+  // Largest stored rendition (null when the backend stores no assets);
+  // local storage returns paths on the API, see assetUrl
+  webp_url: string | null;
+  assets: Partial<Record<"full" | "gallery" | "thumbnail", string>>;
   metadata: {
     color_hex: string;
+    palette?: {
+      hex: string;
+      rgb: [number, number, number];
+      proportion: number;
+    }[];
     measurements: {
       width_cm: number;
       height_cm: number;
       area_cm2: number;
     };
     scale_ratio: number;
+    coin?: {
+      x: number | null;
+      y: number | null;
+      diameter_pixels: number;
+      type: string;
+      source: "detected" | "cache" | "client" | "default";
+    };
+    // Stored WebP renditions, largest first
+    renditions?: {
+      name: "full" | "gallery" | "thumbnail";
+      width: number;
+      height: number;
+      bytes: number;
+      alpha: boolean;
+    }[];
+    encode_preset?: "quick" | "accurate";
+    // Perceptual hash; store it in garments.phash
+    phash?: string;
+    // Color + shape descriptor; store it in garments.descriptor
+    descriptor?: string;
   };
+  // Look-alike garments already in the wardrobe, nearest first (null when
+  // the scan was sent without userId)
+  duplicates: ScanDuplicate[] | null;
 }
 
 const API_BASE = process.env.NEXT_PUBLIC_API_URL || "lokafitproject-production.up.railway.app";
 
+// Absolute URL of a stored scan asset (the backend's local storage
+// returns paths under its /assets route)
+export function assetUrl(url: string | null): string | null {
+  return url?.startsWith("/") ? `${API_BASE}${url}` : url;
+}
+
+// Every rendition URL of a scan made absolute, ready to store on the garment
+export function assetUrls(
+  assets: ScanResponse["assets"]
+): ScanResponse["assets"] {
+  return Object.fromEntries(
+    Object.entries(assets).map(([name, url]) => [name, url && assetUrl(url)])
+  );
+}
+
+// Bearer token of the signed-in user; the backend only serves that user's
+// wardrobe when SUPABASE_JWT_SECRET is set
+async function authHeaders(): Promise<Record<string, string>> {
+  const {
+    data: { session },
+  } = await createClient().auth.getSession();
+  return session ? { Authorization: `Bearer ${session.access_token}` } : {};
+}
+
 export async function scanGarmentAccurate(
   request: ScanRequest
 ): Promise<ScanResponse> {
@@ -38,9 +107,13 @@ export async function scanGarmentAccurate(
   formData.append("file", request.file);
   formData.append("coin_coords", JSON.stringify(request.coinCoords));
   formData.append("white_tap_coords", JSON.stringify(request.whiteTapCoords));
+  if (request.sessionId) formData.append("session_id", request.sessionId);
+  if (request.deviceId) formData.append("device_id", request.deviceId);
+  if (request.userId) formData.append("user_id", request.userId);
 
   const response = await fetch(`${API_BASE}/api/v1/scan/accurate`, {
     method: "POST",
+    headers: await authHeaders(),
     body: formData,
   });
 
@@ -51,12 +124,14 @@ export async function scanGarmentAccurate(
   return response.json();
 }
 
-export async function scanGarmentQuick(file: File): Promise<ScanResponse> {
+export async function scanGarmentQuick(file: File, userId?: string): Promise<ScanResponse> {
   const formData = new FormData();
   formData.append("file", file);
+  if (userId) formData.append("user_id", userId);
 
   const response = await fetch(`${API_BASE}/api/v1/scan/quick`, {
     method: "POST",
+    headers: await authHeaders(),
     body: formData,
   });
 
@@ -67,6 +142,164 @@ export async function scanGarmentQuick(file: File): Promise<ScanResponse> {
   return response.json();
 }
 
+interface BatchScanItem {
+  file: File;
+  coinCoords?: ScanRequest["coinCoords"];
+  whiteTapCoords?: ScanRequest["whiteTapCoords"];
+}
+
+export type BatchScanResult =
+  | ({ index: number; filename: string; status: "success" } & Omit<ScanResponse, "status">)
+  | { index: number; filename: string; status: "error"; code: number; detail: string };
+
+export async function scanGarmentBatch(
+  items: BatchScanItem[],
+  onResult: (result: BatchScanResult) => void,
+  userId?: string
+): Promise<{ total: number; succeeded: number; failed: number }> {
+  const formData = new FormData();
+  items.forEach((item) => formData.append("files", item.file));
+  if (userId) formData.append("user_id", userId);
+  formData.append(
+    "coords",
+    JSON.stringify(
+      items.map((item) =>
+        item.coinCoords || item.whiteTapCoords
+          ? {
+              coin_coords: item.coinCoords,
+              white_tap_coords: item.whiteTapCoords,
+            }
+          : null
+      )
+    )
+  );
+
+  const response = await fetch(`${API_BASE}/api/v1/scan/batch`, {
+    method: "POST",
+    headers: await authHeaders(),
+    body: formData,
+  });
+
+  if (!response.ok || !response.body) {
+    throw new Error(`Batch scan failed: ${response.statusText}`);
+  }
+
+  // Results arrive as NDJSON, one line per garment as it finishes
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffered = "";
+  let summary = { total: items.length, succeeded: 0, failed: 0 };
+
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) break;
+    buffered += decoder.decode(value, { stream: true });
+
+    const lines = buffered.split("\n");
+    buffered = lines.pop() ?? "";
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      const message = JSON.parse(line);
+      if (message.status === "done") {
+        summary = message;
+      } else {
+        onResult(message);
+      }
+    }
+  }
+
+  return summary;
+}
+
+export interface ScanJob {
+  job_id: string;
+  state: "queued" | "running" | "succeeded" | "failed";
+  attempts: number;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+  expires_at: string | null;
+  result?: Omit<ScanResponse, "status"> & { cached: boolean };
+  error?: { code: number; detail: string };
+}
+
+// Queues the scan and returns at once; reuse idempotencyKey when retrying
+// a submission so a flaky connection never scans the same photo twice
+export async function submitScanJob(
+  request: Partial<Omit<ScanRequest, "file">> & { file: File },
+  idempotencyKey: string = crypto.randomUUID()
+): Promise<ScanJob> {
+  const formData = new FormData();
+  formData.append("file", request.file);
+  if (request.coinCoords) formData.append("coin_coords", JSON.stringify(request.coinCoords));
+  if (request.whiteTapCoords) formData.append("white_tap_coords", JSON.stringify(request.whiteTapCoords));
+  if (request.sessionId) formData.append("session_id", request.sessionId);
+  if (request.deviceId) formData.append("device_id", request.deviceId);
+  if (request.userId) formData.append("user_id", request.userId);
+
+  const response = await fetch(`${API_BASE}/api/v1/scan/jobs`, {
+    method: "POST",
+    headers: { "Idempotency-Key": idempotencyKey, ...(await authHeaders()) },
+    body: formData,
+  });
+
+  if (!response.ok) {
+    throw new Error(`Scan submission failed: ${response.statusText}`);
+  }
+
+  return (await response.json()).data;
+}
+
+export async function getScanJob(jobId: string): Promise<ScanJob> {
+  const response = await fetch(`${API_BASE}/api/v1/scan/jobs/${jobId}`, {
+    headers: await authHeaders(),
+  });
+
+  if (!response.ok) {
+    throw new Error(`Scan job lookup failed: ${response.statusText}`);
+  }
+
+  return (await response.json()).data;
+}
+
+// Stores a scanned garment through the backend, which updates the
+// duplicate and similar-garment indexes at once (writing straight to
+// Supabase would only reach them after their refresh interval)
+export async function saveScannedGarment(
+  userId: string,
+  scan: ScanResponse
+): Promise<Garment> {
+  const response = await fetch(`${API_BASE}/api/v1/wardrobe/garments`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      ...(await authHeaders()),
+    },
+    body: JSON.stringify({
+      user_id: userId,
+      garments: [
+        {
+          // The backend already stored the renditions; keep their URLs
+          file_url: assetUrl(scan.webp_url) ?? "",
+          assets: assetUrls(scan.assets),
+          color_hex: scan.metadata.color_hex,
+          measurements_json: scan.metadata.measurements,
+          phash: scan.metadata.phash,
+          descriptor: scan.metadata.descriptor,
+          garment_type: "Unknown",
+          status: "DRAF",
+        },
+      ],
+    }),
+  });
+
+  if (!response.ok) {
+    throw new Error(`Saving garment failed: ${response.statusText}`);
+  }
+
+  return (await response.json()).data[0];
+}
+
 export async function analyzeSkinTone(file: File) {
   const formData = new FormData();
   formData.append("file", file);
@@ -83,20 +316,31 @@ export async function analyzeSkinTone(file: File) {
   return response.json();
 }
 
+// Wardrobe for recommendation requests: a user id (loaded server-side from
+// the garments table) or an inline list of garments
+export type WardrobeRef = string | any[];
+
+function wardrobePayload(wardrobe: WardrobeRef) {
+  return typeof wardrobe === "string"
+    ? { user_id: wardrobe }
+    : { user_garments: wardrobe };
+}
+
 export async function generateInstantMatch(
   itemColor: string,
   skinTone: string,
-  userGarments: any[]
+  wardrobe: WardrobeRef
 ) {
   const response = await fetch(`${API_BASE}/api/v1/recommend/instant`, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
+      ...(await authHeaders()),
     },
     body: JSON.stringify({
       item_color: itemColor,
       skin_tone: skinTone,
-      user_garments: userGarments,
+      ...wardrobePayload(wardrobe),
     }),
   });
 
@@ -107,14 +351,59 @@ export async function generateInstantMatch(
   return response.json();
 }
 
-export async function generateWeeklyPlan(userGarments: any[], skinTone: string) {
+export interface SimilarGarment {
+  garment_id: string;
+  // Cosine similarity (higher is closer) or L2 distance (lower is closer)
+  score: number;
+}
+
+export interface SimilarQuery {
+  // One of the user's garments, or the descriptor of an unsaved scan
+  garmentId?: string;
+  descriptor?: string;
+  // The user's wardrobe or the shared catalog
+  scope?: "wardrobe" | "catalog";
+  metric?: "cosine" | "l2";
+  k?: number;
+}
+
+export async function findSimilarGarments(
+  userId: string,
+  query: SimilarQuery
+): Promise<SimilarGarment[]> {
+  const response = await fetch(`${API_BASE}/api/v1/recommend/similar`, {
+    method: "POST",
+    headers: {
+      "Content-Type": "application/json",
+      ...(await authHeaders()),
+    },
+    body: JSON.stringify({
+      user_id: userId,
+      garment_id: query.garmentId,
+      descriptor: query.descriptor,
+      scope: query.scope ?? "wardrobe",
+      metric: query.metric ?? "cosine",
+      k: query.k ?? 10,
+    }),
+  });
+
+  if (!response.ok) {
+    throw new Error(`Similar garment search failed: ${response.statusText}`);
+  }
+
+  const result = await response.json();
+  return result.data.items;
+}
+
+export async function generateWeeklyPlan(wardrobe: WardrobeRef, skinTone: string) {
   const response = await fetch(`${API_BASE}/api/v1/recommend/weekly`, {
     method: "POST",
     headers: {
       "Content-Type": "application/json",
+      ...(await authHeaders()),
     },
     body: JSON.stringify({
-      user_garments: userGarments,
+      ...wardrobePayload(wardrobe),
       skin_tone: skinTone,
     }),
   });
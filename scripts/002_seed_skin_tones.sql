@@ -1,27 +1,33 @@
 -- Seed skin tone palettes with Indonesian-focused color theory
+-- Fixed ids: the backend (app/db/palettes.py) returns them as skin_tone_id
 
-INSERT INTO skin_tone_palettes (name, hex_values, description) VALUES
+INSERT INTO skin_tone_palettes (id, name, hex_values, description) VALUES
 (
+  'ddc50012-b015-44da-8a44-c3ffc2ed26ab',
   'Warm Undertone',
   '{"primary": "#E8B4A8", "secondary": ["#D4A574", "#C99070", "#B8845C", "#A47548"], "accent": "#F5D4A3"}',
   'Golden, peachy, warm skin tones'
 ),
 (
+  '877c220f-cbce-48d8-bc38-548ee5e61800',
   'Cool Undertone',
   '{"primary": "#D4A0A0", "secondary": ["#C4949C", "#B488A0", "#A47CA8", "#9876B0"], "accent": "#E8C4D8"}',
   'Pink, rosy, cool skin tones'
 ),
 (
+  '1bf47018-1ceb-4254-9257-55645e6ae404',
   'Neutral Undertone',
   '{"primary": "#D4A890", "secondary": ["#C49C84", "#B89078", "#A8846C", "#987860"], "accent": "#E8C8A0"}',
   'Balanced, olive, neutral skin tones'
 ),
 (
+  'f38387ca-2c38-4598-a811-ebf64bf932c4',
   'Deep/Dark Skin Tone',
   '{"primary": "#6B4423", "secondary": ["#5C3817", "#4D2C0B", "#3E2000", "#2F1400"], "accent": "#8B6433"}',
   'Deep, dark, warm skin tones'
 ),
 (
+  '66db4592-f951-4d83-8536-a949ea7dd527',
   'Light/Fair Skin Tone',
   '{"primary": "#F5D4C4", "secondary": ["#E8C8B8", "#DBBCAC", "#CEB0A0", "#C1A494"], "accent": "#FDE8DC"}',
   'Light, fair, pale skin tones'
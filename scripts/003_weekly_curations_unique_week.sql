@@ -0,0 +1,6 @@
+-- One stored weekly plan per user and week (the backend upserts on this key)
+CREATE UNIQUE INDEX IF NOT EXISTS idx_weekly_curations_user_week
+  ON weekly_curations(user_id, week_of);
+
+CREATE POLICY "curations_update_own" ON weekly_curations FOR UPDATE
+  USING (auth.uid() = user_id);
@@ -0,0 +1,4 @@
+-- Perceptual hash of each scanned garment (16 hex digits, from the scan
+-- response's metadata.phash); the backend indexes these per user to flag
+-- near-duplicate scans
+ALTER TABLE garments ADD COLUMN IF NOT EXISTS phash TEXT;
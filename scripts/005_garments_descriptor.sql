@@ -0,0 +1,4 @@
+-- Color + shape descriptor of each scanned garment (base64 float32 vector,
+-- from the scan response's metadata.descriptor); the backend builds the
+-- /recommend/similar index from these
+ALTER TABLE garments ADD COLUMN IF NOT EXISTS descriptor TEXT;
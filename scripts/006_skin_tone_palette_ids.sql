@@ -0,0 +1,26 @@
+-- Give the seeded skin tone palettes the fixed ids of 002_seed_skin_tones.sql
+-- (databases seeded before they had ids got random ones) and repoint the
+-- profiles that already reference them
+
+BEGIN;
+
+CREATE TEMP TABLE fixed_palette_ids (id UUID, name TEXT) ON COMMIT DROP;
+INSERT INTO fixed_palette_ids (id, name) VALUES
+  ('ddc50012-b015-44da-8a44-c3ffc2ed26ab', 'Warm Undertone'),
+  ('877c220f-cbce-48d8-bc38-548ee5e61800', 'Cool Undertone'),
+  ('1bf47018-1ceb-4254-9257-55645e6ae404', 'Neutral Undertone'),
+  ('f38387ca-2c38-4598-a811-ebf64bf932c4', 'Deep/Dark Skin Tone'),
+  ('66db4592-f951-4d83-8536-a949ea7dd527', 'Light/Fair Skin Tone');
+
+UPDATE profiles
+SET skin_tone_id = fixed.id
+FROM skin_tone_palettes palette
+JOIN fixed_palette_ids fixed ON fixed.name = palette.name
+WHERE profiles.skin_tone_id = palette.id AND palette.id <> fixed.id;
+
+UPDATE skin_tone_palettes
+SET id = fixed.id
+FROM fixed_palette_ids fixed
+WHERE skin_tone_palettes.name = fixed.name AND skin_tone_palettes.id <> fixed.id;
+
+COMMIT;
@@ -0,0 +1,4 @@
+-- WebP renditions stored by the backend for each scanned garment
+-- ({"full": url, "gallery": url, "thumbnail": url}, the scan response's
+-- assets); file_url keeps the largest one
+ALTER TABLE garments ADD COLUMN IF NOT EXISTS assets JSONB;
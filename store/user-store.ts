@@ -17,6 +17,8 @@ export interface UserProfile {
 export interface Garment {
   id: string;
   file_url: string;
+  // Stored WebP renditions (scan response assets)
+  assets?: Partial<Record<"full" | "gallery" | "thumbnail", string>>;
   color_hex: string;
   measurements_json?: Record<string, any>;
   garment_type: string;